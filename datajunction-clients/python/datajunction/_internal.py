@@ -1,6 +1,7 @@
 """DataJunction base client setup."""
 
 # pylint: disable=redefined-outer-name, import-outside-toplevel, too-many-lines
+import json
 import logging
 import os
 import platform
@@ -18,6 +19,10 @@ except ImportError:  # pragma: no cover
         ),
         ImportWarning,
     )
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
 import requests
 from pydantic import BaseModel, Field
 from requests.adapters import CaseInsensitiveDict, HTTPAdapter
@@ -34,6 +39,8 @@ if TYPE_CHECKING:
     from datajunction.tags import Tag  # pragma: no cover
 
 DEFAULT_NAMESPACE = "default"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_QUERY_METADATA_KEY = b"djqs:query"
 _logger = logging.getLogger(__name__)
 
 
@@ -228,6 +235,45 @@ class DJClient:
                 )
         raise DJClientException("No data for query!")
 
+    @staticmethod
+    def data_request_headers() -> Dict[str, str]:
+        """
+        Headers for data requests, asking for results as an Arrow stream if pyarrow and
+        pandas are installed, since they can be turned into a dataframe without being
+        decoded row by row.
+        """
+        if pa is None or "pd" not in globals():
+            return {}
+        return {"Accept": f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.9"}
+
+    @staticmethod
+    def is_arrow_response(response: requests.Response) -> bool:
+        """
+        Whether the response holds results as an Arrow stream.
+        """
+        return response.headers.get("content-type", "").startswith(
+            ARROW_STREAM_MEDIA_TYPE,
+        )
+
+    @staticmethod
+    def read_arrow_results(content: bytes) -> Tuple[Dict[str, Any], "pa.Table"]:
+        """
+        Read results sent as an Arrow stream, returning the query they belong to along
+        with the table of results.
+        """
+        table = pa.ipc.open_stream(content).read_all()
+        metadata = table.schema.metadata or {}
+        if ARROW_QUERY_METADATA_KEY not in metadata:
+            raise DJClientException("No query found in the Arrow stream!")
+        return json.loads(metadata[ARROW_QUERY_METADATA_KEY]), table
+
+    @staticmethod
+    def process_arrow_results(table: "pa.Table") -> "pd.DataFrame":
+        """
+        Return a pandas dataframe of results read from an Arrow stream.
+        """
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
     #
     # Node methods
     #
@@ -239,6 +239,7 @@ class DJClient(_internal.DJClient):
             poll_interval = 1  # Initial polling interval in seconds
             job_state = models.QueryState.UNKNOWN
             results = None
+            table = None
             while job_state not in models.END_JOB_STATES:
                 progress_bar()  # pylint: disable=not-callable
                 response = self._session.get(
@@ -251,12 +252,16 @@ class DJClient(_internal.DJClient):
                         "engine_version": engine_version or self.engine_version,
                         "async_": async_,
                     },
+                    headers=self.data_request_headers(),
                 )
-                results = response.json()
 
                 # Raise errors if any
                 if not response.status_code < 400:
                     raise DJClientException(f"Error retrieving data: {response.text}")
+                if self.is_arrow_response(response):
+                    results, table = self.read_arrow_results(response.content)
+                else:
+                    results, table = response.json(), None
                 if results["state"] not in models.QueryState.list():
                     raise DJClientException(  # pragma: no cover
                         f"Query state {results['state']} is not a DJ-parseable query state!"
@@ -266,7 +271,7 @@ class DJClient(_internal.DJClient):
 
                 # Update the query state and print links if any
                 job_state = models.QueryState(results["state"])
-                if not printed_links and results["links"]:  # pragma: no cover
+                if not printed_links and results.get("links"):  # pragma: no cover
                     print(
                         "Links:\n"
                         + "\n".join([f"\t* {link}" for link in results["links"]]),
@@ -280,6 +285,8 @@ class DJClient(_internal.DJClient):
 
             # Return results if the job has finished
             if job_state == models.QueryState.FINISHED:
+                if table is not None:
+                    return self.process_arrow_results(table)
                 return self.process_results(results)
             if job_state == models.QueryState.CANCELED:  # pragma: no cover
                 raise DJClientException("Query execution was canceled!")
@@ -7,7 +7,7 @@ import os
 from http.client import HTTPException
 from pathlib import Path
 from typing import AsyncGenerator, Dict, Iterator, List, Optional
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock
 
 import pytest
 import pytest_asyncio
@@ -19,7 +19,7 @@ from datajunction_server.database.column import Column
 from datajunction_server.database.engine import Engine
 from datajunction_server.models.materialization import MaterializationInfo
 from datajunction_server.models.query import QueryCreate, QueryWithResults
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.typing import QueryState
 from datajunction_server.utils import (
     get_query_service_client,
@@ -115,14 +115,16 @@ async def session(
 
 
 @pytest.fixture
-def query_service_client(mocker: MockerFixture) -> Iterator[QueryServiceClient]:
+def query_service_client(
+    mocker: MockerFixture,
+) -> Iterator[AsyncQueryServiceClient]:
     """
     Custom settings for unit tests.
     """
-    qs_client = QueryServiceClient(uri="query_service:8001")
+    qs_client = AsyncQueryServiceClient(uri="query_service:8001")
     qs_client.query_state = QueryState.RUNNING  # type: ignore
 
-    def mock_get_columns_for_table(
+    async def mock_get_columns_for_table(
         catalog: str,
         schema: str,
         table: str,
@@ -139,7 +141,7 @@ def query_service_client(mocker: MockerFixture) -> Iterator[QueryServiceClient]:
         mock_get_columns_for_table,
     )
 
-    def mock_submit_query(
+    async def mock_submit_query(
         query_create: QueryCreate,
         request_headers: Optional[  # pylint: disable=unused-argument
             Dict[str, str]
@@ -164,8 +166,14 @@ def query_service_client(mocker: MockerFixture) -> Iterator[QueryServiceClient]:
         "submit_query",
         mock_submit_query,
     )
+    # The mocked query service only returns results as JSON
+    mocker.patch.object(
+        qs_client,
+        "submit_query_arrow",
+        mock_submit_query,
+    )
 
-    mock_materialize = MagicMock()
+    mock_materialize = AsyncMock()
     mock_materialize.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=["common.a", "common.b"],
@@ -176,7 +184,7 @@ def query_service_client(mocker: MockerFixture) -> Iterator[QueryServiceClient]:
         mock_materialize,
     )
 
-    mock_deactivate_materialization = MagicMock()
+    mock_deactivate_materialization = AsyncMock()
     mock_deactivate_materialization.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=[],
@@ -187,7 +195,7 @@ def query_service_client(mocker: MockerFixture) -> Iterator[QueryServiceClient]:
         mock_deactivate_materialization,
     )
 
-    mock_get_materialization_info = MagicMock()
+    mock_get_materialization_info = AsyncMock()
     mock_get_materialization_info.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=["common.a", "common.b"],
@@ -204,13 +212,13 @@ def query_service_client(mocker: MockerFixture) -> Iterator[QueryServiceClient]:
 def server(  # pylint: disable=too-many-statements
     session: AsyncSession,
     settings: Settings,
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
 ) -> Iterator[TestClient]:
     """
     Create a mock server for testing APIs that contains a mock query service.
     """
 
-    def get_query_service_client_override() -> QueryServiceClient:
+    def get_query_service_client_override() -> AsyncQueryServiceClient:
         return query_service_client
 
     async def get_session_override() -> AsyncSession:
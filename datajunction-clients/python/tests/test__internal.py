@@ -2,6 +2,7 @@
 Tests DJ client (internal) functionality.
 """
 
+import json
 from unittest.mock import MagicMock, call
 
 import pytest
@@ -90,3 +91,25 @@ class TestDJClient:  # pylint: disable=too-many-public-methods, protected-access
                 tag_name="foo",
             )
         assert "Boom!" in str(exc_info.value)
+
+    def test_read_arrow_results(self, client):
+        """
+        Check that results sent as an Arrow stream are read into a dataframe.
+        """
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({"num": [1, 2]}).replace_schema_metadata(
+            {"djqs:query": json.dumps({"state": "FINISHED", "results": []})},
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        results, table = client.read_arrow_results(sink.getvalue().to_pybytes())
+        assert results == {"state": "FINISHED", "results": []}
+        assert client.process_arrow_results(table)["num"].tolist() == [1, 2]
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, pa.schema([("num", pa.int64())])) as writer:
+            pass
+        with pytest.raises(DJClientException):
+            client.read_arrow_results(sink.getvalue().to_pybytes())
@@ -0,0 +1,27 @@
+"""Add pool_params field for engines
+
+Revision ID: 5c1e3b9d2a47
+Revises: f3407a1ec625
+Create Date: 2026-10-17 17:00:00.000000+00:00
+
+"""
+# pylint: disable=no-member, invalid-name, missing-function-docstring, unused-import, no-name-in-module
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c1e3b9d2a47"
+down_revision = "f3407a1ec625"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("engine", sa.Column("pool_params", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("engine", "pool_params")
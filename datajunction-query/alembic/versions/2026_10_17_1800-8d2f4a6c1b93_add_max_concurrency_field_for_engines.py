@@ -0,0 +1,27 @@
+"""Add max_concurrency field for engines
+
+Revision ID: 8d2f4a6c1b93
+Revises: 5c1e3b9d2a47
+Create Date: 2026-10-17 18:00:00.000000+00:00
+
+"""
+# pylint: disable=no-member, invalid-name, missing-function-docstring, unused-import, no-name-in-module
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8d2f4a6c1b93"
+down_revision = "5c1e3b9d2a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("engine", sa.Column("max_concurrency", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("engine", "max_concurrency")
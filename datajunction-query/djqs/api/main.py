@@ -17,6 +17,7 @@ from djqs import __version__
 from djqs.api import catalogs, engines, queries, tables
 from djqs.config import load_djqs_config
 from djqs.exceptions import DJException
+from djqs.scheduler import get_query_scheduler
 from djqs.utils import get_session, get_settings
 
 _logger = logging.getLogger(__name__)
@@ -28,13 +29,14 @@ session = next(get_session())
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # pylint: disable=W0621,W0613
     """
-    Load DJQS config on app startup
+    Load DJQS config on app startup, and stop running queries on shutdown
     """
     try:
         load_djqs_config(settings=settings, session=session)
     except Exception as e:  # pylint: disable=W0718,C0103
         _logger.warning("Could not load DJQS config: %s", e)
     yield
+    get_query_scheduler().shutdown()
 
 
 app = FastAPI(
@@ -1,28 +1,33 @@
 """
 Query related APIs.
 """
+import asyncio
 import json
 import logging
 import uuid
+from concurrent.futures import Future
 from http import HTTPStatus
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import msgpack
+import pyarrow as pa
 from accept_types import get_best_match
-from fastapi import (
-    APIRouter,
-    BackgroundTasks,
-    Body,
-    Depends,
-    Header,
-    HTTPException,
-    Request,
-    Response,
-)
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic.json import pydantic_encoder
 from sqlmodel import Session
 
 from djqs.config import Settings
-from djqs.engine import process_query
+from djqs.constants import (
+    ARROW_QUERY_METADATA_KEY,
+    ARROW_STREAM_MEDIA_TYPE,
+    QUERY_ID_HEADER,
+)
+from djqs.engine import (
+    cancel_scheduled_query,
+    schedule_query,
+    wait_for_query_state_change,
+)
 from djqs.models.query import (
     Query,
     QueryCreate,
@@ -33,11 +38,24 @@ from djqs.models.query import (
     decode_results,
     encode_results,
 )
+from djqs.results import (
+    get_page_links,
+    load_results,
+    load_results_table,
+    serialize_table,
+)
+from djqs.typing import END_JOB_STATES
 from djqs.utils import get_session, get_settings
 
 _logger = logging.getLogger(__name__)
 router = APIRouter(tags=["SQL Queries"])
 
+RESPONSE_MEDIA_TYPES = [
+    "application/json",
+    "application/msgpack",
+    ARROW_STREAM_MEDIA_TYPE,
+]
+
 
 @router.post(
     "/queries/",
@@ -45,8 +63,8 @@ router = APIRouter(tags=["SQL Queries"])
     status_code=HTTPStatus.OK,
     responses={
         200: {
-            "content": {"application/msgpack": {}},
-            "description": "Return results as JSON or msgpack",
+            "content": {"application/msgpack": {}, ARROW_STREAM_MEDIA_TYPE: {}},
+            "description": "Return results as JSON, msgpack or an Arrow stream",
         },
     },
     openapi_extra={
@@ -73,14 +91,16 @@ async def submit_query(  # pylint: disable=too-many-arguments
     settings: Settings = Depends(get_settings),
     request: Request,
     response: Response,
-    background_tasks: BackgroundTasks,
     body: Any = Body(...),
 ) -> QueryResults:
     """
     Run or schedule a query.
 
     This endpoint is different from others in that it accepts both JSON and msgpack, and
-    can also return JSON or msgpack, depending on HTTP headers.
+    can also return JSON, msgpack or an Arrow stream, depending on HTTP headers.
+
+    Queries run on a bounded pool of workers. When too many queries are waiting to run,
+    new ones are turned away with a 429 status, and should be submitted again later.
     """
     content_type = request.headers.get("content-type")
     if content_type == "application/json":
@@ -99,23 +119,29 @@ async def submit_query(  # pylint: disable=too-many-arguments
         )
     create_query = QueryCreate(**data)
 
-    query_with_results = save_query_and_run(
+    return_type = get_best_match(accept, RESPONSE_MEDIA_TYPES)
+    if not return_type:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_ACCEPTABLE,
+            detail=f"Client MUST accept: {', '.join(RESPONSE_MEDIA_TYPES)}",
+        )
+
+    query_with_results = await save_query_and_run(
         create_query,
         session,
         settings,
         response,
-        background_tasks,
         request.headers,
     )
 
-    return_type = get_best_match(accept, ["application/json", "application/msgpack"])
-    if not return_type:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_ACCEPTABLE,
-            detail="Client MUST accept: application/json, application/msgpack",
+    if return_type == ARROW_STREAM_MEDIA_TYPE:
+        content = await run_in_threadpool(
+            serialize_query_results,
+            settings,
+            query_with_results,
+            limit=settings.results_page_size,
         )
-
-    if return_type == "application/msgpack":
+    elif return_type == "application/msgpack":
         content = msgpack.packb(
             query_with_results.dict(by_alias=True),
             default=encode_results,
@@ -127,19 +153,46 @@ async def submit_query(  # pylint: disable=too-many-arguments
         content=content,
         media_type=return_type,
         status_code=response.status_code or HTTPStatus.OK,
+        headers={QUERY_ID_HEADER: str(query_with_results.id)},
     )
 
 
-def save_query_and_run(  # pylint: disable=R0913
+async def save_query_and_run(
     create_query: QueryCreate,
     session: Session,
     settings: Settings,
     response: Response,
-    background_tasks: BackgroundTasks,
     headers: Optional[Dict[str, str]] = None,
 ) -> QueryResults:
     """
-    Store a new query to the DB and run it.
+    Store a new query to the DB and schedule it to run.
+
+    Async queries are returned as soon as they're scheduled, otherwise the query is
+    returned with its results once it has run.
+    """
+    accepted, future = await run_in_threadpool(
+        save_query_and_schedule,
+        create_query,
+        session,
+        settings,
+        headers,
+    )
+    if accepted.async_:
+        response.status_code = HTTPStatus.CREATED
+        return accepted
+
+    return await asyncio.wrap_future(future)
+
+
+def save_query_and_schedule(
+    create_query: QueryCreate,
+    session: Session,
+    settings: Settings,
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[QueryResults, Future]:
+    """
+    Store a new query to the DB and schedule it to run, returning the accepted query
+    and the future of its results.
     """
     query = Query(**create_query.dict(by_alias=True))
     query.state = QueryState.ACCEPTED
@@ -148,39 +201,70 @@ def save_query_and_run(  # pylint: disable=R0913
     session.commit()
     session.refresh(query)
 
-    if query.async_:
-        background_tasks.add_task(process_query, session, settings, query, headers)
-
-        response.status_code = HTTPStatus.CREATED
-        return QueryResults(results=[], errors=[], **query.dict())
-
-    return process_query(session, settings, query, headers)
+    accepted = QueryResults(results=[], errors=[], **query.dict())
+    return accepted, schedule_query(session, settings, query, create_query, headers)
 
 
 def load_query_results(
     settings: Settings,
     key: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
 ) -> List[StatementResults]:
     """
     Load results from backend, if available.
 
-    If ``paginate`` is true we also load the results into the cache, anticipating more
-    paginated queries.
+    Only the chunks of results holding the requested page of rows are read.
     """
-    if settings.results_backend.has(key):
-        _logger.info("Reading results from results backend")
-        cached = settings.results_backend.get(key)
-        query_results = json.loads(cached)
-    else:
-        _logger.warning("No results found")
-        query_results = []
+    return load_results(settings.results_backend, key, offset=offset, limit=limit)
+
+
+def serialize_query_results(
+    settings: Settings,
+    query_results: QueryResults,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> bytes:
+    """
+    Serialize a page of a query's results as an Arrow stream, read straight from the
+    stored chunks. The query itself, without the rows, is kept in the schema metadata.
 
-    return query_results
+    Only the rows of the first statement are included, since a stream has one schema.
+    """
+    table = load_results_table(
+        settings.results_backend,
+        str(query_results.id),
+        offset=offset,
+        limit=limit,
+    )
+    if table is None:
+        table = pa.table({})
+    metadata = query_results.dict(by_alias=True)
+    for statement in metadata["results"]:
+        statement["rows"] = []
+    return serialize_table(
+        table,
+        {ARROW_QUERY_METADATA_KEY: json.dumps(metadata, default=pydantic_encoder)},
+    )
 
 
-@router.get("/queries/{query_id}/", response_model=QueryResults)
-def read_query(
+@router.get(
+    "/queries/{query_id}/",
+    response_model=QueryResults,
+    responses={
+        200: {
+            "content": {ARROW_STREAM_MEDIA_TYPE: {}},
+            "description": "Return results as JSON or an Arrow stream",
+        },
+    },
+)
+async def read_query(  # pylint: disable=too-many-arguments
     query_id: uuid.UUID,
+    state: Optional[QueryState] = None,
+    timeout: float = 0.0,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    accept: Optional[str] = Header(None),
     *,
     session: Session = Depends(get_session),
     settings: Settings = Depends(get_settings),
@@ -188,18 +272,152 @@ def read_query(
     """
     Fetch information about a query.
 
-    For paginated queries we move the data from the results backend to the cache for a
-    short period, anticipating additional requests.
+    If ``state`` is given, the request is held for up to ``timeout`` seconds until the
+    query leaves that state (long polling), so that clients watching a query get told
+    about state changes without having to keep polling for them. Held requests don't
+    tie up a worker thread or a database connection while they wait.
+
+    Results can be paginated with ``offset`` and ``limit``, which apply to the rows of
+    each statement. The ``previous`` and ``next`` links point to the neighbouring pages.
+
+    Clients that prefer ``application/vnd.apache.arrow.stream`` get the results as an
+    Arrow stream instead.
+    """
+    if offset < 0 or (limit is not None and limit <= 0):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail="Offset must not be negative and limit must be positive",
+        )
+    if state is not None and timeout > 0:
+        await wait_for_query_state_change(
+            session,
+            query_id,
+            state,
+            timeout=min(timeout, settings.query_state_max_wait),
+            poll_interval=settings.query_state_poll_interval,
+        )
+    return await run_in_threadpool(
+        get_query_with_results,
+        query_id,
+        offset,
+        limit,
+        accept,
+        session,
+        settings,
+    )
+
+
+def get_query_with_results(  # pylint: disable=too-many-arguments
+    query_id: uuid.UUID,
+    offset: int,
+    limit: Optional[int],
+    accept: Optional[str],
+    session: Session,
+    settings: Settings,
+) -> QueryResults:
+    """
+    Get a query along with a page of its results, as JSON or as an Arrow stream.
     """
-    query = session.get(Query, query_id)
+    query = session.get(Query, query_id, populate_existing=True)
     if not query:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Query not found")
 
-    query_results = load_query_results(settings, str(query_id))
-
-    prev = next_ = None
+    arrow = (
+        accept is not None
+        and get_best_match(accept, ["application/json", ARROW_STREAM_MEDIA_TYPE])
+        == ARROW_STREAM_MEDIA_TYPE
+    )
+    # Arrow responses are read from the stored chunks as they are, so only the row
+    # counts are needed here
+    query_results = load_query_results(
+        settings,
+        str(query_id),
+        offset,
+        0 if arrow else limit,
+    )
+    prev, next_ = get_page_links(
+        settings.url,
+        str(query_id),
+        query_results,
+        offset=offset,
+        limit=limit,
+    )
     results = Results(__root__=query_results)
 
-    return QueryResults(
+    query_with_results = QueryResults(
         results=results, next=next_, previous=prev, errors=[], **query.dict()
     )
+    if arrow:
+        return Response(
+            content=serialize_query_results(
+                settings,
+                query_with_results,
+                offset=offset,
+                limit=limit,
+            ),
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers={QUERY_ID_HEADER: str(query_id)},
+        )
+    return query_with_results
+
+
+@router.post(
+    "/queries/{query_id}/cancel/",
+    response_model=QueryResults,
+    responses={
+        202: {"description": "The query is being canceled"},
+        409: {"description": "The query has already ended"},
+    },
+)
+async def cancel_query(  # pylint: disable=too-many-arguments
+    query_id: uuid.UUID,
+    timeout: float = 5.0,
+    *,
+    session: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+    response: Response,
+) -> QueryResults:
+    """
+    Cancel a query.
+
+    Queries waiting to run are canceled right away. Running queries have their running
+    statement interrupted, and the request waits up to ``timeout`` seconds for them to
+    end. If they're still running by then the response has a 202 status, and the query
+    ends up canceled once its results stop being fetched.
+    """
+    query = await run_in_threadpool(
+        session.get,
+        Query,
+        query_id,
+        populate_existing=True,
+    )
+    if not query:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Query not found")
+    if query.state in END_JOB_STATES:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail=f"Query has already ended ({query.state})",
+        )
+
+    ended = await run_in_threadpool(cancel_scheduled_query, session, query)
+    if not ended and timeout > 0:
+        await wait_for_query_state_change(
+            session,
+            query_id,
+            QueryState.RUNNING,
+            timeout=min(timeout, settings.query_state_max_wait),
+            poll_interval=settings.query_state_poll_interval,
+        )
+        query = (
+            await run_in_threadpool(
+                session.get,
+                Query,
+                query_id,
+                populate_existing=True,
+            )
+            or query
+        )
+    if query.state not in END_JOB_STATES:
+        response.status_code = HTTPStatus.ACCEPTED
+
+    return QueryResults(results=[], errors=[], **query.dict())
@@ -16,6 +16,7 @@ from sqlmodel import Session, delete, select
 from djqs.exceptions import DJException
 from djqs.models.catalog import Catalog, CatalogEngines
 from djqs.models.engine import Engine
+from djqs.pools import get_engine_pools
 
 
 class Settings(BaseSettings):  # pylint: disable=too-few-public-methods
@@ -39,6 +40,11 @@ class Settings(BaseSettings):  # pylint: disable=too-few-public-methods
     # Where to store the results from queries.
     results_backend: BaseCache = FileSystemCache("/tmp/djqs", default_timeout=0)
 
+    # How many rows of a query's results to store together, and how many to return with
+    # the response when running a query synchronously (the rest are read page by page)
+    results_chunk_size: int = 10000
+    results_page_size: int = 10000
+
     paginating_timeout: timedelta = timedelta(minutes=5)
 
     # How long to wait when pinging databases to find out the fastest online database.
@@ -50,6 +56,33 @@ class Settings(BaseSettings):  # pylint: disable=too-few-public-methods
     # Enable setting catalog and engine config via REST API calls
     enable_dynamic_config: bool = True
 
+    # The longest a request may wait for a query's state to change (in seconds), and how
+    # often waiting requests check for changes made by other processes
+    query_state_max_wait: float = 60.0
+    query_state_poll_interval: float = 1.0
+
+    # Defaults for the connection pools of the query engines, which engines can override
+    # with their ``pool_params``: how many connections to keep open and how many more to
+    # open when they're all in use, whether to check connections before using them, how
+    # old connections get before they're replaced (in seconds, -1 for never), and how
+    # long a pool can go unused before it's closed
+    engine_pool_size: int = 5
+    engine_pool_max_overflow: int = 10
+    engine_pool_pre_ping: bool = True
+    engine_pool_recycle: int = -1
+    engine_pool_idle_timeout: timedelta = timedelta(minutes=30)
+
+    # How many queries run at once, and how many more can wait to run before new queries
+    # are turned away. Engines can limit how many of the running queries are theirs with
+    # ``max_concurrency``
+    query_workers: int = 8
+    query_queue_size: int = 100
+
+    # How long queries can run for (in seconds) unless they ask for a timeout of their
+    # own, which can't be longer than the maximum (None for no limit)
+    query_timeout: Optional[float] = None
+    query_max_timeout: Optional[float] = None
+
 
 def load_djqs_config(settings: Settings, session: Session) -> None:  # pragma: no cover
     """
@@ -59,6 +92,9 @@ def load_djqs_config(settings: Settings, session: Session) -> None:  # pragma: n
     if not config_file:
         return
 
+    # Connections to the engines as they were configured before are no longer needed
+    get_engine_pools().dispose()
+
     session.exec(delete(Catalog))
     session.exec(delete(Engine))
     session.exec(delete(CatalogEngines))
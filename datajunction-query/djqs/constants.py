@@ -18,3 +18,9 @@ GET_COLUMNS_TIMEOUT = timedelta(seconds=60)
 
 # Request header configuration params
 SQLALCHEMY_URI = "SQLALCHEMY_URI"
+
+# Media type of results in the Arrow IPC stream format, and the schema metadata key under
+# which the query they belong to is sent along with them
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_QUERY_METADATA_KEY = "djqs:query"
+QUERY_ID_HEADER = "X-DJ-Query-Id"
@@ -1,32 +1,65 @@
 """
 Query related functions.
 """
+import asyncio
+import json
 import logging
-import os
+import threading
+from concurrent.futures import Future
+from contextlib import closing
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
 
 import duckdb
 import snowflake.connector
 import sqlparse
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from sqlalchemy.engine import CursorResult
 from sqlmodel import Session, select
 
 from djqs.config import Settings
 from djqs.constants import SQLALCHEMY_URI
+from djqs.exceptions import DJQueryQueueFullException
 from djqs.models.engine import Engine, EngineType
 from djqs.models.query import (
     ColumnMetadata,
     Query,
+    QueryCreate,
     QueryResults,
     QueryState,
     Results,
-    StatementResults,
 )
-from djqs.typing import ColumnType, Description, SQLADialect, Stream, TypeEnum
+from djqs.pools import get_engine_pools
+from djqs.results import (
+    get_page_links,
+    load_results,
+    rows_to_record_batch,
+    store_results,
+)
+from djqs.scheduler import (
+    QueryJob,
+    cancellable,
+    get_query_scheduler,
+    interrupt_connection,
+)
+from djqs.typing import (
+    END_JOB_STATES,
+    Batches,
+    ColumnType,
+    Description,
+    SQLADialect,
+    TypeEnum,
+)
 
 _logger = logging.getLogger(__name__)
 
+# The requests waiting for query states to change, along with their event loops, which
+# are woken whenever a query's state changes in this process
+_query_state_waiters: Dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+_query_state_waiters_lock = threading.Lock()
+
 
 def get_columns_from_description(
     description: Description,
@@ -68,14 +101,23 @@ def get_columns_from_description(
 
 def run_query(  # pylint: disable=R0914
     session: Session,
+    settings: Settings,
     query: Query,
     headers: Optional[Dict[str, str]] = None,
-) -> List[Tuple[str, List[ColumnMetadata], Stream]]:
+    job: Optional[QueryJob] = None,
+) -> Iterator[Tuple[str, List[ColumnMetadata], Batches]]:
     """
-    Run a query and return its results.
+    Run a query and yield its results.
+
+    For each statement we yield a tuple with the statement SQL, a description of the
+    columns (name and type) and a stream of Arrow record batches, which is fetched from
+    the engine as it's consumed, and should be consumed before moving on to the next
+    statement. Batches are fetched natively where the driver supports it. Connections
+    to the engine come from its pool, and are returned to it once all of the statements
+    have been consumed. The pool is kept open until then.
 
-    For each statement we return a tuple with the statement SQL, a description of the
-    columns (name and type) and a stream of rows (tuples).
+    If the query is run as a scheduled ``job``, canceling the job interrupts the
+    statement running on the connection.
     """
 
     _logger.info("Running query on catalog %s", query.catalog_name)
@@ -87,93 +129,155 @@ def run_query(  # pylint: disable=R0914
     ).one()
 
     query_server = headers.get("SQLALCHEMY_URI") if headers else None
+    engine_pools = get_engine_pools()
 
     if query_server:
         _logger.info(
-            "Creating sqlalchemy engine using request header param %s",
+            "Using sqlalchemy engine from request header param %s",
             SQLALCHEMY_URI,
         )
-        sqla_engine = create_engine(query_server)
+        pooled_engine = engine_pools.sqlalchemy_engine(engine, settings, query_server)
     elif engine.type == EngineType.DUCKDB:
-        _logger.info("Creating duckdb connection")
-        conn = (
-            duckdb.connect()
-            if engine.uri == "duckdb:///:memory:"
-            else duckdb.connect(
-                database=engine.extra_params["location"],
-                read_only=True,
-            )
-        )
-        return run_duckdb_query(query, conn)
+        _logger.info("Using duckdb connection")
+        with engine_pools.duckdb_connection(engine, settings) as duckdb_conn, closing(
+            duckdb_conn.cursor(),
+        ) as conn:
+            if job:
+                job.on_cancel(conn.interrupt)
+            yield from run_duckdb_query(query, conn, settings.results_chunk_size)
+        return
     elif engine.type == EngineType.SNOWFLAKE:
-        _logger.info("Creating snowflake connection")
-        conn = snowflake.connector.connect(
-            **engine.extra_params,
-            password=os.getenv("SNOWSQL_PWD"),
+        _logger.info("Using snowflake connection")
+        with engine_pools.snowflake_pool(engine, settings) as pool, closing(
+            pool.connect(),
+        ) as conn:
+            cursor = conn.cursor()
+            if job:
+                job.on_cancel(partial(cancel_snowflake_query, cursor))
+            yield from run_snowflake_query(
+                query,
+                cursor,
+                settings.results_chunk_size,
+            )
+        return
+    else:
+        _logger.info(
+            "Using sqlalchemy engine from engine name and version defined on query",
         )
-        cur = conn.cursor()
+        pooled_engine = engine_pools.sqlalchemy_engine(engine, settings)
 
-        return run_snowflake_query(query, cur)
+    statements = sqlparse.parse(query.executed_query)
+    with pooled_engine as sqla_engine, sqla_engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        if job:
+            job.on_cancel(
+                partial(interrupt_connection, connection.connection.dbapi_connection),
+            )
+        for statement in statements:
+            # Druid doesn't like statements that end in a semicolon...
+            sql = str(statement).strip().rstrip(";")
+
+            results = connection.execute(text(sql))
+            columns = get_columns_from_description(
+                results.cursor.description,
+                sqla_engine.dialect,
+            )
+            batches = fetch_result_batches(results, settings.results_chunk_size)
+            yield sql, columns, batches
 
-    _logger.info(
-        "Creating sqlalchemy engine using engine name and version defined on query",
-    )
-    sqla_engine = create_engine(engine.uri, connect_args=engine.extra_params)
-    connection = sqla_engine.connect()
 
-    output: List[Tuple[str, List[ColumnMetadata], Stream]] = []
-    statements = sqlparse.parse(query.executed_query)
-    for statement in statements:
-        # Druid doesn't like statements that end in a semicolon...
-        sql = str(statement).strip().rstrip(";")
-
-        results = connection.execute(text(sql))
-        stream = (tuple(row) for row in results)
-        columns = get_columns_from_description(
-            results.cursor.description,
-            sqla_engine.dialect,
-        )
-        output.append((sql, columns, stream))
+def fetch_result_batches(results: CursorResult, batch_size: int) -> Batches:
+    """
+    Stream the rows of a SQLAlchemy result as record batches, with the types of the
+    first batch.
+    """
+    if not results.returns_rows:
+        return
+    names = list(results.keys())
+    schema = None
+    for rows in results.partitions(batch_size):
+        batch = rows_to_record_batch(rows, names, schema)
+        schema = schema or batch.schema
+        yield batch
 
-    return output
+
+def fetch_cursor_batches(cursor: Any, batch_size: int) -> Batches:
+    """
+    Stream the rows of an executed DB API cursor as record batches, with the types of
+    the first batch.
+    """
+    names = [column[0] for column in cursor.description or []]
+    schema = None
+    while rows := cursor.fetchmany(batch_size):
+        batch = rows_to_record_batch(rows, names, schema)
+        schema = schema or batch.schema
+        yield batch
+
+
+def fetch_snowflake_batches(
+    cursor: snowflake.connector.cursor.SnowflakeCursor,
+    batch_size: int,
+) -> Batches:
+    """
+    Stream the results of a snowflake query as record batches, fetching them in the
+    Arrow format unless the results aren't available in it.
+    """
+    try:
+        tables = cursor.fetch_arrow_batches()
+    except snowflake.connector.errors.NotSupportedError:
+        yield from fetch_cursor_batches(cursor, batch_size)
+        return
+    for table in tables:
+        yield from table.to_batches()
+
+
+def cancel_snowflake_query(cursor: snowflake.connector.cursor.SnowflakeCursor) -> None:
+    """
+    Cancel the query running on a snowflake cursor, if it has started.
+    """
+    if cursor.sfqid:
+        cursor.abort_query(cursor.sfqid)
 
 
 def run_duckdb_query(
     query: Query,
     conn: duckdb.DuckDBPyConnection,
-) -> List[Tuple[str, List[ColumnMetadata], Stream]]:
+    batch_size: int,
+) -> Iterator[Tuple[str, List[ColumnMetadata], Batches]]:
     """
     Run a duckdb query against the local duckdb database
     """
-    output: List[Tuple[str, List[ColumnMetadata], Stream]] = []
-    rows = conn.execute(query.submitted_query).fetchall()
+    cursor = conn.execute(query.submitted_query)
     columns: List[ColumnMetadata] = []
-    output.append((query.submitted_query, columns, rows))
-    return output
+    yield query.submitted_query, columns, iter(cursor.fetch_record_batch(batch_size))
 
 
 def run_snowflake_query(
     query: Query,
     cur: snowflake.connector.cursor.SnowflakeCursor,
-) -> List[Tuple[str, List[ColumnMetadata], Stream]]:
+    batch_size: int,
+) -> Iterator[Tuple[str, List[ColumnMetadata], Batches]]:
     """
     Run a query against a snowflake warehouse
     """
-    output: List[Tuple[str, List[ColumnMetadata], Stream]] = []
-    rows = cur.execute(query.submitted_query).fetchall()
+    cursor = cur.execute(query.submitted_query)
     columns: List[ColumnMetadata] = []
-    output.append((query.submitted_query, columns, rows))
-    return output
+    yield query.submitted_query, columns, fetch_snowflake_batches(cursor, batch_size)
 
 
-def process_query(
+def process_query(  # pylint: disable=too-many-arguments
     session: Session,
     settings: Settings,
     query: Query,
     headers: Optional[Dict[str, str]] = None,
+    job: Optional[QueryJob] = None,
 ) -> QueryResults:
     """
     Process a query.
+
+    Queries run as a scheduled ``job`` are marked as running while they run, so that
+    they can be canceled, and end up canceled or failed if the job is canceled or times
+    out.
     """
     query.scheduled = datetime.now(timezone.utc)
     query.state = QueryState.SCHEDULED
@@ -182,29 +286,38 @@ def process_query(
     errors = []
     query.started = datetime.now(timezone.utc)
     try:
-        root = []
-        for sql, columns, stream in run_query(
+        statements = run_query(
             session=session,
+            settings=settings,
             query=query,
             headers=headers,
-        ):
-            rows = list(stream)
-            root.append(
-                StatementResults(
-                    sql=sql,
-                    columns=columns,
-                    rows=rows,
-                    row_count=len(rows),
-                ),
-            )
-        results = Results(__root__=root)
+            job=job,
+        )
+        if job:
+            job.check_canceled()
+            query.state = QueryState.RUNNING
+            session.add(query)
+            session.commit()
+            notify_query_state_changed()
+            statements = cancellable(statements, job)
+
+        stored = store_results(
+            settings.results_backend,
+            str(query.id),
+            statements,
+            settings.results_chunk_size,
+        )
 
         query.state = QueryState.FINISHED
         query.progress = 1.0
     except Exception as ex:  # pylint: disable=broad-except
-        results = Results(__root__=[])
-        query.state = QueryState.FAILED
-        errors = [str(ex)]
+        stored = []
+        if job and job.canceled:
+            query.state = job.canceled_state or QueryState.CANCELED
+            errors = [str(job.canceled_error)]
+        else:
+            query.state = QueryState.FAILED
+            errors = [str(ex)]
 
     query.finished = datetime.now(timezone.utc)
 
@@ -212,6 +325,174 @@ def process_query(
     session.commit()
     session.refresh(query)
 
-    settings.results_backend.add(str(query.id), results.json())
+    settings.results_backend.add(
+        str(query.id),
+        json.dumps([statement.dict() for statement in stored]),
+    )
+    notify_query_state_changed()
+
+    # Async queries are returned before they run, so their results are only read when
+    # they're asked for
+    results = (
+        []
+        if query.async_
+        else load_results(
+            settings.results_backend,
+            str(query.id),
+            limit=settings.results_page_size,
+        )
+    )
+    prev, next_ = get_page_links(
+        settings.url,
+        str(query.id),
+        results,
+        limit=settings.results_page_size,
+    )
+    return QueryResults(
+        results=Results(__root__=results),
+        next=next_,
+        previous=prev,
+        errors=errors,
+        **query.dict(),
+    )
+
+
+def schedule_query(
+    session: Session,
+    settings: Settings,
+    query: Query,
+    create_query: QueryCreate,
+    headers: Optional[Dict[str, str]] = None,
+) -> Future:
+    """
+    Queue a stored query to run on the query workers, returning the future of its
+    results. If too many queries are already waiting to run the query is removed, and
+    ``DJQueryQueueFullException`` is raised.
+
+    Queries run with a session of their own, since the request they came from may be
+    over by the time they run.
+    """
+    engine = session.exec(
+        select(Engine)
+        .where(Engine.name == query.engine_name)
+        .where(Engine.version == query.engine_version),
+    ).one_or_none()
+    timeout = create_query.timeout or settings.query_timeout
+    if settings.query_max_timeout:
+        timeout = min(timeout or settings.query_max_timeout, settings.query_max_timeout)
+
+    bind = session.get_bind()
+    query_id = query.id
+
+    def run(job: QueryJob) -> QueryResults:
+        with Session(bind, autoflush=False) as job_session:
+            return process_query(
+                job_session,
+                settings,
+                job_session.get(Query, query_id),
+                headers,
+                job,
+            )
+
+    job = QueryJob(
+        query_id=query_id,
+        engine=(query.engine_name, query.engine_version),
+        run=run,
+        priority=create_query.priority,
+        timeout=timeout,
+        max_concurrency=engine.max_concurrency if engine else None,
+    )
+    try:
+        return get_query_scheduler().submit(job)
+    except DJQueryQueueFullException:
+        session.delete(query)
+        session.commit()
+        raise
+
+
+def cancel_scheduled_query(session: Session, query: Query) -> bool:
+    """
+    Cancel a query that hasn't ended, returning whether it has ended by now.
+
+    Queries waiting to run end right away, while running queries have their statements
+    interrupted and end once their worker notices. Queries that aren't known to the
+    workers of this process, like the ones left behind when it restarted, are marked
+    as canceled.
+    """
+    if get_query_scheduler().cancel(query.id):
+        session.refresh(query)
+        return query.state in END_JOB_STATES
+
+    query.state = QueryState.CANCELED
+    query.finished = datetime.now(timezone.utc)
+    session.add(query)
+    session.commit()
+    session.refresh(query)
+    notify_query_state_changed()
+    return True
+
+
+def notify_query_state_changed() -> None:
+    """
+    Wake up the requests waiting for query states to change.
+    """
+    with _query_state_waiters_lock:
+        waiters = list(_query_state_waiters.items())
+    for changed, loop in waiters:
+        try:
+            loop.call_soon_threadsafe(changed.set)
+        except RuntimeError:  # pragma: no cover
+            # The loop has been closed
+            pass
+
+
+def get_query_state(session: Session, query_id: UUID) -> Optional[QueryState]:
+    """
+    Get the state of a query, if it exists. The transaction is ended right away, so
+    that the session doesn't hold on to a connection in between checks.
+    """
+    query = session.get(Query, query_id, populate_existing=True)
+    state = query.state if query else None
+    session.commit()
+    return state
+
+
+async def wait_for_query_state_change(  # pylint: disable=too-many-arguments
+    session: Session,
+    query_id: UUID,
+    state: QueryState,
+    timeout: float,
+    poll_interval: float,
+) -> None:
+    """
+    Wait up to ``timeout`` seconds for a query to leave the given state.
 
-    return QueryResults(results=results, errors=errors, **query.dict())
+    The wait doesn't hold up a worker thread: changes made in this process wake it right
+    away, and changes made by other processes are picked up by checking the metadata
+    database every ``poll_interval`` seconds, in the default executor.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    changed = asyncio.Event()
+    with _query_state_waiters_lock:
+        _query_state_waiters[changed] = loop
+    try:
+        while True:
+            # Cleared before checking, so that changes made while checking aren't missed
+            changed.clear()
+            current = await loop.run_in_executor(
+                None,
+                get_query_state,
+                session,
+                query_id,
+            )
+            remaining = deadline - loop.time()
+            if current != state or remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), min(remaining, poll_interval))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        with _query_state_waiters_lock:
+            del _query_state_waiters[changed]
@@ -218,3 +218,12 @@ class DJTableNotFound(DJException):
     """
     Raised for tables that cannot be found
     """
+
+
+class DJQueryQueueFullException(DJException):
+    """
+    Exception raised when too many queries are waiting to run to accept another one.
+    """
+
+    dbapi_exception: DBAPIExceptions = "OperationalError"
+    http_status_code: int = 429
@@ -29,6 +29,8 @@ class Engine(SQLModel, table=True):  # type: ignore
     version: str
     uri: Optional[str]
     extra_params: Dict = Field(default={}, sa_column=SqlaColumn(JSON))
+    pool_params: Dict = Field(default={}, sa_column=SqlaColumn(JSON))
+    max_concurrency: Optional[int] = None
 
 
 class BaseEngineInfo(SQLModel):
@@ -56,10 +56,15 @@ class Query(BaseQuery, table=True):  # type: ignore
 class QueryCreate(BaseQuery):
     """
     Model for submitted queries.
+
+    Queries with a higher ``priority`` run before others waiting to run, and queries
+    running for longer than ``timeout`` seconds fail.
     """
 
     submitted_query: str
     async_: bool = False
+    priority: int = 0
+    timeout: Optional[float] = None
 
 
 class ColumnMetadata(SQLModel):
@@ -86,6 +91,20 @@ class StatementResults(SQLModel):
     row_count: int = 0
 
 
+class StoredStatementResults(SQLModel):
+    """
+    Results for a given statement, as stored in the results backend.
+
+    The rows are stored separately, in ``chunk_count`` chunks of ``chunk_size`` rows.
+    """
+
+    sql: str
+    columns: List[ColumnMetadata]
+    row_count: int = 0
+    chunk_size: int
+    chunk_count: int = 0
+
+
 class Results(SQLModel):
     """
     Results for a given query.
@@ -0,0 +1,275 @@
+"""
+Pools of connections to the query engines, shared by all the queries run against them.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import duckdb
+import snowflake.connector
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine as SQLAEngine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.pool import Pool, QueuePool
+
+from djqs.models.engine import Engine
+
+if TYPE_CHECKING:
+    from djqs.config import Settings
+
+_logger = logging.getLogger(__name__)
+
+# Pools are kept per engine name, version and URI
+PoolKey = Tuple[str, str, Optional[str]]
+
+
+class PoolParams(NamedTuple):
+    """
+    How to pool the connections to an engine.
+
+    Up to ``pool_size`` connections are kept open, and up to ``max_overflow`` more are
+    opened when they're all in use. Connections are checked before use if ``pre_ping``
+    is set, and replaced once they're ``recycle`` seconds old (-1 never replaces them).
+    Pools that haven't been used for ``idle_timeout`` are closed.
+    """
+
+    pool_size: int
+    max_overflow: int
+    pre_ping: bool
+    recycle: int
+    idle_timeout: timedelta
+
+    @classmethod
+    def from_engine(cls, engine: Engine, settings: "Settings") -> "PoolParams":
+        """
+        The pool params for an engine, which override the defaults from the settings.
+        """
+        pool_params = engine.pool_params or {}
+        return cls(
+            pool_size=pool_params.get("pool_size", settings.engine_pool_size),
+            max_overflow=pool_params.get(
+                "max_overflow",
+                settings.engine_pool_max_overflow,
+            ),
+            pre_ping=pool_params.get("pre_ping", settings.engine_pool_pre_ping),
+            recycle=pool_params.get("recycle", settings.engine_pool_recycle),
+            idle_timeout=timedelta(seconds=pool_params["idle_timeout"])
+            if "idle_timeout" in pool_params
+            else settings.engine_pool_idle_timeout,
+        )
+
+
+class PooledEngine:  # pylint: disable=too-few-public-methods
+    """
+    A pool of connections to an engine, along with when it was last used and how many
+    queries are using it. Pools that are closed while queries are using them are only
+    retired, and closed once the last of those queries is done.
+    """
+
+    def __init__(
+        self,
+        pool: Any,
+        dispose: Callable[[], None],
+        idle_timeout: timedelta,
+    ):
+        self.pool = pool
+        self.dispose = dispose
+        self.idle_timeout = idle_timeout
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self.retired = False
+
+    def is_idle(self, now: float) -> bool:
+        """
+        Whether the pool isn't in use and hasn't been for longer than its idle timeout.
+        """
+        return (
+            not self.in_use and now - self.last_used > self.idle_timeout.total_seconds()
+        )
+
+
+class EnginePools:
+    """
+    The connection pools of the query engines, so that queries reuse connections
+    instead of connecting to an engine every time.
+    """
+
+    def __init__(self):
+        self._pools: Dict[PoolKey, PooledEngine] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(
+        self,
+        key: PoolKey,
+        create: Callable[[], PooledEngine],
+    ) -> Iterator[Any]:
+        """
+        Use the pool for a key, creating it if there isn't one yet. The pool is kept
+        open until it's no longer in use. Pools that have gone idle are closed along
+        the way.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for idle_key in [
+                key_ for key_, pooled in self._pools.items() if pooled.is_idle(now)
+            ]:
+                _logger.info("Closing idle connection pool for %s", idle_key[:2])
+                self._pools.pop(idle_key).dispose()
+
+            pooled = self._pools.get(key)
+            if pooled is None:
+                _logger.info("Creating connection pool for %s", key[:2])
+                pooled = self._pools[key] = create()
+            pooled.in_use += 1
+            pooled.last_used = now
+        try:
+            yield pooled.pool
+        finally:
+            with self._lock:
+                pooled.in_use -= 1
+                pooled.last_used = time.monotonic()
+                if pooled.retired and not pooled.in_use:
+                    _logger.info("Closing retired connection pool for %s", key[:2])
+                    pooled.dispose()
+
+    def sqlalchemy_engine(
+        self,
+        engine: Engine,
+        settings: "Settings",
+        uri: Optional[str] = None,
+    ) -> ContextManager[SQLAEngine]:
+        """
+        Use the pooled SQLAlchemy engine for an engine, or for a URI that overrides the
+        engine's own.
+        """
+        params = PoolParams.from_engine(engine, settings)
+        uri = uri or engine.uri
+        connect_args = {} if uri != engine.uri else engine.extra_params
+
+        def create() -> PooledEngine:
+            kwargs: Dict[str, Any] = {}
+            url = make_url(uri)
+            if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+                kwargs.update(
+                    pool_size=params.pool_size,
+                    max_overflow=params.max_overflow,
+                )
+            sqla_engine = create_engine(
+                uri,
+                connect_args=connect_args,
+                pool_pre_ping=params.pre_ping,
+                pool_recycle=params.recycle,
+                **kwargs,
+            )
+            return PooledEngine(sqla_engine, sqla_engine.dispose, params.idle_timeout)
+
+        return self.checkout((engine.name, engine.version, uri), create)
+
+    def duckdb_connection(
+        self,
+        engine: Engine,
+        settings: "Settings",
+    ) -> ContextManager[duckdb.DuckDBPyConnection]:
+        """
+        Use the shared connection to a duckdb database. Queries should run on their own
+        cursor from it, since a duckdb connection can't be used by many threads at once.
+        """
+        params = PoolParams.from_engine(engine, settings)
+
+        def create() -> PooledEngine:
+            conn = (
+                duckdb.connect()
+                if engine.uri == "duckdb:///:memory:"
+                else duckdb.connect(
+                    database=engine.extra_params["location"],
+                    read_only=True,
+                )
+            )
+            return PooledEngine(conn, conn.close, params.idle_timeout)
+
+        return self.checkout((engine.name, engine.version, engine.uri), create)
+
+    def snowflake_pool(
+        self,
+        engine: Engine,
+        settings: "Settings",
+    ) -> ContextManager[Pool]:
+        """
+        Use the pool of connections to a snowflake warehouse.
+        """
+        params = PoolParams.from_engine(engine, settings)
+
+        def create() -> PooledEngine:
+            pool = QueuePool(
+                lambda: snowflake.connector.connect(
+                    **engine.extra_params,
+                    password=os.getenv("SNOWSQL_PWD"),
+                ),
+                pool_size=params.pool_size,
+                max_overflow=params.max_overflow,
+                recycle=params.recycle,
+            )
+            if params.pre_ping:
+                event.listen(pool, "checkout", ping_connection)
+            return PooledEngine(pool, pool.dispose, params.idle_timeout)
+
+        return self.checkout((engine.name, engine.version, engine.uri), create)
+
+    def dispose(self) -> None:
+        """
+        Close all of the pools. Pools that are in use are closed once the queries using
+        them are done, and new queries get new pools in the meantime.
+        """
+        with self._lock:
+            for pooled in self._pools.values():
+                if pooled.in_use:
+                    pooled.retired = True
+                else:
+                    pooled.dispose()
+            self._pools.clear()
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+
+def ping_connection(  # pylint: disable=unused-argument
+    dbapi_connection: Any,
+    connection_record: Any,
+    connection_proxy: Any,
+) -> None:
+    """
+    Check that a pooled connection still works before handing it out, so that the pool
+    replaces connections that were dropped.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    except Exception as exc:  # pylint: disable=broad-except
+        raise DisconnectionError() from exc
+    finally:
+        cursor.close()
+
+
+@lru_cache(maxsize=None)
+def get_engine_pools() -> EnginePools:
+    """
+    Get the process-wide engine connection pools.
+    """
+    return EnginePools()
@@ -0,0 +1,313 @@
+"""
+Storage of query results in the results backend.
+
+The rows of each statement are stored in chunks of a fixed number of rows, written while
+the rows are still being fetched, so that neither running a query nor reading a page of
+its results needs to hold all of its rows in memory. The results themselves are stored
+under the query ID as a manifest of the statements and their chunks.
+
+Chunks are stored as Arrow IPC streams, so that results can be served in the Arrow
+format as they are, and are only turned into rows for JSON and msgpack responses.
+"""
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pyarrow as pa
+from cachelib.base import BaseCache
+from pydantic.json import pydantic_encoder
+
+from djqs.models.query import ColumnMetadata, StatementResults, StoredStatementResults
+from djqs.typing import Batches, Row
+
+_logger = logging.getLogger(__name__)
+
+
+def get_chunk_key(key: str, statement: int, chunk: int) -> str:
+    """
+    The results backend key for a chunk of a statement's rows.
+    """
+    return f"{key}:{statement}:{chunk}"
+
+
+def rows_to_record_batch(
+    rows: Sequence[Row],
+    names: List[str],
+    schema: Optional[pa.Schema] = None,
+) -> pa.RecordBatch:
+    """
+    Build a record batch from rows. Columns are given their types in ``schema``, if
+    there is one, so that the batches of a statement share the types of its first batch.
+    Columns whose values don't share a type are turned into strings.
+    """
+    arrays = []
+    for index, values in enumerate(zip(*rows) if rows else [[] for _ in names]):
+        type_ = schema.field(index).type if schema is not None else None
+        try:
+            arrays.append(
+                pa.array(
+                    values,
+                    type=None if type_ is None or pa.types.is_null(type_) else type_,
+                ),
+            )
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(
+                pa.array([None if value is None else str(value) for value in values]),
+            )
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def concat_tables(tables: List[pa.Table]) -> pa.Table:
+    """
+    Concatenate the tables of a statement's rows, cast to the schema of the first one.
+    Columns that are all nulls in the first table take their type from the first table
+    that has values in them, and columns whose values don't fit that type are turned
+    into strings.
+    """
+    fields = list(tables[0].schema)
+    for table in tables[1:]:
+        for index, field in enumerate(table.schema):
+            if pa.types.is_null(field.type) or field.type == fields[index].type:
+                continue
+            fields[index] = fields[index].with_type(
+                field.type if pa.types.is_null(fields[index].type) else pa.string(),
+            )
+    schema = pa.schema(fields)
+    return pa.concat_tables([table.cast(schema) for table in tables])
+
+
+def table_to_rows(table: pa.Table) -> List[Row]:
+    """
+    The rows of a table, with their values as they would be stored in JSON.
+    """
+    columns = [
+        json.loads(json.dumps(column.to_pylist(), default=pydantic_encoder))
+        for column in table.columns
+    ]
+    return list(zip(*columns))
+
+
+def serialize_table(
+    table: pa.Table,
+    metadata: Optional[Dict[str, str]] = None,
+) -> bytes:
+    """
+    Serialize a table as an Arrow IPC stream.
+    """
+    if metadata:
+        table = table.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def deserialize_table(data: bytes) -> pa.Table:
+    """
+    Deserialize a table from an Arrow IPC stream.
+    """
+    return pa.ipc.open_stream(data).read_all()
+
+
+def iter_chunks(batches: Batches, chunk_size: int) -> Iterator[pa.Table]:
+    """
+    Regroup record batches into tables of up to ``chunk_size`` rows.
+    """
+    pending: List[pa.RecordBatch] = []
+    pending_rows = 0
+    for batch in batches:
+        while batch.num_rows:
+            take = min(chunk_size - pending_rows, batch.num_rows)
+            pending.append(batch.slice(0, take))
+            pending_rows += take
+            batch = batch.slice(take)
+            if pending_rows == chunk_size:
+                yield _batches_to_table(pending)
+                pending, pending_rows = [], 0
+    if pending:
+        yield _batches_to_table(pending)
+
+
+def _batches_to_table(batches: List[pa.RecordBatch]) -> pa.Table:
+    """
+    A table of record batches, which may not all have the same types.
+    """
+    return concat_tables([pa.Table.from_batches([batch]) for batch in batches])
+
+
+def store_results(
+    results_backend: BaseCache,
+    key: str,
+    statements: Iterable[Tuple[str, List[ColumnMetadata], Batches]],
+    chunk_size: int,
+) -> List[StoredStatementResults]:
+    """
+    Store the rows of each statement in chunks of ``chunk_size`` rows as they're
+    fetched, and return the manifest of the stored statements. If fetching the rows
+    fails, the chunks stored so far are removed.
+    """
+    stored: List[StoredStatementResults] = []
+    chunk_keys: List[str] = []
+    try:
+        for statement, (sql, columns, batches) in enumerate(statements):
+            row_count = chunk_count = 0
+            for chunk in iter_chunks(batches, chunk_size):
+                chunk_keys.append(get_chunk_key(key, statement, chunk_count))
+                results_backend.set(chunk_keys[-1], serialize_table(chunk))
+                row_count += chunk.num_rows
+                chunk_count += 1
+            stored.append(
+                StoredStatementResults(
+                    sql=sql,
+                    columns=columns,
+                    row_count=row_count,
+                    chunk_size=chunk_size,
+                    chunk_count=chunk_count,
+                ),
+            )
+    except Exception:
+        results_backend.delete_many(*chunk_keys)
+        raise
+    return stored
+
+
+def _load_chunks(
+    results_backend: BaseCache,
+    key: str,
+    statement: int,
+    stored: StoredStatementResults,
+    offset: int,
+    limit: Optional[int],
+) -> Tuple[List[Union[str, bytes]], int]:
+    """
+    Read the chunks of a statement's rows that hold the requested page, and return
+    them along with where the page starts in the first of them.
+    """
+    first_chunk = offset // stored.chunk_size
+    last_chunk = (
+        stored.chunk_count
+        if limit is None
+        else min(stored.chunk_count, -(-(offset + limit) // stored.chunk_size))
+    )
+    chunks = [
+        results_backend.get(get_chunk_key(key, statement, chunk))
+        for chunk in range(first_chunk, last_chunk)
+    ]
+    return chunks, offset - first_chunk * stored.chunk_size
+
+
+def _load_manifest(results_backend: BaseCache, key: str) -> List[Dict]:
+    """
+    Load the manifest of a query's results, if there are any.
+    """
+    if not results_backend.has(key):
+        _logger.warning("No results found")
+        return []
+    _logger.info("Reading results from results backend")
+    return json.loads(results_backend.get(key))
+
+
+def load_results(
+    results_backend: BaseCache,
+    key: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[StatementResults]:
+    """
+    Load up to ``limit`` rows of each statement, starting from ``offset``, reading only
+    the chunks that hold them. The row count of each statement is its total number of
+    rows.
+    """
+    results = []
+    end = None if limit is None else offset + limit
+    for statement, data in enumerate(_load_manifest(results_backend, key)):
+        if "rows" in data:
+            # Results stored whole, before they were stored in chunks
+            statement_results = StatementResults(**data)
+            statement_results.rows = statement_results.rows[offset:end]
+            results.append(statement_results)
+            continue
+
+        stored = StoredStatementResults(**data)
+        chunks, start = _load_chunks(
+            results_backend,
+            key,
+            statement,
+            stored,
+            offset,
+            limit,
+        )
+        rows: List[Row] = []
+        for chunk in chunks:
+            # Chunks were stored as JSON before they were stored in the Arrow format
+            rows.extend(
+                json.loads(chunk)
+                if isinstance(chunk, str)
+                else table_to_rows(deserialize_table(chunk)),
+            )
+        results.append(
+            StatementResults(
+                sql=stored.sql,
+                columns=stored.columns,
+                rows=rows[start : None if limit is None else start + limit],
+                row_count=stored.row_count,
+            ),
+        )
+    return results
+
+
+def load_results_table(
+    results_backend: BaseCache,
+    key: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Optional[pa.Table]:
+    """
+    Load up to ``limit`` rows of the first statement, starting from ``offset``, as an
+    Arrow table. Returns None if there are no results.
+    """
+    manifest = _load_manifest(results_backend, key)
+    if not manifest:
+        return None
+
+    data = manifest[0]
+    names = [column["name"] for column in data["columns"]]
+    if "rows" in data:
+        rows = data["rows"][offset : None if limit is None else offset + limit]
+        return pa.Table.from_batches([rows_to_record_batch(rows, names)])
+
+    stored = StoredStatementResults(**data)
+    chunks, start = _load_chunks(results_backend, key, 0, stored, offset, limit)
+    tables = [
+        pa.Table.from_batches([rows_to_record_batch(json.loads(chunk), names)])
+        if isinstance(chunk, str)
+        else deserialize_table(chunk)
+        for chunk in chunks
+    ]
+    if not tables:
+        return pa.table({name: pa.array([], pa.null()) for name in names})
+    return concat_tables(tables).slice(start, limit)
+
+
+def get_page_links(
+    url: str,
+    query_id: str,
+    results: List[StatementResults],
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    The links to the previous and next pages of a query's results, if there are any.
+    """
+    if limit is None:
+        return None, None
+    base = f"{url.rstrip('/')}/queries/{query_id}/"
+    prev = (
+        f"{base}?offset={max(offset - limit, 0)}&limit={limit}" if offset > 0 else None
+    )
+    next_ = (
+        f"{base}?offset={offset + limit}&limit={limit}"
+        if any(statement.row_count > offset + limit for statement in results)
+        else None
+    )
+    return prev, next_
@@ -0,0 +1,311 @@
+"""
+Scheduling of query execution on a bounded pool of workers.
+
+Queries wait in a bounded queue until a worker is free and their engine is running fewer
+queries than it allows, with higher priority queries going first. Queries that run for
+longer than their timeout, or that are canceled, have their statements interrupted.
+"""
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from djqs.exceptions import DJQueryQueueFullException
+from djqs.models.query import ColumnMetadata
+from djqs.typing import Batches, QueryState
+from djqs.utils import get_settings
+
+_logger = logging.getLogger(__name__)
+
+# Engines are identified by their name and version
+EngineKey = Tuple[str, str]
+
+
+class QueryCanceled(Exception):
+    """
+    Raised when a query is canceled or times out while it's running.
+    """
+
+
+class QueryJob:  # pylint: disable=too-many-instance-attributes
+    """
+    A query waiting for, or running on, a worker.
+
+    ``run`` is called with the job on a worker, and what it returns becomes the result of
+    the job's ``future``. While the query runs it can register callbacks that interrupt
+    its statements with ``on_cancel``, and should call ``check_canceled`` between
+    fetching batches of results.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        query_id: UUID,
+        engine: EngineKey,
+        run: Callable[["QueryJob"], Any],
+        priority: int = 0,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.query_id = query_id
+        self.engine = engine
+        self.run = run
+        self.priority = priority
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.future: Future = Future()
+
+        # The state and error the query ends up with if it's canceled
+        self.canceled_state: Optional[QueryState] = None
+        self.canceled_error: Optional[str] = None
+
+        self._interrupts: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def canceled(self) -> bool:
+        """
+        Whether the query has been canceled or has timed out.
+        """
+        return self.canceled_state is not None
+
+    def cancel(self, timed_out: bool = False) -> None:
+        """
+        Cancel the query, interrupting its running statements.
+        """
+        with self._lock:
+            if self.canceled:
+                return
+            if timed_out:
+                self.canceled_state = QueryState.FAILED
+                self.canceled_error = f"Query timed out after {self.timeout} seconds"
+            else:
+                self.canceled_state = QueryState.CANCELED
+                self.canceled_error = "Query was canceled"
+            interrupts = list(self._interrupts)
+        _logger.info("%s query %s", self.canceled_error, self.query_id)
+        for interrupt in interrupts:
+            run_interrupt(interrupt)
+
+    def on_cancel(self, interrupt: Callable[[], None]) -> None:
+        """
+        Register a callback that interrupts the query's running statements. If the query
+        has already been canceled it's interrupted right away.
+        """
+        with self._lock:
+            self._interrupts.append(interrupt)
+            canceled = self.canceled
+        if canceled:
+            run_interrupt(interrupt)
+
+    def check_canceled(self) -> None:
+        """
+        Raise ``QueryCanceled`` if the query has been canceled.
+        """
+        if self.canceled:
+            raise QueryCanceled(self.canceled_error)
+
+
+def run_interrupt(interrupt: Callable[[], None]) -> None:
+    """
+    Run a callback that interrupts a query, which may fail if the query has already
+    finished.
+    """
+    try:
+        interrupt()
+    except Exception:  # pylint: disable=broad-except
+        _logger.warning("Could not interrupt query", exc_info=True)
+
+
+def interrupt_connection(connection: Any) -> None:
+    """
+    Interrupt the statement running on a DB API connection, if the driver supports it
+    (``interrupt`` in sqlite and duckdb, ``cancel`` in psycopg2 and others).
+    """
+    for method in ("interrupt", "cancel"):
+        if callable(getattr(connection, method, None)):
+            getattr(connection, method)()
+            return
+
+
+def cancellable(
+    statements: Iterable[Tuple[str, List[ColumnMetadata], Batches]],
+    job: QueryJob,
+) -> Iterable[Tuple[str, List[ColumnMetadata], Batches]]:
+    """
+    Stop fetching the results of a query's statements once the query is canceled.
+    """
+
+    def check(batches: Batches) -> Batches:
+        for batch in batches:
+            job.check_canceled()
+            yield batch
+
+    for sql, columns, batches in statements:
+        job.check_canceled()
+        yield sql, columns, check(batches)
+
+
+class QueryScheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Runs queries on a pool of ``workers`` threads, with up to ``queue_size`` queries
+    waiting for a worker. Submitting a query when the queue is full raises
+    ``DJQueryQueueFullException``, so that clients back off.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+
+        self._condition = threading.Condition()
+        self._pending: List[Tuple[int, int, QueryJob]] = []
+        self._jobs: Dict[UUID, QueryJob] = {}
+        self._running: Dict[EngineKey, int] = {}
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._shutdown = False
+
+    def submit(self, job: QueryJob) -> Future:
+        """
+        Queue a query to run, returning the future of its result.
+        """
+        with self._condition:
+            if len(self._pending) >= self.queue_size:
+                raise DJQueryQueueFullException(
+                    message=(
+                        f"Too many queries are waiting to run ({self.queue_size}), "
+                        "please try again later"
+                    ),
+                )
+            heapq.heappush(
+                self._pending,
+                (-job.priority, next(self._sequence), job),
+            )
+            self._jobs[job.query_id] = job
+            self._start_workers()
+            self._condition.notify_all()
+        return job.future
+
+    def cancel(self, query_id: UUID) -> bool:
+        """
+        Cancel a query, returning whether it was waiting for or running on a worker.
+
+        Queries that were waiting are taken out of the queue and end right away.
+        Running queries have their statements interrupted, and end on their worker.
+        """
+        with self._condition:
+            job = self._jobs.get(query_id)
+            if job is None:
+                return False
+            pending = self._remove_pending(job)
+            if pending:
+                del self._jobs[query_id]
+        job.cancel()
+        if pending:
+            self._run(job)
+        return True
+
+    def shutdown(self) -> None:
+        """
+        Cancel all of the queries and stop the workers. Queries submitted afterwards
+        start the workers again.
+        """
+        with self._condition:
+            self._shutdown = True
+            jobs = list(self._jobs.values())
+            pending = [job for _, _, job in self._pending]
+            self._pending.clear()
+            for job in pending:
+                del self._jobs[job.query_id]
+            threads, self._threads = self._threads, []
+            self._condition.notify_all()
+        for job in jobs:
+            job.cancel()
+        for job in pending:
+            self._run(job)
+        for thread in threads:
+            thread.join()
+        with self._condition:
+            self._shutdown = False
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"djqs-query-worker-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _remove_pending(self, job: QueryJob) -> bool:
+        for index, (_, _, pending) in enumerate(self._pending):
+            if pending is job:
+                self._pending.pop(index)
+                heapq.heapify(self._pending)
+                return True
+        return False
+
+    def _take_job(self) -> Optional[QueryJob]:
+        """
+        Take the highest priority query whose engine can run another query.
+        """
+        for entry in sorted(self._pending):
+            job = entry[2]
+            if (
+                job.max_concurrency is None
+                or self._running.get(job.engine, 0) < job.max_concurrency
+            ):
+                self._remove_pending(job)
+                self._running[job.engine] = self._running.get(job.engine, 0) + 1
+                return job
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                job = None
+                while job is None:
+                    if self._shutdown:
+                        return
+                    job = self._take_job()
+                    if job is None:
+                        self._condition.wait()
+
+            timer = None
+            if job.timeout:
+                timer = threading.Timer(job.timeout, job.cancel, (True,))
+                timer.daemon = True
+                timer.start()
+            try:
+                self._run(job)
+            finally:
+                if timer:
+                    timer.cancel()
+                with self._condition:
+                    self._running[job.engine] -= 1
+                    self._jobs.pop(job.query_id, None)
+                    self._condition.notify_all()
+
+    @staticmethod
+    def _run(job: QueryJob) -> None:
+        try:
+            job.future.set_result(job.run(job))
+        except BaseException as exc:  # pylint: disable=broad-except
+            _logger.exception("Error running query %s", job.query_id)
+            job.future.set_exception(exc)
+
+
+@lru_cache(maxsize=None)
+def get_query_scheduler() -> QueryScheduler:
+    """
+    Get the process-wide query scheduler.
+    """
+    settings = get_settings()
+    return QueryScheduler(settings.query_workers, settings.query_queue_size)
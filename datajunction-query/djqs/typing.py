@@ -9,6 +9,7 @@ from __future__ import annotations
 from types import ModuleType
 from typing import Any, Iterator, List, Literal, Optional, Tuple, TypedDict, Union
 
+import pyarrow as pa
 from typing_extensions import Protocol
 
 from djqs.enum import StrEnum
@@ -45,6 +46,7 @@ Description = Optional[
 # A stream of data
 Row = Tuple[Any, ...]
 Stream = Iterator[Row]
+Batches = Iterator[pa.RecordBatch]
 
 
 class ColumnType(StrEnum):
@@ -98,6 +100,9 @@ class QueryState(StrEnum):
     FAILED = "FAILED"
 
 
+END_JOB_STATES = [QueryState.FINISHED, QueryState.CANCELED, QueryState.FAILED]
+
+
 # sqloxide type hints
 # Reference: https://github.com/sqlparser-rs/sqlparser-rs/blob/main/src/ast/query.rs
 
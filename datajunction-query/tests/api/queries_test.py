@@ -1,20 +1,27 @@
+# pylint: disable=too-many-lines
 """
 Tests for the queries API.
 """
 
 import datetime
 import json
+import threading
+import time
+import uuid
 from http import HTTPStatus
 from unittest import mock
 
 import msgpack
+import pyarrow as pa
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
 from pytest_mock import MockerFixture
-from sqlmodel import Session
+from sqlmodel import Session, select
 
+import djqs.engine
 from djqs.config import Settings
-from djqs.engine import process_query
+from djqs.constants import ARROW_QUERY_METADATA_KEY, ARROW_STREAM_MEDIA_TYPE
+from djqs.exceptions import DJQueryQueueFullException
 from djqs.models.catalog import Catalog
 from djqs.models.engine import Engine, EngineType
 from djqs.models.query import (
@@ -26,6 +33,8 @@ from djqs.models.query import (
     decode_results,
     encode_results,
 )
+from djqs.results import deserialize_table
+from djqs.scheduler import QueryScheduler
 
 
 def test_submit_query(session: Session, client: TestClient) -> None:
@@ -57,6 +66,8 @@ def test_submit_query(session: Session, client: TestClient) -> None:
             "engine_version": "1.0",
             "submitted_query": "SELECT 1 AS col",
             "async_": False,
+            "priority": 0,
+            "timeout": None,
         },
     )
 
@@ -118,6 +129,8 @@ def test_submit_query_with_sqlalchemy_uri_header(
             "engine_version": "1.0",
             "submitted_query": "SELECT 1 AS col",
             "async_": False,
+            "priority": 0,
+            "timeout": None,
         },
     )
 
@@ -260,7 +273,10 @@ def test_submit_query_errors(
     )
     assert response.status_code == 406
     assert response.json() == {
-        "detail": "Client MUST accept: application/json, application/msgpack",
+        "detail": (
+            "Client MUST accept: application/json, application/msgpack, "
+            "application/vnd.apache.arrow.stream"
+        ),
     }
 
 
@@ -374,10 +390,13 @@ def test_submit_query_results_backend(
         {
             "sql": "SELECT 1 AS col",
             "columns": [],
-            "rows": [[1]],
             "row_count": 1,
+            "chunk_size": 10000,
+            "chunk_count": 1,
         },
     ]
+    cached = settings.results_backend.get(f"{data['id']}:0:0")
+    assert deserialize_table(cached).to_pylist() == [{"col": 1}]
 
 
 def test_submit_query_async(
@@ -388,13 +407,14 @@ def test_submit_query_async(
     """
     Test ``POST /queries/`` on an async database.
     """
-    add_task = mocker.patch("fastapi.BackgroundTasks.add_task")
+    submit = mocker.patch.object(QueryScheduler, "submit")
 
     engine = Engine(
         name="test_engine",
         type=EngineType.SQLALCHEMY,
         version="1.0",
         uri="sqlite://",
+        max_concurrency=2,
     )
     catalog = Catalog(name="test_catalog", engines=[engine])
     session.add(catalog)
@@ -407,6 +427,8 @@ def test_submit_query_async(
         engine_version=engine.version,
         submitted_query="SELECT 1 AS col",
         async_=True,
+        priority=5,
+        timeout=60,
     )
 
     with freeze_time("2021-01-01T00:00:00Z", auto_tick_seconds=300):
@@ -431,13 +453,113 @@ def test_submit_query_async(
     assert data["results"] == []
     assert data["errors"] == []
 
-    # check that ``BackgroundTasks.add_task`` was called
-    add_task.assert_called()
-    arguments = add_task.mock_calls[0].args
-    assert arguments[0] == process_query  # pylint: disable=comparison-with-callable
-    assert arguments[1] == session
-    assert isinstance(arguments[2], Settings)
-    assert isinstance(arguments[3], Query)
+    # check that the query was scheduled to run
+    submit.assert_called()
+    job = submit.call_args.args[0]
+    assert str(job.query_id) == data["id"]
+    assert job.engine == ("test_engine", "1.0")
+    assert job.priority == 5
+    assert job.timeout == 60
+    assert job.max_concurrency == 2
+
+    # The results of async queries are only read when they're asked for
+    query_results = job.run(job)
+    assert query_results.state == QueryState.FINISHED
+    assert query_results.results.__root__ == []
+    response = client.get(f"/queries/{data['id']}/")
+    assert response.json()["results"][0]["rows"] == [[1]]
+
+
+def test_submit_query_queue_full(
+    mocker: MockerFixture,
+    session: Session,
+    client: TestClient,
+) -> None:
+    """
+    Test that ``POST /queries/`` turns queries away when too many are waiting to run.
+    """
+    mocker.patch.object(
+        QueryScheduler,
+        "submit",
+        side_effect=DJQueryQueueFullException("Too many queries"),
+    )
+    engine = Engine(
+        name="test_engine",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    catalog = Catalog(name="test_catalog", engines=[engine])
+    session.add(catalog)
+    session.commit()
+
+    query_create = QueryCreate(
+        catalog_name="test_catalog",
+        engine_name="test_engine",
+        engine_version="1.0",
+        submitted_query="SELECT 1 AS col",
+        async_=True,
+    )
+    response = client.post(
+        "/queries/",
+        data=query_create.json(),
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json()["message"] == "Too many queries"
+    assert session.exec(select(Query)).all() == []
+
+
+def test_cancel_query(
+    mocker: MockerFixture,
+    session: Session,
+    client: TestClient,
+) -> None:
+    """
+    Test ``POST /queries/{query_id}/cancel/``.
+    """
+    query = Query(
+        catalog_name="test_catalog",
+        engine_name="test_engine",
+        engine_version="1.0",
+        submitted_query="SELECT 1",
+        state=QueryState.ACCEPTED,
+        async_=True,
+    )
+    session.add(query)
+    session.commit()
+    session.refresh(query)
+
+    # Queries the workers don't know about are marked as canceled
+    cancel = mocker.patch.object(QueryScheduler, "cancel", return_value=False)
+    response = client.post(f"/queries/{query.id}/cancel/")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["state"] == "CANCELED"
+    cancel.assert_called_with(query.id)
+
+    response = client.post(f"/queries/{query.id}/cancel/")
+    assert response.status_code == HTTPStatus.CONFLICT
+
+    response = client.post("/queries/27289db6-a75c-47fc-b451-da59a743a168/cancel/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    # Running queries are given time to end
+    query = Query(
+        catalog_name="test_catalog",
+        engine_name="test_engine",
+        engine_version="1.0",
+        submitted_query="SELECT 1",
+        state=QueryState.RUNNING,
+        async_=True,
+    )
+    session.add(query)
+    session.commit()
+    session.refresh(query)
+
+    mocker.patch.object(QueryScheduler, "cancel", return_value=True)
+    response = client.post(f"/queries/{query.id}/cancel/?timeout=0.1")
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json()["state"] == "RUNNING"
 
 
 def test_submit_query_error(session: Session, client: TestClient) -> None:
@@ -546,6 +668,138 @@ def test_read_query(session: Session, settings: Settings, client: TestClient) ->
     assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
 
+def test_read_query_paginated(
+    session: Session,
+    settings: Settings,
+    client: TestClient,
+) -> None:
+    """
+    Test paginating the results of ``GET /queries/{query_id}``.
+    """
+    settings.results_chunk_size = 2
+    engine = Engine(
+        name="test_engine",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    catalog = Catalog(name="test_catalog", engines=[engine])
+    session.add(catalog)
+    session.commit()
+    session.refresh(catalog)
+
+    query_create = QueryCreate(
+        catalog_name=catalog.name,
+        engine_name=engine.name,
+        engine_version=engine.version,
+        submitted_query=(
+            "SELECT 1 AS col UNION ALL SELECT 2 UNION ALL SELECT 3 "
+            "UNION ALL SELECT 4 UNION ALL SELECT 5"
+        ),
+    )
+    response = client.post(
+        "/queries/",
+        data=query_create.json(),
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+    )
+    data = response.json()
+    query_id = data["id"]
+    assert data["results"][0]["rows"] == [[1], [2], [3], [4], [5]]
+    assert data["next"] is None
+
+    response = client.get(f"/queries/{query_id}/?offset=1&limit=3")
+    data = response.json()
+    assert data["results"][0]["rows"] == [[2], [3], [4]]
+    assert data["results"][0]["row_count"] == 5
+    assert data["previous"] == (
+        f"http://localhost:8001/queries/{query_id}/?offset=0&limit=3"
+    )
+    assert data["next"] == f"http://localhost:8001/queries/{query_id}/?offset=4&limit=3"
+
+    response = client.get(f"/queries/{query_id}/?offset=4&limit=3")
+    data = response.json()
+    assert data["results"][0]["rows"] == [[5]]
+    assert data["next"] is None
+
+    response = client.get(f"/queries/{query_id}/?limit=0")
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    # Synchronous queries only return the first page of their results
+    settings.results_page_size = 3
+    response = client.post(
+        "/queries/",
+        data=query_create.json(),
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+    )
+    data = response.json()
+    assert data["results"][0]["rows"] == [[1], [2], [3]]
+    assert data["results"][0]["row_count"] == 5
+    assert data["next"] == (
+        f"http://localhost:8001/queries/{data['id']}/?offset=3&limit=3"
+    )
+
+
+def test_read_query_arrow(
+    session: Session,
+    settings: Settings,
+    client: TestClient,
+) -> None:
+    """
+    Test fetching the results of a query as an Arrow stream.
+    """
+    settings.results_chunk_size = 2
+    engine = Engine(
+        name="test_engine",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    catalog = Catalog(name="test_catalog", engines=[engine])
+    session.add(catalog)
+    session.commit()
+    session.refresh(catalog)
+
+    query_create = QueryCreate(
+        catalog_name=catalog.name,
+        engine_name=engine.name,
+        engine_version=engine.version,
+        submitted_query=(
+            "SELECT 1 AS col, 'a' AS name UNION ALL SELECT 2, 'b' "
+            "UNION ALL SELECT 3, 'c'"
+        ),
+    )
+    response = client.post(
+        "/queries/",
+        data=query_create.json(),
+        headers={
+            "Content-Type": "application/json",
+            "Accept": ARROW_STREAM_MEDIA_TYPE,
+        },
+    )
+    assert response.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    table = deserialize_table(response.content)
+    assert table.to_pydict() == {"col": [1, 2, 3], "name": ["a", "b", "c"]}
+    metadata = json.loads(table.schema.metadata[ARROW_QUERY_METADATA_KEY.encode()])
+    assert metadata["state"] == "FINISHED"
+    assert metadata["results"][0]["row_count"] == 3
+    assert metadata["results"][0]["rows"] == []
+
+    response = client.get(
+        f"/queries/{metadata['id']}/?offset=1&limit=1",
+        headers={"Accept": ARROW_STREAM_MEDIA_TYPE},
+    )
+    table = deserialize_table(response.content)
+    assert table.to_pydict() == {"col": [2], "name": ["b"]}
+    metadata = json.loads(table.schema.metadata[ARROW_QUERY_METADATA_KEY.encode()])
+    assert metadata["next"] == (
+        f"http://localhost:8001/queries/{metadata['id']}/?offset=2&limit=1"
+    )
+
+    # JSON is still the default
+    response = client.get(f"/queries/{metadata['id']}/", headers={"Accept": "*/*"})
+    assert response.json()["results"][0]["rows"] == [[1, "a"], [2, "b"], [3, "c"]]
+
+
 def test_read_query_no_results_backend(session: Session, client: TestClient) -> None:
     """
     Test ``GET /queries/{query_id}``.
@@ -595,6 +849,75 @@ def test_read_query_no_results_backend(session: Session, client: TestClient) ->
     response = client.get("/queries/123")
 
 
+def test_read_query_wait_for_state_change(  # pylint: disable=protected-access
+    session: Session,
+    mocker: MockerFixture,
+    client: TestClient,
+) -> None:
+    """
+    Test long polling ``GET /queries/{query_id}`` for a change to the query's state.
+    """
+    engine = Engine(
+        name="test_engine",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    catalog = Catalog(name="test_catalog", engines=[engine])
+    session.add(catalog)
+    session.commit()
+    session.refresh(catalog)
+
+    query = Query(
+        catalog_name=catalog.name,
+        engine_name=engine.name,
+        engine_version=engine.version,
+        submitted_query="SELECT 1",
+        executed_query="SELECT 1",
+        state=QueryState.RUNNING,
+        async_=True,
+    )
+    session.add(query)
+    session.commit()
+    session.refresh(query)
+
+    # The query has already left the state, so the request isn't held
+    real_get_query_state = djqs.engine.get_query_state
+    get_query_state = mocker.spy(djqs.engine, "get_query_state")
+    response = client.get(f"/queries/{query.id}/?state=ACCEPTED&timeout=10")
+    assert response.status_code == 200
+    assert response.json()["state"] == "RUNNING"
+    assert get_query_state.call_count == 1
+
+    # The query stays in the state, so the request is held until it times out
+    response = client.get(f"/queries/{query.id}/?state=RUNNING&timeout=0.2")
+    assert response.status_code == 200
+    assert response.json()["state"] == "RUNNING"
+    assert get_query_state.call_count >= 3
+
+    # The query finishes while the request is held, which wakes it up right away
+    # instead of at the next check
+    calls = []
+
+    def finish(session_: Session, query_id: uuid.UUID):
+        calls.append(query_id)
+        if len(calls) == 2:
+            query.state = QueryState.FINISHED
+            session_.add(query)
+            session_.commit()
+        return real_get_query_state(session_, query_id)
+
+    mocker.patch("djqs.engine.get_query_state", side_effect=finish)
+    threading.Timer(0.1, djqs.engine.notify_query_state_changed).start()
+    started = time.monotonic()
+    response = client.get(f"/queries/{query.id}/?state=RUNNING&timeout=10")
+    assert response.status_code == 200
+    assert response.json()["state"] == "FINISHED"
+    assert len(calls) == 2
+    assert time.monotonic() - started < 0.9
+    assert not djqs.engine._query_state_waiters
+
+
 @mock.patch("djqs.engine.duckdb.connect")
 def test_submit_duckdb_query(
     mock_duckdb_connect,
@@ -605,7 +928,7 @@ def test_submit_duckdb_query(
     """
     Test submitting a Spark query
     """
-    mock_duckdb_connect.return_value = duckdb_conn
+    mock_duckdb_connect.return_value = duckdb_conn.cursor()
     engine = Engine(
         name="test_duckdb_engine",
         type=EngineType.DUCKDB,
@@ -631,6 +954,8 @@ def test_submit_duckdb_query(
             "engine_version": "0.7.1",
             "submitted_query": "SELECT 1 AS int_col, 'a' as str_col",
             "async_": False,
+            "priority": 0,
+            "timeout": None,
         },
     )
 
@@ -670,7 +995,9 @@ def test_submit_snowflake_query(
     Test submitting a Snowflake query
     """
     mock_exec = mock.MagicMock()
-    mock_exec.fetchall.return_value = [[1, "a"]]
+    mock_exec.fetch_arrow_batches.return_value = [
+        pa.table({"INT_COL": [1], "STR_COL": ["a"]}),
+    ]
     mock_cur = mock.MagicMock()
     mock_cur.execute.return_value = mock_exec
     mock_conn = mock.MagicMock()
@@ -703,6 +1030,8 @@ def test_submit_snowflake_query(
             "engine_version": "7.37",
             "submitted_query": "SELECT 1 AS int_col, 'a' as str_col",
             "async_": False,
+            "priority": 0,
+            "timeout": None,
         },
     )
 
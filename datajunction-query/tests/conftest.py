@@ -15,9 +15,19 @@ from sqlmodel.pool import StaticPool
 
 from djqs.api.main import app
 from djqs.config import Settings
+from djqs.pools import get_engine_pools
 from djqs.utils import get_session, get_settings
 
 
+@pytest.fixture(autouse=True)
+def engine_pools() -> Iterator[None]:
+    """
+    Close the engine connection pools opened by each test.
+    """
+    yield
+    get_engine_pools().dispose()
+
+
 @pytest.fixture
 def settings(mocker: MockerFixture) -> Iterator[Settings]:
     """
@@ -0,0 +1,182 @@
+"""
+Tests for ``djqs.pools``.
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from sqlalchemy import text
+
+from djqs.config import Settings
+from djqs.models.engine import Engine, EngineType
+from djqs.pools import EnginePools, PoolParams
+
+
+def test_pool_params() -> None:
+    """
+    Test that engines override the default pool params from the settings.
+    """
+    settings = Settings(engine_pool_size=3, engine_pool_pre_ping=False)
+    engine = Engine(name="foo", type=EngineType.SQLALCHEMY, version="1.0", uri="bar")
+    assert PoolParams.from_engine(engine, settings) == PoolParams(
+        pool_size=3,
+        max_overflow=10,
+        pre_ping=False,
+        recycle=-1,
+        idle_timeout=timedelta(minutes=30),
+    )
+
+    engine.pool_params = {"pool_size": 1, "pre_ping": True, "idle_timeout": 60}
+    assert PoolParams.from_engine(engine, settings) == PoolParams(
+        pool_size=1,
+        max_overflow=10,
+        pre_ping=True,
+        recycle=-1,
+        idle_timeout=timedelta(seconds=60),
+    )
+
+
+def test_sqlalchemy_engine() -> None:
+    """
+    Test that queries share an engine's SQLAlchemy engine.
+    """
+    settings = Settings()
+    engine = Engine(
+        name="foo",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    engine_pools = EnginePools()
+
+    with engine_pools.sqlalchemy_engine(engine, settings) as sqla_engine:
+        with sqla_engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).fetchall() == [(1,)]
+    with engine_pools.sqlalchemy_engine(engine, settings) as other_sqla_engine:
+        assert other_sqla_engine is sqla_engine
+    assert len(engine_pools) == 1
+
+    # A URI from the request headers gets a pool of its own
+    with engine_pools.sqlalchemy_engine(
+        engine,
+        settings,
+        "sqlite:///:memory:",
+    ) as other_sqla_engine:
+        assert other_sqla_engine is not sqla_engine
+    assert len(engine_pools) == 2
+
+    # A new version of the engine gets a pool of its own
+    engine.version = "1.1"
+    with engine_pools.sqlalchemy_engine(engine, settings) as other_sqla_engine:
+        assert other_sqla_engine is not sqla_engine
+    assert len(engine_pools) == 3
+
+    engine_pools.dispose()
+    assert len(engine_pools) == 0
+
+
+def test_idle_pools_are_closed() -> None:
+    """
+    Test that pools are closed once they haven't been used for their idle timeout.
+    """
+    settings = Settings(engine_pool_idle_timeout=timedelta(seconds=60))
+    engine = Engine(
+        name="foo",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    other_engine = Engine(
+        name="bar",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    engine_pools = EnginePools()
+
+    with mock.patch("djqs.pools.time.monotonic", return_value=0):
+        with engine_pools.sqlalchemy_engine(engine, settings) as sqla_engine:
+            pass
+    pool = sqla_engine.pool
+    with mock.patch("djqs.pools.time.monotonic", return_value=30):
+        with engine_pools.sqlalchemy_engine(other_engine, settings):
+            pass
+    assert sqla_engine.pool is pool
+    assert len(engine_pools) == 2
+
+    with mock.patch("djqs.pools.time.monotonic", return_value=61):
+        with engine_pools.sqlalchemy_engine(other_engine, settings):
+            pass
+    assert sqla_engine.pool is not pool
+    assert len(engine_pools) == 1
+
+
+def test_pools_in_use_are_not_closed() -> None:
+    """
+    Test that pools aren't closed while queries are using them, whether they've gone
+    idle or all of the pools are being closed.
+    """
+    settings = Settings(engine_pool_idle_timeout=timedelta(seconds=60))
+    engine = Engine(
+        name="foo",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    other_engine = Engine(
+        name="bar",
+        type=EngineType.SQLALCHEMY,
+        version="1.0",
+        uri="sqlite://",
+    )
+    engine_pools = EnginePools()
+
+    with mock.patch("djqs.pools.time.monotonic", return_value=0):
+        using = engine_pools.sqlalchemy_engine(engine, settings)
+        sqla_engine = using.__enter__()  # pylint: disable=unnecessary-dunder-call
+    with mock.patch("djqs.pools.time.monotonic", return_value=61):
+        with engine_pools.sqlalchemy_engine(other_engine, settings):
+            pass
+    assert len(engine_pools) == 2
+
+    pooled = engine_pools._pools[  # pylint: disable=protected-access
+        ("foo", "1.0", "sqlite://")
+    ]
+    pooled.dispose = mock.MagicMock()
+    engine_pools.dispose()
+    assert len(engine_pools) == 0
+    pooled.dispose.assert_not_called()
+
+    # New queries get a new pool in the meantime
+    with engine_pools.sqlalchemy_engine(engine, settings) as other_sqla_engine:
+        assert other_sqla_engine is not sqla_engine
+
+    using.__exit__(None, None, None)
+    pooled.dispose.assert_called_once()
+
+
+@mock.patch("djqs.pools.snowflake.connector")
+def test_snowflake_pool(mock_snowflake_connector) -> None:
+    """
+    Test that connections to snowflake are pooled and checked before they're used.
+    """
+    settings = Settings()
+    engine = Engine(
+        name="snowflake",
+        type=EngineType.SNOWFLAKE,
+        version="7.37",
+        uri="snowflake://",
+        extra_params={"user": "foo", "account": "bar"},
+    )
+    engine_pools = EnginePools()
+
+    for _ in range(2):
+        with engine_pools.snowflake_pool(engine, settings) as pool:
+            conn = pool.connect()
+            conn.close()
+    mock_snowflake_connector.connect.assert_called_once()
+    mock_cursor = mock_snowflake_connector.connect.return_value.cursor.return_value
+    mock_cursor.execute.assert_called_with("SELECT 1")
+
+    engine_pools.dispose()
+    mock_snowflake_connector.connect.return_value.close.assert_called_once()
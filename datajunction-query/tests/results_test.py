@@ -0,0 +1,156 @@
+"""
+Tests for ``djqs.results``.
+"""
+
+import json
+
+import pyarrow as pa
+import pytest
+from cachelib.simple import SimpleCache
+
+from djqs.models.query import ColumnMetadata
+from djqs.results import (
+    deserialize_table,
+    load_results,
+    load_results_table,
+    rows_to_record_batch,
+    store_results,
+)
+
+
+def batches(*rows):
+    """
+    Record batches of a single ``col`` column, one for each list of rows.
+    """
+    return iter([rows_to_record_batch(batch, ["col"]) for batch in rows])
+
+
+def test_store_and_load_results() -> None:
+    """
+    Test storing results in chunks and loading pages of them.
+    """
+    results_backend = SimpleCache(default_timeout=0)
+    columns = [ColumnMetadata(name="col", type="INT")]
+    statements = [
+        ("SELECT a", columns, batches([(1,), (2,), (3,)], [(4,), (5,)])),
+        ("SELECT b", columns, batches()),
+    ]
+
+    stored = store_results(results_backend, "query", statements, chunk_size=2)
+    assert [(statement.row_count, statement.chunk_count) for statement in stored] == [
+        (5, 3),
+        (0, 0),
+    ]
+    assert deserialize_table(results_backend.get("query:0:2")).to_pylist() == [
+        {"col": 5},
+    ]
+    results_backend.set("query", json.dumps([statement.dict() for statement in stored]))
+
+    results = load_results(results_backend, "query")
+    assert [statement.rows for statement in results] == [
+        [(1,), (2,), (3,), (4,), (5,)],
+        [],
+    ]
+
+    # Only the chunks holding the page are read
+    results_backend.delete("query:0:0")
+    results = load_results(results_backend, "query", offset=2, limit=2)
+    assert results[0].rows == [(3,), (4,)]
+    assert results[0].row_count == 5
+
+    table = load_results_table(results_backend, "query", offset=3, limit=2)
+    assert table.to_pydict() == {"col": [4, 5]}
+
+    assert load_results(results_backend, "missing") == []
+    assert load_results_table(results_backend, "missing") is None
+
+
+def test_load_json_chunks() -> None:
+    """
+    Test loading results whose chunks were stored as JSON.
+    """
+    results_backend = SimpleCache(default_timeout=0)
+    manifest = {
+        "sql": "SELECT a",
+        "columns": [{"name": "col", "type": "INT"}],
+        "row_count": 3,
+        "chunk_size": 2,
+        "chunk_count": 2,
+    }
+    results_backend.set("query", json.dumps([manifest]))
+    results_backend.set("query:0:0", json.dumps([[1], [2]]))
+    results_backend.set("query:0:1", json.dumps([[3]]))
+
+    assert load_results(results_backend, "query", offset=1)[0].rows == [(2,), (3,)]
+    table = load_results_table(results_backend, "query", offset=1)
+    assert table.to_pydict() == {"col": [2, 3]}
+
+
+def test_rows_to_record_batch() -> None:
+    """
+    Test that columns with mixed types are stored as strings.
+    """
+    batch = rows_to_record_batch([(1, "a"), ("b", None)], ["mixed", "name"])
+    assert batch.schema.field("mixed").type == pa.string()
+    assert batch.to_pydict() == {"mixed": ["1", "b"], "name": ["a", None]}
+
+
+def test_rows_to_record_batch_schema() -> None:
+    """
+    Test that batches take the types of the statement's first batch.
+    """
+    schema = rows_to_record_batch([(1,), (None,)], ["col"]).schema
+    batch = rows_to_record_batch([(None,), (None,)], ["col"], schema)
+    assert batch.schema == schema
+
+    # Values that don't fit the type are turned into strings
+    batch = rows_to_record_batch([(1.5,), ("a",)], ["col"], schema)
+    assert batch.to_pydict() == {"col": ["1.5", "a"]}
+
+
+def test_load_chunks_with_different_types() -> None:
+    """
+    Test loading the chunks of a statement when they were stored with different types.
+    """
+    results_backend = SimpleCache(default_timeout=0)
+    columns = [ColumnMetadata(name="col", type="STR")]
+    statements = [
+        (
+            "SELECT a",
+            columns,
+            batches([(None,), (None,)], [(1,), (2,)], [("a",)], [(None,)]),
+        ),
+    ]
+    stored = store_results(results_backend, "query", statements, chunk_size=2)
+    results_backend.set("query", json.dumps([statement.dict() for statement in stored]))
+
+    table = load_results_table(results_backend, "query")
+    assert table.schema.field("col").type == pa.string()
+    assert table.to_pydict() == {"col": [None, None, "1", "2", "a", None]}
+
+    # Within a chunk as well
+    stored = store_results(
+        results_backend,
+        "other",
+        [("SELECT b", columns, batches([(None,)], [(1,)], [(2.5,)]))],
+        chunk_size=3,
+    )
+    results_backend.set("other", json.dumps([statement.dict() for statement in stored]))
+    table = load_results_table(results_backend, "other")
+    assert table.to_pydict() == {"col": [None, "1", "2.5"]}
+
+
+def test_store_results_failure() -> None:
+    """
+    Test that chunks are removed when fetching the results fails.
+    """
+    results_backend = SimpleCache(default_timeout=0)
+
+    def stream():
+        yield rows_to_record_batch([(1,)], ["col"])
+        yield rows_to_record_batch([(2,)], ["col"])
+        raise RuntimeError("Connection lost")
+
+    with pytest.raises(RuntimeError):
+        store_results(results_backend, "query", [("SELECT a", [], stream())], 1)
+    assert not results_backend.has("query:0:0")
@@ -0,0 +1,202 @@
+"""
+Tests for ``djqs.scheduler``.
+"""
+
+import threading
+import uuid
+from typing import Callable, List
+from unittest import mock
+
+import pytest
+
+from djqs.exceptions import DJQueryQueueFullException
+from djqs.scheduler import (
+    QueryCanceled,
+    QueryJob,
+    QueryScheduler,
+    cancellable,
+    interrupt_connection,
+)
+from djqs.typing import QueryState
+
+
+def make_job(
+    started: List[str],
+    name: str,
+    release: threading.Event,
+    engine: str = "foo",
+    **kwargs,
+) -> QueryJob:
+    """
+    A job that records when it starts, and runs until it's released or canceled.
+    """
+
+    def run(job: QueryJob) -> str:
+        job.check_canceled()
+        started.append(name)
+        job.on_cancel(release.set)
+        release.wait(5)
+        job.check_canceled()
+        return name
+
+    return QueryJob(uuid.uuid4(), (engine, "1.0"), run, **kwargs)
+
+
+def wait_until(condition: Callable[[], bool]) -> None:
+    """
+    Wait for a condition to hold.
+    """
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("Timed out waiting")  # pragma: no cover
+
+
+def test_priorities_and_engine_concurrency() -> None:
+    """
+    Test that higher priority queries run first, within the limits of their engines.
+    """
+    scheduler = QueryScheduler(workers=2, queue_size=10)
+    started: List[str] = []
+
+    # Fill up the workers, so that the next queries wait
+    release_blockers = threading.Event()
+    futures = [
+        scheduler.submit(make_job(started, f"blocker{i}", release_blockers))
+        for i in range(2)
+    ]
+    wait_until(lambda: len(started) == 2)
+
+    release_high = threading.Event()
+    released = threading.Event()
+    released.set()
+    futures += [
+        scheduler.submit(job)
+        for job in (
+            make_job(started, "low", released, engine="bar", max_concurrency=1),
+            make_job(
+                started,
+                "high",
+                release_high,
+                engine="bar",
+                priority=1,
+                max_concurrency=1,
+            ),
+            make_job(started, "other", released, engine="baz"),
+        )
+    ]
+    assert len(scheduler) == 5
+
+    # "high" goes first, and "other" goes ahead of "low", since bar can only run one
+    # query at a time
+    release_blockers.set()
+    wait_until(lambda: len(started) == 4)
+    assert set(started[2:]) == {"high", "other"}
+    assert futures[4].result(5) == "other"
+    assert not futures[2].done()
+
+    release_high.set()
+    assert [future.result(5) for future in futures] == [
+        "blocker0",
+        "blocker1",
+        "low",
+        "high",
+        "other",
+    ]
+    assert started[-1] == "low"
+    wait_until(lambda: len(scheduler) == 0)
+    scheduler.shutdown()
+
+
+def test_queue_full() -> None:
+    """
+    Test that queries are turned away when too many are waiting to run.
+    """
+    scheduler = QueryScheduler(workers=1, queue_size=1)
+    started: List[str] = []
+    release = threading.Event()
+
+    scheduler.submit(make_job(started, "running", release))
+    wait_until(lambda: bool(started))
+    scheduler.submit(make_job(started, "waiting", release))
+    with pytest.raises(DJQueryQueueFullException) as exc_info:
+        scheduler.submit(make_job(started, "rejected", release))
+    assert exc_info.value.http_status_code == 429
+
+    release.set()
+    scheduler.shutdown()
+
+
+def test_cancel() -> None:
+    """
+    Test canceling waiting and running queries.
+    """
+    scheduler = QueryScheduler(workers=1, queue_size=10)
+    started: List[str] = []
+    release = threading.Event()
+
+    running = make_job(started, "running", release)
+    waiting = make_job(started, "waiting", threading.Event())
+    running_future = scheduler.submit(running)
+    wait_until(lambda: bool(started))
+    waiting_future = scheduler.submit(waiting)
+
+    # The waiting query is taken out of the queue and ends without running
+    assert scheduler.cancel(waiting.query_id)
+    with pytest.raises(QueryCanceled):
+        waiting_future.result(5)
+    assert waiting.canceled_state == QueryState.CANCELED
+
+    # The running query is interrupted
+    assert scheduler.cancel(running.query_id)
+    with pytest.raises(QueryCanceled):
+        running_future.result(5)
+    assert started == ["running"]
+
+    assert not scheduler.cancel(uuid.uuid4())
+    scheduler.shutdown()
+
+
+def test_timeout() -> None:
+    """
+    Test that queries running for longer than their timeout are interrupted.
+    """
+    scheduler = QueryScheduler(workers=1, queue_size=10)
+    job = make_job([], "slow", threading.Event(), timeout=0.05)
+    future = scheduler.submit(job)
+    with pytest.raises(QueryCanceled) as exc_info:
+        future.result(5)
+    assert str(exc_info.value) == "Query timed out after 0.05 seconds"
+    assert job.canceled_state == QueryState.FAILED
+    scheduler.shutdown()
+
+
+def test_cancellable() -> None:
+    """
+    Test that the results of canceled queries stop being fetched.
+    """
+    job = QueryJob(uuid.uuid4(), ("foo", "1.0"), mock.MagicMock())
+    statements = cancellable([("SELECT 1", [], iter([1, 2]))], job)
+    _, _, batches = next(iter(statements))
+    assert next(batches) == 1
+    job.cancel()
+    with pytest.raises(QueryCanceled):
+        next(batches)
+
+
+def test_interrupt_connection() -> None:
+    """
+    Test interrupting the statement running on a DB API connection.
+    """
+    connection = mock.MagicMock(spec=["interrupt", "cancel"])
+    interrupt_connection(connection)
+    connection.interrupt.assert_called_once()
+    connection.cancel.assert_not_called()
+
+    connection = mock.MagicMock(spec=["cancel"])
+    interrupt_connection(connection)
+    connection.cancel.assert_called_once()
+
+    # Drivers that can't interrupt statements are left alone
+    interrupt_connection(mock.MagicMock(spec=[]))
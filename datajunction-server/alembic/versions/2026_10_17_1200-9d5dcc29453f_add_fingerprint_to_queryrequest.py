@@ -0,0 +1,40 @@
+"""Add request fingerprints to queryrequest and a graph epoch sequence
+
+Revision ID: 9d5dcc29453f
+Revises: 34171c92dd6d
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+# pylint: disable=no-member, invalid-name, missing-function-docstring, unused-import, no-name-in-module
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d5dcc29453f"
+down_revision = "34171c92dd6d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(sa.schema.CreateSequence(sa.Sequence("graph_epoch_seq")))
+
+    with op.batch_alter_table("queryrequest", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("fingerprint", sa.String(64), nullable=True))
+        batch_op.add_column(sa.Column("graph_epoch", sa.BigInteger(), nullable=True))
+        batch_op.create_index(
+            batch_op.f("ix_queryrequest_fingerprint"),
+            ["fingerprint"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("queryrequest", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_queryrequest_fingerprint"))
+        batch_op.drop_column("graph_epoch")
+        batch_op.drop_column("fingerprint")
+
+    op.execute(sa.schema.DropSequence(sa.Sequence("graph_epoch_seq")))
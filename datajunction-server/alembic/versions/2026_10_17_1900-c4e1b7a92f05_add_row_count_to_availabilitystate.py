@@ -0,0 +1,28 @@
+"""Add row_count to availabilitystate
+
+Revision ID: c4e1b7a92f05
+Revises: 9d5dcc29453f
+Create Date: 2026-10-17 19:00:00.000000+00:00
+
+"""
+# pylint: disable=no-member, invalid-name, missing-function-docstring, unused-import, no-name-in-module
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4e1b7a92f05"
+down_revision = "9d5dcc29453f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("availabilitystate", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("row_count", sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("availabilitystate", schema=None) as batch_op:
+        batch_op.drop_column("row_count")
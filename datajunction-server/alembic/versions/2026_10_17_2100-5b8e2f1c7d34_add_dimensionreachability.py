@@ -0,0 +1,62 @@
+"""Add dimensionreachability
+
+Revision ID: 5b8e2f1c7d34
+Revises: c4e1b7a92f05
+Create Date: 2026-10-17 21:00:00.000000+00:00
+
+"""
+# pylint: disable=no-member, invalid-name, missing-function-docstring, unused-import, no-name-in-module
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b8e2f1c7d34"
+down_revision = "c4e1b7a92f05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "dimensionreachability",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("node_revision_id", sa.BigInteger(), nullable=False),
+        sa.Column("dimension_node_id", sa.BigInteger(), nullable=False),
+        sa.Column("join_path", sa.String(), nullable=False),
+        sa.Column("role_path", sa.String(), nullable=False),
+        sa.Column("hops", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["node_revision_id"],
+            ["noderevision.id"],
+            name=op.f("fk_dimensionreachability_node_revision_id_noderevision"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["dimension_node_id"],
+            ["node.id"],
+            name=op.f("fk_dimensionreachability_dimension_node_id_node"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_dimensionreachability")),
+    )
+    with op.batch_alter_table("dimensionreachability", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_dimensionreachability_node_revision_id"),
+            ["node_revision_id"],
+            unique=False,
+        )
+        batch_op.create_index(
+            batch_op.f("ix_dimensionreachability_dimension_node_id"),
+            ["dimension_node_id"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("dimensionreachability", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_dimensionreachability_dimension_node_id"))
+        batch_op.drop_index(batch_op.f("ix_dimensionreachability_node_revision_id"))
+
+    op.drop_table("dimensionreachability")
@@ -0,0 +1,34 @@
+"""Add status to backfill
+
+Revision ID: 7a3d9c2e4b16
+Revises: 5b8e2f1c7d34
+Create Date: 2026-10-17 22:00:00.000000+00:00
+
+"""
+# pylint: disable=no-member, invalid-name, missing-function-docstring, unused-import, no-name-in-module
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7a3d9c2e4b16"
+down_revision = "5b8e2f1c7d34"
+branch_labels = None
+depends_on = None
+
+backfill_status = sa.Enum("PENDING", "SUBMITTED", "FAILED", name="backfillstatus")
+
+
+def upgrade():
+    backfill_status.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table("backfill", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("status", backfill_status, nullable=True))
+    # Backfills used to only be recorded once the query service had accepted them
+    op.execute("UPDATE backfill SET status = 'SUBMITTED'")
+
+
+def downgrade():
+    with op.batch_alter_table("backfill", schema=None) as batch_op:
+        batch_op.drop_column("status")
+    backfill_status.drop(op.get_bind(), checkfirst=True)
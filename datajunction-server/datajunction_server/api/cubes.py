@@ -24,7 +24,7 @@ from datajunction_server.models.cube import (
 from datajunction_server.models.metric import TranslatedSQL
 from datajunction_server.models.query import QueryCreate
 from datajunction_server.naming import from_amenable_name
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.utils import (
     get_and_update_current_user,
     get_query_service_client,
@@ -104,7 +104,7 @@ async def get_cube_dimension_values(  # pylint: disable=too-many-locals
     async_: bool = False,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
     validate_access: access.ValidateAccessFn = Depends(  # pylint: disable=redefined-outer-name
         validate_access,
@@ -140,7 +140,7 @@ async def get_cube_dimension_values(  # pylint: disable=too-many-locals
         submitted_query=translated_sql.sql,
         async_=async_,
     )
-    result = query_service_client.submit_query(
+    result = await query_service_client.submit_query(
         query_create,
         request_headers=request_headers,
     )
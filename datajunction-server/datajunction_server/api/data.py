@@ -3,22 +3,26 @@
 Data related APIs.
 """
 from http import HTTPStatus
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
+from accept_types import get_best_match
 from fastapi import BackgroundTasks, Depends, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 from sse_starlette.sse import EventSourceResponse
 
 from datajunction_server.api.helpers import (
     build_sql_for_multiple_metrics,
+    get_metrics_query_target,
     query_event_stream,
 )
-from datajunction_server.api.sql import get_node_sql
+from datajunction_server.api.sql import get_node_sql, get_saved_sql
+from datajunction_server.constants import ARROW_STREAM_MEDIA_TYPE
 from datajunction_server.database.availabilitystate import AvailabilityState
 from datajunction_server.database.history import ActivityType, EntityType, History
 from datajunction_server.database.node import Node, NodeRevision
+from datajunction_server.database.queryrequest import QueryBuildType, QueryRequest
 from datajunction_server.database.user import User
 from datajunction_server.errors import (
     DJException,
@@ -31,11 +35,21 @@ from datajunction_server.internal.access.authorization import (
     validate_access_requests,
 )
 from datajunction_server.internal.engines import get_engine
+from datajunction_server.internal.sql_cache import (
+    AccessRecorder,
+    check_saved_request_access,
+    get_graph_generation,
+    get_sql_build_cache,
+)
 from datajunction_server.models import access
 from datajunction_server.models.node import AvailabilityStateBase
 from datajunction_server.models.node_type import NodeType
 from datajunction_server.models.query import QueryCreate, QueryWithResults
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.models.user import UserOutput
+from datajunction_server.service_clients import (
+    ArrowQueryResults,
+    AsyncQueryServiceClient,
+)
 from datajunction_server.utils import (
     get_and_update_current_user,
     get_query_service_client,
@@ -46,6 +60,45 @@ from datajunction_server.utils import (
 settings = get_settings()
 router = SecureAPIRouter(tags=["data"])
 
+ARROW_RESPONSES = {
+    200: {
+        "content": {ARROW_STREAM_MEDIA_TYPE: {}},
+        "description": "Return results as JSON or an Arrow stream",
+    },
+}
+
+
+def accepts_arrow(request: Request) -> bool:
+    """
+    Whether the request prefers results as an Arrow stream over JSON.
+    """
+    accept = request.headers.get("accept")
+    return bool(accept) and (
+        get_best_match(accept, ["application/json", ARROW_STREAM_MEDIA_TYPE])
+        == ARROW_STREAM_MEDIA_TYPE
+    )
+
+
+async def submit_query(
+    query_service_client: AsyncQueryServiceClient,
+    query_create: QueryCreate,
+    request: Request,
+) -> Union[ArrowQueryResults, QueryWithResults]:
+    """
+    Submit a query to the query service, getting its results as an Arrow stream if the
+    request prefers them that way.
+    """
+    request_headers = dict(request.headers)
+    if accepts_arrow(request):
+        return await query_service_client.submit_query_arrow(
+            query_create,
+            request_headers=request_headers,
+        )
+    return await query_service_client.submit_query(
+        query_create,
+        request_headers=request_headers,
+    )
+
 
 @router.post("/data/{node_name}/availability/", name="Add Availability State to Node")
 async def add_availability_state(
@@ -126,6 +179,7 @@ async def add_availability_state(
         table=data.table,
         valid_through_ts=data.valid_through_ts,
         url=data.url,
+        row_count=data.row_count,
         min_temporal_partition=data.min_temporal_partition,
         max_temporal_partition=data.max_temporal_partition,
         partitions=[
@@ -157,7 +211,12 @@ async def add_availability_state(
     )
 
 
-@router.get("/data/{node_name}/", name="Get Data for a Node")
+@router.get(
+    "/data/{node_name}/",
+    response_model=QueryWithResults,
+    name="Get Data for a Node",
+    responses=ARROW_RESPONSES,  # type: ignore
+)
 async def get_data(  # pylint: disable=too-many-locals
     node_name: str,
     *,
@@ -174,7 +233,7 @@ async def get_data(  # pylint: disable=too-many-locals
     ),
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     engine_name: Optional[str] = None,
     engine_version: Optional[str] = None,
     current_user: User = Depends(get_and_update_current_user),
@@ -182,11 +241,13 @@ async def get_data(  # pylint: disable=too-many-locals
         validate_access,
     ),
     background_tasks: BackgroundTasks,
-) -> QueryWithResults:
+) -> Union[QueryWithResults, Response]:
     """
-    Gets data for a node
+    Gets data for a node.
+
+    Clients that prefer ``application/vnd.apache.arrow.stream`` get the results as an
+    Arrow stream, passed on from the query service as it is.
     """
-    request_headers = dict(request.headers)
     query, query_request = await get_node_sql(
         node_name,
         dimensions,
@@ -220,10 +281,10 @@ async def get_data(  # pylint: disable=too-many-locals
         submitted_query=query.sql,
         async_=async_,
     )
-    result = query_service_client.submit_query(
-        query_create,
-        request_headers=request_headers,
-    )
+    result = await submit_query(query_service_client, query_create, request)
+    if isinstance(result, ArrowQueryResults):
+        query_request.query_id = result.query_id
+        return Response(content=result.content, media_type=ARROW_STREAM_MEDIA_TYPE)
     query_request.query_id = result.id
 
     # Inject column info if there are results
@@ -245,7 +306,7 @@ async def get_data_stream_for_node(  # pylint: disable=R0914, R0913
     ),
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     engine_name: Optional[str] = None,
     engine_version: Optional[str] = None,
     current_user: User = Depends(get_and_update_current_user),
@@ -307,7 +368,7 @@ async def get_data_stream_for_node(  # pylint: disable=R0914, R0913
         submitted_query=query.sql,
         async_=True,
     )
-    initial_query_info = query_service_client.submit_query(
+    initial_query_info = await query_service_client.submit_query(
         query_create,
         request_headers=request_headers,
     )
@@ -333,18 +394,18 @@ async def get_data_stream_for_node(  # pylint: disable=R0914, R0913
     response_model=QueryWithResults,
     name="Get Data For Query ID",
 )
-def get_data_for_query(
+async def get_data_for_query(
     query_id: str,
     *,
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
 ) -> QueryWithResults:
     """
     Return data for a specific query ID.
     """
     request_headers = dict(request.headers)
     try:
-        return query_service_client.get_query(
+        return await query_service_client.get_query(
             query_id=query_id,
             request_headers=request_headers,
         )
@@ -355,7 +416,12 @@ def get_data_for_query(
         ) from exc
 
 
-@router.get("/data/", response_model=QueryWithResults, name="Get Data For Metrics")
+@router.get(
+    "/data/",
+    response_model=QueryWithResults,
+    name="Get Data For Metrics",
+    responses=ARROW_RESPONSES,  # type: ignore
+)
 async def get_data_for_metrics(  # pylint: disable=R0914, R0913
     metrics: List[str] = Query([]),
     dimensions: List[str] = Query([]),
@@ -366,47 +432,133 @@ async def get_data_for_metrics(  # pylint: disable=R0914, R0913
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     engine_name: Optional[str] = None,
     engine_version: Optional[str] = None,
     current_user: User = Depends(get_and_update_current_user),
     validate_access: access.ValidateAccessFn = Depends(  # pylint: disable=W0621
         validate_access,
     ),
-) -> QueryWithResults:
+) -> Union[QueryWithResults, Response]:
     """
-    Return data for a set of metrics with dimensions and filters
+    Return data for a set of metrics with dimensions and filters.
+
+    Clients that prefer ``application/vnd.apache.arrow.stream`` get the results as an
+    Arrow stream, passed on from the query service as it is.
     """
-    request_headers = dict(request.headers)
-    access_control = access.AccessControlStore(
-        validate_access=validate_access,
-        user=current_user,
-        base_verb=access.ResourceRequestVerb.READ,
+    sql_cache = get_sql_build_cache()
+    cache_key = sql_cache.key(
+        "data",
+        QueryBuildType.METRICS,
+        nodes=metrics,
+        dimensions=dimensions,
+        filters=filters,
+        engine_name=engine_name,
+        engine_version=engine_version,
+        limit=limit,
+        orderby=orderby,
     )
+    generation = await get_graph_generation(session)
+    async with sql_cache.building(cache_key):
+        if cached_query := sql_cache.get(
+            cache_key,
+            generation,
+            validate_access,
+            UserOutput.from_orm(current_user),
+        ):
+            translated_sql, query_create = cached_query
+        else:
+            # Server processes sharing the database take turns too, and then find the
+            # saved query request
+            await QueryRequest.lock(session, cache_key[1])
 
-    translated_sql, engine, catalog = await build_sql_for_multiple_metrics(
-        session,
-        metrics,
-        dimensions,
-        filters,
-        orderby,
-        limit,
-        engine_name,
-        engine_version,
-        access_control,
-    )
+            # The SQL saved for the request is only used if it reads from the same
+            # materialized cube as a build would now
+            target = await get_metrics_query_target(
+                session,
+                metrics,
+                dimensions,
+                filters,
+                engine_name,
+                engine_version,
+            )
+            other_args = {
+                "materialized_cube": target.cube_materialization.cube.name
+                if target.cube_materialization
+                else None,
+            }
+            if translated_sql := await get_saved_sql(
+                session,
+                QueryBuildType.METRICS,
+                metrics,
+                dimensions,
+                filters,
+                orderby,
+                limit,
+                engine_name,
+                engine_version,
+                other_args=other_args,
+            ):
+                access_checks = await check_saved_request_access(
+                    session,
+                    metrics,
+                    dimensions,
+                    validate_access,
+                    UserOutput.from_orm(current_user),
+                )
+                engine, catalog = target.engine, target.catalog()
+            else:
+                access_recorder = AccessRecorder(validate_access)
+                access_control = access.AccessControlStore(
+                    validate_access=access_recorder,
+                    user=current_user,
+                    base_verb=access.ResourceRequestVerb.READ,
+                )
+                translated_sql, engine, catalog = await build_sql_for_multiple_metrics(
+                    session,
+                    metrics,
+                    dimensions,
+                    filters,
+                    orderby,
+                    limit,
+                    engine_name,
+                    engine_version,
+                    access_control,
+                    target=target,
+                )
+                access_checks = access_recorder.access_checks
+                await QueryRequest.save_query_request(
+                    session=session,
+                    nodes=metrics,
+                    dimensions=dimensions,
+                    filters=filters,
+                    orderby=orderby,
+                    limit=limit,
+                    engine_name=engine_name,
+                    engine_version=engine_version,
+                    query_type=QueryBuildType.METRICS,
+                    query=translated_sql.sql,
+                    columns=[col.dict() for col in translated_sql.columns],  # type: ignore
+                    other_args=other_args,
+                )
+            await session.commit()
+            query_create = QueryCreate(
+                engine_name=engine.name,
+                catalog_name=catalog.name,
+                engine_version=engine.version,
+                submitted_query=translated_sql.sql,
+            )
+            sql_cache.set(
+                cache_key,
+                generation,
+                (translated_sql, query_create),
+                access_checks,
+            )
 
-    query_create = QueryCreate(
-        engine_name=engine.name,
-        catalog_name=catalog.name,
-        engine_version=engine.version,
-        submitted_query=translated_sql.sql,
-        async_=async_,
-    )
-    result = query_service_client.submit_query(
-        query_create,
-        request_headers=request_headers,
-    )
+    query_create.async_ = async_
+    result = await submit_query(query_service_client, query_create, request)
+    if isinstance(result, ArrowQueryResults):
+        return Response(content=result.content, media_type=ARROW_STREAM_MEDIA_TYPE)
 
     # Inject column info if there are results
     if result.results.__root__:  # pragma: no cover
@@ -424,7 +576,7 @@ async def get_data_stream_for_metrics(  # pylint: disable=R0914, R0913
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     engine_name: Optional[str] = None,
     engine_version: Optional[str] = None,
 ) -> QueryWithResults:
@@ -451,7 +603,7 @@ async def get_data_stream_for_metrics(  # pylint: disable=R0914, R0913
         async_=True,
     )
     # Submits the query, equivalent to calling POST /data/ directly
-    initial_query_info = query_service_client.submit_query(
+    initial_query_info = await query_service_client.submit_query(
         query_create,
         request_headers=request_headers,
     )
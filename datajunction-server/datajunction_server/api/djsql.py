@@ -14,7 +14,7 @@ from datajunction_server.internal.access.authentication.http import SecureAPIRou
 from datajunction_server.internal.access.authorization import validate_access
 from datajunction_server.models import access
 from datajunction_server.models.query import QueryCreate, QueryWithResults
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.utils import (
     get_and_update_current_user,
     get_query_service_client,
@@ -33,7 +33,7 @@ async def get_data_for_djsql(  # pylint: disable=R0914, R0913
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     engine_name: Optional[str] = None,
     engine_version: Optional[str] = None,
     current_user: User = Depends(get_and_update_current_user),
@@ -66,7 +66,7 @@ async def get_data_for_djsql(  # pylint: disable=R0914, R0913
         async_=async_,
     )
 
-    result = query_service_client.submit_query(
+    result = await query_service_client.submit_query(
         query_create,
         request_headers=request_headers,
     )
@@ -84,7 +84,7 @@ async def get_data_stream_for_djsql(
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     engine_name: Optional[str] = None,
     engine_version: Optional[str] = None,
     current_user: User = Depends(get_and_update_current_user),
@@ -118,7 +118,7 @@ async def get_data_stream_for_djsql(
     )
 
     # Submits the query, equivalent to calling POST /data/ directly
-    initial_query_info = query_service_client.submit_query(
+    initial_query_info = await query_service_client.submit_query(
         query_create,
         request_headers=request_headers,
     )
@@ -30,6 +30,7 @@ class Backfill:  # pylint: disable=too-few-public-methods
 
     spec: Optional[List[PartitionBackfill]]
     urls: Optional[List[str]]
+    status: Optional[str]
 
 
 @strawberry.type
@@ -10,13 +10,19 @@ import re
 import time
 import uuid
 from http import HTTPStatus
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import distinct, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.sql.operators import and_, is_
 
+from datajunction_server.construction.aggregate_navigation import (
+    CubeMaterialization,
+    choose_cube_materialization,
+    cube_column_name,
+    referenced_columns,
+)
 from datajunction_server.construction.build import (
     build_materialized_cube_node,
     build_metric_nodes,
@@ -26,6 +32,10 @@ from datajunction_server.construction.build import (
     validate_shared_dimensions,
 )
 from datajunction_server.construction.dj_query import build_dj_query
+from datajunction_server.construction.partition_coverage import (
+    Coverage,
+    get_partition_coverage,
+)
 from datajunction_server.database.attributetype import AttributeType
 from datajunction_server.database.catalog import Catalog
 from datajunction_server.database.column import Column
@@ -33,6 +43,7 @@ from datajunction_server.database.engine import Engine
 from datajunction_server.database.history import EntityType, History
 from datajunction_server.database.namespace import NodeNamespace
 from datajunction_server.database.node import (
+    CubeRelationship,
     MissingParent,
     Node,
     NodeMissingParents,
@@ -49,6 +60,7 @@ from datajunction_server.errors import (
     ErrorCode,
 )
 from datajunction_server.internal.engines import get_engine
+from datajunction_server.internal.query_watchers import get_query_watchers
 from datajunction_server.models import access
 from datajunction_server.models.attribute import RESERVED_ATTRIBUTE_NAMESPACE
 from datajunction_server.models.history import status_change_history
@@ -57,7 +69,7 @@ from datajunction_server.models.node import NodeStatus
 from datajunction_server.models.node_type import NodeType
 from datajunction_server.models.query import ColumnMetadata, QueryWithResults
 from datajunction_server.naming import LOOKUP_CHARS
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.parsing import ast
 from datajunction_server.typing import END_JOB_STATES
 from datajunction_server.utils import SEPARATOR
@@ -545,66 +557,100 @@ def validate_orderby(
         )
 
 
-async def find_existing_cube(
+async def find_materialized_cube(
     session: AsyncSession,
     metric_columns: List[Column],
     dimension_columns: List[Column],
-    materialized: bool = True,
-) -> Optional[NodeRevision]:
-    """
-    Find an existing cube with these metrics and dimensions, if any.
-    If `materialized` is set, it will only look for materialized cubes.
-    """
-    element_names = [col.name for col in (metric_columns + dimension_columns)]
-    statement = select(Node).join(
-        NodeRevision,
-        onclause=(
-            and_(
-                (Node.id == NodeRevision.node_id),
-                (Node.current_version == NodeRevision.version),
-            )
-        ),
+    filters: Optional[List[str]] = None,
+) -> Optional[CubeMaterialization]:
+    """
+    Find the cheapest materialized cube that can answer for these metrics and dimensions,
+    along with the materialization to read from. Cubes with data available that include
+    all of the metrics are candidates, and can answer if their grain includes all of the
+    dimensions, along with any dimensions that are filtered on, and if their partitions
+    cover the temporal range that is filtered on.
+    """
+    metric_names = sorted({col.name for col in metric_columns})
+    num_metrics = func.count(distinct(Column.name))  # pylint: disable=not-callable
+    cubes_with_metrics = (
+        select(CubeRelationship.cube_id)
+        .join(Column, Column.id == CubeRelationship.cube_element_id)
+        .where(Column.name.in_(metric_names))  # type: ignore
+        .group_by(CubeRelationship.cube_id)
+        .having(num_metrics == len(metric_names))
     )
-    for name in element_names:
-        statement = statement.filter(
-            NodeRevision.cube_elements.any(Column.name == name),  # type: ignore  # pylint: disable=no-member
-        ).options(
-            joinedload(Node.current).options(
-                joinedload(NodeRevision.materializations),
-                joinedload(NodeRevision.availability),
+    statement = (
+        select(NodeRevision)
+        .join(
+            Node,
+            onclause=(
+                and_(
+                    (Node.id == NodeRevision.node_id),
+                    (Node.current_version == NodeRevision.version),
+                )
             ),
         )
+        .where(
+            NodeRevision.id.in_(cubes_with_metrics),  # type: ignore
+            NodeRevision.availability.has(),
+            NodeRevision.materializations.any(),
+            is_(Node.deactivated_at, None),
+        )
+        .options(
+            selectinload(NodeRevision.materializations),
+            selectinload(NodeRevision.columns),
+            joinedload(NodeRevision.availability),
+        )
+    )
+    cubes = [
+        cube
+        for cube in (await session.execute(statement)).unique().scalars().all()
+        if get_partition_coverage(cube, filters).coverage == Coverage.FULL
+    ]
+    dimensions = {
+        cube_column_name(col.node_revision().name + SEPARATOR + col.name)  # type: ignore
+        for col in dimension_columns
+    } | referenced_columns(filters or [])
+    return choose_cube_materialization(
+        cubes,
+        [col.node_revision().name for col in metric_columns],  # type: ignore
+        dimensions,
+    )
+
+
+class MetricsQueryTarget(NamedTuple):
+    """
+    What a query for a set of metrics is built from and where it runs
+    """
 
-    existing_cubes = (await session.execute(statement)).unique().scalars().all()
-    for cube in existing_cubes:
-        if not materialized or (  # pragma: no cover
-            materialized and cube.current.materializations and cube.current.availability
-        ):
-            return cube.current
+    metric_columns: List[Column]
+    metric_nodes: List[Node]
+    dimension_columns: List[Column]
+    leading_metric_node: Node
+    cube_materialization: Optional[CubeMaterialization]
+    engine: Engine
 
-    return None
+    def catalog(self, use_materialized: bool = True) -> Catalog:
+        """
+        The catalog the query runs on, which is the materialized cube's if it's used
+        """
+        if self.cube_materialization and use_materialized:
+            return self.cube_materialization.cube.catalog
+        return self.leading_metric_node.current.catalog
 
 
-async def build_sql_for_multiple_metrics(  # pylint: disable=too-many-arguments,too-many-locals
+async def get_metrics_query_target(  # pylint: disable=too-many-arguments
     session: AsyncSession,
     metrics: List[str],
     dimensions: List[str],
-    filters: List[str] = None,
-    orderby: List[str] = None,
-    limit: Optional[int] = None,
+    filters: List[str],
     engine_name: Optional[str] = None,
     engine_version: Optional[str] = None,
-    access_control: Optional[access.AccessControlStore] = None,
-    use_materialized: bool = True,
-) -> Tuple[TranslatedSQL, Engine, Catalog]:
+) -> MetricsQueryTarget:
     """
-    Build SQL for multiple metrics. Used by both /sql and /data endpoints
+    Work out what a query for a set of metrics is built from and which engine it runs
+    on, without building it
     """
-    if not filters:
-        filters = []
-    if not orderby:
-        orderby = []
-
     metric_columns, metric_nodes, _, dimension_columns, _ = await validate_cube(
         session,
         metrics,
@@ -625,14 +671,17 @@ async def build_sql_for_multiple_metrics(  # pylint: disable=too-many-arguments,
     # Try to find a built cube that already has the given metrics and dimensions
     # The cube needs to have a materialization configured and an availability state
     # posted in order for us to use the materialized datasource
-    cube = await find_existing_cube(
+    cube_materialization = await find_materialized_cube(
         session,
         metric_columns,
         dimension_columns,
-        materialized=True,
+        filters,
     )
-    if cube:
-        catalog = await get_catalog_by_name(session, cube.availability.catalog)  # type: ignore
+    if cube_materialization:
+        catalog = await get_catalog_by_name(
+            session,
+            cube_materialization.cube.availability.catalog,  # type: ignore
+        )
         available_engines = catalog.engines + available_engines
 
     # Check if selected engine is available
@@ -646,6 +695,50 @@ async def build_sql_for_multiple_metrics(  # pylint: disable=too-many-arguments,
             f"The selected engine is not available for the node {metrics[0]}. "
             f"Available engines include: {', '.join(engine.name for engine in available_engines)}",
         )
+    return MetricsQueryTarget(
+        metric_columns=metric_columns,
+        metric_nodes=metric_nodes,
+        dimension_columns=dimension_columns,
+        leading_metric_node=leading_metric_node,  # type: ignore
+        cube_materialization=cube_materialization,
+        engine=engine,
+    )
+
+
+async def build_sql_for_multiple_metrics(  # pylint: disable=too-many-arguments,too-many-locals
+    session: AsyncSession,
+    metrics: List[str],
+    dimensions: List[str],
+    filters: List[str] = None,
+    orderby: List[str] = None,
+    limit: Optional[int] = None,
+    engine_name: Optional[str] = None,
+    engine_version: Optional[str] = None,
+    access_control: Optional[access.AccessControlStore] = None,
+    use_materialized: bool = True,
+    target: Optional[MetricsQueryTarget] = None,
+) -> Tuple[TranslatedSQL, Engine, Catalog]:
+    """
+    Build SQL for multiple metrics. Used by both /sql and /data endpoints
+    """
+    if not filters:
+        filters = []
+    if not orderby:
+        orderby = []
+
+    target = target or await get_metrics_query_target(
+        session,
+        metrics,
+        dimensions,
+        filters,
+        engine_name,
+        engine_version,
+    )
+    metric_columns, dimension_columns = target.metric_columns, target.dimension_columns
+    leading_metric_node = target.leading_metric_node
+    cube_materialization = target.cube_materialization
+    cube = cube_materialization.cube if cube_materialization else None
+    engine = target.engine
 
     validate_orderby(orderby, metrics, dimensions)
 
@@ -665,6 +758,7 @@ async def build_sql_for_multiple_metrics(  # pylint: disable=too-many-arguments,
             filters,
             orderby,
             limit,
+            cube_materialization.materialization,  # type: ignore
         )
         query_metric_columns = [
             ColumnMetadata(
@@ -694,12 +788,12 @@ async def build_sql_for_multiple_metrics(  # pylint: disable=too-many-arguments,
                 dialect=materialized_cube_catalog.engines[0].dialect,
             ),
             engine,
-            cube.catalog,
+            target.catalog(use_materialized),
         )
 
     query_ast = await build_metric_nodes(
         session,
-        metric_nodes,
+        target.metric_nodes,
         filters=filters or [],
         dimensions=dimensions or [],
         orderby=orderby or [],
@@ -733,20 +827,20 @@ async def build_sql_for_multiple_metrics(  # pylint: disable=too-many-arguments,
 async def query_event_stream(  # pylint: disable=too-many-arguments
     query: QueryWithResults,
     request_headers: Optional[Dict[str, str]],
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
     columns: List[Column],
     request,
     timeout: float = 0.0,
-    stream_delay: float = 0.5,
     retry_timeout: int = 5000,
 ):
     """
-    A generator of events from a query submitted to the query service
+    A generator of events from a query submitted to the query service. The query is
+    followed by a watcher shared with every other client streaming the same query.
     """
     starting_time = time.time()
-    # Start with query and query_next as the initial state of the query
-    query_prev = query_next = query
-    query_id = query_prev.id
+    query_id = query.id
+    if query.state in END_JOB_STATES and query.results.__root__:  # pragma: no cover
+        query.results.__root__[0].columns = columns or []
     _logger.info("sending initial event to the client for query %s", query_id)
     yield {
         "event": "message",
@@ -754,46 +848,48 @@ async def query_event_stream(  # pylint: disable=too-many-arguments
         "retry": retry_timeout,
         "data": json.dumps(query.json()),
     }
-    # Continuously check the query until it's complete
-    while not timeout or (time.time() - starting_time < timeout):
-        # Check if the client closed the connection
-        if await request.is_disconnected():  # pragma: no cover
-            _logger.error("connection closed by the client")
-            break
-
-        # Check the current state of the query
-        query_next = query_service_client.get_query(  # type: ignore # pragma: no cover
-            query_id=query_id,
-            request_headers=request_headers,
-        )
-        if query_next.state in END_JOB_STATES:  # pragma: no cover
-            _logger.info(  # pragma: no cover
-                "query end state detected (%s), sending final event to the client",
-                query_next.state,
-            )
-            if query_next.results.__root__:  # pragma: no cover
-                query_next.results.__root__[0].columns = columns or []
-            yield {
-                "event": "message",
-                "id": uuid.uuid4(),
-                "retry": retry_timeout,
-                "data": json.dumps(query_next.json()),
-            }
-            _logger.info("connection closed by the server")
-            break
-        if query_prev != query_next:  # pragma: no cover
-            _logger.info(
-                "query information has changed, sending an event to the client",
-            )
+    if query.state in END_JOB_STATES:
+        return
+
+    async with get_query_watchers().watch(
+        query_service_client,
+        query,
+        request_headers=request_headers,
+    ) as watcher:
+        updates = watcher.updates()
+        while True:
+            # Check if the client closed the connection
+            if await request.is_disconnected():  # pragma: no cover
+                _logger.error("connection closed by the client")
+                break
+            try:
+                query_next = await asyncio.wait_for(
+                    updates.__anext__(),  # pylint: disable=unnecessary-dunder-call
+                    timeout=timeout - (time.time() - starting_time)
+                    if timeout
+                    else None,
+                )
+            except (StopAsyncIteration, asyncio.TimeoutError):
+                break
+            if query_next.state in END_JOB_STATES:
+                _logger.info(
+                    "query end state detected (%s), sending final event to the client",
+                    query_next.state,
+                )
+                if query_next.results.__root__:  # pragma: no cover
+                    query_next.results.__root__[0].columns = columns or []
+            else:
+                _logger.info(
+                    "query information has changed, sending an event to the client",
+                )
             yield {
                 "event": "message",
                 "id": uuid.uuid4(),
                 "retry": retry_timeout,
                 "data": json.dumps(query_next.json()),
             }
-
-            query = query_next
-        await asyncio.sleep(stream_delay)  # pragma: no cover
+        await updates.aclose()
+    _logger.info("connection closed by the server")
 
 
 async def build_sql_for_dj_query(  # pylint: disable=too-many-arguments,too-many-locals
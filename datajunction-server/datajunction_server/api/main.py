@@ -56,7 +56,7 @@ from datajunction_server.database.engine import Engine
 from datajunction_server.database.node import NodeRevision
 from datajunction_server.database.user import User
 from datajunction_server.errors import DJException
-from datajunction_server.utils import get_settings
+from datajunction_server.utils import get_query_service_client, get_settings
 
 if TYPE_CHECKING:  # pragma: no cover
     from opentelemetry import trace
@@ -122,6 +122,15 @@ async def startup():
     FastAPICache.init(InMemoryBackend(), prefix="inmemory-cache")  # pragma: no cover
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Close the query service client's connections when the server shuts down
+    """
+    if query_service_client := get_query_service_client():  # pragma: no cover
+        await query_service_client.aclose()
+
+
 @app.exception_handler(DJException)
 async def dj_exception_handler(  # pylint: disable=unused-argument
     request: Request,
@@ -20,6 +20,12 @@ from datajunction_server.database.user import User
 from datajunction_server.errors import DJDoesNotExistException, DJException
 from datajunction_server.internal.access.authentication.http import SecureAPIRouter
 from datajunction_server.internal.access.authorization import validate_access
+from datajunction_server.internal.backfills import (
+    BackfillPlan,
+    plan_backfill,
+    run_backfill_plan,
+    upstream_valid_through_ts,
+)
 from datajunction_server.internal.materializations import (
     create_new_materialization,
     schedule_materialization_jobs,
@@ -36,9 +42,9 @@ from datajunction_server.models.materialization import (
     UpsertMaterialization,
 )
 from datajunction_server.models.node_type import NodeType
-from datajunction_server.models.partition import PartitionBackfill
+from datajunction_server.models.partition import BackfillStatus, PartitionBackfill
 from datajunction_server.naming import amenable_name
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.typing import UTCDatetime
 from datajunction_server.utils import (
     get_and_update_current_user,
@@ -84,7 +90,7 @@ async def upsert_materialization(  # pylint: disable=too-many-locals
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
     validate_access: access.ValidateAccessFn = Depends(  # pylint: disable=W0621
         validate_access,
@@ -148,11 +154,13 @@ async def upsert_materialization(  # pylint: disable=too-many-locals
             )
             await session.commit()
             await session.refresh(existing_materialization)
-        existing_materialization_info = query_service_client.get_materialization_info(
-            node_name,
-            current_revision.version,  # type: ignore
-            new_materialization.name,  # type: ignore
-            request_headers=request_headers,
+        existing_materialization_info = (
+            await query_service_client.get_materialization_info(
+                node_name,
+                current_revision.version,  # type: ignore
+                new_materialization.name,  # type: ignore
+                request_headers=request_headers,
+            )
         )
         # refresh existing materialization job
         await schedule_materialization_jobs(
@@ -245,7 +253,7 @@ async def list_node_materializations(
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
 ) -> List[MaterializationConfigInfoUnified]:
     """
     Show all materializations configured for the node, with any associated metadata
@@ -256,7 +264,7 @@ async def list_node_materializations(
     materializations = []
     for materialization in node.current.materializations:  # type: ignore
         if not materialization.deactivated_at or show_deleted:  # pragma: no cover
-            info = query_service_client.get_materialization_info(
+            info = await query_service_client.get_materialization_info(
                 node_name,
                 node.current.version,  # type: ignore
                 materialization.name,  # type: ignore
@@ -286,7 +294,7 @@ async def deactivate_node_materializations(
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
 ) -> List[MaterializationConfigInfoUnified]:
     """
@@ -295,7 +303,7 @@ async def deactivate_node_materializations(
     """
     request_headers = dict(request.headers)
     node = await Node.get_by_name(session, node_name)
-    query_service_client.deactivate_materialization(
+    await query_service_client.deactivate_materialization(
         node_name,
         materialization_name,
         request_headers=request_headers,
@@ -347,13 +355,18 @@ async def run_materialization_backfill(  # pylint: disable=too-many-locals
     materialization_name: str,
     backfill_partitions: List[PartitionBackfill],
     *,
+    incremental: bool = False,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
 ) -> MaterializationInfo:
     """
     Start a backfill for a configured materialization.
+
+    With `incremental`, only the partitions in the requested range that are missing from
+    the node's materialized data, or that are stale, are backfilled. These are submitted
+    in chunks, newest first, with a limited number of chunks being submitted at a time.
     """
     request_headers = dict(request.headers)
     node = await Node.get_by_name(
@@ -369,6 +382,10 @@ async def run_materialization_backfill(  # pylint: disable=too-many-locals
                     selectinload(Column.partition),
                 ),
                 selectinload(NodeRevision.materializations),
+                joinedload(NodeRevision.availability),
+                selectinload(NodeRevision.parents).options(
+                    joinedload(Node.current).joinedload(NodeRevision.availability),
+                ),
             ),
         ],
     )
@@ -407,31 +424,96 @@ async def run_materialization_backfill(  # pylint: disable=too-many-locals
             f"Materialization job {materialization.job} does not exist",
         )
 
-    materialization_output = clazz().run_backfill(  # type: ignore
-        materialization,
-        backfill_partitions,
-        query_service_client,
-        request_headers=request_headers,
-    )
-    backfill = Backfill(
-        materialization=materialization,
-        spec=[backfill_partition.dict() for backfill_partition in backfill_partitions],
-        urls=materialization_output.urls,
+    plan = (
+        plan_backfill(
+            node_revision,
+            backfill_partitions,
+            chunk_size=settings.backfill_chunk_size,
+            upstream_valid_through=upstream_valid_through_ts(node_revision),
+        )
+        if incremental
+        else BackfillPlan([backfill_partitions], [], [], 0)
     )
-    materialization.backfills.append(backfill)
+    backfills = [
+        Backfill(
+            materialization=materialization,
+            spec=[backfill_partition.dict() for backfill_partition in chunk],
+            urls=[],
+            status=BackfillStatus.PENDING,
+        )
+        for chunk in plan.chunks
+    ]
+    if incremental:
+        # Record the chunks before submitting them, so that any that the query service
+        # doesn't get back about are kept as pending
+        await session.commit()
+        outcomes = await run_backfill_plan(  # type: ignore
+            clazz(),
+            materialization,
+            plan,
+            query_service_client,
+            max_concurrency=settings.backfill_max_concurrency,
+            request_headers=request_headers,
+        )
+    else:
+        outcomes = [
+            (
+                backfill_partitions,
+                await clazz().run_backfill(  # type: ignore
+                    materialization,
+                    backfill_partitions,
+                    query_service_client,
+                    request_headers=request_headers,
+                ),
+            ),
+        ]
 
+    for backfill, (_, outcome) in zip(backfills, outcomes):
+        if isinstance(outcome, Exception):
+            backfill.status = BackfillStatus.FAILED
+        else:
+            backfill.status = BackfillStatus.SUBMITTED
+            backfill.urls = outcome.urls
+
+    details = {
+        "materialization": materialization_name,
+        "partition": [
+            backfill_partition.dict() for backfill_partition in backfill_partitions
+        ],
+    }
+    if incremental:
+        details["plan"] = {
+            "missing": len(plan.missing),
+            "stale": len(plan.stale),
+            "skipped": plan.skipped,
+            "chunks": [
+                {
+                    "partition": backfill.spec,
+                    "status": backfill.status,
+                }
+                for backfill in backfills
+            ],
+        }
     backfill_event = History(
         entity_type=EntityType.BACKFILL,
         node=node_name,
         activity_type=ActivityType.CREATE,
-        details={
-            "materialization": materialization_name,
-            "partition": [
-                backfill_partition.dict() for backfill_partition in backfill_partitions
-            ],
-        },
+        details=details,
         user=current_user.username,
     )
     session.add(backfill_event)
     await session.commit()
-    return materialization_output
+    if not incremental:
+        return outcomes[0][1]  # type: ignore
+
+    submitted = [
+        outcome for _, outcome in outcomes if not isinstance(outcome, Exception)
+    ]
+    if outcomes and not submitted:
+        raise outcomes[0][1]  # type: ignore
+    return MaterializationInfo(
+        output_tables=sorted(
+            {table for output in submitted for table in output.output_tables},
+        ),
+        urls=[url for output in submitted for url in output.urls],
+    )
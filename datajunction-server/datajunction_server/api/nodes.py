@@ -97,7 +97,7 @@ from datajunction_server.models.partition import (
     PartitionInput,
     PartitionType,
 )
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.dag import (
     _node_output_options,
     get_dimensions,
@@ -411,7 +411,7 @@ async def create_source(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_and_update_current_user),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     validate_access: access.ValidateAccessFn = Depends(  # pylint: disable=W0621
         validate_access,
     ),
@@ -521,7 +521,7 @@ async def create_node(
     *,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_and_update_current_user),
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     background_tasks: BackgroundTasks,
     validate_access: access.ValidateAccessFn = Depends(  # pylint: disable=W0621
         validate_access,
@@ -620,7 +620,7 @@ async def create_cube(
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
     background_tasks: BackgroundTasks,
     validate_access: access.ValidateAccessFn = Depends(  # pylint: disable=W0621
@@ -677,7 +677,7 @@ async def register_table(
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
     background_tasks: BackgroundTasks,
 ) -> NodeOutput:
@@ -704,7 +704,7 @@ async def register_table(
 
     # Use reflection to get column names and types
     _catalog = await get_catalog_by_name(session=session, name=catalog)
-    columns = query_service_client.get_columns_for_table(
+    columns = await query_service_client.get_columns_for_table(
         _catalog.name,
         schema_,
         table,
@@ -947,7 +947,7 @@ async def refresh_source_node(
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
 ) -> NodeOutput:
     """
@@ -967,7 +967,7 @@ async def refresh_source_node(
     # Get the latest columns for the source node's table from the query service
     new_columns = []
     try:
-        new_columns = query_service_client.get_columns_for_table(
+        new_columns = await query_service_client.get_columns_for_table(
             current_revision.catalog.name,
             current_revision.schema_,  # type: ignore
             current_revision.table,  # type: ignore
@@ -1079,7 +1079,7 @@ async def update_node(
     *,
     session: AsyncSession = Depends(get_session),
     request: Request,
-    query_service_client: QueryServiceClient = Depends(get_query_service_client),
+    query_service_client: AsyncQueryServiceClient = Depends(get_query_service_client),
     current_user: User = Depends(get_and_update_current_user),
     background_tasks: BackgroundTasks,
     validate_access: access.ValidateAccessFn = Depends(  # pylint: disable=W0621
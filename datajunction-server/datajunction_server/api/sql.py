@@ -4,7 +4,7 @@ SQL related APIs.
 """
 import logging
 from collections import OrderedDict
-from typing import List, Optional, Tuple, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 from fastapi import BackgroundTasks, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -21,6 +21,12 @@ from datajunction_server.database.user import User
 from datajunction_server.internal.access.authentication.http import SecureAPIRouter
 from datajunction_server.internal.access.authorization import validate_access
 from datajunction_server.internal.engines import get_engine
+from datajunction_server.internal.sql_cache import (
+    AccessRecorder,
+    check_saved_request_access,
+    get_graph_generation,
+    get_sql_build_cache,
+)
 from datajunction_server.models import access
 from datajunction_server.models.access import AccessControlStore
 from datajunction_server.models.metric import TranslatedSQL
@@ -39,8 +45,49 @@ settings = get_settings()
 router = SecureAPIRouter(tags=["sql"])
 
 
+async def get_saved_sql(
+    session: AsyncSession,
+    query_type: QueryBuildType,
+    nodes: List[str],
+    dimensions: List[str],
+    filters: List[str],
+    orderby: List[str],
+    limit: Optional[int],
+    engine_name: Optional[str],
+    engine_version: Optional[str],
+    other_args: Optional[Dict[str, Any]] = None,
+) -> Optional[TranslatedSQL]:
+    """
+    The SQL saved for a request in the query requests, if there is any
+    """
+    query_request = await QueryRequest.get_query_request(
+        session,
+        nodes=nodes,
+        dimensions=dimensions,
+        filters=filters,
+        orderby=orderby,
+        limit=limit,
+        engine_name=engine_name,
+        engine_version=engine_version,
+        query_type=query_type,
+        other_args=other_args,
+    )
+    if not query_request:
+        return None
+    engine = (
+        await get_engine(session, engine_name, engine_version)  # type: ignore
+        if engine_name
+        else None
+    )
+    return TranslatedSQL(
+        sql=query_request.query,
+        columns=query_request.columns,
+        dialect=engine.dialect if engine else None,
+    )
+
+
 @router.get("/sql/measures/", response_model=TranslatedSQL, name="Get Measures SQL")
-async def get_measures_sql_for_cube(
+async def get_measures_sql_for_cube(  # pylint: disable=too-many-locals
     metrics: List[str] = Query([]),
     dimensions: List[str] = Query([]),
     filters: List[str] = Query([]),
@@ -69,56 +116,87 @@ async def get_measures_sql_for_cube(
         get_measures_query,
     )
 
-    if query_request := await QueryRequest.get_query_request(
-        session,
+    sql_cache = get_sql_build_cache()
+    cache_key = sql_cache.key(
+        "measures",
+        QueryBuildType.MEASURES,
         nodes=metrics,
         dimensions=dimensions,
         filters=filters,
-        orderby=[],
-        limit=None,
         engine_name=engine_name,
         engine_version=engine_version,
-        query_type=QueryBuildType.MEASURES,
         other_args={"include_all_columns": include_all_columns},
-    ):
-        engine = (
-            await get_engine(session, engine_name, engine_version)  # type: ignore
-            if engine_name
-            else None
-        )
-        return TranslatedSQL(
-            sql=query_request.query,
-            columns=query_request.columns,
-            dialect=engine.dialect if engine else None,
-        )
-
-    measures_query = await get_measures_query(
-        session=session,
-        metrics=metrics,
-        dimensions=dimensions,
-        filters=filters,
-        engine_name=engine_name,
-        engine_version=engine_version,
-        current_user=current_user,
-        validate_access=validate_access,
-        include_all_columns=include_all_columns,
     )
+    generation = await get_graph_generation(session)
+    async with sql_cache.building(cache_key):
+        if cached_sql := sql_cache.get(
+            cache_key,
+            generation,
+            validate_access,
+            UserOutput.from_orm(current_user),
+        ):
+            return cached_sql
 
-    await QueryRequest.save_query_request(
-        session=session,
-        nodes=metrics,
-        dimensions=dimensions,
-        filters=filters,
-        orderby=[],
-        limit=None,
-        engine_name=engine_name,
-        engine_version=engine_version,
-        query_type=QueryBuildType.MEASURES,
-        query=measures_query.sql,
-        columns=[col.dict() for col in measures_query.columns],  # type: ignore
-        other_args={"include_all_columns": include_all_columns},
-    )
-    return measures_query
+        # Server processes sharing the database take turns too, and then find the
+        # saved query request
+        await QueryRequest.lock(session, cache_key[1])
+        if translated_sql := await get_saved_sql(
+            session,
+            QueryBuildType.MEASURES,
+            metrics,
+            dimensions,
+            filters,
+            [],
+            None,
+            engine_name,
+            engine_version,
+            other_args={"include_all_columns": include_all_columns},
+        ):
+            access_checks = await check_saved_request_access(
+                session,
+                metrics,
+                dimensions,
+                validate_access,
+                UserOutput.from_orm(current_user),
+            )
+            sql_cache.set(cache_key, generation, translated_sql, access_checks)
+            await session.commit()
+            return translated_sql
+
+        access_recorder = AccessRecorder(validate_access)
+        measures_query = await get_measures_query(
+            session=session,
+            metrics=metrics,
+            dimensions=dimensions,
+            filters=filters,
+            engine_name=engine_name,
+            engine_version=engine_version,
+            current_user=current_user,
+            validate_access=access_recorder,
+            include_all_columns=include_all_columns,
+        )
+
+        await QueryRequest.save_query_request(
+            session=session,
+            nodes=metrics,
+            dimensions=dimensions,
+            filters=filters,
+            orderby=[],
+            limit=None,
+            engine_name=engine_name,
+            engine_version=engine_version,
+            query_type=QueryBuildType.MEASURES,
+            query=measures_query.sql,
+            columns=[col.dict() for col in measures_query.columns],  # type: ignore
+            other_args={"include_all_columns": include_all_columns},
+        )
+        sql_cache.set(
+            cache_key,
+            generation,
+            measures_query,
+            access_recorder.access_checks,
+        )
+        return measures_query
 
 
 @router.get(
@@ -126,7 +204,7 @@ async def get_measures_sql_for_cube(
     response_model=List[GeneratedSQL],
     name="Get Measures SQL",
 )
-async def get_measures_sql_for_cube_v2(
+async def get_measures_sql_for_cube_v2(  # pylint: disable=too-many-locals
     metrics: List[str] = Query([]),
     dimensions: List[str] = Query([]),
     filters: List[str] = Query([]),
@@ -162,19 +240,54 @@ async def get_measures_sql_for_cube_v2(
         get_measures_query,
     )
 
-    measures_query = await get_measures_query(
-        session=session,
-        metrics=metrics,
+    sql_cache = get_sql_build_cache()
+    cache_key = sql_cache.key(
+        "measures_v2",
+        QueryBuildType.MEASURES,
+        nodes=metrics,
         dimensions=dimensions,
         filters=filters,
         engine_name=engine_name,
         engine_version=engine_version,
-        current_user=current_user,
-        validate_access=validate_access,
-        include_all_columns=include_all_columns,
-        sql_transpilation_library=settings.sql_transpilation_library,
+        other_args={
+            "include_all_columns": include_all_columns,
+            "sql_transpilation_library": settings.sql_transpilation_library,
+        },
     )
-    return measures_query
+    generation = await get_graph_generation(session)
+    async with sql_cache.building(cache_key):
+        if cached_sql := sql_cache.get(
+            cache_key,
+            generation,
+            validate_access,
+            UserOutput.from_orm(current_user) if current_user else None,
+        ):
+            return cached_sql
+
+        # Server processes sharing the database take turns building it too. The lock
+        # is held until the transaction ends.
+        await QueryRequest.lock(session, cache_key[1])
+        access_recorder = AccessRecorder(validate_access)
+        measures_query = await get_measures_query(
+            session=session,
+            metrics=metrics,
+            dimensions=dimensions,
+            filters=filters,
+            engine_name=engine_name,
+            engine_version=engine_version,
+            current_user=current_user,
+            validate_access=access_recorder,
+            include_all_columns=include_all_columns,
+            sql_transpilation_library=settings.sql_transpilation_library,
+        )
+        sql_cache.set(
+            cache_key,
+            generation,
+            measures_query,
+            access_recorder.access_checks,
+        )
+        await session.commit()
+        return measures_query
 
 
 async def build_and_save_node_sql(  # pylint: disable=too-many-locals
@@ -391,7 +504,7 @@ async def get_sql(  # pylint: disable=too-many-locals
 
 
 @router.get("/sql/", response_model=TranslatedSQL, name="Get SQL For Metrics")
-async def get_sql_for_metrics(
+async def get_sql_for_metrics(  # pylint: disable=too-many-locals
     metrics: List[str] = Query([]),
     dimensions: List[str] = Query([]),
     filters: List[str] = Query([]),
@@ -410,57 +523,87 @@ async def get_sql_for_metrics(
     Return SQL for a set of metrics with dimensions and filters
     """
 
-    access_control = access.AccessControlStore(
-        validate_access=validate_access,
-        user=current_user,
-        base_verb=access.ResourceRequestVerb.READ,
-    )
-
-    if query_request := await QueryRequest.get_query_request(
-        session,
+    sql_cache = get_sql_build_cache()
+    cache_key = sql_cache.key(
+        "metrics",
+        QueryBuildType.METRICS,
         nodes=metrics,
         dimensions=dimensions,
         filters=filters,
-        orderby=orderby,
-        limit=limit,
         engine_name=engine_name,
         engine_version=engine_version,
-        query_type=QueryBuildType.METRICS,
-    ):
-        engine = (
-            await get_engine(session, engine_name, engine_version)  # type: ignore
-            if engine_name
-            else None
-        )
-        return TranslatedSQL(
-            sql=query_request.query,
-            columns=query_request.columns,
-            dialect=engine.dialect if engine else None,
+        limit=limit,
+        orderby=orderby,
+    )
+    generation = await get_graph_generation(session)
+    async with sql_cache.building(cache_key):
+        if cached_sql := sql_cache.get(
+            cache_key,
+            generation,
+            validate_access,
+            UserOutput.from_orm(current_user),
+        ):
+            return cached_sql
+
+        access_recorder = AccessRecorder(validate_access)
+        access_control = access.AccessControlStore(
+            validate_access=access_recorder,
+            user=current_user,
+            base_verb=access.ResourceRequestVerb.READ,
         )
 
-    translated_sql, _, _ = await build_sql_for_multiple_metrics(
-        session,
-        metrics,
-        dimensions,
-        filters,
-        orderby,
-        limit,
-        engine_name,
-        engine_version,
-        access_control,
-    )
+        await QueryRequest.lock(session, cache_key[1])
+        if translated_sql := await get_saved_sql(
+            session,
+            QueryBuildType.METRICS,
+            metrics,
+            dimensions,
+            filters,
+            orderby,
+            limit,
+            engine_name,
+            engine_version,
+        ):
+            access_checks = await check_saved_request_access(
+                session,
+                metrics,
+                dimensions,
+                validate_access,
+                UserOutput.from_orm(current_user),
+            )
+            sql_cache.set(cache_key, generation, translated_sql, access_checks)
+            await session.commit()
+            return translated_sql
 
-    await QueryRequest.save_query_request(
-        session=session,
-        nodes=metrics,
-        dimensions=dimensions,
-        filters=filters,
-        orderby=orderby,
-        limit=limit,
-        engine_name=engine_name,
-        engine_version=engine_version,
-        query_type=QueryBuildType.METRICS,
-        query=translated_sql.sql,
-        columns=[col.dict() for col in translated_sql.columns],  # type: ignore
-    )
-    return translated_sql
+        translated_sql, _, _ = await build_sql_for_multiple_metrics(
+            session,
+            metrics,
+            dimensions,
+            filters,
+            orderby,
+            limit,
+            engine_name,
+            engine_version,
+            access_control,
+        )
+
+        await QueryRequest.save_query_request(
+            session=session,
+            nodes=metrics,
+            dimensions=dimensions,
+            filters=filters,
+            orderby=orderby,
+            limit=limit,
+            engine_name=engine_name,
+            engine_version=engine_version,
+            query_type=QueryBuildType.METRICS,
+            query=translated_sql.sql,
+            columns=[col.dict() for col in translated_sql.columns],  # type: ignore
+        )
+        sql_cache.set(
+            cache_key,
+            generation,
+            translated_sql,
+            access_recorder.access_checks,
+        )
+        return translated_sql
@@ -54,6 +54,25 @@ class Settings(
     # Query service
     query_service: Optional[str] = None
 
+    # Connection pool for the query service client: the most connections open at once
+    # (further requests wait for one to free up) and the most kept alive while idle
+    query_service_max_connections: int = 100
+    query_service_max_keepalive_connections: int = 20
+
+    # Seconds to wait to connect to the query service and for it to respond (None waits
+    # for as long as it takes), and the number of times to retry requests that fail to
+    # connect or come back with a 429 or 5xx status
+    query_service_connect_timeout: float = 5.0
+    query_service_timeout: Optional[float] = None
+    query_service_retries: int = 0
+
+    # How long (in seconds) to ask the query service to hold requests for a query's state
+    # until it changes, and the polling interval to back off from (up to the maximum) if
+    # the query service answers right away instead
+    query_status_wait: float = 30.0
+    query_status_poll_interval: float = 0.5
+    query_status_max_poll_interval: float = 5.0
+
     # The namespace where source nodes for registered tables should exist
     source_node_namespace: Optional[str] = "source"
 
@@ -91,6 +110,25 @@ class Settings(
     # Interval in seconds with which to expire caching of any indexes
     index_cache_expire = 60
 
+    # Maximum number of parsed query ASTs to keep in the in-process parse cache
+    parse_cache_size: int = 1024
+
+    # Maximum number of compiled node query ASTs to keep in the in-process cache
+    compiled_node_cache_size: int = 1024
+
+    # Maximum number of built SQL queries to keep in the in-process cache that sits in
+    # front of the saved query requests
+    sql_build_cache_size: int = 1024
+
+    # Backend used to parse SQL into DJ ASTs, either `antlr4` or `sqlglot` (requires the
+    # `transpilation` extra). Statements that sqlglot can't handle are parsed with ANTLR.
+    sql_parsing_backend: str = "antlr4"
+
+    # Maximum number of partitions in each chunk of an incremental backfill, and the number
+    # of chunks that are submitted to the query service at a time
+    backfill_chunk_size: int = 30
+    backfill_max_concurrency: int = 4
+
     # SQLAlchemy engine config
     db_pool_size = 20
     db_max_overflow = 20
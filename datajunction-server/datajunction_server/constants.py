@@ -16,6 +16,11 @@ DEFAULT_DIMENSION_COLUMN = "id"
 QUERY_EXECUTE_TIMEOUT = timedelta(seconds=60)
 GET_COLUMNS_TIMEOUT = timedelta(seconds=60)
 
+# media type of query results streamed in the Apache Arrow IPC format, and the header
+# with the ID of the query they belong to
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+QUERY_ID_HEADER = "X-DJ-Query-Id"
+
 AUTH_COOKIE = "__dj"
 LOGGED_IN_FLAG_COOKIE = "__djlif"
 
@@ -0,0 +1,235 @@
+"""
+Aggregate navigation: answering requests for metrics from whichever materialized cube
+can do so most cheaply, rolling its data up to the requested dimensions where needed
+"""
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from datajunction_server.database.materialization import Materialization
+from datajunction_server.database.node import NodeRevision
+from datajunction_server.errors import DJException
+from datajunction_server.models.materialization import (
+    GenericCubeConfig,
+    Measure,
+    MetricMeasures,
+)
+from datajunction_server.models.node_type import NodeType
+from datajunction_server.naming import amenable_name
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse
+from datajunction_server.utils import SEPARATOR
+
+# How values of each simple aggregation are rolled up to a coarser grain
+ROLLUP_AGGREGATIONS = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+
+def cube_column_name(name: str) -> str:
+    """
+    The name of the column in a materialized cube's table for a metric or a dimension
+    attribute, i.e., default.hard_hat.country[manager] -> default_DOT_hard_hat_DOT_country
+    """
+    return amenable_name(name.split("[")[0])
+
+
+def referenced_columns(expressions: Iterable[str]) -> Set[str]:
+    """
+    The cube columns for the metrics and dimension attributes referenced in filter or
+    order by expressions
+    """
+    columns = set()
+    for expression in expressions:
+        query = parse(f"SELECT * WHERE {expression}")
+        for col in query.select.where.find_all(ast.Column):  # type: ignore
+            identifier = col.identifier(False)
+            if SEPARATOR in identifier:
+                columns.add(cube_column_name(identifier))
+    return columns
+
+
+def metric_rollup(
+    metric: NodeRevision,
+    column: str,
+    column_type: str,
+) -> Optional[MetricMeasures]:
+    """
+    How to roll up a metric whose values are stored in a column at a finer grain. Only
+    metrics that decompose into a single simple aggregation (SUM, COUNT, MIN or MAX) can
+    be rolled up, e.g., a count is rolled up by summing the stored counts.
+    """
+    from datajunction_server.internal.materializations import (  # pylint: disable=import-outside-toplevel
+        decompose_expression,
+    )
+
+    try:
+        combiner, measures = decompose_expression(
+            parse(metric.query).select.projection[0],  # type: ignore
+        )
+    except DJException:
+        return None
+    if not (
+        isinstance(combiner, ast.Function)
+        and len(measures) == 1
+        and combiner.alias_or_name.name.lower() in ROLLUP_AGGREGATIONS
+        and isinstance(combiner.args[0], ast.Column)
+    ):
+        return None
+    aggregation = ROLLUP_AGGREGATIONS[combiner.alias_or_name.name.lower()]
+    return MetricMeasures(
+        metric=metric.name,
+        measures=[
+            Measure(name=column, field_name=column, agg=aggregation, type=column_type),
+        ],
+        combiner=f"{aggregation}({column})",
+    )
+
+
+def get_metric_combiners(
+    cube: NodeRevision,
+    materialization: Materialization,
+) -> Dict[str, MetricMeasures]:
+    """
+    How each of the cube's metrics is computed from a materialization's table, keyed by
+    metric name.
+
+    Measures cubes store the measures of each metric along with the expression that
+    combines them into the metric, which can be evaluated at the cube's grain or any
+    coarser one. Metrics cubes store the metric values themselves, which can only be
+    used for metrics that can be rolled up.
+    """
+    cube_config = GenericCubeConfig.parse_obj(materialization.config)
+    metric_nodes = {
+        element.name: node_revision
+        for element, node_revision in cube.cube_elements_with_nodes()
+        if node_revision and node_revision.type == NodeType.METRIC
+    }
+    if cube_config.measures:
+        return {
+            # Older materializations key the measures by the metrics' column names
+            (
+                metric_nodes[key].name
+                if materialization.name == "default" and key in metric_nodes
+                else key
+            ): metric_measures
+            for key, metric_measures in cube_config.measures.items()
+        }
+
+    metrics_by_name = {metric.name: metric for metric in metric_nodes.values()}
+    combiners = {}
+    for column in cube_config.metrics or []:
+        metric = metrics_by_name.get(column.node)  # type: ignore
+        rollup = metric_rollup(metric, column.name, column.type) if metric else None
+        if rollup:
+            combiners[rollup.metric] = rollup
+    return combiners
+
+
+class CubeMaterialization(NamedTuple):
+    """
+    The materialization of a cube that produced the table its data is available in,
+    along with the dimension attributes the table is grouped by (its grain), how each
+    metric is computed from the table, and the number of rows in the table if known
+    """
+
+    cube: NodeRevision
+    materialization: Materialization
+    grain: FrozenSet[str]
+    metrics: Dict[str, MetricMeasures]
+    row_count: Optional[int]
+
+    def can_answer(self, metrics: Iterable[str], dimensions: Iterable[str]) -> bool:
+        """
+        Whether the table can answer for the metrics when rolled up to the dimension
+        attributes (given by their cube column names)
+        """
+        return all(metric in self.metrics for metric in metrics) and set(
+            dimensions,
+        ).issubset(self.grain)
+
+    def cost(self) -> Tuple[bool, int, int, str, str]:
+        """
+        The relative cost of answering from the table. Tables with fewer rows are cheaper
+        to scan, and where row counts aren't known, tables with coarser grains are assumed
+        to have fewer rows.
+        """
+        return (
+            self.row_count is None,
+            self.row_count or 0,
+            len(self.grain),
+            self.cube.name,
+            self.materialization.name,
+        )
+
+
+def materialization_table(
+    cube: NodeRevision,
+    materialization: Materialization,
+) -> Optional[str]:
+    """
+    The table that a cube materialization writes to, where its config determines it.
+    Druid materializations ingest into a datasource named after the cube, along with
+    the configured prefix and suffix.
+    """
+    config = materialization.config or {}
+    if not {"druid", "prefix", "suffix"} & set(config):
+        return None
+    return (
+        (config.get("prefix") or "")
+        + amenable_name(cube.name)
+        + (config.get("suffix") or "")
+    )
+
+
+def index_cube_materializations(cube: NodeRevision) -> List[CubeMaterialization]:
+    """
+    Index the active materialization of a cube that produced the table its data is
+    available in, if the cube has data available.
+
+    The availability only describes one table, so the other materializations can't be
+    answered from. Where a cube has several active materializations, the one that
+    produced the table is the one that writes to it. If that can't be told, none of
+    them are used.
+    """
+    if not cube.availability:
+        return []
+    active = [
+        materialization
+        for materialization in cube.materializations
+        if not materialization.deactivated_at
+    ]
+    if len(active) > 1:
+        active = [
+            materialization
+            for materialization in active
+            if materialization_table(cube, materialization) == cube.availability.table
+        ][:1]
+    grain = frozenset(
+        cube_column_name(dimension) for dimension in cube.cube_dimensions()
+    )
+    return [
+        CubeMaterialization(
+            cube=cube,
+            materialization=materialization,
+            grain=grain,
+            metrics=get_metric_combiners(cube, materialization),
+            row_count=cube.availability.row_count,
+        )
+        for materialization in active
+    ]
+
+
+def choose_cube_materialization(
+    cubes: Iterable[NodeRevision],
+    metrics: List[str],
+    dimensions: Iterable[str],
+) -> Optional[CubeMaterialization]:
+    """
+    Choose the cheapest cube materialization that can answer for the metrics (given by
+    their names) at the level of the dimension attributes (given by their cube column
+    names), if there is any
+    """
+    candidates = [
+        candidate
+        for cube in cubes
+        for candidate in index_cube_materializations(cube)
+        if candidate.can_answer(metrics, dimensions)
+    ]
+    return min(candidates, key=CubeMaterialization.cost) if candidates else None
@@ -9,9 +9,19 @@ from typing import DefaultDict, Deque, Dict, List, Optional, Set, Tuple, Union,
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from datajunction_server.construction.aggregate_navigation import (
+    cube_column_name,
+    get_metric_combiners,
+)
+from datajunction_server.construction.partition_coverage import (
+    Coverage,
+    get_partition_coverage,
+)
+from datajunction_server.construction.sketches import SketchType
 from datajunction_server.construction.utils import to_namespaced_name
 from datajunction_server.database import Engine
 from datajunction_server.database.column import Column
+from datajunction_server.database.materialization import Materialization
 from datajunction_server.database.node import Node, NodeRevision
 from datajunction_server.database.user import User
 from datajunction_server.errors import (
@@ -24,7 +34,6 @@ from datajunction_server.internal.engines import get_engine
 from datajunction_server.models import access
 from datajunction_server.models.column import SemanticType
 from datajunction_server.models.engine import Dialect
-from datajunction_server.models.materialization import GenericCubeConfig
 from datajunction_server.models.metric import TranslatedSQL
 from datajunction_server.models.node import BuildCriteria
 from datajunction_server.models.node_type import NodeType
@@ -33,6 +42,7 @@ from datajunction_server.sql.dag import get_dimensions, get_shared_dimensions
 from datajunction_server.sql.parsing.ast import CompileContext
 from datajunction_server.sql.parsing.backends.antlr4 import ast, parse
 from datajunction_server.sql.parsing.types import (
+    BinaryType,
     ColumnType,
     DoubleType,
     LongType,
@@ -463,15 +473,19 @@ async def _build_tables_on_select(
     for node, tbls in tables.items():
         await session.refresh(node, ["dimension_links"])
 
-        # Try to find a physical table attached to this node, if one exists.
+        # Try to find a physical table attached to this node, if one exists. If it only
+        # has part of the requested temporal range, the rest is built from the node.
         physical_table = cast(
             Optional[ast.Table],
-            _get_node_table(node, build_criteria),
+            _get_node_table(node, build_criteria, filters=filters, allow_partial=True),
         )
+        partition_coverage = get_partition_coverage(node, filters)
 
         for tbl in tbls:
             # If no attached physical table was found, recursively build the node
-            if physical_table is None:
+            if physical_table is None or (
+                partition_coverage.coverage == Coverage.PARTIAL
+            ):
                 node_query = parse(cast(str, node.query))
                 if hash(node_query) in memoized_queries:  # pragma: no cover
                     query_ast = memoized_queries[hash(node_query)]  # type: ignore
@@ -487,6 +501,13 @@ async def _build_tables_on_select(
                     )
                     memoized_queries[hash(node_query)] = query_ast
 
+                if physical_table is not None:
+                    query_ast = partition_coverage.union_with_live(
+                        node,
+                        physical_table,
+                        query_ast,  # type: ignore
+                    )
+
                 alias = amenable_name(node.name)
                 node_ast = ast.Alias(ast.Name(alias), child=query_ast, as_=True)  # type: ignore
                 query_ast.parenthesized = True  # type: ignore
@@ -818,9 +839,13 @@ def _get_node_table(
     node: NodeRevision,
     build_criteria: Optional[BuildCriteria] = None,
     as_select: bool = False,
+    filters: Optional[List[str]] = None,
+    allow_partial: bool = False,
 ) -> Optional[Union[ast.Select, ast.Table]]:
     """
-    If a node has a materialization available, return the materialized table
+    If a node has a materialization available, return the materialized table. Where the
+    filters request a temporal range, the table is only used if its partitions cover the
+    range, or part of it when `allow_partial` is set.
     """
     table = None
     can_use_materialization = (
@@ -855,6 +880,8 @@ def _get_node_table(
         and node.availability.is_available(
             criteria=build_criteria,
         )
+        and get_partition_coverage(node, filters).coverage
+        in ((Coverage.FULL, Coverage.PARTIAL) if allow_partial else (Coverage.FULL,))
     ):  # pragma: no cover
         table = ast.Table(
             ast.Name(
@@ -1407,53 +1434,63 @@ def build_temp_select(temp_query: str):
     return temp_select
 
 
-def build_materialized_cube_node(
+def use_cube_columns(expression: ast.Node) -> None:
+    """
+    Point the references to metrics and dimension attributes in an expression at their
+    columns in a materialized cube's table
+    """
+    for col in list(expression.find_all(ast.Column)):
+        identifier = col.identifier(False)
+        if SEPARATOR in identifier:
+            col.name = ast.Name(cube_column_name(identifier))
+
+
+def build_materialized_cube_node(  # pylint: disable=too-many-arguments
     selected_metrics: List[Column],
     selected_dimensions: List[Column],
     cube: NodeRevision,
     filters: List[str] = None,
     orderby: List[str] = None,
     limit: Optional[int] = None,
+    materialization: Optional[Materialization] = None,
 ) -> ast.Query:
     """
-    Build query for a materialized cube node
+    Build query for a materialized cube node, reading from the given materialization or
+    the cube's first one, which should be the one that produced the cube's available
+    table. The cube's table is rolled up to the selected dimensions.
     """
     combined_ast: ast.Query = ast.Query(
         select=ast.Select(from_=ast.From(relations=[])),
         ctes=[],
     )
-    materialization_config = cube.materializations[0]
-    cube_config = GenericCubeConfig.parse_obj(materialization_config.config)
-
-    if materialization_config.name == "default":
-        # TODO: remove after we migrate old Druid materializations  # pylint: disable=fixme
-        selected_metric_keys = [
-            col.name for col in selected_metrics
-        ]  # pragma: no cover
-    else:
-        selected_metric_keys = [
-            col.node_revision().name for col in selected_metrics  # type: ignore
-        ]
+    materialization_config = materialization or cube.materializations[0]
+    metric_combiners = get_metric_combiners(cube, materialization_config)
 
     # Assemble query for materialized cube based on the previously saved measures
     # combiner expression for each metric
-    for metric_key in selected_metric_keys:
-        if metric_key in cube_config.measures:  # pragma: no cover
-            metric_measures = cube_config.measures[metric_key]
+    for metric_key in [
+        col.node_revision().name for col in selected_metrics  # type: ignore
+    ]:
+        if metric_key in metric_combiners:  # pragma: no cover
+            metric_measures = metric_combiners[metric_key]
             measures_combiner_ast = parse(f"SELECT {metric_measures.combiner}")
+            # Measures that are sketches hold the serialized sketch rather than a
+            # value of the measure's type, which the sketch combiners take as is
             measures_type_lookup = {
                 (
                     measure.name
                     if materialization_config.name == "default"
                     else measure.field_name
-                ): measure.type
+                ): (
+                    BinaryType()
+                    if measure.agg.lower() in set(SketchType)
+                    else ColumnType(measure.type)
+                )
                 for measure in metric_measures.measures
             }
             for col in measures_combiner_ast.find_all(ast.Column):
                 col.add_type(
-                    ColumnType(
-                        measures_type_lookup[col.alias_or_name.name],  # type: ignore
-                    ),
+                    measures_type_lookup[col.alias_or_name.name],  # type: ignore
                 )
             combined_ast.select.projection.extend(
                 [
@@ -1482,6 +1519,7 @@ def build_materialized_cube_node(
         temp_select = build_temp_select(
             f"select * where {filter_}",
         )
+        use_cube_columns(temp_select.where)  # type: ignore
         filter_asts.append(temp_select.where)
 
     if filter_asts:  # pragma: no cover
@@ -1493,6 +1531,7 @@ def build_materialized_cube_node(
         temp_select = build_temp_select(
             f"select * order by {','.join(orderby)}",
         )
+        use_cube_columns(temp_select.organization)  # type: ignore
         combined_ast.select.organization = temp_select.organization
 
     # Add limit
@@ -9,6 +9,11 @@ from typing import DefaultDict, Dict, List, Optional, Union, cast
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from datajunction_server.construction.cache import get_compiled_node_cache
+from datajunction_server.construction.partition_coverage import (
+    Coverage,
+    get_partition_coverage,
+)
 from datajunction_server.construction.utils import to_namespaced_name
 from datajunction_server.database import Engine
 from datajunction_server.database.dimensionlink import DimensionLink
@@ -791,12 +796,10 @@ def build_requested_dimensions_columns(
 
 async def compile_node_ast(session, node_revision: NodeRevision) -> ast.Query:
     """
-    Parses the node's query into an AST and compiles it.
+    Parses the node's query into an AST and compiles it. Compiled ASTs are cached by
+    node revision, so this returns a copy of the cached AST when there is one.
     """
-    node_ast = parse(node_revision.query)
-    ctx = CompileContext(session, DJException())
-    await node_ast.compile(ctx)
-    return node_ast
+    return await get_compiled_node_cache().get_or_compile(session, node_revision)
 
 
 def build_dimension_attribute(
@@ -931,17 +934,22 @@ async def build_ast(  # pylint: disable=too-many-arguments,too-many-locals
         for ref_expr in reference_expressions:
 
             # Try to find a materialized table attached to this node, if one exists.
+            # If it only has part of the requested temporal range, the rest is built
+            # from the node.
             physical_table = cast(
                 Optional[ast.Table],
                 get_table_for_node(
                     referenced_node,
                     build_criteria=build_criteria,
+                    filters=filters,
+                    allow_partial=True,
                 ),
             )
-            if not physical_table:
+            partition_coverage = get_partition_coverage(referenced_node, filters)
+            if not physical_table or partition_coverage.coverage == Coverage.PARTIAL:
                 # Build a new CTE with the query AST if there is no materialized table
                 if referenced_node.name not in ctes_mapping:
-                    node_query = parse(cast(str, referenced_node.query))
+                    node_query = await compile_node_ast(session, referenced_node)
                     query_ast = await build_ast(  # type: ignore
                         session,
                         referenced_node,
@@ -967,6 +975,14 @@ async def build_ast(  # pylint: disable=too-many-arguments,too-many-locals
                     _columns=reference_cte._columns,  # pylint: disable=protected-access
                     _dj_node=referenced_node,
                 )
+                if physical_table:
+                    query_ast = partition_coverage.union_with_live(
+                        referenced_node,
+                        physical_table,
+                        query_ast,
+                    )
+                    query_ast.alias = ast.Name(amenable_name(referenced_node.name))
+                    query_ast.parenthesized = True
             else:
                 # Otherwise use the materialized table and apply filters where possible
                 alias = amenable_name(referenced_node.name)
@@ -1081,11 +1097,15 @@ def get_dj_node_references_from_select(
 def get_table_for_node(
     node: NodeRevision,
     build_criteria: Optional[BuildCriteria] = None,
+    filters: Optional[List[str]] = None,
+    allow_partial: bool = False,
 ) -> Optional[ast.Table]:
     """
     If a node has a materialized table available, return the materialized table.
     Source nodes should always have an associated table, whereas for all other nodes
-    we can check the materialization type.
+    we can check the materialization type. Where the filters request a temporal range,
+    the materialized table is only used if its partitions cover the range, or part of
+    it when `allow_partial` is set.
     """
     table = None
     can_use_materialization = (
@@ -1112,6 +1132,8 @@ def get_table_for_node(
         and node.availability.is_available(
             criteria=build_criteria,
         )
+        and get_partition_coverage(node, filters).coverage
+        in ((Coverage.FULL, Coverage.PARTIAL) if allow_partial else (Coverage.FULL,))
     ):  # pragma: no cover
         table = ast.Table(
             ast.Name(
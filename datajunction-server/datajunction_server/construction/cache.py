@@ -0,0 +1,199 @@
+"""
+A process-wide cache of compiled node query ASTs
+"""
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from cachetools import LRUCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from datajunction_server.database.node import NodeRevision
+from datajunction_server.errors import DJException
+from datajunction_server.models.node_type import NodeType
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse
+
+# A node revision's id, version and last update time. Versions alone don't identify a
+# revision, since a node that's deleted and created again starts over at v1.0.
+RevisionStamp = Tuple[int, Optional[str], datetime]
+
+# The kinds of DJ nodes that tables in node queries are compiled against
+TABLE_NODE_TYPES = {NodeType.SOURCE, NodeType.TRANSFORM, NodeType.DIMENSION}
+
+
+def revision_stamp(node_revision: NodeRevision) -> RevisionStamp:
+    """
+    The stamp that identifies a node revision
+    """
+    return node_revision.id, node_revision.version, node_revision.updated_at
+
+
+class CompiledNode(NamedTuple):
+    """
+    A node revision's compiled query AST, held without its references to DJ nodes, and
+    the revisions of the DJ nodes that its tables were compiled against
+    """
+
+    stamp: RevisionStamp
+    query: ast.Query
+    tables: Dict[str, Optional[RevisionStamp]]
+
+
+class CompiledNodeCacheInfo(NamedTuple):
+    """
+    Statistics on the compiled node cache
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CompiledNodeCache:
+    """
+    A size-bounded LRU cache of compiled node query ASTs, keyed by node name and version.
+
+    The cache holds on to the compiled ASTs without the DJ nodes (ORM objects) that their
+    tables reference, since those belong to the session that compiled them. Each copy
+    handed out has its tables bound to the DJ nodes loaded in the caller's session, and
+    an entry is only used if those are still the revisions the AST was compiled against.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(node_revision: NodeRevision) -> Tuple[str, Optional[str]]:
+        """
+        The cache key for a node revision
+        """
+        return node_revision.name, node_revision.version
+
+    async def get_or_compile(
+        self,
+        session: AsyncSession,
+        node_revision: NodeRevision,
+    ) -> ast.Query:
+        """
+        Returns a copy of the node revision's compiled query AST, compiling it and caching
+        the result if it isn't already cached (or was compiled against other revisions
+        of its upstream nodes than the current ones).
+        """
+        key = self.key(node_revision)
+        with self._lock:
+            compiled = self._cache.get(key)
+        if compiled is not None and compiled.stamp == revision_stamp(node_revision):
+            query = await self.bind(session, compiled)
+            if query is not None:
+                with self._lock:
+                    self.hits += 1
+                return query
+
+        with self._lock:
+            self.misses += 1
+        query = parse(node_revision.query)
+        ctx = ast.CompileContext(session, DJException())
+        await query.compile(ctx)
+        if compiled := self.unbind(node_revision, query):
+            with self._lock:
+                self._cache[key] = compiled
+        return query
+
+    @staticmethod
+    def unbind(
+        node_revision: NodeRevision,
+        query: ast.Query,
+    ) -> Optional[CompiledNode]:
+        """
+        A copy of the compiled query AST without its references to DJ nodes. Queries with
+        columns that were resolved through the dimensions graph aren't cached, as those
+        columns' tables hold on to the dimension links that were followed.
+        """
+        tables = list(query.find_all(ast.Table))
+        table_ids = {id(table) for table in tables}
+        if any(
+            isinstance(column.table, ast.Table) and id(column.table) not in table_ids
+            for column in query.find_all(ast.Column)
+        ):
+            return None
+        stamps = {
+            table.identifier(quotes=False): (
+                revision_stamp(table.dj_node) if table.dj_node else None
+            )
+            for table in tables
+        }
+        query = query.copy()
+        for table in query.find_all(ast.Table):
+            table.set_dj_node(None)
+        return CompiledNode(revision_stamp(node_revision), query, stamps)
+
+    @staticmethod
+    async def bind(
+        session: AsyncSession,
+        compiled: CompiledNode,
+    ) -> Optional[ast.Query]:
+        """
+        A copy of the cached query AST with its tables bound to the DJ nodes loaded in
+        the session, or None if those aren't the revisions it was compiled against
+        """
+        ctx = ast.CompileContext(session, DJException())
+        await ctx.load_dj_nodes(set(compiled.tables))
+        revisions = {}
+        for name, stamp in compiled.tables.items():
+            node = ctx.dj_nodes[name]
+            revision = node.current if node and node.type in TABLE_NODE_TYPES else None
+            if (revision_stamp(revision) if revision else None) != stamp:
+                return None
+            revisions[name] = revision
+
+        query = compiled.query.copy()
+        for table in query.find_all(ast.Table):
+            table.set_dj_node(revisions[table.identifier(quotes=False)])
+        return query
+
+    def invalidate(self, node_name: str) -> None:
+        """
+        Drops the cached query ASTs of all revisions of a node
+        """
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == node_name]:
+                del self._cache[key]
+
+    def info(self) -> CompiledNodeCacheInfo:
+        """
+        Returns hit/miss counters and the current size of the cache
+        """
+        with self._lock:
+            return CompiledNodeCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=int(self._cache.maxsize),
+                currsize=len(self._cache),
+            )
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets its counters
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+@lru_cache(maxsize=None)
+def get_compiled_node_cache() -> CompiledNodeCache:
+    """
+    Get the process-wide compiled node cache
+    """
+    from datajunction_server.utils import (  # pylint: disable=import-outside-toplevel
+        get_settings,
+    )
+
+    return CompiledNodeCache(maxsize=get_settings().compiled_node_cache_size)
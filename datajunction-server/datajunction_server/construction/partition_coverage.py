@@ -0,0 +1,333 @@
+"""
+Partition coverage of materialized tables, i.e., whether the temporal range that a
+request filters on has been materialized in full, in part, or not at all
+"""
+from typing import List, NamedTuple, Optional, Set, Union
+
+from sqlalchemy import inspect
+
+from datajunction_server.database.column import Column
+from datajunction_server.database.node import NodeRevision
+from datajunction_server.enum import StrEnum
+from datajunction_server.models.node_type import NodeType
+from datajunction_server.naming import amenable_name
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse
+from datajunction_server.sql.parsing.types import IntegerBase
+from datajunction_server.utils import SEPARATOR
+
+PartitionValue = Union[None, int, str, List[str]]
+
+# The comparison that results from swapping its operands, i.e., 20230101 <= col is
+# the same as col >= 20230101
+FLIPPED_COMPARISONS = {
+    ast.BinaryOpKind.Gt: ast.BinaryOpKind.Lt,
+    ast.BinaryOpKind.GtEq: ast.BinaryOpKind.LtEq,
+    ast.BinaryOpKind.Lt: ast.BinaryOpKind.Gt,
+    ast.BinaryOpKind.LtEq: ast.BinaryOpKind.GtEq,
+    ast.BinaryOpKind.Eq: ast.BinaryOpKind.Eq,
+}
+
+
+class Coverage(StrEnum):
+    """
+    How much of a requested temporal range a materialized table covers
+    """
+
+    FULL = "full"
+    PARTIAL = "partial"
+    NONE = "none"
+
+
+def partition_value(value: PartitionValue) -> Optional[str]:
+    """
+    Normalize a temporal partition value so that values can be compared with each other,
+    i.e., ["2023", "01", "25"], "2023-01-25" and 20230125 all become "20230125"
+    """
+    if value is None or value == []:
+        return None
+    if isinstance(value, list):
+        value = "".join(str(part) for part in value if part is not None)
+    return "".join(char for char in str(value) if char.isalnum()) or None
+
+
+def partition_literal(column: Column, value: PartitionValue) -> Optional[ast.Value]:
+    """
+    The literal for a temporal partition value of a column, if the value is of a single
+    partition column
+    """
+    if isinstance(value, list):
+        if len(value) != 1:
+            return None
+        value = value[0]
+    if value is None:
+        return None
+    value = str(value)
+    if isinstance(column.type, IntegerBase) and value.isdigit():
+        return ast.Number(int(value))
+    return ast.String(f"'{value}'")
+
+
+class TemporalRange(NamedTuple):
+    """
+    An inclusive range of temporal partition values, where a missing bound leaves that
+    end of the range open
+    """
+
+    lower: Optional[str] = None
+    upper: Optional[str] = None
+
+    def narrow(
+        self,
+        lower: Optional[str] = None,
+        upper: Optional[str] = None,
+    ) -> "TemporalRange":
+        """
+        Narrow the range with additional bounds
+        """
+        return TemporalRange(
+            max(filter(None, (self.lower, lower)), default=None),
+            min(filter(None, (self.upper, upper)), default=None),
+        )
+
+
+class PartitionCoverage(NamedTuple):
+    """
+    The coverage of a request by a node's materialized table, along with the predicate
+    on its temporal partition column that holds for the materialized range, if the
+    materialized table only partly covers the request
+    """
+
+    coverage: Coverage
+    materialized_range: Optional[ast.Between] = None
+
+    def union_with_live(
+        self,
+        node: NodeRevision,
+        materialized: ast.Table,
+        live: ast.TableExpression,
+    ) -> ast.Query:
+        """
+        Combine the materialized table for the range of temporal partitions it has with
+        the live computation of the node (a query, or a reference to a CTE) for the rest
+        of the requested range
+        """
+        alias = amenable_name(node.name)
+        if isinstance(live, ast.Query):
+            live.parenthesized = True
+            live = ast.Alias(  # type: ignore
+                ast.Name(f"{alias}_live"),
+                child=live,
+                as_=True,
+            )
+
+        def projection() -> List[ast.Column]:
+            return [ast.Column(ast.Name(col.name)) for col in node.columns]
+
+        outside_range = self.materialized_range.copy()  # type: ignore
+        outside_range.negated = True
+        union = ast.Query(
+            select=ast.Select(
+                projection=projection(),  # type: ignore
+                from_=ast.From(relations=[ast.Relation(materialized)]),
+                where=self.materialized_range.copy(),  # type: ignore
+                set_op=ast.SetOp(
+                    kind="UNION ALL",
+                    right=ast.Select(
+                        projection=projection(),  # type: ignore
+                        from_=ast.From(relations=[ast.Relation(live)]),
+                        where=outside_range,
+                    ),
+                ),
+            ),
+        )
+        union.parenthesized = True
+        return ast.Query(
+            select=ast.Select(
+                projection=projection(),  # type: ignore
+                from_=ast.From(
+                    relations=[
+                        ast.Relation(
+                            ast.Alias(  # type: ignore
+                                ast.Name(f"{alias}_coverage"),
+                                child=union,
+                                as_=True,
+                            ),
+                        ),
+                    ],
+                ),
+            ),
+        )
+
+
+def temporal_partition_column(node: NodeRevision) -> Optional[Column]:
+    """
+    The column of the node that its materialized table is partitioned on by time. This
+    is the temporal partition recorded on the availability state if it's one of the
+    node's columns, or otherwise the node's own temporal partition column.
+    """
+    columns = {col.name: col for col in node.columns}
+    partitions = node.availability.temporal_partitions if node.availability else None
+    if partitions and len(partitions) == 1 and partitions[0] in columns:
+        return columns[partitions[0]]
+    temporal_columns = node.temporal_partition_columns()
+    return temporal_columns[0] if temporal_columns else None
+
+
+def column_references(node: NodeRevision, column: Column) -> Set[str]:
+    """
+    The names that requests can refer to a node's column by: the column on the node,
+    or the dimension attributes that the column links to. Dimension links are only
+    looked at if they've been loaded.
+    """
+    references = {f"{node.name}{SEPARATOR}{column.name}"}
+    if SEPARATOR in column.name:
+        # Cube columns are named after the dimension attributes they hold
+        references.add(column.name)
+    if column.dimension and column.dimension_column:
+        references.add(
+            f"{column.dimension.name}{SEPARATOR}{column.dimension_column}",
+        )
+    if "dimension_links" not in inspect(node).unloaded:
+        for link in node.dimension_links:
+            references.update(
+                dimension_attribute
+                for dimension_attribute, foreign_key in (
+                    link.foreign_keys_reversed.items()
+                )
+                if foreign_key.split(SEPARATOR)[-1] == column.name
+            )
+    return references
+
+
+def _literal_value(expr: ast.Expression) -> Optional[str]:
+    if isinstance(expr, (ast.Number, ast.String)):
+        return partition_value(str(expr.value))
+    return None
+
+
+def _conjuncts(expr: ast.Expression) -> List[ast.Expression]:
+    if isinstance(expr, ast.BinaryOp) and expr.op in (
+        ast.BinaryOpKind.And,
+        ast.BinaryOpKind.LogicalAnd,
+    ):
+        return _conjuncts(expr.left) + _conjuncts(expr.right)
+    return [expr]
+
+
+def requested_range(
+    filters: List[str],
+    references: Set[str],
+) -> Optional[TemporalRange]:
+    """
+    The temporal range that the filters restrict a column to, given the names it can be
+    referred to by, or None if they don't restrict it.
+
+    Only comparisons of the column with literals that all rows must satisfy are taken
+    into account, so the range may be wider than what's requested but never narrower.
+    """
+    range_ = TemporalRange()
+    restricted = False
+    for filter_ in filters:
+        where = parse(f"SELECT * WHERE {filter_}").select.where
+        for conjunct in _conjuncts(where):  # type: ignore
+            if isinstance(conjunct, ast.Between):
+                if (
+                    not conjunct.negated
+                    and isinstance(conjunct.expr, ast.Column)
+                    and conjunct.expr.identifier(False) in references
+                ):
+                    range_ = range_.narrow(
+                        _literal_value(conjunct.low),
+                        _literal_value(conjunct.high),
+                    )
+                    restricted = True
+                continue
+            if (
+                not isinstance(conjunct, ast.BinaryOp)
+                or conjunct.op not in FLIPPED_COMPARISONS
+            ):
+                continue
+            column, value, op = conjunct.left, conjunct.right, conjunct.op
+            if isinstance(value, ast.Column):
+                column, value, op = value, column, FLIPPED_COMPARISONS[op]
+            literal = _literal_value(value)
+            if not (
+                isinstance(column, ast.Column)
+                and column.identifier(False) in references
+                and literal
+            ):
+                continue
+            if op in (ast.BinaryOpKind.Gt, ast.BinaryOpKind.GtEq):
+                range_ = range_.narrow(lower=literal)
+            elif op in (ast.BinaryOpKind.Lt, ast.BinaryOpKind.LtEq):
+                range_ = range_.narrow(upper=literal)
+            else:
+                range_ = range_.narrow(literal, literal)
+            restricted = True
+    return range_ if restricted else None
+
+
+def get_partition_coverage(  # pylint: disable=too-many-return-statements
+    node: NodeRevision,
+    filters: Optional[List[str]] = None,
+) -> PartitionCoverage:
+    """
+    How much of the temporal range requested by the filters the node's materialized
+    table covers, going by the range of temporal partitions recorded on its
+    availability state.
+
+    Requests that don't filter on the temporal partition, and tables without a recorded
+    range, are considered covered, as are bounds in a different format than the recorded
+    range (i.e., a year compared to a date), since they can't be checked. Tables that
+    only partly cover a request, but whose range can't be expressed as a predicate on a
+    single column, are considered not to cover it.
+
+    Source nodes are always read from their tables as they are, since there's no query
+    to build the rest of a range from, so their coverage isn't worked out.
+    """
+    availability = node.availability
+    if not filters or not availability or node.type == NodeType.SOURCE:
+        return PartitionCoverage(Coverage.FULL)
+    available = TemporalRange(
+        partition_value(availability.min_temporal_partition),
+        partition_value(availability.max_temporal_partition),
+    )
+    column = temporal_partition_column(node)
+    if not column or not available.lower or not available.upper:
+        return PartitionCoverage(Coverage.FULL)
+    requested = requested_range(filters, column_references(node, column))
+    if requested is None:
+        return PartitionCoverage(Coverage.FULL)
+
+    # Bounds that can't be compared with the available range are left open
+    lower = (
+        requested.lower
+        if requested.lower and len(requested.lower) == len(available.lower)
+        else None
+    )
+    upper = (
+        requested.upper
+        if requested.upper and len(requested.upper) == len(available.upper)
+        else None
+    )
+    if (upper is not None and upper < available.lower) or (
+        lower is not None and lower > available.upper
+    ):
+        return PartitionCoverage(Coverage.NONE)
+    if (
+        lower is not None
+        and lower >= available.lower
+        and upper is not None
+        and upper <= available.upper
+    ):
+        return PartitionCoverage(Coverage.FULL)
+
+    low = partition_literal(column, availability.min_temporal_partition)
+    high = partition_literal(column, availability.max_temporal_partition)
+    if not low or not high:
+        return PartitionCoverage(Coverage.NONE)
+    return PartitionCoverage(
+        Coverage.PARTIAL,
+        ast.Between(expr=ast.Column(ast.Name(column.name)), low=low, high=high),
+    )
@@ -0,0 +1,83 @@
+"""
+Mergeable sketches, which let approximate distinct counts and percentiles be stored as
+measures in Druid and rolled up, much like sums and counts
+"""
+from typing import Optional
+
+from datajunction_server.construction.utils import to_namespaced_name
+from datajunction_server.enum import StrEnum
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse
+
+
+class SketchType(StrEnum):
+    """
+    Kinds of sketches
+    """
+
+    # HyperLogLog and Theta sketches for distinct counts
+    HLL = "hll"
+    THETA = "theta"
+
+    # Quantiles sketches for percentiles
+    QUANTILES = "quantiles"
+
+
+# The sketch that each approximate aggregation can be computed from
+SKETCH_AGGREGATIONS = {
+    "approx_count_distinct": SketchType.HLL,
+    "approx_count_distinct_ds_hll": SketchType.HLL,
+    "approx_count_distinct_ds_theta": SketchType.THETA,
+    "approx_percentile": SketchType.QUANTILES,
+}
+
+
+# How each kind of sketch is combined into the value of its aggregation. Sketches are
+# built by Druid as the measures are ingested, so the measures hold the sketched values
+# themselves, and the combiners take a column of sketches.
+SKETCH_COMBINERS = {
+    SketchType.HLL: "APPROX_COUNT_DISTINCT_DS_HLL({column})",
+    SketchType.THETA: "APPROX_COUNT_DISTINCT_DS_THETA({column})",
+    SketchType.QUANTILES: "APPROX_QUANTILE_DS({column}, {fraction})",
+}
+
+
+def sketch_type(expr: ast.Expression) -> Optional[SketchType]:
+    """
+    The sketch that an aggregation can be computed from, if any. Exact distinct counts
+    are approximated with HLL sketches, and only percentiles at a single fraction can be
+    computed from sketches.
+    """
+    if not isinstance(expr, ast.Function) or not expr.args:
+        return None
+    function_name = expr.alias_or_name.name.lower()
+    if function_name == "count" and expr.quantifier.upper() == "DISTINCT":
+        return SketchType.HLL if len(expr.args) == 1 else None
+    sketch = SKETCH_AGGREGATIONS.get(function_name)
+    if sketch == SketchType.QUANTILES and (
+        len(expr.args) < 2 or not isinstance(expr.args[1], ast.Number)
+    ):
+        return None
+    return sketch
+
+
+def sketch_measure(expr: ast.Function) -> ast.Expression:
+    """
+    The measure that a sketch is built from for an aggregation, i.e., the values that
+    are aggregated
+    """
+    value = expr.args[0]
+    if isinstance(value, ast.Column):
+        return ast.Column(name=to_namespaced_name(value.identifier(False)))
+    return value
+
+
+def sketch_combiner(expr: ast.Function, column: ast.Column) -> ast.Expression:
+    """
+    The expression that combines a column of sketches into the value of an aggregation
+    """
+    combiner = SKETCH_COMBINERS[sketch_type(expr)].format(  # type: ignore
+        column=column,
+        fraction=expr.args[1] if len(expr.args) > 1 else None,
+    )
+    return parse(f"SELECT {combiner}").select.projection[0]  # type: ignore
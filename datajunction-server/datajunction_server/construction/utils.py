@@ -43,16 +43,24 @@ async def get_dj_node(
             .scalar_one()
         )
     except NoResultFound as no_result_exc:
-        kind_msg = " or ".join(str(k) for k in kinds) if kinds else ""
-        raise DJErrorException(
-            DJError(
-                code=ErrorCode.UNKNOWN_NODE,
-                message=f"No node `{node_name}` exists of kind {kind_msg}.",
-            ),
-        ) from no_result_exc
+        raise unknown_node_exception(node_name, kinds) from no_result_exc
     return match.current if match and current else match
 
 
+def unknown_node_exception(
+    node_name: str,
+    kinds: Optional[Set[NodeType]] = None,
+) -> DJErrorException:
+    """The exception raised when there's no DJ node with a given name and kind"""
+    kind_msg = " or ".join(str(k) for k in kinds) if kinds else ""
+    return DJErrorException(
+        DJError(
+            code=ErrorCode.UNKNOWN_NODE,
+            message=f"No node `{node_name}` exists of kind {kind_msg}.",
+        ),
+    )
+
+
 async def try_get_dj_node(
     session: AsyncSession,
     name: Union[str, "Column"],
@@ -6,6 +6,7 @@ __all__ = [
     "Collection",
     "Database",
     "DimensionLink",
+    "DimensionReachability",
     "Engine",
     "History",
     "Node",
@@ -24,6 +25,7 @@ from datajunction_server.database.catalog import Catalog
 from datajunction_server.database.collection import Collection
 from datajunction_server.database.database import Database, Table
 from datajunction_server.database.dimensionlink import DimensionLink
+from datajunction_server.database.dimensionreachability import DimensionReachability
 from datajunction_server.database.engine import Engine
 from datajunction_server.database.measure import Measure
 from datajunction_server.database.namespace import NodeNamespace
@@ -30,6 +30,9 @@ class AvailabilityState(Base):  # pylint: disable=too-few-public-methods
     valid_through_ts: Mapped[int] = mapped_column(sa.BigInteger())
     url: Mapped[Optional[str]]
 
+    # The number of rows in the table, if known
+    row_count: Mapped[Optional[int]] = mapped_column(sa.BigInteger(), nullable=True)
+
     # An ordered list of categorical partitions like ["country", "group_id"]
     # or ["region_id", "age_group"]
     categorical_partitions: Mapped[Optional[List[str]]] = mapped_column(
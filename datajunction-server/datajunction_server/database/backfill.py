@@ -2,11 +2,11 @@
 """Backfill database schema."""
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import JSON, BigInteger, ForeignKey, Integer
+from sqlalchemy import JSON, BigInteger, Enum, ForeignKey, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from datajunction_server.database.base import Base
-from datajunction_server.models.partition import PartitionBackfill
+from datajunction_server.models.partition import BackfillStatus, PartitionBackfill
 
 if TYPE_CHECKING:
     from datajunction_server.database.materialization import Materialization
@@ -47,3 +47,9 @@ class Backfill(Base):  # type: ignore  # pylint: disable=too-few-public-methods
         JSON,
         default=[],
     )
+
+    # Whether the query service has accepted the backfill
+    status: Mapped[Optional[BackfillStatus]] = mapped_column(
+        Enum(BackfillStatus),
+        nullable=True,
+    )
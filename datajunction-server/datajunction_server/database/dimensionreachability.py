@@ -0,0 +1,141 @@
+"""Dimension reachability table."""
+from sqlalchemy import (
+    BigInteger,
+    ForeignKey,
+    Integer,
+    String,
+    delete,
+    event,
+    func,
+    select,
+)
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from datajunction_server.database.base import Base
+from datajunction_server.database.column import Column
+from datajunction_server.database.dimensionlink import DimensionLink
+from datajunction_server.database.history import EntityType, History
+from datajunction_server.database.node import Node, NodeColumns, NodeRevision
+
+# Session info flag set when a session has flushed changes that aren't committed yet
+UNCOMMITTED_CHANGES_FLAG = "dj_uncommitted_changes"
+
+# The advisory lock that changes to the graph hold shared, and that recording the
+# dimensions reachable from a node revision holds exclusively
+DIMENSION_REACHABILITY_LOCK = 0x646A5F72656163
+
+# The kinds of history events that can change which dimensions are reachable
+REACHABILITY_ENTITY_TYPES = (EntityType.NODE, EntityType.LINK, EntityType.DEPENDENCY)
+
+
+class DimensionReachability(Base):  # pylint: disable=too-few-public-methods
+    """
+    The dimension nodes that can be reached from a node revision, through its columns'
+    dimension references and its dimension links, and onwards through the current
+    revisions of the dimensions. There is a row per path to a dimension, along with the
+    roles of the dimension links taken and the number of hops.
+
+    Every node revision whose dimensions have been worked out also has a row for itself
+    with zero hops, so that revisions without any rows are known to not have been worked
+    out yet. Rows are removed whenever the graph changes along their paths, and worked
+    out again the next time the node revision's dimensions are needed.
+    """
+
+    __tablename__ = "dimensionreachability"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+    )
+    node_revision_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "noderevision.id",
+            name="fk_dimensionreachability_node_revision_id_noderevision",
+            ondelete="CASCADE",
+        ),
+        index=True,
+    )
+    dimension_node_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            "node.id",
+            name="fk_dimensionreachability_dimension_node_id_node",
+            ondelete="CASCADE",
+        ),
+        index=True,
+    )
+
+    # The path taken to the dimension, i.e., "default.users.[birth],default.date" for a
+    # dimension link with the role "birth", and the roles taken, i.e., "[birth]"
+    join_path: Mapped[str] = mapped_column(String, default="")
+    role_path: Mapped[str] = mapped_column(String, default="")
+    hops: Mapped[int] = mapped_column(Integer, default=0)
+
+
+def affected_node_ids(node_name: str):
+    """
+    The nodes whose reachable dimensions may change along with the given node: the node
+    itself and the nodes that reference it as a dimension. The latter are needed since
+    dimensions that are deactivated aren't reachable, and so aren't recorded.
+    """
+    dimension = select(Node.id).where(Node.name == node_name).scalar_subquery()
+    return (
+        select(Node.id)
+        .where(Node.name == node_name)
+        .union(
+            select(NodeRevision.node_id)
+            .join(DimensionLink, DimensionLink.node_revision_id == NodeRevision.id)
+            .where(DimensionLink.dimension_id == dimension),
+            select(NodeRevision.node_id)
+            .join(NodeColumns, NodeColumns.node_id == NodeRevision.id)
+            .join(Column, NodeColumns.column_id == Column.id)
+            .where(Column.dimension_id == dimension),
+        )
+    )
+
+
+@event.listens_for(History, "after_insert")
+def invalidate_dimension_reachability(
+    mapper,
+    connection,
+    target,
+):  # pylint: disable=unused-argument
+    """
+    Remove the reachable dimensions of all node revisions with a path through the node
+    that the recorded change was made to, in the same transaction as the change. The
+    change holds the reachability lock shared until it's committed, which keeps the
+    dimensions from being recorded from the graph as it was before the change.
+    """
+    if target.entity_type not in REACHABILITY_ENTITY_TYPES or not target.node:
+        return
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            select(func.pg_advisory_xact_lock_shared(DIMENSION_REACHABILITY_LOCK)),
+        )
+    connection.execute(
+        delete(DimensionReachability).where(
+            DimensionReachability.node_revision_id.in_(
+                select(DimensionReachability.node_revision_id).where(
+                    DimensionReachability.dimension_node_id.in_(
+                        affected_node_ids(target.node),
+                    ),
+                ),
+            ),
+        ),
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def flag_uncommitted_changes(session, flush_context):  # pylint: disable=unused-argument
+    """
+    Flag the session as having changes that aren't committed yet
+    """
+    session.info[UNCOMMITTED_CHANGES_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def clear_uncommitted_changes(session):
+    """
+    Drop the flag once the transaction has ended
+    """
+    session.info.pop(UNCOMMITTED_CHANGES_FLAG, None)
@@ -3,8 +3,22 @@ from datetime import datetime, timezone
 from functools import partial
 from typing import Any, Dict, Optional
 
-from sqlalchemy import JSON, BigInteger, DateTime, Enum, Integer, String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    DateTime,
+    Enum,
+    Integer,
+    Sequence,
+    String,
+    cast,
+    column,
+    event,
+    select,
+    table,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, Session, mapped_column
 
 from datajunction_server.database.base import Base
 from datajunction_server.enum import StrEnum
@@ -79,3 +93,77 @@ class History(Base):  # pylint: disable=too-few-public-methods
 
     def __hash__(self) -> int:
         return hash(self.id)
+
+
+# The sequence that the graph epoch is drawn from
+GRAPH_EPOCH_SEQUENCE = Sequence("graph_epoch_seq", metadata=Base.metadata)
+
+# Session info flag set when a session draws a graph epoch for a change to the graph
+GRAPH_EPOCH_DRAWN_FLAG = "dj_graph_epoch_drawn"
+
+
+class GraphEpoch:
+    """
+    A counter that moves on with every history event, i.e., with every change to the
+    DJ graph. Anything derived from the graph that's saved along with the epoch it was
+    derived at is known to be current for as long as the epoch stays the same.
+
+    The epoch is drawn from a sequence, so that changes to the graph don't wait on each
+    other. Drawing from a sequence takes effect right away rather than when the change
+    is committed, so a new epoch is drawn both when the change is recorded and once
+    it's been committed. Anything derived while the change was in progress is left
+    behind by the second draw.
+    """
+
+    @classmethod
+    def current(cls):
+        """
+        An expression for the current epoch
+        """
+        sequence = table(
+            GRAPH_EPOCH_SEQUENCE.name,
+            column("last_value"),
+            column("is_called"),
+        )
+        return (
+            select(sequence.c.last_value + cast(sequence.c.is_called, Integer))
+            .select_from(sequence)
+            .scalar_subquery()
+        )
+
+    @classmethod
+    async def get_current(cls, session: AsyncSession) -> int:
+        """
+        The current epoch
+        """
+        return (await session.execute(select(cls.current()))).scalar_one()
+
+
+@event.listens_for(History, "after_insert")
+def bump_graph_epoch(mapper, connection, target):  # pylint: disable=unused-argument
+    """
+    Move the graph epoch on as the change is recorded, and flag the session so that it's
+    moved on again once the change is committed
+    """
+    connection.execute(select(GRAPH_EPOCH_SEQUENCE.next_value()))
+    if session := Session.object_session(target):
+        session.info[GRAPH_EPOCH_DRAWN_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def bump_committed_graph_epoch(session):
+    """
+    Move the graph epoch on again once a change to the graph has been committed
+    """
+    if session.info.pop(GRAPH_EPOCH_DRAWN_FLAG, False):
+        with session.get_bind().connect() as connection:
+            connection.execute(select(GRAPH_EPOCH_SEQUENCE.next_value()))
+            connection.commit()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_graph_epoch_draw(session):
+    """
+    Drop the flag for changes that were rolled back
+    """
+    session.info.pop(GRAPH_EPOCH_DRAWN_FLAG, None)
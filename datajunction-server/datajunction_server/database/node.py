@@ -514,6 +514,7 @@ class NodeRevision(
         secondary="noderelationship",
         primaryjoin="NodeRevision.id==NodeRelationship.child_id",
         secondaryjoin="Node.id==NodeRelationship.parent_id",
+        order_by="Node.id",
     )
 
     missing_parents: Mapped[List[MissingParent]] = relationship(
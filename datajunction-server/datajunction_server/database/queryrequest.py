@@ -1,4 +1,6 @@
 """Query request schema."""
+import hashlib
+import json
 from datetime import datetime, timezone
 from functools import partial
 from http import HTTPStatus
@@ -9,8 +11,10 @@ from sqlalchemy import (
     BigInteger,
     DateTime,
     Enum,
+    String,
     UniqueConstraint,
     and_,
+    func,
     select,
     text,
 )
@@ -20,6 +24,7 @@ from sqlalchemy.orm import Mapped, joinedload, mapped_column, selectinload
 
 from datajunction_server.construction.utils import to_namespaced_name
 from datajunction_server.database.base import Base
+from datajunction_server.database.history import GraphEpoch
 from datajunction_server.database.node import Node, NodeRevision
 from datajunction_server.enum import StrEnum
 from datajunction_server.errors import DJInvalidInputException
@@ -137,6 +142,12 @@ class QueryRequest(Base):  # type: ignore  # pylint: disable=too-few-public-meth
         server_default=text("'{}'::jsonb"),
     )
 
+    # A hash of the request inputs as they were passed in, before versioning
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(64), index=True)
+
+    # The graph epoch at which the request key was last versioned
+    graph_epoch: Mapped[Optional[int]] = mapped_column(BigInteger())
+
     # --------------------------------------------------- #
     #  Request results                                    #
     #  (values needed to rebuild a TranslatedSQL object)  #
@@ -162,10 +173,8 @@ class QueryRequest(Base):  # type: ignore  # pylint: disable=too-few-public-meth
     # External identifier for the query
     query_id: Mapped[Optional[str]]
 
-    @classmethod
-    async def get_query_request(
-        cls,
-        session: AsyncSession,
+    @staticmethod
+    def request_fingerprint(  # pylint: disable=too-many-arguments
         query_type: QueryBuildType,
         nodes: List[str],
         dimensions: List[str],
@@ -175,18 +184,69 @@ class QueryRequest(Base):  # type: ignore  # pylint: disable=too-few-public-meth
         limit: Optional[int],
         orderby: List[str],
         other_args: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        A hash of the request inputs, which identifies the request independently of the
+        versions of the nodes involved
+        """
+        request = {
+            "query_type": str(query_type),
+            "nodes": nodes,
+            "dimensions": dimensions,
+            "filters": filters,
+            "engine_name": engine_name,
+            "engine_version": engine_version,
+            "limit": limit,
+            "orderby": orderby,
+            "other_args": other_args or {},
+        }
+        return hashlib.sha256(
+            json.dumps(request, sort_keys=True).encode("utf-8"),
+        ).hexdigest()
+
+    @classmethod
+    async def lock(cls, session: AsyncSession, fingerprint: str) -> None:
+        """
+        Takes a transaction-level advisory lock on a request fingerprint, so that server
+        processes sharing the database take turns building the SQL for the request. The
+        lock is held until the transaction ends, i.e., until the built SQL is saved.
+        """
+        if session.bind.dialect.name != "postgresql":  # pragma: no cover
+            return
+        await session.execute(
+            select(func.pg_advisory_xact_lock(int(fingerprint[:15], 16))),
+        )
+
+    @classmethod
+    async def get_by_fingerprint(
+        cls,
+        session: AsyncSession,
+        fingerprint: str,
     ) -> Optional["QueryRequest"]:
         """
-        Retrieves saved query for a node SQL request
+        Retrieves the saved query request with the given fingerprint if it was versioned
+        at the current graph epoch, i.e., if nothing in the DJ graph has changed since
         """
-        versioned_request = await cls.to_versioned_query_request(
-            session,
-            nodes,
-            dimensions,
-            filters,
-            orderby,
-            query_type,
+        statement = select(cls).where(
+            cls.fingerprint == fingerprint,
+            cls.graph_epoch == GraphEpoch.current(),
         )
+        return (await session.execute(statement)).scalars().first()
+
+    @classmethod
+    async def get_by_versioned_request(  # pylint: disable=too-many-arguments
+        cls,
+        session: AsyncSession,
+        query_type: QueryBuildType,
+        versioned_request: Dict[str, List[str]],
+        engine_name: Optional[str],
+        engine_version: Optional[str],
+        limit: Optional[int],
+        other_args: Optional[Dict[str, Any]] = None,
+    ) -> Optional["QueryRequest"]:
+        """
+        Retrieves the saved query request with the given versioned request key
+        """
         statement = select(cls).where(
             and_(
                 cls.query_type == query_type,
@@ -202,13 +262,72 @@ class QueryRequest(Base):  # type: ignore  # pylint: disable=too-few-public-meth
                 cls.other_args == (other_args or text("'{}'::jsonb")),
             ),
         )
-        query_request = (await session.execute(statement)).scalar_one_or_none()
-        if query_request:
+        return (await session.execute(statement)).scalar_one_or_none()
+
+    @classmethod
+    async def get_query_request(
+        cls,
+        session: AsyncSession,
+        query_type: QueryBuildType,
+        nodes: List[str],
+        dimensions: List[str],
+        filters: List[str],
+        engine_name: Optional[str],
+        engine_version: Optional[str],
+        limit: Optional[int],
+        orderby: List[str],
+        other_args: Optional[Dict[str, Any]] = None,
+    ) -> Optional["QueryRequest"]:
+        """
+        Retrieves saved query for a node SQL request. The request is looked up by its
+        fingerprint first, and is only versioned (which takes a number of queries on the
+        DJ graph) if the graph has changed since it was saved. A request found by
+        versioning is stamped with its fingerprint and the current epoch, which is
+        flushed for the caller to commit.
+        """
+        fingerprint = cls.request_fingerprint(
+            query_type,
+            nodes,
+            dimensions,
+            filters,
+            engine_name,
+            engine_version,
+            limit,
+            orderby,
+            other_args,
+        )
+        if query_request := await cls.get_by_fingerprint(session, fingerprint):
             return query_request
-        return None
+
+        # The epoch is read before versioning, so that any change made from here on
+        # leaves the saved request behind
+        graph_epoch = await GraphEpoch.get_current(session)
+        versioned_request = await cls.to_versioned_query_request(
+            session,
+            nodes,
+            dimensions,
+            filters,
+            orderby,
+            query_type,
+        )
+        query_request = await cls.get_by_versioned_request(
+            session,
+            query_type,
+            versioned_request,
+            engine_name,
+            engine_version,
+            limit,
+            other_args,
+        )
+        if query_request:
+            query_request.fingerprint = fingerprint
+            query_request.graph_epoch = graph_epoch
+            session.add(query_request)
+            await session.flush()
+        return query_request
 
     @classmethod
-    async def save_query_request(
+    async def save_query_request(  # pylint: disable=too-many-locals
         cls,
         session: AsyncSession,
         query_type: QueryBuildType,
@@ -226,32 +345,25 @@ class QueryRequest(Base):  # type: ignore  # pylint: disable=too-few-public-meth
         """
         Retrieves saved query for a node SQL request
         """
-        query_request = await cls.get_query_request(
+        graph_epoch = await GraphEpoch.get_current(session)
+        versioned_request = await cls.to_versioned_query_request(
             session,
-            query_type=query_type,
-            nodes=nodes,
-            dimensions=dimensions,
-            filters=filters,
-            engine_name=engine_name,
-            engine_version=engine_version,
-            limit=limit,
-            orderby=orderby,
-            other_args=other_args,
+            nodes,
+            dimensions,
+            filters,
+            orderby,
+            query_type,
         )
-        if query_request:  # pragma: no cover
-            query_request.query = query
-            query_request.columns = columns
-            session.add(query_request)
-            await session.commit()
-        else:
-            versioned_request = await cls.to_versioned_query_request(
-                session,
-                nodes,
-                dimensions,
-                filters,
-                orderby,
-                query_type,
-            )
+        query_request = await cls.get_by_versioned_request(
+            session,
+            query_type,
+            versioned_request,
+            engine_name,
+            engine_version,
+            limit,
+            other_args,
+        )
+        if not query_request:
             query_request = QueryRequest(
                 query_type=query_type,
                 nodes=versioned_request["nodes"],
@@ -262,12 +374,24 @@ class QueryRequest(Base):  # type: ignore  # pylint: disable=too-few-public-meth
                 engine_version=engine_version,
                 limit=limit,
                 orderby=versioned_request["orderby"],
-                query=query,
-                columns=columns,
                 other_args=other_args or text("'{}'::jsonb"),
             )
-            session.add(query_request)
-            await session.commit()
+        query_request.query = query
+        query_request.columns = columns
+        query_request.fingerprint = cls.request_fingerprint(
+            query_type,
+            nodes,
+            dimensions,
+            filters,
+            engine_name,
+            engine_version,
+            limit,
+            orderby,
+            other_args,
+        )
+        query_request.graph_epoch = graph_epoch
+        session.add(query_request)
+        await session.commit()
         return query_request
 
     @classmethod
@@ -0,0 +1,386 @@
+"""
+Incremental backfills: planning backfills of only the temporal partitions of a node that
+are missing from, or stale in, its materialized table
+"""
+import asyncio
+import itertools
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from datajunction_server.database.availabilitystate import AvailabilityState
+from datajunction_server.database.column import Column
+from datajunction_server.database.materialization import Materialization
+from datajunction_server.database.node import NodeRevision
+from datajunction_server.errors import DJInvalidInputException
+from datajunction_server.materialization.jobs import MaterializationJob
+from datajunction_server.models.materialization import MaterializationInfo
+from datajunction_server.models.node import PartitionAvailability
+from datajunction_server.models.partition import Granularity, PartitionBackfill
+from datajunction_server.naming import amenable_name
+from datajunction_server.service_clients import AsyncQueryServiceClient
+
+_logger = logging.getLogger(__name__)
+
+# The partition value format that is assumed for each granularity, if a temporal
+# partition doesn't configure one
+DEFAULT_PARTITION_FORMATS = {
+    Granularity.SECOND: "yyyyMMddHHmmss",
+    Granularity.MINUTE: "yyyyMMddHHmm",
+    Granularity.HOUR: "yyyyMMddHH",
+    Granularity.DAY: "yyyyMMdd",
+    Granularity.WEEK: "yyyyMMdd",
+    Granularity.MONTH: "yyyyMM",
+    Granularity.QUARTER: "yyyyMM",
+    Granularity.YEAR: "yyyy",
+}
+
+# Java date format patterns (as used by Spark's DATE_FORMAT) and their strftime codes
+DATE_FORMAT_PATTERNS = {
+    "yyyy": "%Y",
+    "MM": "%m",
+    "dd": "%d",
+    "HH": "%H",
+    "mm": "%M",
+    "ss": "%S",
+}
+
+# Backfills of more partitions than this are not planned partition by partition
+MAX_PLANNED_PARTITIONS = 100_000
+
+
+class PartitionCalendar(NamedTuple):
+    """
+    The successive values of a temporal partition, at its granularity and in its format
+    """
+
+    granularity: Granularity
+    format: str
+
+    @classmethod
+    def for_column(cls, column: Column) -> "PartitionCalendar":
+        """
+        The calendar of a temporal partition column, which is daily by default
+        """
+        granularity = Granularity(
+            (column.partition.granularity if column.partition else None)
+            or Granularity.DAY,
+        )
+        format_ = (
+            column.partition.format if column.partition else None
+        ) or DEFAULT_PARTITION_FORMATS[granularity]
+        for pattern, code in DATE_FORMAT_PATTERNS.items():
+            format_ = format_.replace(pattern, code)
+        return cls(granularity, format_)
+
+    def parse(self, value: Union[int, str]) -> datetime:
+        """
+        The time of a partition value
+        """
+        return datetime.strptime(str(value), self.format)
+
+    def to_value(self, time: datetime) -> str:
+        """
+        The partition value at a time
+        """
+        return time.strftime(self.format)
+
+    def next(self, time: datetime) -> datetime:
+        """
+        The time of the partition that follows the one at a time
+        """
+        months = {Granularity.MONTH: 1, Granularity.QUARTER: 3, Granularity.YEAR: 12}
+        if self.granularity in months:
+            month = time.month - 1 + months[self.granularity]
+            return time.replace(year=time.year + month // 12, month=month % 12 + 1)
+        return time + timedelta(
+            **{
+                Granularity.SECOND: {"seconds": 1},
+                Granularity.MINUTE: {"minutes": 1},
+                Granularity.HOUR: {"hours": 1},
+                Granularity.DAY: {"days": 1},
+                Granularity.WEEK: {"weeks": 1},
+            }[self.granularity],
+        )
+
+    def values(self, start: datetime, end: datetime) -> List[datetime]:
+        """
+        The times of the partitions from the one at `start` through the one at `end`
+        """
+        times = []
+        time = start
+        while time <= end:
+            times.append(time)
+            if len(times) > MAX_PLANNED_PARTITIONS:
+                raise DJInvalidInputException(
+                    f"Cannot plan a backfill of more than {MAX_PLANNED_PARTITIONS} "
+                    "partitions, please backfill a smaller range",
+                )
+            time = self.next(time)
+        return times
+
+    def from_timestamp(self, timestamp: int) -> Optional[datetime]:
+        """
+        The time of a valid through timestamp, which is either a partition value, a date
+        integer, or seconds (or milliseconds) since the epoch
+        """
+        for format_ in (self.format, "%Y%m%d"):
+            try:
+                return datetime.strptime(str(timestamp), format_)
+            except ValueError:
+                pass
+        if timestamp > 10**11:
+            timestamp //= 1000
+        try:
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(
+                tzinfo=None,
+            )
+        except (OverflowError, OSError, ValueError):  # pragma: no cover
+            return None
+
+
+class BackfillPlan(NamedTuple):
+    """
+    The chunks of partitions to backfill, newest first, each as the backfill spec to
+    submit, along with the partitions that are missing and those that are stale
+    """
+
+    chunks: List[List[PartitionBackfill]]
+    missing: List[str]
+    stale: List[str]
+    skipped: int
+
+
+def availability_entries(
+    availability: AvailabilityState,
+) -> List[PartitionAvailability]:
+    """
+    The ranges of temporal partitions available, per categorical partition value
+    """
+    entries = [
+        PartitionAvailability.parse_obj(entry) if isinstance(entry, dict) else entry
+        for entry in availability.partitions or []
+    ]
+    return entries or [
+        PartitionAvailability(
+            value=[None] * len(availability.categorical_partitions or []),
+            min_temporal_partition=availability.min_temporal_partition,
+            max_temporal_partition=availability.max_temporal_partition,
+            valid_through_ts=availability.valid_through_ts,
+        ),
+    ]
+
+
+def upstream_valid_through_ts(node_revision: NodeRevision) -> Optional[int]:
+    """
+    The time through which all of the node's upstreams with materialized data have
+    valid data
+    """
+    timestamps = [
+        parent.current.availability.valid_through_ts
+        for parent in node_revision.parents
+        if parent.current and parent.current.availability
+    ]
+    return min(timestamps) if timestamps else None
+
+
+def _entry_range(
+    calendar: PartitionCalendar,
+    entry: PartitionAvailability,
+) -> Optional[Tuple[datetime, datetime]]:
+    try:
+        return (
+            calendar.parse(entry.min_temporal_partition[0]),  # type: ignore
+            calendar.parse(entry.max_temporal_partition[0]),  # type: ignore
+        )
+    except (IndexError, TypeError, ValueError):
+        return None
+
+
+def _chunk(
+    times: List[datetime],
+    calendar: PartitionCalendar,
+    chunk_size: int,
+) -> List[List[datetime]]:
+    """
+    Split the times of partitions, newest first, into runs of consecutive partitions of
+    at most `chunk_size` partitions
+    """
+    chunks: List[List[datetime]] = []
+    for time in times:
+        if (
+            chunks
+            and len(chunks[-1]) < chunk_size
+            and calendar.next(time) == chunks[-1][-1]
+        ):
+            chunks[-1].append(time)
+        else:
+            chunks.append([time])
+    return chunks
+
+
+def plan_backfill(  # pylint: disable=too-many-locals
+    node_revision: NodeRevision,
+    partitions: List[PartitionBackfill],
+    chunk_size: int,
+    upstream_valid_through: Optional[int] = None,
+) -> BackfillPlan:
+    """
+    Plan a backfill of the requested range of the node's temporal partition, where only
+    partitions that are missing from the node's availability state, or that are stale,
+    are backfilled. Partitions are stale if they were materialized before their upstream
+    data was valid, i.e., they are later than the time their availability is valid
+    through, but not later than the time the upstreams are now valid through.
+
+    The partitions to backfill are chunked into runs of at most `chunk_size` consecutive
+    partitions, newest first. Backfills that aren't of a range of one temporal partition
+    can't be planned, and are kept as they are.
+    """
+    temporal_columns = {
+        amenable_name(col.name): col
+        for col in node_revision.temporal_partition_columns()
+    }
+    temporal_specs = [
+        spec
+        for spec in partitions
+        if amenable_name(spec.column_name) in temporal_columns
+    ]
+    if len(temporal_specs) != 1 or not temporal_specs[0].range:
+        return BackfillPlan([partitions], [], [], 0)
+    temporal_spec = temporal_specs[0]
+    calendar = PartitionCalendar.for_column(
+        temporal_columns[amenable_name(temporal_spec.column_name)],
+    )
+    start, end = temporal_spec.range
+    try:
+        requested = calendar.values(calendar.parse(start), calendar.parse(end))
+    except ValueError as exc:
+        raise DJInvalidInputException(
+            f"The backfill range {temporal_spec.range} does not match the format of "
+            f"the partition `{temporal_spec.column_name}`",
+        ) from exc
+
+    availability = node_revision.availability
+    if availability:
+        entries = [
+            (entry, _entry_range(calendar, entry))
+            for entry in availability_entries(availability)
+        ]
+        # Every combination of the requested categorical partition values has to be
+        # available for a partition to be available
+        categorical_values = {
+            amenable_name(spec.column_name): spec.values
+            for spec in partitions
+            if spec is not temporal_spec and spec.values
+        }
+        combinations = list(
+            itertools.product(
+                *[
+                    categorical_values.get(amenable_name(name)) or [None]
+                    for name in availability.categorical_partitions or []
+                ],
+            ),
+        )
+    else:
+        entries, combinations = [], [()]
+    upstream_time = (
+        calendar.from_timestamp(upstream_valid_through)
+        if upstream_valid_through is not None
+        else None
+    )
+
+    missing, stale = [], []
+    for time in requested:
+        for combination in combinations:
+            covering = [
+                entry
+                for entry, range_ in entries
+                if range_
+                and range_[0] <= time <= range_[1]
+                and all(
+                    value is None or value == requested_value
+                    for value, requested_value in zip(entry.value, combination)
+                )
+            ]
+            if not covering:
+                missing.append(time)
+                break
+            valid_through = max(
+                (
+                    entry.valid_through_ts
+                    for entry in covering
+                    if entry.valid_through_ts
+                ),
+                default=None,
+            )
+            valid_through_time = (
+                calendar.from_timestamp(valid_through) if valid_through else None
+            )
+            if (
+                upstream_time
+                and valid_through_time
+                and valid_through_time < time <= upstream_time
+            ):
+                stale.append(time)
+                break
+
+    to_backfill = sorted(set(missing) | set(stale), reverse=True)
+    chunks = [
+        [
+            PartitionBackfill(
+                column_name=temporal_spec.column_name,
+                range=[
+                    type(start)(calendar.to_value(chunk[-1])),
+                    type(end)(calendar.to_value(chunk[0])),
+                ],
+            ),
+            *[spec for spec in partitions if spec is not temporal_spec],
+        ]
+        for chunk in _chunk(to_backfill, calendar, chunk_size)
+    ]
+    return BackfillPlan(
+        chunks=chunks,
+        missing=[calendar.to_value(time) for time in missing],
+        stale=[calendar.to_value(time) for time in stale],
+        skipped=len(requested) - len(to_backfill),
+    )
+
+
+async def run_backfill_plan(  # pylint: disable=too-many-arguments
+    job: MaterializationJob,
+    materialization: Materialization,
+    plan: BackfillPlan,
+    query_service_client: AsyncQueryServiceClient,
+    max_concurrency: int,
+    request_headers: Optional[Dict[str, str]] = None,
+) -> List[Tuple[List[PartitionBackfill], Union[MaterializationInfo, Exception]]]:
+    """
+    Submit the chunks of a backfill plan through the query service, with at most
+    `max_concurrency` chunks being submitted at a time, newest first. Returns the
+    outcome of submitting each chunk, which is either the materialization info or the
+    error that the chunk failed with.
+    """
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def submit(chunk: List[PartitionBackfill]) -> MaterializationInfo:
+        async with semaphore:
+            return await job.run_backfill(
+                materialization,
+                chunk,
+                query_service_client,
+                request_headers=request_headers,
+            )
+
+    outcomes = await asyncio.gather(
+        *[submit(chunk) for chunk in plan.chunks],
+        return_exceptions=True,
+    )
+    for chunk, outcome in zip(plan.chunks, outcomes):
+        if isinstance(outcome, Exception):
+            _logger.warning(
+                "Failed to submit backfill of %s for materialization %s: %s",
+                [spec.dict() for spec in chunk],
+                materialization.name,
+                outcome,
+            )
+    return list(zip(plan.chunks, outcomes))  # type: ignore
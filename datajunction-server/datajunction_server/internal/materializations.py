@@ -12,6 +12,12 @@ from datajunction_server.construction.build import (
     get_default_criteria,
     get_measures_query,
 )
+from datajunction_server.construction.sketches import (
+    SketchType,
+    sketch_combiner,
+    sketch_measure,
+    sketch_type,
+)
 from datajunction_server.database.materialization import Materialization
 from datajunction_server.database.node import NodeRevision
 from datajunction_server.database.user import User
@@ -19,6 +25,7 @@ from datajunction_server.errors import DJException, DJInvalidInputException
 from datajunction_server.materialization.jobs import MaterializationJob
 from datajunction_server.models import access
 from datajunction_server.models.column import SemanticType
+from datajunction_server.models.engine import Dialect
 from datajunction_server.models.materialization import (
     DruidMeasuresCubeConfig,
     DruidMetricsCubeConfig,
@@ -32,7 +39,7 @@ from datajunction_server.models.materialization import (
 from datajunction_server.models.metric import TranslatedSQL
 from datajunction_server.models.node_type import NodeType
 from datajunction_server.models.query import ColumnMetadata
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.parsing import ast
 from datajunction_server.sql.parsing.ast import CompileContext
 from datajunction_server.sql.parsing.backends.antlr4 import parse
@@ -42,14 +49,43 @@ from datajunction_server.utils import SEPARATOR
 MAX_COLUMN_NAME_LENGTH = 128
 
 
+def materialization_dialect(job: Optional[str]) -> Dialect:
+    """
+    The dialect of the engine that holds the output of a materialization job, i.e.,
+    Druid for the Druid cube jobs. Jobs that don't say are assumed to output to Spark.
+    """
+    materialization_jobs = {
+        cls.__name__: cls for cls in MaterializationJob.__subclasses__()
+    }
+    clazz = materialization_jobs.get(job)  # type: ignore
+    return clazz.dialect if clazz and clazz.dialect else Dialect.SPARK
+
+
+def _column_sketches(query: ast.Query) -> Dict[int, Tuple[ast.Function, SketchType]]:
+    """
+    The aggregations of a single column in a metric query that can be computed from
+    sketches of the column, along with their kinds of sketches, keyed by the column's id
+    """
+    sketches = {}
+    for function in query.select.find_all(ast.Function):
+        sketch = sketch_type(function)
+        if sketch and isinstance(function.args[0], ast.Column):
+            sketches[id(function.args[0])] = (function, sketch)
+    return sketches
+
+
 async def rewrite_metrics_expressions(
     session: AsyncSession,
     current_revision: NodeRevision,
     measures_query: TranslatedSQL,
+    dialect: Dialect = Dialect.DRUID,
 ) -> Dict[str, MetricMeasures]:
     """
     Map each metric to a rewritten version of the metric expression with the measures from
-    the materialized measures table.
+    the materialized measures table. Druid builds sketches as the data is ingested, so
+    for Druid, distinct counts and percentiles of a column are ingested as sketches of
+    the column, and rewritten to combine the sketches. Elsewhere the measures table holds
+    the column's values, which the original aggregation is kept for.
     """
     context = CompileContext(session, DJException())
     metrics_expressions = {}
@@ -61,6 +97,7 @@ async def rewrite_metrics_expressions(
         measures_for_metric = []
         metric_ast = parse(metric.current.query)
         await metric_ast.compile(context)
+        sketches = _column_sketches(metric_ast) if dialect == Dialect.DRUID else {}
         for col in metric_ast.select.find_all(ast.Column):
             full_column_name = (
                 col.table.dj_node.name + SEPARATOR + col.alias_or_name.name  # type: ignore
@@ -70,7 +107,7 @@ async def rewrite_metrics_expressions(
                     name=full_column_name,
                     field_name=measures_to_output_columns_lookup[full_column_name],
                     type=str(col.type),
-                    agg="sum",
+                    agg=sketches[id(col)][1] if id(col) in sketches else "sum",
                 ),
             )
             if (
@@ -80,6 +117,11 @@ async def rewrite_metrics_expressions(
                 col.name = ast.Name(
                     measures_to_output_columns_lookup[full_column_name],
                 )
+        for function, _ in sketches.values():
+            combiner = sketch_combiner(function, function.args[0])  # type: ignore
+            if function.alias:
+                combiner = combiner.set_alias(function.alias)  # type: ignore
+            metric_ast.select.replace(function, combiner, copy=False)
         if (
             hasattr(metric_ast.select.projection[0], "alias")
             and metric_ast.select.projection[0].alias  # type: ignore
@@ -157,6 +199,7 @@ async def build_cube_materialization_config(
             session,
             current_revision,
             measures_query,
+            materialization_dialect(upsert_input.job.value.job_class),
         )
         generic_config = DruidMeasuresCubeConfig(
             node_name=current_revision.name,
@@ -281,7 +324,7 @@ async def schedule_materialization_jobs(
     session: AsyncSession,
     node_revision_id: int,
     materialization_names: List[str],
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
     request_headers: Optional[Dict[str, str]] = None,
 ) -> Dict[str, MaterializationInfo]:
     """
@@ -299,7 +342,8 @@ async def schedule_materialization_jobs(
     for materialization in materializations:
         clazz = materialization_jobs.get(materialization.job)
         if clazz and materialization.name:  # pragma: no cover
-            materialization_to_output[materialization.name] = clazz().schedule(  # type: ignore
+            job = clazz()
+            materialization_to_output[materialization.name] = await job.schedule(  # type: ignore
                 materialization,
                 query_service_client,
                 request_headers=request_headers,
@@ -338,6 +382,10 @@ def decompose_expression(  # pylint: disable=too-many-return-statements
 
     Some complex aggregations can be decomposed to simple aggregations: i.e., AVG(x) can
     be decomposed to SUM(x)/COUNT(x).
+
+    Distinct counts and percentiles are decomposed to sketches, which can be merged
+    much like simple aggregations. The sketches are built by Druid as the measures are
+    ingested, so their measures are the values to sketch.
     """
     if isinstance(expr, ast.Alias):
         expr = expr.child  # pragma: no cover
@@ -353,6 +401,13 @@ def decompose_expression(  # pylint: disable=too-many-return-statements
         function_name = expr.alias_or_name.name.lower()
         readable_name = _get_readable_name(expr)
 
+        sketch = sketch_type(expr)
+        if sketch:
+            measure_name = ast.Name(f"{readable_name}_{sketch}")
+            return sketch_combiner(expr, ast.Column(name=measure_name)), [
+                sketch_measure(expr).set_alias(measure_name),
+            ]
+
         if function_name in simple_aggregations:
             measure_name = ast.Name(f"{readable_name}_{function_name}")
             if not expr.args[0].is_aggregation():
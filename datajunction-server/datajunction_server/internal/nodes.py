@@ -20,6 +20,7 @@ from datajunction_server.api.helpers import (
     resolve_downstream_references,
     validate_cube,
 )
+from datajunction_server.construction.cache import get_compiled_node_cache
 from datajunction_server.database.attributetype import AttributeType, ColumnAttribute
 from datajunction_server.database.column import Column
 from datajunction_server.database.dimensionlink import DimensionLink
@@ -72,7 +73,7 @@ from datajunction_server.models.node import (
 )
 from datajunction_server.models.node_type import NodeType
 from datajunction_server.naming import from_amenable_name
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.dag import (
     get_downstream_nodes,
     get_nodes_with_dimension,
@@ -261,12 +262,14 @@ async def create_node_revision(
     parent_refs = (
         (
             await session.execute(
-                select(Node).where(
+                select(Node)
+                .where(
                     # pylint: disable=no-member
                     Node.name.in_(  # type: ignore
                         new_parents,
                     ),
-                ),
+                )
+                .order_by(Node.id),
             )
         )
         .unique()
@@ -530,7 +533,7 @@ async def update_any_node(
     data: UpdateNode,
     session: AsyncSession,
     request_headers: Dict[str, str],
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
     current_user: User,
     background_tasks: BackgroundTasks = None,
     validate_access: access.ValidateAccessFn = None,
@@ -579,7 +582,7 @@ async def update_node_with_query(
     session: AsyncSession,
     *,
     request_headers: Dict[str, str],
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
     current_user: User,
     background_tasks: BackgroundTasks,
     validate_access: access.ValidateAccessFn,
@@ -746,7 +749,7 @@ async def update_cube_node(  # pylint: disable=too-many-locals
     data: UpdateNode,
     *,
     request_headers: Dict[str, str],
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
     current_user: User,
     background_tasks: BackgroundTasks = None,
     validate_access: access.ValidateAccessFn,
@@ -895,6 +898,7 @@ async def propagate_update_downstream(  # pylint: disable=too-many-locals
     # in the right order. Otherwise it is possible for a leaf node like a metric to be updated
     # before its upstreams are updated.
     for downstream in downstreams:
+        get_compiled_node_cache().invalidate(downstream.name)
         original_node_revision = downstream.current
         previous_status = original_node_revision.status
         node_validator = await revalidate_node(
@@ -979,7 +983,7 @@ async def create_node_from_inactive(  # pylint: disable=too-many-arguments
     *,
     current_user: User,
     request_headers: Dict[str, str],
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
     background_tasks: BackgroundTasks = None,
     validate_access: access.ValidateAccessFn = None,
 ) -> Optional[Node]:
@@ -1194,7 +1198,8 @@ async def create_new_revision_from_existing(  # pylint: disable=too-many-locals,
                             new_parents,
                         ),
                     )
-                    .options(joinedload(Node.current)),
+                    .options(joinedload(Node.current))
+                    .order_by(Node.id),
                 )
             )
             .unique()
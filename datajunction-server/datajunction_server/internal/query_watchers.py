@@ -0,0 +1,193 @@
+"""
+Watchers that follow queries in the query service on behalf of the clients streaming
+their status
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from datajunction_server.models.query import QueryWithResults
+from datajunction_server.service_clients import AsyncQueryServiceClient
+from datajunction_server.typing import END_JOB_STATES
+from datajunction_server.utils import get_settings
+
+_logger = logging.getLogger(__name__)
+
+# The request headers that carry a client's credentials to the query service
+CREDENTIAL_HEADERS = ("authorization", "cookie")
+
+
+class QueryWatcher:  # pylint: disable=too-many-instance-attributes
+    """
+    Follows a query in the query service until it ends, and passes every change to it on
+    to all of the clients watching it.
+
+    The query service is asked to hold each request until the query's state changes (long
+    polling). If it answers right away without the query having changed, it doesn't
+    support that, and the watcher falls back to polling it with exponential backoff.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        query_service_client: AsyncQueryServiceClient,
+        query: QueryWithResults,
+        request_headers: Optional[Dict[str, str]] = None,
+        wait: float = 30.0,
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 5.0,
+    ):
+        self.query_service_client = query_service_client
+        self.query = query
+        self.request_headers = request_headers
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.version = 0
+        self.error: Optional[Exception] = None
+        self.done = False
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start following the query
+        """
+        self._task = asyncio.ensure_future(self._watch())
+
+    def stop(self) -> None:
+        """
+        Stop following the query
+        """
+        if self._task:
+            self._task.cancel()
+
+    async def _watch(self) -> None:
+        """
+        Get the query from the query service until it ends, publishing every change
+        """
+        loop = asyncio.get_running_loop()
+        delay = self.poll_interval
+        try:
+            while self.query.state not in END_JOB_STATES:
+                started = loop.time()
+                query = await self.query_service_client.get_query(
+                    query_id=self.query.id,
+                    request_headers=self.request_headers,
+                    changed_from=self.query.state,
+                    wait=self.wait,
+                )
+                if query != self.query:
+                    await self._publish(query)
+                    delay = self.poll_interval
+                elif loop.time() - started < self.wait / 2:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_poll_interval)
+        except Exception as exc:  # pylint: disable=broad-except
+            _logger.exception("failed to get the state of query %s", self.query.id)
+            self.error = exc
+        finally:
+            self.done = True
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def _publish(self, query: QueryWithResults) -> None:
+        """
+        Pass a change to the query on to its watchers
+        """
+        async with self._changed:
+            self.query = query
+            self.version += 1
+            self._changed.notify_all()
+
+    async def updates(self) -> AsyncIterator[QueryWithResults]:
+        """
+        Yields the query whenever it changes, until it ends
+        """
+        version = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self.version > version  # pylint: disable=cell-var-from-loop
+                    or self.done,
+                )
+                if self.error:
+                    raise self.error
+                if self.version == version:
+                    return
+                query, version = self.query, self.version
+            yield query
+            if query.state in END_JOB_STATES:
+                return
+
+
+class QueryWatchers:
+    """
+    The query watchers of a server process, so that there's a single watcher for each
+    query no matter how many clients are streaming its status. Clients only share a
+    watcher when they pass the same request headers on to the query service, since
+    the headers may decide what they're allowed to see.
+    """
+
+    def __init__(self):
+        self._watchers: Dict[Tuple[str, Tuple[Optional[str], ...]], QueryWatcher] = {}
+
+    @staticmethod
+    def _key(
+        query: QueryWithResults,
+        request_headers: Optional[Dict[str, str]],
+    ) -> Tuple[str, Tuple[Optional[str], ...]]:
+        """
+        The key of a query's watcher: the query and the credentials it's followed with
+        """
+        headers = {
+            name.lower(): value for name, value in (request_headers or {}).items()
+        }
+        return query.id, tuple(headers.get(name) for name in CREDENTIAL_HEADERS)
+
+    @asynccontextmanager
+    async def watch(
+        self,
+        query_service_client: AsyncQueryServiceClient,
+        query: QueryWithResults,
+        request_headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[QueryWatcher]:
+        """
+        Watch a query, sharing the watcher with everyone else watching it with the same
+        credentials. The watcher stops once no one is using it anymore.
+        """
+        key = self._key(query, request_headers)
+        watcher = self._watchers.get(key)
+        if watcher is None:
+            settings = get_settings()
+            watcher = self._watchers[key] = QueryWatcher(
+                query_service_client,
+                query,
+                request_headers=request_headers,
+                wait=settings.query_status_wait,
+                poll_interval=settings.query_status_poll_interval,
+                max_poll_interval=settings.query_status_max_poll_interval,
+            )
+            watcher.start()
+        watcher.subscribers += 1
+        try:
+            yield watcher
+        finally:
+            watcher.subscribers -= 1
+            if watcher.subscribers == 0:
+                if self._watchers.get(key) is watcher:
+                    del self._watchers[key]
+                watcher.stop()
+
+    def __len__(self) -> int:
+        return len(self._watchers)
+
+
+@lru_cache(maxsize=None)
+def get_query_watchers() -> QueryWatchers:
+    """
+    Get the process-wide query watchers
+    """
+    return QueryWatchers()
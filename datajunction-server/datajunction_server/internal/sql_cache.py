@@ -0,0 +1,304 @@
+"""
+A process-wide cache of built SQL, kept in front of the saved query requests
+"""
+import asyncio
+import copy
+import threading
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from cachelib.base import BaseCache
+from cachetools import LRUCache
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from datajunction_server.database.history import GraphEpoch, History
+from datajunction_server.database.queryrequest import QueryBuildType, QueryRequest
+from datajunction_server.models import access
+from datajunction_server.models.user import UserOutput
+from datajunction_server.utils import get_settings
+
+# The shared cache key under which the current graph generation is published
+GRAPH_GENERATION_KEY = "dj:graph_generation"
+
+# Session info flag set when a session records a change to the DJ graph
+GRAPH_CHANGED_FLAG = "dj_graph_changed"
+
+# The state and requests of an access check made while building SQL
+AccessCheck = Tuple[
+    access.AccessControlState,
+    Tuple[access.ResourceRequest, ...],
+    Tuple[access.ResourceRequest, ...],
+]
+
+
+class CachedSQL(NamedTuple):
+    """
+    Built SQL along with the graph generation it was built at and the access checks
+    that building it took
+    """
+
+    generation: str
+    value: Any
+    access_checks: Tuple[AccessCheck, ...]
+
+
+class SQLBuildCacheInfo(NamedTuple):
+    """
+    Statistics on the SQL build cache
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class AccessRecorder:  # pylint: disable=too-few-public-methods
+    """
+    Wraps a `validate_access` function to record the access checks made through it, so
+    that they can be made again for requests served from the cache.
+    """
+
+    def __init__(self, validate_access: access.ValidateAccessFn):
+        self.validate_access = validate_access
+        self.access_checks: List[AccessCheck] = []
+
+    def __call__(self, access_control: access.AccessControl) -> None:
+        self.access_checks.append(
+            (
+                access_control.state,
+                tuple(
+                    access.ResourceRequest(
+                        verb=request.verb,
+                        access_object=request.access_object,
+                    )
+                    for request in access_control.direct_requests
+                ),
+                tuple(
+                    access.ResourceRequest(
+                        verb=request.verb,
+                        access_object=request.access_object,
+                    )
+                    for request in access_control.indirect_requests
+                ),
+            ),
+        )
+        self.validate_access(access_control)
+
+
+class SQLBuildCache:
+    """
+    A size-bounded LRU cache of built SQL (`TranslatedSQL` and `GeneratedSQL` objects),
+    keyed by endpoint and request fingerprint. Saved query requests are the second tier.
+
+    Each entry is stamped with the graph generation it was built at, and is only used
+    while the generation stays the same, i.e., until anything in the DJ graph changes.
+    Requests served from the cache go through the same access checks that building the
+    SQL took.
+
+    Identical requests that come in while the SQL for them is being built wait for that
+    build to finish and are then served from the cache, rather than each building it.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._build_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(  # pylint: disable=too-many-arguments
+        endpoint: str,
+        query_type: QueryBuildType,
+        nodes: List[str],
+        dimensions: List[str],
+        filters: List[str],
+        engine_name: Optional[str],
+        engine_version: Optional[str],
+        limit: Optional[int] = None,
+        orderby: Optional[List[str]] = None,
+        other_args: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, str]:
+        """
+        The cache key for a request to an endpoint
+        """
+        return endpoint, QueryRequest.request_fingerprint(
+            query_type,
+            nodes,
+            dimensions,
+            filters,
+            engine_name,
+            engine_version,
+            limit,
+            orderby or [],
+            other_args,
+        )
+
+    def get(
+        self,
+        key: Tuple[str, str],
+        generation: str,
+        validate_access: access.ValidateAccessFn,
+        user: Optional[UserOutput],
+    ) -> Optional[Any]:
+        """
+        Returns a copy of the SQL cached for the request if it was built at the given
+        graph generation, after checking that the user has access to it
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None or cached.generation != generation:
+                self.misses += 1
+                return None
+            self.hits += 1
+        for state, direct_requests, indirect_requests in cached.access_checks:
+            access_control = access.AccessControlStore(
+                validate_access=validate_access,
+                user=user,
+                state=state,
+                direct_requests=set(copy.deepcopy(direct_requests)),
+                indirect_requests=set(copy.deepcopy(indirect_requests)),
+            )
+            access_control.validate_and_raise()
+        return copy.deepcopy(cached.value)
+
+    @asynccontextmanager
+    async def building(self, key: Tuple[str, str]) -> AsyncIterator[None]:
+        """
+        Lets one request at a time look up or build the SQL for a key. Requests for the
+        key that come in meanwhile wait their turn, by which time the SQL is cached.
+        """
+        with self._lock:
+            build_lock = self._build_locks.get(key)
+            if build_lock is None:
+                build_lock = self._build_locks[key] = asyncio.Lock()
+        async with build_lock:
+            yield
+
+    def set(
+        self,
+        key: Tuple[str, str],
+        generation: str,
+        value: Any,
+        access_checks: Optional[List[AccessCheck]] = None,
+    ) -> None:
+        """
+        Caches the SQL built for a request at the given graph generation
+        """
+        cached = CachedSQL(
+            generation=generation,
+            value=copy.deepcopy(value),
+            access_checks=tuple(access_checks or ()),
+        )
+        with self._lock:
+            self._cache[key] = cached
+
+    def info(self) -> SQLBuildCacheInfo:
+        """
+        Returns hit/miss counters and the current size of the cache
+        """
+        with self._lock:
+            return SQLBuildCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=int(self._cache.maxsize),
+                currsize=len(self._cache),
+            )
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets its counters
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+async def check_saved_request_access(
+    session: AsyncSession,
+    nodes: List[str],
+    dimensions: List[str],
+    validate_access: access.ValidateAccessFn,
+    user: Optional[UserOutput],
+) -> List[AccessCheck]:
+    """
+    Check that the user can read the nodes and dimension nodes of a saved query request
+    before serving SQL from it, and return the access checks made so that they can be
+    made again for requests served from the cache
+    """
+    access_recorder = AccessRecorder(validate_access)
+    access_control = access.AccessControlStore(
+        validate_access=access_recorder,
+        user=user,
+        base_verb=access.ResourceRequestVerb.READ,
+    )
+    for node_name in nodes + [dim.rsplit(".", 1)[0] for dim in dimensions]:
+        await access_control.add_request_by_node_name(session, node_name)
+    access_control.validate_and_raise()
+    return access_recorder.access_checks
+
+
+@lru_cache(maxsize=None)
+def get_sql_build_cache() -> SQLBuildCache:
+    """
+    Get the process-wide SQL build cache
+    """
+    return SQLBuildCache(maxsize=get_settings().sql_build_cache_size)
+
+
+@lru_cache(maxsize=None)
+def get_shared_cache() -> Optional[BaseCache]:
+    """
+    The cache shared between server processes, if `redis_cache` is configured
+    """
+    return get_settings().cache
+
+
+async def get_graph_generation(session: AsyncSession) -> str:
+    """
+    The current generation of the DJ graph. With a shared cache, this is a token that's
+    replaced whenever a server process commits a change to the graph, so that checking
+    it doesn't need a trip to the database. Otherwise it's the graph epoch.
+    """
+    if shared_cache := get_shared_cache():
+        generation = shared_cache.get(GRAPH_GENERATION_KEY)
+        if generation is None:
+            shared_cache.add(GRAPH_GENERATION_KEY, uuid.uuid4().hex, timeout=0)
+            generation = shared_cache.get(GRAPH_GENERATION_KEY)
+        return str(generation)
+    return str(await GraphEpoch.get_current(session))
+
+
+@event.listens_for(History, "after_insert")
+def flag_graph_change(mapper, connection, target):  # pylint: disable=unused-argument
+    """
+    Flag the session as having changed the DJ graph
+    """
+    if session := Session.object_session(target):
+        session.info[GRAPH_CHANGED_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def publish_graph_change(session):
+    """
+    Start a new graph generation in the shared cache once a change to the graph has
+    been committed, which leaves the SQL cached by all server processes behind
+    """
+    if session.info.pop(GRAPH_CHANGED_FLAG, False):
+        if shared_cache := get_shared_cache():
+            shared_cache.set(GRAPH_GENERATION_KEY, uuid.uuid4().hex, timeout=0)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_graph_change(session):
+    """
+    Drop the flag for changes that were rolled back
+    """
+    session.info.pop(GRAPH_CHANGED_FLAG, None)
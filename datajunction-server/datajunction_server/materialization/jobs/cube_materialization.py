@@ -18,7 +18,7 @@ from datajunction_server.models.materialization import (
     MaterializationStrategy,
 )
 from datajunction_server.naming import amenable_name
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.parsing import ast
 from datajunction_server.sql.parsing.backends.antlr4 import parse
 
@@ -31,10 +31,10 @@ class DefaultCubeMaterialization(
     settings needed for to materialize a generic cube.
     """
 
-    def schedule(
+    async def schedule(
         self,
         materialization: Materialization,
-        query_service_client: QueryServiceClient,
+        query_service_client: AsyncQueryServiceClient,
     ):
         """
         Since this is a settings-only dummy job, we do nothing in this stage.
@@ -49,10 +49,10 @@ class DruidMaterializationJob(MaterializationJob):
 
     config_class = None
 
-    def schedule(
+    async def schedule(
         self,
         materialization: Materialization,
-        query_service_client: QueryServiceClient,
+        query_service_client: AsyncQueryServiceClient,
         request_headers: Optional[Dict[str, str]] = None,
     ) -> MaterializationInfo:
         """
@@ -77,7 +77,7 @@ class DruidMaterializationJob(MaterializationJob):
             materialization,
             materialization.node_revision,
         )
-        return query_service_client.materialize(
+        return await query_service_client.materialize(
             DruidMaterializationInput(
                 name=materialization.name,
                 node_name=materialization.node_revision.name,
@@ -102,6 +102,7 @@ class DruidMetricsCubeMaterializationJob(DruidMaterializationJob, Materializatio
     Druid materialization (aggregations aka metrics) for a cube node.
     """
 
+    dialect = Dialect.DRUID
     config_class = DruidMetricsCubeConfig  # type: ignore
 
 
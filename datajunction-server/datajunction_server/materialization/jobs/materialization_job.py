@@ -14,7 +14,7 @@ from datajunction_server.models.materialization import (
 )
 from datajunction_server.models.partition import PartitionBackfill
 from datajunction_server.naming import amenable_name
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.parsing import ast
 from datajunction_server.sql.parsing.backends.antlr4 import parse
 from datajunction_server.utils import get_settings
@@ -32,17 +32,17 @@ class MaterializationJob(abc.ABC):  # pylint: disable=too-few-public-methods
     def __init__(self):
         ...
 
-    def run_backfill(
+    async def run_backfill(
         self,
         materialization: Materialization,
         partitions: List[PartitionBackfill],
-        query_service_client: QueryServiceClient,
+        query_service_client: AsyncQueryServiceClient,
         request_headers: Optional[Dict[str, str]] = None,
     ) -> MaterializationInfo:
         """
         Kicks off a backfill based on the spec using the query service
         """
-        return query_service_client.run_backfill(
+        return await query_service_client.run_backfill(
             materialization.node_revision.name,
             materialization.name,  # type: ignore
             partitions,
@@ -50,10 +50,10 @@ class MaterializationJob(abc.ABC):  # pylint: disable=too-few-public-methods
         )
 
     @abc.abstractmethod
-    def schedule(
+    async def schedule(
         self,
         materialization: Materialization,
-        query_service_client: QueryServiceClient,
+        query_service_client: AsyncQueryServiceClient,
     ) -> MaterializationInfo:
         """
         Schedules the materialization job, typically done by calling a separate service
@@ -70,10 +70,10 @@ class SparkSqlMaterializationJob(  # pylint: disable=too-few-public-methods # pr
 
     dialect = Dialect.SPARK
 
-    def schedule(
+    async def schedule(
         self,
         materialization: Materialization,
-        query_service_client: QueryServiceClient,
+        query_service_client: AsyncQueryServiceClient,
         request_headers: Optional[Dict[str, str]] = None,
     ) -> MaterializationInfo:
         """
@@ -157,7 +157,7 @@ class SparkSqlMaterializationJob(  # pylint: disable=too-few-public-methods # pr
                     op=ast.BinaryOpKind.And,
                 )
 
-        result = query_service_client.materialize(
+        result = await query_service_client.materialize(
             GenericMaterializationInput(
                 name=materialization.name,  # type: ignore
                 node_name=materialization.node_revision.name,
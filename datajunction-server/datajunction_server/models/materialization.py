@@ -38,6 +38,22 @@ DRUID_AGG_MAPPING = {
     ("float", "count"): "longSum",
 }
 
+# Druid aggregators that build each kind of sketch as measures are ingested
+DRUID_SKETCH_AGGREGATORS = {
+    "hll": "HLLSketchBuild",
+    "theta": "thetaSketch",
+    "quantiles": "quantilesDoublesSketch",
+}
+
+
+def druid_aggregator(measure: "Measure") -> Optional[str]:
+    """
+    The Druid aggregator that a measure is rolled up with at ingestion, if any
+    """
+    return DRUID_SKETCH_AGGREGATORS.get(
+        measure.agg.lower(),
+    ) or DRUID_AGG_MAPPING.get((measure.type.lower(), measure.agg.lower()))
+
 
 class MaterializationStrategy(StrEnum):
     """
@@ -292,17 +308,17 @@ class DruidMeasuresCubeConfig(DruidCubeConfigInput, GenericCubeConfig):
             measure.field_name
             for measure_group in self.measures.values()  # type: ignore
             for measure in measure_group.measures
-            if (measure.type.lower(), measure.agg.lower()) not in DRUID_AGG_MAPPING
+            if not druid_aggregator(measure)
         ]
         return {
             measure.name: {
                 "fieldName": measure.field_name,
                 "name": measure.field_name,
-                "type": DRUID_AGG_MAPPING[(measure.type.lower(), measure.agg.lower())],
+                "type": druid_aggregator(measure),
             }
             for measure_group in self.measures.values()  # type: ignore
             for measure in measure_group.measures
-            if (measure.type.lower(), measure.agg.lower()) in DRUID_AGG_MAPPING
+            if druid_aggregator(measure)
         }
 
     def build_druid_spec(self, node_revision: "NodeRevision"):
@@ -265,6 +265,9 @@ class AvailabilityStateBase(TemporalPartitionRange):
     valid_through_ts: int
     url: Optional[str]
 
+    # The number of rows in the table, if known
+    row_count: Optional[int]
+
     # An ordered list of categorical partitions like ["country", "group_id"]
     # or ["region_id", "age_group"]
     categorical_partitions: Optional[List[str]] = Field(default=[])
@@ -346,6 +349,9 @@ class AvailabilityStateBase(TemporalPartitionRange):
                 or MIN_VALID_THROUGH_TS
             )
 
+        # Keep the last known row count until a new one is posted
+        if self.row_count is None:
+            self.row_count = other.row_count
         return self
 
 
@@ -94,6 +94,17 @@ class PartitionColumnOutput(BaseModel):
     expression: Optional[str]
 
 
+class BackfillStatus(StrEnum):
+    """
+    The status of a backfill, as reported back by the query service
+    """
+
+    # Recorded, but not yet accepted by the query service
+    PENDING = "pending"
+    SUBMITTED = "submitted"
+    FAILED = "failed"
+
+
 class BackfillOutput(BaseModel):
     """
     Output model for backfills
@@ -101,6 +112,7 @@ class BackfillOutput(BaseModel):
 
     spec: Optional[List[PartitionBackfill]]
     urls: Optional[List[str]]
+    status: Optional[BackfillStatus]
 
     class Config:  # pylint: disable=missing-class-docstring, too-few-public-methods
         orm_mode = True
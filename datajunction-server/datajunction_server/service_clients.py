@@ -1,12 +1,15 @@
 """Clients for various configurable services."""
+import asyncio
 from http import HTTPStatus
-from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Union
 from urllib.parse import urljoin
 
+import httpx
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3 import Retry
 
+from datajunction_server.constants import ARROW_STREAM_MEDIA_TYPE, QUERY_ID_HEADER
 from datajunction_server.database.column import Column
 from datajunction_server.errors import (
     DJDoesNotExistException,
@@ -22,6 +25,7 @@ from datajunction_server.models.materialization import (
 from datajunction_server.models.partition import PartitionBackfill
 from datajunction_server.models.query import QueryCreate, QueryWithResults
 from datajunction_server.sql.parsing.types import ColumnType
+from datajunction_server.typing import QueryState
 
 if TYPE_CHECKING:
     from datajunction_server.database.engine import Engine
@@ -64,19 +68,29 @@ class RequestsSessionWithEndpoint(requests.Session):
         return urljoin(self.endpoint, url)
 
 
+class ArrowQueryResults(NamedTuple):
+    """
+    The results of a query as an Arrow stream, as returned by the query service.
+    """
+
+    query_id: str
+    content: bytes
+
+
 class QueryServiceClient:  # pylint: disable=too-few-public-methods
     """
     Client for the query service.
     """
 
     HEADERS_TO_IGNORE = ("accept-encoding",)
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
 
     def __init__(self, uri: str, retries: int = 0):
         self.uri = uri
         retry_strategy = Retry(
             total=retries,
             backoff_factor=1.5,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=list(QueryServiceClient.RETRY_STATUSES),
             allowed_methods=["GET", "POST", "PUT", "PATCH"],
         )
         self.requests_session = RequestsSessionWithEndpoint(
@@ -95,6 +109,75 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             if key.lower() not in QueryServiceClient.HEADERS_TO_IGNORE
         }
 
+    @staticmethod
+    def columns_from_response(
+        response: Union[requests.Response, httpx.Response],
+    ) -> List[Column]:
+        """
+        The table columns in a response from the query service.
+        """
+        if response.status_code not in (200, 201):
+            if response.status_code == HTTPStatus.NOT_FOUND:
+                raise DJDoesNotExistException(
+                    message=f"Table not found: {response.text}",
+                )
+            raise DJQueryServiceClientException(
+                message=f"Error response from query service: {response.text}",
+            )
+        table_columns = response.json()["columns"]
+        if not table_columns:
+            raise DJQueryServiceClientException(
+                message=f"No columns found: {response.text}",
+            )
+        return [
+            Column(name=column["name"], type=ColumnType(column["type"]), order=idx)
+            for idx, column in enumerate(table_columns)
+        ]
+
+    @staticmethod
+    def submitted_query_from_response(
+        response: Union[requests.Response, httpx.Response],
+    ) -> QueryWithResults:
+        """
+        The query in the query service's response to submitting it.
+        """
+        response_data = response.json()
+        if response.status_code not in (200, 201):
+            raise DJQueryServiceClientException(
+                message=f"Error response from query service: {response_data['message']}",
+                errors=[
+                    DJError(code=ErrorCode.QUERY_SERVICE_ERROR, message=error)
+                    for error in response_data["errors"]
+                ],
+                http_status_code=response.status_code,
+            )
+        return QueryWithResults(**response_data)
+
+    @staticmethod
+    def query_from_response(
+        response: Union[requests.Response, httpx.Response],
+    ) -> QueryWithResults:
+        """
+        The query in a response from the query service.
+        """
+        if response.status_code not in (200, 201):
+            raise DJQueryServiceClientException(
+                message=f"Error response from query service: {response.text}",
+            )
+        return QueryWithResults(**response.json())
+
+    @staticmethod
+    def materialization_info_from_response(
+        response: Union[requests.Response, httpx.Response],
+    ) -> MaterializationInfo:
+        """
+        The materialization info in a response from the query service, which is empty
+        if the query service responds with an error.
+        """
+        if response.status_code not in (200, 201):
+            return MaterializationInfo(output_tables=[], urls=[])
+        return MaterializationInfo(**response.json())
+
     def get_columns_for_table(
         self,
         catalog: str,
@@ -121,23 +204,7 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             if request_headers
             else self.requests_session.headers,
         )
-        if response.status_code not in (200, 201):
-            if response.status_code == HTTPStatus.NOT_FOUND:
-                raise DJDoesNotExistException(
-                    message=f"Table not found: {response.text}",
-                )
-            raise DJQueryServiceClientException(
-                message=f"Error response from query service: {response.text}",
-            )
-        table_columns = response.json()["columns"]
-        if not table_columns:
-            raise DJQueryServiceClientException(
-                message=f"No columns found: {response.text}",
-            )
-        return [
-            Column(name=column["name"], type=ColumnType(column["type"]), order=idx)
-            for idx, column in enumerate(table_columns)
-        ]
+        return QueryServiceClient.columns_from_response(response)
 
     def submit_query(  # pylint: disable=too-many-arguments
         self,
@@ -157,18 +224,7 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             else self.requests_session.headers,
             json=query_create.dict(),
         )
-        response_data = response.json()
-        if response.status_code not in (200, 201):
-            raise DJQueryServiceClientException(
-                message=f"Error response from query service: {response_data['message']}",
-                errors=[
-                    DJError(code=ErrorCode.QUERY_SERVICE_ERROR, message=error)
-                    for error in response_data["errors"]
-                ],
-                http_status_code=response.status_code,
-            )
-        query_info = response.json()
-        return QueryWithResults(**query_info)
+        return QueryServiceClient.submitted_query_from_response(response)
 
     def get_query(
         self,
@@ -184,12 +240,7 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             if request_headers
             else self.requests_session.headers,
         )
-        if response.status_code not in (200, 201):
-            raise DJQueryServiceClientException(
-                message=f"Error response from query service: {response.text}",
-            )
-        query_info = response.json()
-        return QueryWithResults(**query_info)
+        return QueryServiceClient.query_from_response(response)
 
     def materialize(
         self,
@@ -214,10 +265,7 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             if request_headers
             else self.requests_session.headers,
         )
-        if response.status_code not in (200, 201):  # pragma: no cover
-            return MaterializationInfo(urls=[], output_tables=[])
-        result = response.json()
-        return MaterializationInfo(**result)
+        return QueryServiceClient.materialization_info_from_response(response)
 
     def deactivate_materialization(
         self,
@@ -237,10 +285,7 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             if request_headers
             else self.requests_session.headers,
         )
-        if response.status_code not in (200, 201):  # pragma: no cover
-            return MaterializationInfo(urls=[], output_tables=[])
-        result = response.json()
-        return MaterializationInfo(**result)
+        return QueryServiceClient.materialization_info_from_response(response)
 
     def get_materialization_info(
         self,
@@ -262,9 +307,7 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             if request_headers
             else self.requests_session.headers,
         )
-        if response.status_code not in (200, 201):
-            return MaterializationInfo(output_tables=[], urls=[])
-        return MaterializationInfo(**response.json())
+        return QueryServiceClient.materialization_info_from_response(response)
 
     def run_backfill(
         self,
@@ -285,6 +328,253 @@ class QueryServiceClient:  # pylint: disable=too-few-public-methods
             else self.requests_session.headers,
             timeout=20,
         )
-        if response.status_code not in (200, 201):
-            return MaterializationInfo(output_tables=[], urls=[])  # pragma: no cover
-        return MaterializationInfo(**response.json())
+        return QueryServiceClient.materialization_info_from_response(response)
+
+
+class AsyncQueryServiceClient:
+    """
+    Asynchronous client for the query service, used by the server so that waiting on the
+    query service doesn't hold up the event loop. It has the same methods as the
+    `QueryServiceClient`, as coroutines.
+
+    Requests share a pool of keep-alive connections, of which at most `max_connections`
+    are open at once. Requests that fail to connect or come back with a 429 or 5xx status
+    are retried up to `retries` times, with exponential backoff.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        uri: str,
+        retries: int = 0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: Optional[float] = None,
+        connect_timeout: float = 5.0,
+        backoff_factor: float = 1.5,
+    ):
+        self.uri = uri
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.client = httpx.AsyncClient(
+            base_url=uri,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Make a request to the query service, retrying it if it fails to connect or
+        comes back with a retryable status.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    raise
+            else:
+                if (
+                    response.status_code not in QueryServiceClient.RETRY_STATUSES
+                    or attempt >= self.retries
+                ):
+                    return response
+                await response.aclose()
+            await asyncio.sleep(self.backoff_factor * 2**attempt)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        await self.client.aclose()
+
+    async def get_columns_for_table(
+        self,
+        catalog: str,
+        schema: str,
+        table: str,
+        request_headers: Optional[Dict[str, str]] = None,
+        engine: Optional["Engine"] = None,
+    ) -> List[Column]:
+        """
+        Retrieves columns for a table.
+        """
+        response = await self.request(
+            "GET",
+            f"/table/{catalog}.{schema}.{table}/columns/",
+            params={
+                "engine": engine.name,
+                "engine_version": engine.version,
+            }
+            if engine
+            else {},
+            headers=QueryServiceClient.filtered_headers(request_headers or {}),
+        )
+        return QueryServiceClient.columns_from_response(response)
+
+    @staticmethod
+    def headers_accepting(
+        request_headers: Optional[Dict[str, str]],
+        accept: str,
+    ) -> Dict[str, str]:
+        """
+        The filtered request headers, accepting the given media types in place of the
+        ones the request accepts.
+        """
+        headers = {
+            key: value
+            for key, value in QueryServiceClient.filtered_headers(
+                request_headers or {},
+            ).items()
+            if key.lower() != "accept"
+        }
+        headers["accept"] = accept
+        return headers
+
+    async def submit_query(
+        self,
+        query_create: QueryCreate,
+        request_headers: Optional[Dict[str, str]] = None,
+    ) -> QueryWithResults:
+        """
+        Submit a query to the query service
+        """
+        response = await self.request(
+            "POST",
+            "/queries/",
+            headers=self.headers_accepting(request_headers, "application/json"),
+            json=query_create.dict(),
+        )
+        return QueryServiceClient.submitted_query_from_response(response)
+
+    async def submit_query_arrow(
+        self,
+        query_create: QueryCreate,
+        request_headers: Optional[Dict[str, str]] = None,
+    ) -> Union[ArrowQueryResults, QueryWithResults]:
+        """
+        Submit a query to the query service, asking for its results as an Arrow stream.
+        The stream is returned as it is, so that it can be passed on without decoding
+        the results. Query services that can't return Arrow streams return the query as
+        JSON instead.
+        """
+        response = await self.request(
+            "POST",
+            "/queries/",
+            headers=self.headers_accepting(
+                request_headers,
+                f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.9",
+            ),
+            json=query_create.dict(),
+        )
+        content_type = response.headers.get("content-type", "")
+        if response.status_code in (200, 201) and content_type.startswith(
+            ARROW_STREAM_MEDIA_TYPE,
+        ):
+            return ArrowQueryResults(
+                query_id=response.headers[QUERY_ID_HEADER],
+                content=response.content,
+            )
+        return QueryServiceClient.submitted_query_from_response(response)
+
+    async def get_query(
+        self,
+        query_id: str,
+        request_headers: Optional[Dict[str, str]] = None,
+        changed_from: Optional[QueryState] = None,
+        wait: float = 0.0,
+    ) -> QueryWithResults:
+        """
+        Get a previously submitted query. If `changed_from` is given, the query service is
+        asked to hold the request for up to `wait` seconds until the query leaves that
+        state.
+        """
+        params: Dict[str, Union[str, float]] = {}
+        timeout = self.client.timeout
+        if changed_from and wait > 0:
+            params = {"state": changed_from, "timeout": wait}
+            if timeout.read is not None:
+                timeout = httpx.Timeout(timeout.read + wait, connect=timeout.connect)
+        response = await self.request(
+            "GET",
+            f"/queries/{query_id}/",
+            params=params,
+            headers=QueryServiceClient.filtered_headers(request_headers or {}),
+            timeout=timeout,
+        )
+        return QueryServiceClient.query_from_response(response)
+
+    async def materialize(
+        self,
+        materialization_input: Union[
+            GenericMaterializationInput,
+            DruidMaterializationInput,
+        ],
+        request_headers: Optional[Dict[str, str]] = None,
+    ) -> MaterializationInfo:
+        """
+        Post a request to the query service asking it to set up a scheduled materialization
+        for the node.
+        """
+        response = await self.request(
+            "POST",
+            "/materialization/",
+            json=materialization_input.dict(),
+            headers=QueryServiceClient.filtered_headers(request_headers or {}),
+        )
+        return QueryServiceClient.materialization_info_from_response(response)
+
+    async def deactivate_materialization(
+        self,
+        node_name: str,
+        materialization_name: str,
+        request_headers: Optional[Dict[str, str]] = None,
+    ) -> MaterializationInfo:
+        """
+        Deactivates the specified node materialization
+        """
+        response = await self.request(
+            "DELETE",
+            f"/materialization/{node_name}/{materialization_name}/",
+            headers=QueryServiceClient.filtered_headers(request_headers or {}),
+        )
+        return QueryServiceClient.materialization_info_from_response(response)
+
+    async def get_materialization_info(
+        self,
+        node_name: str,
+        node_version: str,
+        materialization_name: str,
+        request_headers: Optional[Dict[str, str]] = None,
+    ) -> MaterializationInfo:
+        """
+        Gets materialization info for the node and materialization config name.
+        """
+        response = await self.request(
+            "GET",
+            f"/materialization/{node_name}/{node_version}/{materialization_name}/",
+            timeout=3,
+            headers=QueryServiceClient.filtered_headers(request_headers or {}),
+        )
+        return QueryServiceClient.materialization_info_from_response(response)
+
+    async def run_backfill(
+        self,
+        node_name: str,
+        materialization_name: str,
+        partitions: List[PartitionBackfill],
+        request_headers: Optional[Dict[str, str]] = None,
+    ) -> MaterializationInfo:
+        """Kicks off a backfill with the given backfill spec"""
+        response = await self.request(
+            "POST",
+            f"/materialization/run/{node_name}/{materialization_name}/",
+            json=[partition.dict() for partition in partitions],
+            headers=QueryServiceClient.filtered_headers(request_headers or {}),
+            timeout=20,
+        )
+        return QueryServiceClient.materialization_info_from_response(response)
@@ -2,16 +2,23 @@
 DAG related functions.
 """
 import itertools
+import logging
 from typing import Dict, List, Optional, Set, Union
 
-from sqlalchemy import and_, func, join, literal, or_, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, insert, join, literal, or_, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
 from sqlalchemy.orm import aliased, contains_eager, joinedload, selectinload
 from sqlalchemy.sql.operators import is_
 
 from datajunction_server.database.attributetype import AttributeType, ColumnAttribute
 from datajunction_server.database.column import Column
 from datajunction_server.database.dimensionlink import DimensionLink
+from datajunction_server.database.dimensionreachability import (
+    DIMENSION_REACHABILITY_LOCK,
+    UNCOMMITTED_CHANGES_FLAG,
+    DimensionReachability,
+)
 from datajunction_server.database.node import (
     Node,
     NodeColumns,
@@ -24,6 +31,7 @@ from datajunction_server.models.node_type import NodeType
 from datajunction_server.utils import SEPARATOR, get_settings
 
 settings = get_settings()
+_logger = logging.getLogger(__name__)
 
 
 def _node_output_options():
@@ -213,17 +221,22 @@ async def get_upstream_nodes(
     ]
 
 
-async def get_dimensions_dag(  # pylint: disable=too-many-locals
-    session: AsyncSession,
-    node_revision: NodeRevision,
-    with_attributes: bool = True,
-) -> List[Union[DimensionAttributeOutput, Node]]:
+def _extract_roles_from_path(join_path: str) -> str:
+    """Extracts dimension roles from a dimension path's join path"""
+    roles = [
+        path.replace("[", "").replace("]", "").split(".")[-1]
+        for path in join_path.split(",")
+        if "[" in path  # this indicates that this a role
+    ]
+    non_empty_roles = [role for role in roles if role]
+    return f"[{'->'.join(non_empty_roles)}]" if non_empty_roles else ""
+
+
+def _dimensions_graph(node_revision: NodeRevision):  # pylint: disable=too-many-locals
     """
-    Gets the dimensions graph of the given node revision with a single recursive CTE query.
-    This graph is split out into dimension attributes or dimension nodes depending on the
-    `with_attributes` flag.
+    The dimensions graph of the given node revision as a single recursive CTE, with a
+    row per path to a reachable dimension node.
     """
-
     initial_node = aliased(NodeRevision, name="initial_node")
     dimension_node = aliased(Node, name="dimension_node")
     dimension_rev = aliased(NodeRevision, name="dimension_rev")
@@ -231,7 +244,6 @@ async def get_dimensions_dag(  # pylint: disable=too-many-locals
     current_rev = aliased(NodeRevision, name="current_rev")
     next_node = aliased(Node, name="next_node")
     next_rev = aliased(NodeRevision, name="next_rev")
-    column = aliased(Column, name="c")
 
     # Merge both branching points of the dimensions graph (the column -> dimension
     # branch and the node -> dimension branch) into a single CTE. We do this merge because
@@ -281,6 +293,7 @@ async def get_dimensions_dag(  # pylint: disable=too-many-locals
             dimension_node.name.label("node_name"),
             dimension_rev.id.label("node_revision_id"),
             dimension_rev.display_name.label("node_display_name"),
+            literal(1).label("hops"),
         )
         .select_from(initial_node)
         .join(graph_branches, node_revision.id == graph_branches.c.node_revision_id)
@@ -316,6 +329,7 @@ async def get_dimensions_dag(  # pylint: disable=too-many-locals
             next_node.name.label("node_name"),
             next_rev.id.label("node_revision_id"),
             next_rev.display_name.label("node_display_name"),
+            (dimensions_graph.c.hops + 1).label("hops"),
         ).select_from(
             dimensions_graph.join(
                 current_node,
@@ -343,6 +357,151 @@ async def get_dimensions_dag(  # pylint: disable=too-many-locals
             ),
         ),
     )
+    return paths
+
+
+def _recorded_dimensions_graph(node_revision: NodeRevision):
+    """
+    The dimensions graph of the given node revision from its recorded reachable
+    dimensions, in the same shape as the recursive CTE
+    """
+    return (
+        select(
+            DimensionReachability.node_revision_id.label("path_start"),
+            Node.id.label("path_end"),
+            DimensionReachability.join_path,
+            Node.name.label("node_name"),
+            NodeRevision.id.label("node_revision_id"),
+            NodeRevision.display_name.label("node_display_name"),
+            DimensionReachability.hops,
+        )
+        .select_from(DimensionReachability)
+        .join(
+            Node,
+            (Node.id == DimensionReachability.dimension_node_id)
+            & (is_(Node.deactivated_at, None)),
+        )
+        .join(
+            NodeRevision,
+            and_(
+                NodeRevision.version == Node.current_version,
+                NodeRevision.node_id == Node.id,
+            ),
+        )
+        .where(
+            DimensionReachability.node_revision_id == node_revision.id,
+            DimensionReachability.hops > 0,
+        )
+        .subquery("dimensions_graph")
+    )
+
+
+async def _is_reachability_recorded(
+    connection: Union[AsyncSession, AsyncConnection],
+    node_revision: NodeRevision,
+) -> bool:
+    recorded = await connection.execute(
+        select(DimensionReachability.id)
+        .where(DimensionReachability.node_revision_id == node_revision.id)
+        .limit(1),
+    )
+    return recorded.first() is not None
+
+
+async def record_dimension_reachability(
+    engine: AsyncEngine,
+    node_revision: NodeRevision,
+) -> bool:
+    """
+    Work out the dimensions reachable from the node revision with the recursive CTE and
+    record them, in a transaction of its own. Returns whether they're recorded.
+
+    Changes to the graph hold a shared advisory lock from when they're recorded in the
+    history until they're committed. The dimensions are only recorded if an exclusive
+    hold on that lock can be had without waiting, i.e., if no change is in progress, so
+    that what's recorded is never behind the graph. Nothing is recorded otherwise, and
+    the dimensions are worked out again the next time.
+    """
+    try:
+        async with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                locked = await connection.scalar(
+                    select(func.pg_try_advisory_xact_lock(DIMENSION_REACHABILITY_LOCK)),
+                )
+                if not locked:
+                    return False
+            if await _is_reachability_recorded(connection, node_revision):
+                return True
+            paths = _dimensions_graph(node_revision)
+            reachable = (
+                await connection.execute(
+                    select(paths.c.path_end, paths.c.join_path, paths.c.hops),
+                )
+            ).all()
+            await connection.execute(
+                insert(DimensionReachability),
+                [
+                    {
+                        "node_revision_id": node_revision.id,
+                        "dimension_node_id": node_revision.node_id,
+                        "join_path": "",
+                        "role_path": "",
+                        "hops": 0,
+                    },
+                ]
+                + [
+                    {
+                        "node_revision_id": node_revision.id,
+                        "dimension_node_id": path_end,
+                        "join_path": join_path,
+                        "role_path": _extract_roles_from_path(join_path),
+                        "hops": hops,
+                    }
+                    for path_end, join_path, hops in reachable
+                ],
+            )
+    except DBAPIError:  # pragma: no cover
+        _logger.warning(
+            "Failed to record the dimensions of %s",
+            node_revision.name,
+            exc_info=True,
+        )
+        return False
+    return True
+
+
+async def get_dimensions_dag(
+    session: AsyncSession,
+    node_revision: NodeRevision,
+    with_attributes: bool = True,
+) -> List[Union[DimensionAttributeOutput, Node]]:
+    """
+    Gets the dimensions graph of the given node revision. This graph is split out into
+    dimension attributes or dimension nodes depending on the `with_attributes` flag.
+
+    The graph is looked up from the recorded reachable dimensions of the node revision,
+    which are recorded first if they haven't been, falling back to working it out with
+    a recursive CTE if they can't be recorded.
+    """
+    column = aliased(Column, name="c")
+
+    # Sessions with uncommitted changes may have changed the graph, and so have to
+    # work it out for themselves
+    has_uncommitted_changes = bool(
+        session.new
+        or session.dirty
+        or session.deleted
+        or session.info.get(UNCOMMITTED_CHANGES_FLAG),
+    )
+    recorded = not has_uncommitted_changes and (
+        await _is_reachability_recorded(session, node_revision)
+        or await record_dimension_reachability(session.bind, node_revision)
+    )
+    paths = (
+        _recorded_dimensions_graph(node_revision)
+        if recorded
+        else _dimensions_graph(node_revision)
+    )
 
     # Final SELECT statements
     # ----
@@ -426,16 +585,6 @@ async def get_dimensions_dag(  # pylint: disable=too-many-locals
         )
     )
 
-    def _extract_roles_from_path(join_path) -> str:
-        """Extracts dimension roles from the query results' join path"""
-        roles = [
-            path.replace("[", "").replace("]", "").split(".")[-1]
-            for path in join_path.split(",")
-            if "[" in path  # this indicates that this a role
-        ]
-        non_empty_roles = [role for role in roles if role]
-        return f"[{'->'.join(non_empty_roles)}]" if non_empty_roles else ""
-
     # Only include a given column it's an attribute on a dimension node or
     # if the column is tagged with the attribute type 'dimension'
     dimension_attributes = (await session.execute(final_query)).all()
@@ -92,14 +92,34 @@ class Dispatch(metaclass=DispatchMeta):
     """
 
     registry: ClassVar[Dict[str, Dict[Tuple[Tuple[int, Type]], Callable]]] = {}
+    # Functions registered on each class whose signatures haven't been added to the
+    # registry yet: reading the signatures is deferred until the class is dispatched on
+    pending: ClassVar[Dict[Type, List[Callable]]] = {}
+    # The function resolved for each class, function name and argument types
+    resolved: ClassVar[Dict[Tuple[Type, str, Tuple[Tuple[int, Type]]], Callable]] = {}
 
     @classmethod
     def register(cls, func):  # pylint: disable=redefined-outer-name
+        cls.registry[cls] = cls.registry.get(cls) or {}
+        cls.registry[cls][func.__name__] = cls.registry[cls].get(func.__name__) or {}
+        cls.pending.setdefault(cls, []).append(func)
+        cls.resolved.clear()
+        return func
+
+    @classmethod
+    def register_signatures(cls):
+        """
+        Add the signatures of the functions registered on the class to its registry
+        """
+        for func in cls.pending.get(cls, []):  # pylint: disable=redefined-outer-name
+            cls.register_signature(func)
+        cls.pending.pop(cls, None)
+
+    @classmethod
+    def register_signature(cls, func):  # pylint: disable=redefined-outer-name
         func_name = func.__name__
         params = inspect.signature(func).parameters
         spread_types = [[]]
-        cls.registry[cls] = cls.registry.get(cls) or {}
-        cls.registry[cls][func_name] = cls.registry[cls].get(func_name) or {}
         for i, (key, value) in enumerate(params.items()):
             name = str(value).split(":", maxsplit=1)[0]
             if name.startswith("**"):
@@ -126,12 +146,13 @@ class Dispatch(metaclass=DispatchMeta):
             spread_types = temp
         for types in spread_types:
             cls.registry[cls][func_name][tuple(types)] = func  # type: ignore
-        return func
 
     @classmethod
     def dispatch(  # pylint: disable=redefined-outer-name
         cls, func_name, *args: "Expression"
     ):
+        if cls in cls.pending:
+            cls.register_signatures()
         type_registry = cls.registry[cls].get(func_name)  # type: ignore
         if not type_registry:
             raise ValueError(
@@ -149,8 +170,13 @@ class Dispatch(metaclass=DispatchMeta):
         if types in type_registry:  # type: ignore
             return type_registry[types]  # type: ignore
 
+        key = (cls, func_name, types)
+        if key in cls.resolved:
+            return cls.resolved[key]
+
         for register, func in type_registry.items():  # type: ignore
             if compare_registers(types, register):
+                cls.resolved[key] = func
                 return func
 
         raise TypeError(
@@ -418,6 +444,40 @@ def infer_type(
     return col.type  # type: ignore
 
 
+class ApproxQuantileDs(Function):
+    """
+    Returns the approximate value at a fraction of a quantiles sketch column or a
+    regular column
+    """
+
+    is_aggregation = True
+    dialects = [Dialect.DRUID]
+
+
+@ApproxQuantileDs.register
+def infer_type(
+    expr: ct.ColumnType,
+    fraction: ct.NumberType,
+) -> ct.DoubleType:
+    return ct.DoubleType()
+
+
+class ApproxSet(Function):
+    """
+    approx_set(x) - Returns the HyperLogLog sketch of the input data set of x
+    """
+
+    is_aggregation = True
+    dialects = [Dialect.TRINO]
+
+
+@ApproxSet.register  # type: ignore
+def infer_type(
+    expr: ct.ColumnType,
+) -> ct.BinaryType:
+    return ct.BinaryType()
+
+
 class Array(Function):
     """
     Returns an array of constants
@@ -820,7 +880,8 @@ def infer_type(
 
 class Cardinality(Function):
     """
-    Returns the size of an array or a map.
+    Returns the size of an array or a map, or the estimated number of distinct values
+    in a HyperLogLog sketch (Trino).
     """
 
 
@@ -838,6 +899,13 @@ def infer_type(
     return ct.IntegerType()
 
 
+@Cardinality.register  # type: ignore
+def infer_type(
+    args: ct.BinaryType,
+) -> ct.LongType:
+    return ct.LongType()
+
+
 class Cbrt(Function):
     """
     cbrt(expr) - Computes the cube root of the value expr.
@@ -2348,6 +2416,54 @@ def infer_type(arg1: ct.ColumnType, arg2: ct.IntegerType) -> ct.ColumnType:
     )
 
 
+class HllSketchAgg(Function):
+    """
+    hll_sketch_agg(expr[, lgConfigK]) - Returns the HllSketch's updatable binary
+    representation
+    """
+
+    is_aggregation = True
+
+
+@HllSketchAgg.register  # type: ignore
+def infer_type(
+    expr: ct.ColumnType,
+    lg_config_k: Optional[ct.IntegerType] = None,
+) -> ct.BinaryType:
+    return ct.BinaryType()
+
+
+class HllSketchEstimate(Function):
+    """
+    hll_sketch_estimate(expr) - Returns the estimated number of unique values given the
+    binary representation of a Datasketches HllSketch
+    """
+
+
+@HllSketchEstimate.register  # type: ignore
+def infer_type(
+    expr: ct.BinaryType,
+) -> ct.LongType:
+    return ct.LongType()
+
+
+class HllUnionAgg(Function):
+    """
+    hll_union_agg(expr[, allowDifferentLgConfigK]) - Returns the estimated number of
+    unique values given the binary representations of Datasketches HllSketches
+    """
+
+    is_aggregation = True
+
+
+@HllUnionAgg.register  # type: ignore
+def infer_type(
+    expr: ct.BinaryType,
+    allow_different_lg_config_k: Optional[ct.BooleanType] = None,
+) -> ct.BinaryType:
+    return ct.BinaryType()
+
+
 class Hour(Function):
     """
     hour(timestamp) - Extracts the hour from a timestamp.
@@ -3299,6 +3415,23 @@ def infer_type(arg: ct.IntervalTypeBase) -> ct.IntervalTypeBase:  # pragma: no c
     return arg.type
 
 
+class Merge(Function):
+    """
+    merge(sketch) - Returns the sketch that is the union of the HyperLogLog or t-digest
+    sketches in the group
+    """
+
+    is_aggregation = True
+    dialects = [Dialect.TRINO]
+
+
+@Merge.register  # type: ignore
+def infer_type(
+    sketch: ct.BinaryType,
+) -> ct.BinaryType:
+    return ct.BinaryType()
+
+
 class Min(Function):
     """
     Computes the minimum value of the input column or expression.
@@ -4138,6 +4271,24 @@ def infer_type(
     return ct.DoubleType()
 
 
+class TdigestAgg(Function):
+    """
+    tdigest_agg(x[, w]) - Returns the t-digest sketch of all input values of x, each
+    with weight w if given
+    """
+
+    is_aggregation = True
+    dialects = [Dialect.TRINO]
+
+
+@TdigestAgg.register  # type: ignore
+def infer_type(
+    expr: ct.NumberType,
+    weight: Optional[ct.NumberType] = None,
+) -> ct.BinaryType:
+    return ct.BinaryType()
+
+
 class ToDate(Function):  # pragma: no cover # pylint: disable=abstract-method
     """
     Converts a date string to a date value.
@@ -4335,6 +4486,23 @@ def infer_type(arg: ct.StringType) -> ct.StringType:
     return ct.StringType()
 
 
+class ValueAtQuantile(Function):
+    """
+    value_at_quantile(tdigest, quantile) - Returns the approximate value at a quantile
+    between 0 and 1 of a t-digest sketch
+    """
+
+    dialects = [Dialect.TRINO]
+
+
+@ValueAtQuantile.register  # type: ignore
+def infer_type(
+    sketch: ct.BinaryType,
+    quantile: ct.NumberType,
+) -> ct.DoubleType:
+    return ct.DoubleType()
+
+
 class Variance(Function):
     """
     Computes the sample variance of the input column or expression.
@@ -4478,14 +4646,14 @@ class FunctionRegistryDict(dict):
 
 
 function_registry = FunctionRegistryDict()
-for cls in Function.__subclasses__():
-    snake_cased = re.sub(r"(?<!^)(?=[A-Z])", "_", cls.__name__)
-    function_registry[cls.__name__.upper()] = cls
-    function_registry[snake_cased.upper()] = cls
+for function_class in Function.__subclasses__():
+    snake_cased = re.sub(r"(?<!^)(?=[A-Z])", "_", function_class.__name__)
+    function_registry[function_class.__name__.upper()] = function_class
+    function_registry[snake_cased.upper()] = function_class
 
 
 table_function_registry = FunctionRegistryDict()
-for cls in TableFunction.__subclasses__():
-    snake_cased = re.sub(r"(?<!^)(?=[A-Z])", "_", cls.__name__)
-    table_function_registry[cls.__name__.upper()] = cls
-    table_function_registry[snake_cased.upper()] = cls
+for function_class in TableFunction.__subclasses__():
+    snake_cased = re.sub(r"(?<!^)(?=[A-Z])", "_", function_class.__name__)
+    table_function_registry[function_class.__name__.upper()] = function_class
+    table_function_registry[snake_cased.upper()] = function_class
@@ -6,14 +6,15 @@ import decimal
 import logging
 from abc import ABC, abstractmethod
 from copy import deepcopy
-from dataclasses import dataclass, field, fields
+from dataclasses import dataclass, field, fields, is_dataclass
 from enum import Enum
-from functools import reduce
+from functools import lru_cache, reduce
 from itertools import chain, zip_longest
 from typing import (
     Any,
     Callable,
     Dict,
+    FrozenSet,
     Generic,
     Iterator,
     List,
@@ -24,12 +25,18 @@ from typing import (
     TypeVar,
     Union,
     cast,
+    get_args,
+    get_type_hints,
 )
 
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
-from datajunction_server.construction.utils import get_dj_node, to_namespaced_name
+from datajunction_server.construction.utils import (
+    to_namespaced_name,
+    unknown_node_exception,
+)
 from datajunction_server.database.dimensionlink import DimensionLink
 from datajunction_server.database.node import Node as DJNodeRef
 from datajunction_server.database.node import NodeRevision
@@ -66,6 +73,10 @@ from datajunction_server.sql.parsing.types import (
 PRIMITIVES = {int, float, str, bool, type(None)}
 logger = logging.getLogger(__name__)
 
+# The classes of the child nodes that fields of AST node classes have been found
+# holding although their annotations rule them out, keyed by node class and field name
+STRAY_CHILD_CLASSES: Dict[Tuple[type, str], Set[type]] = collections.defaultdict(set)
+
 
 def flatten(maybe_iterables: Any) -> Iterator:
     """
@@ -79,10 +90,262 @@ def flatten(maybe_iterables: Any) -> Iterator:
     )
 
 
+@lru_cache(maxsize=None)
+def field_names(node_class: type) -> Tuple[Tuple[str, bool], ...]:
+    """
+    The names of the dataclass fields of an AST node class, each paired with whether
+    the field is obfuscated (has a leading underscore)
+    """
+    if not is_dataclass(node_class):
+        return ()
+    return tuple(
+        (node_field.name, node_field.name.startswith("_"))
+        for node_field in fields(node_class)
+    )
+
+
+@lru_cache(maxsize=None)
+def field_node_classes(node_class: type, name: str) -> Optional[FrozenSet[type]]:
+    """
+    The AST node classes that a field of an AST node class may hold: those named by
+    the field's annotation and their subclasses, along with any that the field has
+    been found holding anyway. Returns None if the annotation doesn't say.
+    """
+    try:
+        hints = get_type_hints(node_class)
+    except Exception:  # pylint: disable=broad-except
+        return None
+    annotated = annotated_node_classes(hints.get(name, Any))
+    if annotated is None:
+        return None
+    classes = set(STRAY_CHILD_CLASSES.get((node_class, name), ()))
+    to_visit = list(annotated)
+    while to_visit:
+        subclass = to_visit.pop()
+        classes.add(subclass)
+        to_visit.extend(subclass.__subclasses__())
+    return frozenset(classes)
+
+
+@lru_cache(maxsize=None)
+def child_field_names(node_class: type) -> Tuple[str, ...]:
+    """
+    The names of the fields of an AST node class that may hold child nodes: those
+    that aren't obfuscated and that aren't known to only hold other values
+    """
+    return tuple(
+        name
+        for name, obfuscated in field_names(node_class)
+        if not obfuscated and field_node_classes(node_class, name) != frozenset()
+    )
+
+
+def clear_node_class_caches() -> None:
+    """
+    Forget what's been worked out about which nodes the AST node classes may hold
+    """
+    for cached in (
+        field_node_classes,
+        child_field_names,
+        child_node_classes,
+        may_contain,
+    ):
+        cached.cache_clear()
+
+
+def add_stray_child_class(node_class: type, name: str, child_class: type) -> None:
+    """
+    Record that a field of an AST node class holds a child node its annotation rules
+    out, so that the field is traversed and searches for nodes of the child's class
+    don't skip over the subtrees holding it
+    """
+    STRAY_CHILD_CLASSES[node_class, name].add(child_class)
+    clear_node_class_caches()
+
+
+@lru_cache(maxsize=None)
+def obfuscated_field_names(node_class: type) -> Tuple[str, ...]:
+    """
+    The names of the obfuscated fields of an AST node class
+    """
+    return tuple(name for name, obfuscated in field_names(node_class) if obfuscated)
+
+
+def annotated_node_classes(annotation: Any) -> Optional[Set[type]]:
+    """
+    The AST node classes named by a field's type annotation, descending into
+    containers and unions. Returns None if the annotation doesn't say which nodes
+    the field may hold (e.g. `Any` or an unbound type variable).
+    """
+    if annotation is Any:
+        return None
+    if isinstance(annotation, TypeVar):
+        return (
+            annotated_node_classes(annotation.__bound__)
+            if annotation.__bound__
+            else None
+        )
+    if args := get_args(annotation):
+        classes: Set[type] = set()
+        for arg in args:
+            arg_classes = annotated_node_classes(arg)
+            if arg_classes is None:
+                return None
+            classes |= arg_classes
+        return classes
+    if not isinstance(annotation, type):
+        return None
+    return {annotation} if issubclass(annotation, Node) else set()
+
+
+@lru_cache(maxsize=None)
+def child_node_classes(node_class: type) -> Optional[FrozenSet[type]]:
+    """
+    The AST node classes that may be children of nodes of `node_class`, according to
+    `field_node_classes`. Returns None if this can't be determined, for instance for
+    classes that add to their `children`.
+    """
+    if node_class.children is not Node.children:
+        return None
+    classes: Set[type] = set()
+    for name in child_field_names(node_class):
+        field_classes = field_node_classes(node_class, name)
+        if field_classes is None:
+            return None
+        classes |= field_classes
+    return frozenset(classes)
+
+
+@lru_cache(maxsize=None)
+def may_contain(node_class: type, node_type: type) -> bool:
+    """
+    Whether the subtree below a node of `node_class` may contain a node of `node_type`
+    """
+    seen = {node_class}
+    to_visit = [node_class]
+    while to_visit:
+        child_classes = child_node_classes(to_visit.pop())
+        if child_classes is None:
+            return True
+        for child_class in child_classes - seen:
+            if issubclass(child_class, node_type):
+                return True
+            seen.add(child_class)
+            to_visit.append(child_class)
+    return False
+
+
 @dataclass
 class CompileContext:
     session: AsyncSession
     exception: DJException
+    # DJ nodes loaded during compilation keyed by name (None if there's no such node),
+    # and the dimension links of their current revisions keyed by revision id
+    dj_nodes: Dict[str, Optional[DJNodeRef]] = field(default_factory=dict)
+    dimension_links: Dict[int, List[DimensionLink]] = field(default_factory=dict)
+
+    async def prefetch(self, query: "Query"):
+        """
+        Load the DJ nodes referenced by the query's tables along with all of the dimension
+        nodes reachable from them, so that compiling the query doesn't make a database
+        round-trip per table and per dimension hop. The dimensions graph is loaded
+        breadth-first, with one batch of queries per level.
+        """
+        names = {
+            table.identifier(quotes=False)
+            for table in query.find_all(Table)
+            if not table.dj_node
+        }
+        while names:
+            revisions = [
+                node.current for node in await self.load_dj_nodes(names) if node.current
+            ]
+            links = await self.load_dimension_links(revisions)
+            dimensions = chain(
+                (col.dimension for revision in revisions for col in revision.columns),
+                (link.dimension for link in links),
+            )
+            names = {
+                dimension.name
+                for dimension in dimensions
+                if dimension and dimension.name not in self.dj_nodes
+            }
+
+    async def load_dj_nodes(self, names: Set[str]) -> List[DJNodeRef]:
+        """
+        Load the DJ nodes with the given names that haven't been loaded yet
+        """
+        names = names - self.dj_nodes.keys()
+        if not names:
+            return []
+        statement = (
+            select(DJNodeRef)
+            .where(DJNodeRef.name.in_(names))
+            .options(
+                joinedload(DJNodeRef.current).options(
+                    *NodeRevision.default_load_options()
+                ),
+            )
+        )
+        nodes = (await self.session.execute(statement)).unique().scalars().all()
+        self.dj_nodes.update(dict.fromkeys(names))
+        self.dj_nodes.update({node.name: node for node in nodes})
+        return nodes
+
+    async def load_dimension_links(
+        self,
+        revisions: List[NodeRevision],
+    ) -> List[DimensionLink]:
+        """
+        Load the dimension links of the given node revisions that haven't been loaded yet,
+        along with the columns of the linked dimension nodes
+        """
+        ids = [rev.id for rev in revisions if rev.id not in self.dimension_links]
+        if not ids:
+            return []
+        statement = (
+            select(DimensionLink)
+            .where(DimensionLink.node_revision_id.in_(ids))
+            .options(
+                joinedload(DimensionLink.dimension).options(
+                    joinedload(DJNodeRef.current).options(
+                        selectinload(DJNode.columns),
+                    ),
+                ),
+            )
+            .order_by(DimensionLink.id)
+        )
+        links = (await self.session.execute(statement)).unique().scalars().all()
+        for id_ in ids:
+            self.dimension_links[id_] = []
+        for link in links:
+            self.dimension_links[link.node_revision_id].append(link)
+        return links
+
+    async def get_dj_node(self, name: str, kinds: Set[DJNodeType]) -> NodeRevision:
+        """
+        The current revision of the DJ node with the given name and one of the given kinds
+        """
+        await self.load_dj_nodes({name})
+        node = self.dj_nodes[name]
+        if node is None or node.type not in kinds:
+            raise unknown_node_exception(name, kinds)
+        return node.current
+
+    async def get_dimension_node(self, name: str) -> Optional[DJNodeRef]:
+        """
+        The active DJ node with the given name, if there is one
+        """
+        await self.load_dj_nodes({name})
+        node = self.dj_nodes[name]
+        return node if node and node.deactivated_at is None else None
+
+    async def get_dimension_links(self, revision: NodeRevision) -> List[DimensionLink]:
+        """
+        The dimension links of a node revision
+        """
+        await self.load_dimension_links([revision])
+        return self.dimension_links[revision.id]
 
 
 # typevar used for node methods that return self
@@ -108,6 +371,11 @@ class Node(ABC):
 
     _is_compiled: bool = False
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # a new class may be below any node that may hold one of its base classes
+        clear_node_class_caches()
+
     def __post_init__(self):
         self.add_self_as_parent()
 
@@ -158,6 +426,9 @@ class Node(ABC):
         for child in flatten(value):
             if isinstance(child, Node) and not key.startswith("_"):
                 child.set_parent(self, key)
+                allowed = field_node_classes(type(self), key)
+                if allowed is not None and type(child) not in allowed:
+                    add_stray_child_class(type(self), key, type(child))
 
     def swap(self: TNode, other: "Node") -> TNode:
         """
@@ -186,9 +457,61 @@ class Node(ABC):
 
     def copy(self: TNode) -> TNode:
         """
-        Create a deep copy of the `self`
-        """
-        return deepcopy(self)
+        Create a copy of the sub-ast of `self`. Only the AST structure and the lists,
+        tuples, sets and dicts held by its nodes are copied: other values (types,
+        literals' values, ORM objects) are shared with the original, and references to
+        nodes in other parts of the tree are kept as they are, while references to
+        nodes inside of the sub-ast are pointed at their copies. The copy has no parent.
+        """
+        nodes: List[Node] = []
+        copies: Dict[int, Node] = {}
+        to_visit: List[Node] = [self]
+        while to_visit:
+            node = to_visit.pop()
+            if id(node) in copies:
+                continue
+            nodes.append(node)
+            copies[id(node)] = object.__new__(type(node))
+            to_visit.extend(node.children)
+            # nodes that obfuscated fields hold on to outside of any tree (such as the
+            # columns of a compiled table) are copied along with the node
+            for name in obfuscated_field_names(type(node)):
+                for value in flatten(node.__dict__.get(name)):
+                    if isinstance(value, Node) and value.parent is None:
+                        to_visit.append(value)
+
+        def relink(value: Any) -> Any:
+            if id(value) in copies:
+                return copies[id(value)]
+            if type(value) in (list, tuple, set):
+                return type(value)(relink(item) for item in value)
+            if type(value) is dict:
+                return {key: relink(item) for key, item in value.items()}
+            return value
+
+        # fill in the copies' fields directly rather than through `__setattr__`, which
+        # re-links parents one field at a time; `parent` is relinked with the rest
+        for node in nodes:
+            copies[id(node)].__dict__.update(
+                (key, relink(value)) for key, value in node.__dict__.items()
+            )
+        # children held by class-level defaults (such as the name of a wildcard) are
+        # shared between nodes, so the copies are given their own
+        for node in nodes:
+            for key in child_field_names(type(node)):
+                value = getattr(node, key, None)
+                if key in node.__dict__ or value is None:
+                    continue
+                copies[id(node)].__dict__[key] = relink(value)
+                for child in flatten(value):
+                    if id(child) in copies:
+                        copies[id(child)].__dict__.update(
+                            parent=copies[id(node)],
+                            parent_key=key,
+                        )
+        copied = copies[id(self)]
+        copied.__dict__.update(parent=None, parent_key=None)
+        return copied
 
     def get_nearest_parent_of_type(
         self: "Node",
@@ -247,50 +570,16 @@ class Node(ABC):
             Iterator: returns all children of a node given filters
                 and optional flattening (by default Iterator[Node])
         """
-
-        def make_child_generator():
-            """
-            Makes a generator enclosing self to return
-            not obfuscated fields (fields without starting `_`)
-            """
-            for self_field in fields(self):
-                if (
-                    not self_field.name.startswith("_") if not obfuscated else True
-                ) and (self_field.name in self.__dict__):
-                    value = self.__dict__[self_field.name]
-                    values = [value]
-                    if flat:
-                        values = flatten(value)
-                    for value in values:
-                        if named:
-                            yield (self_field.name, value)
-                        else:
-                            yield value
-
-        # `iter`s used to satisfy mypy (`child_generator` type changes between generator, filter)
-        child_generator = iter(make_child_generator())
-
-        if nodes_only:
-            child_generator = iter(
-                filter(
-                    lambda child: isinstance(child, Node)
-                    if not named
-                    else isinstance(child[1], Node),
-                    child_generator,
-                ),
-            )
-
-        if not nones:
-            child_generator = iter(
-                filter(
-                    lambda child: (child is not None)
-                    if not named
-                    else (child[1] is not None),
-                    child_generator,
-                ),
-            )  # pylint: disable=C0301
-
-        return child_generator
+        for name, is_obfuscated in field_names(type(self)):
+            if (is_obfuscated and not obfuscated) or name not in self.__dict__:
+                continue
+            value = self.__dict__[name]
+            for child in flatten(value) if flat else (value,):
+                if (nodes_only and not isinstance(child, Node)) or (
+                    not nones and child is None
+                ):
+                    continue
+                yield (name, child) if named else child
 
     @property
     def children(self) -> Iterator["Node"]:
@@ -298,13 +587,16 @@ class Node(ABC):
         Returns an iterator of all nodes that are one
         step from the current node down including through iterables
         """
-        return self.fields(
-            flat=True,
-            nodes_only=True,
-            obfuscated=False,
-            nones=False,
-            named=False,
-        )
+        children = []
+        for name in child_field_names(type(self)):
+            value = getattr(self, name, None)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, (list, tuple, set, Iterator)):
+                children.extend(
+                    child for child in flatten(value) if isinstance(child, Node)
+                )
+        return iter(children)
 
     def replace(  # pylint: disable=invalid-name
         self,
@@ -336,17 +628,18 @@ class Node(ABC):
         """
         Find all nodes that `func` returns `True` for
         """
-        if func(self):
-            yield self
-
-        for node in chain(*[child.filter(func) for child in self.children]):
-            yield node
+        to_visit = [self]
+        while to_visit:
+            node = to_visit.pop()
+            if func(node):
+                yield node
+            to_visit.extend(reversed(list(node.children)))
 
     def contains(self, other: "Node") -> bool:
         """
         Checks if the subtree of `self` contains the node
         """
-        return any(self.filter(lambda node: node is other))
+        return any(node is other for node in self.find_all(type(other)))
 
     def is_ancestor_of(self, other: Optional["Node"]) -> bool:
         """
@@ -358,15 +651,24 @@ class Node(ABC):
         """
         Find all nodes of a particular type in the node's sub-ast
         """
-        return self.filter(lambda n: isinstance(n, node_type))  # type: ignore
+        to_visit: List[Node] = [self]
+        while to_visit:
+            node = to_visit.pop()
+            if isinstance(node, node_type):
+                yield node
+            # skip over subtrees that can't contain a node of the type
+            if may_contain(type(node), node_type):
+                to_visit.extend(reversed(list(node.children)))
 
     def apply(self, func: Callable[["Node"], None]):
         """
         Traverse ast and apply func to each Node
         """
-        func(self)
-        for child in self.children:
-            child.apply(func)
+        to_visit = [self]
+        while to_visit:
+            node = to_visit.pop()
+            func(node)
+            to_visit.extend(reversed(list(node.children)))
 
     def compare(
         self,
@@ -856,13 +1158,8 @@ class Column(Aliasable, Named, Expression):
             Query,
             self.get_nearest_parent_of_type(Query),
         )
-        direct_tables = list(
-            filter(
-                lambda tbl: tbl.in_from_or_lateral()
-                and tbl.get_nearest_parent_of_type(Query) is query,
-                query.find_all(TableExpression),
-            ),
-        )
+        scope = Scope.of(query)
+        direct_tables = scope.tables
         if hasattr(self, "child"):
             self.add_type(self.child.type)
         for table in direct_tables:
@@ -882,17 +1179,13 @@ class Column(Aliasable, Named, Expression):
         # Go through TableExpressions directly on the AST first and collect all
         # possible origins for this column. There may be more than one if the column
         # is not namespaced.
-        for table in direct_tables:
-            if (
-                # This column may be namespaced, in which case we'll search for an origin table
-                # that has the namespace as an alias or name. If this column has no namespace,
-                # it should be sourced from the immediate table
-                not namespace
-                or namespace == table.alias_or_name.identifier(False)
-            ):
-                result = await table.add_ref_column(self, ctx)
-                if result:
-                    found.append(table)
+        # This column may be namespaced, in which case we'll search for an origin table
+        # that has the namespace as an alias or name. If this column has no namespace,
+        # it should be sourced from the immediate table
+        for table in scope.lookup(namespace):
+            result = await table.add_ref_column(self, ctx)
+            if result:
+                found.append(table)
 
         # This column may be a struct, meaning it'll have an optional namespace,
         # a column name, and a subscript
@@ -907,32 +1200,25 @@ class Column(Aliasable, Named, Expression):
         if found:
             return found
 
-        if not query.in_from_or_lateral():
-            correlation_tables = list(
-                filter(
-                    lambda tbl: tbl.in_from_or_lateral()
-                    and query.is_ancestor_of(tbl.get_nearest_parent_of_type(Query)),
-                    query.find_all(TableExpression),
-                ),
-            )
-            for table in correlation_tables:
-                if not namespace or table.alias_or_name.identifier(False) == namespace:
-                    if await table.add_ref_column(self, ctx):
-                        found.append(table)
+        # A subquery expression (e.g. a scalar subquery) may reference columns of
+        # the queries it is correlated with, nearest scope first
+        correlated = scope.parent
+        while correlated and not found:
+            for table in correlated.lookup(namespace):
+                if await table.add_ref_column(self, ctx):
+                    found.append(table)
+            correlated = correlated.parent
 
         if found:
             return found
 
         # Check for ctes
         alpha_query = self.get_furthest_parent()
-        direct_table_names = {
-            direct_table.alias_or_name.identifier() for direct_table in direct_tables
-        }
         if isinstance(alpha_query, Query) and alpha_query.ctes:
             for cte in alpha_query.ctes:
                 cte_name = cte.alias_or_name.identifier(False)
                 if cte_name == namespace or (
-                    not namespace and cte_name in direct_table_names
+                    not namespace and cte_name in scope.table_names
                 ):
                     if await cte.add_ref_column(self, ctx):
                         found.append(cte)
@@ -961,14 +1247,8 @@ class Column(Aliasable, Named, Expression):
                     current_table.set_dj_node(current_table.dj_node.current)
                 for dj_col in current_table.dj_node.columns:
                     if dj_col.dimension:
-                        col_dimension = await DJNodeRef.get_by_name(
-                            ctx.session,
+                        col_dimension = await ctx.get_dimension_node(
                             dj_col.dimension.name,
-                            options=[
-                                joinedload(DJNodeRef.current).options(
-                                    selectinload(DJNode.columns),
-                                ),
-                            ],
                         )
                         if col_dimension:
                             new_table = Table(
@@ -985,25 +1265,18 @@ class Column(Aliasable, Named, Expression):
                                 for col in col_dimension.current.columns
                             ]
                             to_process.append((new_table, path))
-                await ctx.session.refresh(current_table.dj_node, ["dimension_links"])
-                for link in current_table.dj_node.dimension_links:
+                for link in await ctx.get_dimension_links(current_table.dj_node):
                     all_roles = []
                     if self.role:
                         all_roles = self.role.split(" -> ")
                     if (not link.role and not all_roles) or (link.role in all_roles):
-                        await ctx.session.refresh(link, ["dimension"])
                         if link.dimension:
-                            await ctx.session.refresh(link.dimension, ["current"])
                             new_table = Table(
                                 name=to_namespaced_name(link.dimension.name),
                                 _dj_node=link.dimension.current,
                                 dimension_link=link,
                                 path=path + [link],
                             )
-                            await ctx.session.refresh(
-                                link.dimension.current,
-                                ["columns"],
-                            )
                             new_table._columns = [
                                 Column(
                                     name=Name(col.name),
@@ -1357,8 +1630,7 @@ class Table(TableExpression, Named):
         self._is_compiled = True
         try:
             if not self.dj_node:
-                dj_node = await get_dj_node(
-                    ctx.session,
+                dj_node = await ctx.get_dj_node(
                     self.identifier(quotes=False),
                     {DJNodeType.SOURCE, DJNodeType.TRANSFORM, DJNodeType.DIMENSION},
                 )
@@ -1693,8 +1965,19 @@ class Function(Named, Operation):
     def __getnewargs__(self):
         return self.name, self.args
 
+    def __reduce_ex__(self, protocol):
+        # Rebuild the function from its fields rather than through `__new__`, which
+        # would need its name to be unpickled first
+        return object.__new__, (type(self),), self.__dict__
+
     def __deepcopy__(self, memodict):
-        return self
+        # Copy the function's fields directly rather than going through `__new__`,
+        # which may swap the class out for a table-valued function
+        func = object.__new__(type(self))
+        memodict[id(self)] = func
+        for key, value in self.__dict__.items():
+            object.__setattr__(func, key, deepcopy(value, memodict))
+        return func
 
     def __str__(self) -> str:
         if self.name.name.upper() in function_registry and self.is_runtime():
@@ -2622,6 +2905,8 @@ class Query(TableExpression, UnNamed):
 
     select: SelectExpression = field(default_factory=SelectExpression)
     ctes: List["Query"] = field(default_factory=list)
+    # the query's scope, held on to while the query is being compiled
+    _scope: Optional["Scope"] = field(init=False, repr=False, default=None)
 
     def is_compiled(self) -> bool:
         return not any(
@@ -2632,9 +2917,17 @@ class Query(TableExpression, UnNamed):
         if self._is_compiled:
             return
 
-        for child in self.children:
-            if child is not self and not child.is_compiled():
-                await child.compile(ctx)
+        await ctx.prefetch(self)
+
+        # The tables in the query don't change while it is being compiled, so its
+        # scope can be shared by all of the columns compiled along the way
+        self._scope = Scope(self)
+        try:
+            for child in self.children:
+                if child is not self and not child.is_compiled():
+                    await child.compile(ctx)
+        finally:
+            self._scope = None
 
         for expr in self.select.projection:
             self._columns += expr.columns
@@ -2750,3 +3043,59 @@ class Query(TableExpression, UnNamed):
             access_control,
         )
         self.select.add_aliases_to_unnamed_columns()
+
+
+class Scope:
+    """
+    The tables that the columns of a query can be resolved against: those in the
+    query's FROM clause and lateral views, indexed by their alias or name. The scope
+    is collected in a single walk of the query that stops at nested queries, which
+    have scopes of their own.
+    """
+
+    def __init__(self, query: Query):
+        self.query = query
+        self.tables: List[TableExpression] = []
+        self.tables_by_name: Dict[str, List[TableExpression]] = {}
+
+        to_visit = list(reversed(list(query.children)))
+        while to_visit:
+            node = to_visit.pop()
+            if isinstance(node, TableExpression) and node.in_from_or_lateral():
+                self.tables.append(node)
+                self.tables_by_name.setdefault(
+                    node.alias_or_name.identifier(False),
+                    [],
+                ).append(node)
+            if not isinstance(node, Query):
+                to_visit.extend(reversed(list(node.children)))
+        self.table_names = {table.alias_or_name.identifier() for table in self.tables}
+
+    @staticmethod
+    def of(query: Query) -> "Scope":
+        """
+        The scope of the query, reusing the one built for the query's compilation
+        if it is being compiled
+        """
+        return query._scope or Scope(query)
+
+    def lookup(self, namespace: str) -> List[TableExpression]:
+        """
+        The tables a column with the given namespace (table alias or name) may come
+        from. Columns without a namespace may come from any table in the scope.
+        """
+        if not namespace:
+            return self.tables
+        return self.tables_by_name.get(namespace, [])
+
+    @property
+    def parent(self) -> Optional["Scope"]:
+        """
+        The scope of the enclosing query, if this query is a subquery expression
+        that can be correlated with it. Queries in a FROM clause or lateral view and
+        CTEs can't reference the columns of the query they're in.
+        """
+        if self.query.parent_key == "ctes" or self.query.in_from_or_lateral():
+            return None
+        outer = self.query.get_nearest_parent_of_type(Query)
+        return Scope.of(outer) if outer else None
@@ -11,9 +11,17 @@ from antlr4.error.Errors import ParseCancellationException
 from antlr4.error.ErrorStrategy import BailErrorStrategy
 
 import datajunction_server.sql.parsing.types as ct
+from datajunction_server.errors import DJException
 from datajunction_server.sql.parsing import ast
 from datajunction_server.sql.parsing.ast import UnaryOpKind
-from datajunction_server.sql.parsing.backends.exceptions import DJParseException
+from datajunction_server.sql.parsing.backends.base import (
+    ParserBackend,
+    get_parser_backend,
+)
+from datajunction_server.sql.parsing.backends.exceptions import (
+    DJParseException,
+    UnsupportedStatement,
+)
 from datajunction_server.sql.parsing.backends.grammar.generated.SqlBaseLexer import (
     SqlBaseLexer,
 )
@@ -23,6 +31,8 @@ from datajunction_server.sql.parsing.backends.grammar.generated.SqlBaseParser im
 from datajunction_server.sql.parsing.backends.grammar.generated.SqlBaseParser import (
     SqlBaseParser as sbp,
 )
+from datajunction_server.sql.parsing.cache import get_parse_cache
+from datajunction_server.sql.parsing.type_parser import primitive_type
 
 if TYPE_CHECKING:
     from datajunction_server.sql.parsing.types import ColumnType
@@ -181,16 +191,82 @@ def parse_rule(sql: str, rule: str) -> Union[ast.Node, "ColumnType"]:
 
 def parse(sql: Optional[str]) -> ast.Query:
     """
-    Parse a string sql query into a DJ ast Query
+    Parse a string sql query into a DJ ast Query. Parsed queries are cached, so
+    the same query text is only ever parsed once per process and parsing backend.
     """
+    from datajunction_server.utils import (  # pylint: disable=import-outside-toplevel
+        get_settings,
+    )
+
     if not sql:
         raise DJParseException("Empty query provided!")
+    backend_name = get_settings().sql_parsing_backend
+    return get_parse_cache().get_or_parse(
+        sql,
+        lambda query: parse_query(query, backend_name),
+        backend_name,
+    )
+
+
+def parse_query(sql: str, backend_name: Optional[str] = None) -> ast.Query:
+    """
+    Parse a string sql query into a DJ ast Query with the given parsing backend, or
+    the configured one, falling back to ANTLR for any statement that the backend
+    rejects.
+    """
+    from datajunction_server.utils import (  # pylint: disable=import-outside-toplevel
+        get_settings,
+    )
+
+    backend = get_parser_backend(backend_name or get_settings().sql_parsing_backend)
+    if backend.name != ANTLR4Backend.name:
+        try:
+            return backend.parse_query(sql)
+        except UnsupportedStatement as exc:
+            logger.debug("Parsing with ANTLR, %s backend: %s", backend.name, exc)
+        except (  # conversion bugs on statements that the backend didn't anticipate
+            DJException,
+            AttributeError,
+            IndexError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ):
+            logger.warning(
+                "The %s parsing backend failed, parsing with ANTLR",
+                backend.name,
+                exc_info=True,
+            )
     return cast(ast.Query, parse_rule(sql, "singleStatement"))
 
 
+class ANTLR4Backend(ParserBackend):
+    """
+    The reference parsing backend, built on the ANTLR4 Spark SQL grammar
+    """
+
+    name = "antlr4"
+
+    def parse_query(self, sql: str) -> ast.Query:
+        return cast(ast.Query, parse_rule(sql, "singleStatement"))
+
+
 TERMINAL_NODE = antlr4.tree.Tree.TerminalNodeImpl
 
 
+def is_parenthesized(ctx) -> bool:
+    """
+    Whether the text spanned by the context starts with an opening paren and
+    ends with a closing one. This only looks at the boundary tokens of the
+    context rather than calling `ctx.getText()`, which would concatenate the
+    entire subtree and make the conversion quadratic for nested expressions.
+    """
+    start, stop = ctx.start, ctx.stop
+    if start is None or stop is None or stop.tokenIndex < start.tokenIndex:
+        return False
+    return start.text.startswith("(") and stop.text.endswith(")")
+
+
 class Visitor:
     def __init__(self):
         self.registry = {}
@@ -227,11 +303,9 @@ class Visitor:
             hasattr(result, "parenthesized")
             and result.parenthesized is None
             and hasattr(ctx, "LEFT_PAREN")
+            and is_parenthesized(ctx)
         ):
-            if text := ctx.getText():
-                text = text.strip()
-                if (text[0] == "(") and (text[-1] == ")"):
-                    result.parenthesized = True
+            result.parenthesized = True
         if (
             hasattr(ctx, "AS")
             and ctx.AS()
@@ -1117,30 +1191,12 @@ def _(ctx: sbp.LambdaContext) -> ast.Lambda:
 
 @visit.register
 def _(ctx: sbp.PrimitiveDataTypeContext) -> ast.Value:
-    column_type = ctx.getText().strip()
-    decimal_match = ct.DECIMAL_REGEX.match(column_type)
-    if decimal_match:
-        precision = int(decimal_match.group("precision"))
-        scale = int(decimal_match.group("scale"))
-        return ct.DecimalType(precision, scale)
-
-    fixed_match = ct.FIXED_PARSER.match(column_type)
-    if fixed_match:
-        length = int(fixed_match.group("length"))
-        return ct.FixedType(length)
-
-    varchar_match = ct.VARCHAR_PARSER.match(column_type)
-    if varchar_match:
-        length = varchar_match.group("length")
-        return ct.VarcharType(length) if length else ct.VarcharType()
-
-    column_type = column_type.lower().strip("()")
-    try:
-        return ct.PRIMITIVE_TYPES[column_type]
-    except KeyError as exc:
+    column_type = primitive_type(ctx.getText().strip())
+    if column_type is None:
         raise DJParseException(
             f"DJ does not recognize the type `{ctx.getText()}`.",
-        ) from exc
+        )
+    return column_type
 
 
 @visit.register
@@ -1174,7 +1230,7 @@ def _(ctx: sbp.ComplexColTypeContext) -> ct.NestedField:
 
 @visit.register
 def _(ctx: sbp.YearMonthIntervalDataTypeContext) -> ct.YearMonthIntervalType:
-    from_ = ctx.from_.getText().upper()
+    from_ = ctx.from_.text.upper()
     to = ctx.to.text.upper() if ctx.to else None
     return ct.YearMonthIntervalType(from_=from_, to_=to)
 
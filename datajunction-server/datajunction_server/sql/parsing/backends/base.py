@@ -0,0 +1,54 @@
+"""
+SQL parsing backends manager.
+"""
+import importlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict
+
+from datajunction_server.errors import DJException, DJPluginNotFoundException
+
+if TYPE_CHECKING:
+    from datajunction_server.sql.parsing import ast
+
+# The modules that implement each parsing backend, imported on first use so that a
+# backend's parsing library only needs to be installed if that backend is selected
+PARSER_BACKEND_MODULES: Dict[str, str] = {
+    "antlr4": "datajunction_server.sql.parsing.backends.antlr4",
+    "sqlglot": "datajunction_server.sql.parsing.backends.sqlglot",
+}
+
+
+class ParserBackend(ABC):  # pylint: disable=too-few-public-methods
+    """
+    SQL parsing backend base class. A backend turns the text of a query into a DJ ast
+    built from the classes in `datajunction_server.sql.parsing.ast`. Backends other
+    than ANTLR may reject statements they can't handle by raising `UnsupportedStatement`,
+    in which case the statement is parsed with the ANTLR backend instead.
+    """
+
+    name: str
+
+    @abstractmethod
+    def parse_query(self, sql: str) -> "ast.Query":
+        """
+        Parse a single SQL statement into a DJ ast Query.
+        """
+
+
+@lru_cache(maxsize=None)
+def get_parser_backend(name: str) -> ParserBackend:
+    """
+    Retrieves the SQL parsing backend with the given name
+    """
+    module = PARSER_BACKEND_MODULES.get(name)
+    if module is None:
+        raise DJPluginNotFoundException(
+            message=f"No SQL parsing backend found for `{name}`!",
+        )
+    try:
+        importlib.import_module(module)
+    except ImportError as import_err:
+        raise DJException(message=f"Not installed: {name}") from import_err
+    backends = [clazz for clazz in ParserBackend.__subclasses__() if clazz.name == name]
+    return backends[0]()  # type: ignore
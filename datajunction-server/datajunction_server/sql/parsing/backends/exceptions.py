@@ -6,3 +6,10 @@ from datajunction_server.errors import DJException
 
 class DJParseException(DJException):
     """Exception type raised upon problem creating a DJ sql ast"""
+
+
+class UnsupportedStatement(DJParseException):
+    """
+    Raised by a parsing backend for a statement that it can't convert into a DJ ast.
+    Statements rejected this way are parsed with the ANTLR backend instead.
+    """
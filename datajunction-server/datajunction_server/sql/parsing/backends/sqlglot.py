@@ -0,0 +1,996 @@
+"""
+A SQL parsing backend built on sqlglot's tokenizer and parser.
+
+sqlglot parses a statement into its own expression tree, which is then converted into
+the same DJ ast that the ANTLR backend builds. The conversion is deliberately strict:
+anything that can't be reproduced exactly as the ANTLR backend would reproduce it is
+rejected with `UnsupportedStatement`, and the statement is parsed with ANTLR instead.
+
+The parser is a subclass of sqlglot's Spark parser that keeps every function call as
+it was written and records the details of the source text that sqlglot's own tree
+doesn't retain (operator spellings, `AS` keywords, literal text, join keywords).
+"""
+# pylint: disable=protected-access,too-many-return-statements
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from sqlglot import exp
+from sqlglot.dialects.spark import Spark
+from sqlglot.errors import SqlglotError
+from sqlglot.tokens import Token, TokenType
+
+from datajunction_server.errors import DJException
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.base import ParserBackend
+from datajunction_server.sql.parsing.backends.exceptions import UnsupportedStatement
+from datajunction_server.sql.parsing.type_parser import parse_column_type
+
+
+def _with_source(
+    parser: "DJSpark.Parser",
+    node: Optional[exp.Expression],
+    start: Token,
+    end: Optional[Token] = None,
+) -> Optional[exp.Expression]:
+    """
+    Record the source text spanned by the tokens from `start` to `end` on the node
+    """
+    if node is not None:
+        node.meta["source"] = parser.sql[start.start : (end or start).end + 1]
+    return node
+
+
+def _with_meta(node: Optional[exp.Expression], **meta) -> Optional[exp.Expression]:
+    """
+    Record details of the source on the node
+    """
+    if node is not None:
+        node.meta.update(meta)
+    return node
+
+
+def _cast_parser(parse: Callable) -> Callable:
+    """
+    Wrap a function parser so the cast it parses is marked as written out as one
+    """
+    return lambda self: _with_meta(parse(self), cast=True)
+
+
+def _source_parser(parse: Callable) -> Callable:
+    """
+    Wrap a primary parser so the literal it parses keeps its source text
+    """
+    return lambda self, token: _with_source(self, parse(self, token), token)
+
+
+class DJSpark(Spark):
+    """
+    The Spark dialect, with a parser that keeps what the DJ ast needs from the source
+    """
+
+    class Parser(Spark.Parser):
+        """
+        Spark parser that leaves function calls as written and annotates the tree with
+        details of the source text. Operator precedence follows the Spark grammar,
+        where OR binds more loosely than AND and all comparisons share one level.
+        """
+
+        FUNCTIONS: Dict[str, Callable] = {}
+
+        FUNCTION_PARSERS = {
+            name: _cast_parser(Spark.Parser.FUNCTION_PARSERS[name])
+            for name in ("CAST", "TRY_CAST")
+        }
+        FUNCTION_PARSERS["EXTRACT"] = Spark.Parser.FUNCTION_PARSERS["EXTRACT"]
+
+        NO_PAREN_FUNCTION_PARSERS = {
+            name: parse
+            for name, parse in Spark.Parser.NO_PAREN_FUNCTION_PARSERS.items()
+            if name != "IF"
+        }
+
+        UNARY_PARSERS = {
+            **Spark.Parser.UNARY_PARSERS,
+            TokenType.NOT: lambda self: _with_meta(
+                self.expression(exp.Not, this=self._parse_equality()),
+                logical=True,
+            ),
+        }
+
+        PRIMARY_PARSERS = {
+            **Spark.Parser.PRIMARY_PARSERS,
+            **{
+                token_type: _source_parser(Spark.Parser.PRIMARY_PARSERS[token_type])
+                for token_type in (TokenType.STRING, TokenType.NUMBER)
+            },
+        }
+
+        RANGE_PARSERS = {
+            **Spark.Parser.RANGE_PARSERS,
+            TokenType.RLIKE: lambda self, this: _with_meta(
+                Spark.Parser.RANGE_PARSERS[TokenType.RLIKE](self, this),
+                keyword=self._prev.text.upper(),
+            ),
+        }
+
+        COMPARISONS = {
+            TokenType.EQ: exp.EQ,
+            TokenType.NEQ: exp.NEQ,
+            TokenType.NULLSAFE_EQ: exp.NullSafeEQ,
+            **Spark.Parser.COMPARISON,
+        }
+
+        def _parse_tokens(
+            self,
+            parse_method: Callable,
+            expressions: Dict,
+        ) -> Optional[exp.Expression]:
+            this = parse_method()
+            while self._match_set(expressions):
+                operator = self._prev
+                this = _with_meta(
+                    self.expression(
+                        expressions[operator.token_type],
+                        this=this,
+                        expression=parse_method(),
+                    ),
+                    operator=operator.text,
+                )
+            return this
+
+        def _parse_conjunction(self) -> Optional[exp.Expression]:
+            return self._parse_tokens(self._parse_and, {TokenType.OR: exp.Or})
+
+        def _parse_and(self) -> Optional[exp.Expression]:
+            return self._parse_tokens(self._parse_equality, {TokenType.AND: exp.And})
+
+        def _parse_equality(self) -> Optional[exp.Expression]:
+            return self._parse_tokens(self._parse_range, self.COMPARISONS)
+
+        def _parse_factor(self) -> Optional[exp.Expression]:
+            return self._parse_tokens(self._parse_unary, self.FACTOR)
+
+        def _parse_id_var(
+            self,
+            any_token: bool = True,
+            tokens: Optional[Any] = None,
+        ) -> Optional[exp.Expression]:
+            start = self._curr
+            identifier = super()._parse_id_var(any_token=any_token, tokens=tokens)
+            if start is not None and start.token_type == TokenType.STRING:
+                _with_meta(identifier, quote=self.sql[start.start])
+            return identifier
+
+        def _parse_extract(self) -> exp.Extract:
+            start = self._index
+            extract = super()._parse_extract()
+            field, separator = self._tokens[start : start + 2]
+            if separator.token_type == TokenType.FROM:
+                extract.meta["field"] = field.text
+            return extract
+
+        def _parse_interval(
+            self, match_interval: bool = True
+        ) -> Optional[exp.Interval]:
+            start = self._index
+            interval = super()._parse_interval(match_interval=match_interval)
+            return _with_meta(  # type: ignore
+                interval,
+                tokens=self._tokens[start : self._index],
+            )
+
+        def _parse_types(
+            self,
+            check_func: bool = False,
+            schema: bool = False,
+            allow_identifiers: bool = True,
+        ) -> Optional[exp.Expression]:
+            start = self._curr
+            data_type = super()._parse_types(
+                check_func=check_func,
+                schema=schema,
+                allow_identifiers=allow_identifiers,
+            )
+            if start is None or self._prev is None:
+                return data_type  # pragma: no cover
+            return _with_source(self, data_type, start, self._prev)
+
+        def _parse_alias(
+            self,
+            this: Optional[exp.Expression],
+            explicit: bool = False,
+        ) -> Optional[exp.Expression]:
+            as_ = self._curr is not None and self._curr.token_type == TokenType.ALIAS
+            aliased = super()._parse_alias(this, explicit=explicit)
+            if aliased is not this:
+                _with_meta(aliased, as_=as_)
+            return aliased
+
+        def _parse_table_alias(
+            self,
+            alias_tokens: Optional[Any] = None,
+        ) -> Optional[exp.TableAlias]:
+            as_ = self._curr is not None and self._curr.token_type == TokenType.ALIAS
+            return _with_meta(  # type: ignore
+                super()._parse_table_alias(alias_tokens),
+                as_=as_,
+            )
+
+        def _parse_join(
+            self,
+            skip_join_token: bool = False,
+            parse_bracket: bool = False,
+        ) -> Optional[exp.Join]:
+            start = self._index
+            join = super()._parse_join(
+                skip_join_token=skip_join_token,
+                parse_bracket=parse_bracket,
+            )
+            if join is not None:
+                keywords = []
+                for token in self._tokens[start:]:
+                    if token.token_type in (TokenType.JOIN, TokenType.COMMA):
+                        join.meta["comma"] = token.token_type == TokenType.COMMA
+                        break
+                    keywords.append(token.text)
+                join.meta["join_type"] = "".join(f"{keyword} " for keyword in keywords)
+            return join
+
+        def _parse_ordered(
+            self,
+            parse_method: Optional[Callable] = None,
+        ) -> Optional[exp.Ordered]:
+            this = parse_method() if parse_method else self._parse_conjunction()
+            if not this:
+                return None  # pragma: no cover
+            ordering = ""
+            if self._match_set((TokenType.ASC, TokenType.DESC)):
+                ordering = self._prev.text.upper()
+            nulls = ""
+            if (
+                self._curr
+                and self._next
+                and self._curr.text.upper() == "NULLS"
+                and self._next.text.upper() in ("FIRST", "LAST")
+            ):
+                nulls = f"NULLS {self._next.text}"
+                self._advance(2)
+            return _with_meta(  # type: ignore
+                self.expression(
+                    exp.Ordered,
+                    this=this,
+                    desc=ordering == "DESC",
+                    nulls_first=nulls.upper() == "NULLS FIRST",
+                ),
+                ordering=ordering,
+                nulls=nulls,
+            )
+
+        def _parse_set_operations(
+            self,
+            this: Optional[exp.Expression],
+        ) -> Optional[exp.Expression]:
+            while this and self._match_set(self.SET_OPERATIONS):
+                operator = self._prev
+                quantifier = ""
+                if self._match_set((TokenType.DISTINCT, TokenType.ALL)):
+                    quantifier = f" {self._prev.text.upper()}"
+                right = self._parse_select(nested=True, parse_set_operation=False)
+                this = _with_meta(
+                    self.expression(
+                        SET_OPERATIONS[operator.token_type],
+                        this=this,
+                        expression=right,
+                    ),
+                    kind=f"{operator.text}{quantifier}",
+                )
+            if isinstance(this, exp.Union) and isinstance(this.expression, exp.Select):
+                # ORDER BY and LIMIT after the last query apply to the whole set operation
+                for arg in ("order", "limit"):
+                    if modifier := this.expression.args.get(arg):
+                        this.set(arg, modifier.pop())
+            return this
+
+
+SET_OPERATIONS: Dict[TokenType, Type[exp.Expression]] = {
+    TokenType.UNION: exp.Union,
+    TokenType.INTERSECT: exp.Intersect,
+    TokenType.EXCEPT: exp.Except,
+}
+
+# Functions that the Spark grammar parses with rules of their own, which the ANTLR
+# backend converts differently from an ordinary function call
+SPECIAL_FUNCTIONS = {
+    "ANY_VALUE",
+    "CAST",
+    "FIRST",
+    "LAST",
+    "OVERLAY",
+    "PERCENTILE_CONT",
+    "PERCENTILE_DISC",
+    "POSITION",
+    "STRUCT",
+    "SUBSTR",
+    "SUBSTRING",
+    "TRIM",
+    "TRY_CAST",
+}
+DATETIME_UNIT_FUNCTIONS = {
+    "DATEADD",
+    "DATEDIFF",
+    "DATE_ADD",
+    "DATE_DIFF",
+    "TIMESTAMPADD",
+    "TIMESTAMPDIFF",
+}
+
+INTERVAL_UNITS = {
+    "YEAR",
+    "MONTH",
+    "WEEK",
+    "DAY",
+    "HOUR",
+    "MINUTE",
+    "SECOND",
+    "MILLISECOND",
+    "MICROSECOND",
+    "NANOSECOND",
+}
+
+COMPARISON_TYPES = (
+    exp.EQ,
+    exp.NEQ,
+    exp.NullSafeEQ,
+    exp.GT,
+    exp.GTE,
+    exp.LT,
+    exp.LTE,
+)
+PREDICATE_TYPES = (
+    exp.Between,
+    exp.In,
+    exp.Is,
+    exp.Like,
+    exp.ILike,
+    exp.NullSafeNEQ,
+    exp.Not,
+    exp.RegexpLike,
+)
+
+
+def unsupported(node: exp.Expression, detail: str = "") -> UnsupportedStatement:
+    """
+    The exception raised for a sqlglot expression that can't be converted
+    """
+    detail = f" ({detail})" if detail else ""
+    return UnsupportedStatement(f"`{type(node).__name__}` is not supported{detail}")
+
+
+def check_args(node: exp.Expression, *allowed: str) -> None:
+    """
+    Reject the expression if it has any arguments set other than the allowed ones
+    """
+    for key, value in node.args.items():
+        if key not in allowed and value not in (None, False, []):
+            raise unsupported(node, key)
+
+
+class Converter:
+    """
+    Converts sqlglot expressions into DJ ast nodes, dispatching on the expression type
+    """
+
+    def __init__(self):
+        self.registry: Dict[Type[exp.Expression], Callable] = {}
+
+    def register(self, *types: Type[exp.Expression]) -> Callable:
+        """
+        Register a conversion function for the given sqlglot expression types
+        """
+
+        def decorator(func: Callable) -> Callable:
+            for type_ in types:
+                self.registry[type_] = func
+            return func
+
+        return decorator
+
+    def __call__(self, node: Optional[exp.Expression]) -> Any:
+        if node is None:
+            raise UnsupportedStatement("Missing expression")
+        func = self.registry.get(type(node))
+        if func is None:
+            raise unsupported(node)
+        return func(node)
+
+    def all(self, nodes: Optional[List[exp.Expression]]) -> List[Any]:
+        """
+        Convert a list of sqlglot expressions
+        """
+        return [self(node) for node in nodes or []]
+
+
+convert = Converter()
+
+
+def convert_name(node: exp.Expression) -> ast.Name:
+    """
+    Convert an identifier into a DJ name
+    """
+    if not isinstance(node, exp.Identifier):
+        raise unsupported(node, "expected an identifier")
+    if node.quoted:
+        quote = node.meta.get("quote", "`")
+        if quote == "'" or quote in node.this:
+            raise unsupported(node, "quoted identifier")
+        return ast.Name(node.this, quote_style=quote)
+    return ast.Name(node.this)
+
+
+def convert_names(*nodes: Optional[exp.Expression]) -> ast.Name:
+    """
+    Convert a sequence of identifiers into a namespaced DJ name
+    """
+    name = None
+    for node in nodes:
+        if node is None:
+            continue
+        parts = [node]
+        while isinstance(parts[0], exp.Dot):
+            parts[:1] = [parts[0].this, parts[0].expression]
+        for part in parts:
+            converted = convert_name(part)
+            converted.namespace = name
+            name = converted
+    if name is None:
+        raise UnsupportedStatement("Empty name")  # pragma: no cover
+    return name
+
+
+def convert_query(node: exp.Expression) -> ast.Query:
+    """
+    Convert a full query: CTEs, the query term and its ORDER BY and LIMIT
+    """
+    check_args(node, *node.args.keys() - {"hint", "offset", "cluster", "distribute"})
+    ctes = []
+    if with_ := node.args.get("with"):
+        check_args(with_, "expressions")
+        for cte in with_.expressions:
+            check_args(cte, "this", "alias")
+            alias = cte.args["alias"]
+            check_args(alias, "this")
+            query = convert_query(cte.this)
+            query = query.set_alias(convert_name(alias.this))
+            query = query.set_as(True)
+            query.parenthesized = True
+            ctes.append(query)
+
+    order, sort = [], []
+    if order_ := node.args.get("order"):
+        check_args(order_, "expressions")
+        order = convert.all(order_.expressions)
+    if sort_ := node.args.get("sort"):
+        check_args(sort_, "expressions")
+        sort = convert.all(sort_.expressions)
+    limit = None
+    if limit_ := node.args.get("limit"):
+        check_args(limit_, "expression")
+        limit = convert(limit_.expression)
+
+    select = convert_query_term(node)
+    select.limit = limit
+    select.organization = ast.Organization(order, sort)
+    return ast.Query(ctes=ctes, select=select)
+
+
+def convert_query_term(node: exp.Expression) -> ast.Select:
+    """
+    Convert a SELECT or a chain of set operations, without CTEs, ORDER BY or LIMIT
+    """
+    if isinstance(node, tuple(SET_OPERATIONS.values())):
+        check_args(node, "this", "expression", "distinct", "with", "order", "limit")
+        left = convert_query_term(node.this)
+        right = node.expression
+        if not isinstance(right, exp.Select):
+            raise unsupported(right, "set operation")
+        left.add_set_op(
+            ast.SetOp(kind=node.meta["kind"], right=convert_query_term(right)),
+        )
+        return left
+    if not isinstance(node, exp.Select):
+        raise unsupported(node, "expected a query")
+    check_args(
+        node,
+        "expressions",
+        "distinct",
+        "from",
+        "joins",
+        "where",
+        "group",
+        "having",
+        "with",
+        "order",
+        "sort",
+        "limit",
+    )
+    quantifier = ""
+    if distinct := node.args.get("distinct"):
+        check_args(distinct)
+        quantifier = "DISTINCT"
+    where = node.args.get("where")
+    having = node.args.get("having")
+    group_by = []
+    if group := node.args.get("group"):
+        check_args(group, "expressions")
+        group_by = convert.all(group.expressions)
+    return ast.Select(
+        quantifier=quantifier,
+        projection=convert.all(node.expressions),
+        from_=convert_from(node),
+        lateral_views=[],
+        where=convert(where.this) if where else None,
+        group_by=group_by,
+        having=convert(having.this) if having else None,
+        hints=[],
+    )
+
+
+def convert_from(node: exp.Select) -> Optional[ast.From]:
+    """
+    Convert the FROM clause and joins of a SELECT into a DJ from clause
+    """
+    from_ = node.args.get("from")
+    if from_ is None:
+        if node.args.get("joins"):
+            raise unsupported(node, "joins without FROM")  # pragma: no cover
+        return None
+    check_args(from_, "this")
+    relations = [ast.Relation(convert_relation(from_.this), [])]
+    for join in node.args.get("joins") or []:
+        check_args(join, "this", "side", "kind", "on", "using")
+        right = convert_relation(join.this)
+        if join.meta.get("comma"):
+            relations.append(ast.Relation(right, []))
+            continue
+        criteria = None
+        if on_ := join.args.get("on"):
+            criteria = ast.JoinCriteria(on=convert(on_))
+        elif using := join.args.get("using"):
+            criteria = ast.JoinCriteria(using=[convert_name(name) for name in using])
+        relations[-1].extensions.append(
+            ast.Join(join.meta["join_type"], right, criteria=criteria),
+        )
+    from_clause = ast.From(relations)
+    from_clause.laterals = []  # type: ignore
+    return from_clause
+
+
+def convert_relation(node: exp.Expression) -> ast.Expression:
+    """
+    Convert a table or an aliased subquery in a FROM clause
+    """
+    alias = node.args.get("alias")
+    if alias is not None:
+        check_args(alias, "this")
+
+    if isinstance(node, exp.Table):
+        check_args(node, "this", "db", "catalog", "alias")
+        table = ast.Table(
+            convert_names(*(node.args.get(part) for part in ("catalog", "db", "this"))),
+            column_list=[],
+        )
+        if alias is not None:
+            table = table.set_alias(ast.Name(convert_name(alias.this)))
+            if alias.meta.get("as_"):
+                table = table.set_as(True)
+        return table
+
+    if isinstance(node, exp.Subquery):
+        check_args(node, "this", "alias")
+        query = convert_query(node.this)
+        query.parenthesized = True
+        if alias is not None:
+            query = query.set_alias(convert_name(alias.this))
+            if alias.meta.get("as_"):
+                query = query.set_as(True)
+        return query
+
+    raise unsupported(node, "relation")
+
+
+def convert_nested_select(node: exp.Expression) -> ast.Select:
+    """
+    Convert the subquery of an IN or EXISTS predicate, which the ANTLR backend
+    converts without its CTEs, ORDER BY and LIMIT
+    """
+    if isinstance(node, exp.Subquery):
+        check_args(node, "this")
+        node = node.this
+    if not isinstance(node, exp.Select) or any(
+        node.args.get(arg) for arg in ("with", "order", "sort", "limit")
+    ):
+        raise unsupported(node, "subquery")
+    select = convert_query_term(node)
+    select.parenthesized = True
+    return select
+
+
+@convert.register(exp.Alias)
+def _(node: exp.Alias) -> ast.Node:
+    check_args(node, "this", "alias")
+    expr = convert(node.this).set_alias(convert_name(node.args["alias"]))
+    if node.meta.get("as_") and expr.as_ is None:
+        expr = expr.set_as(True)
+    return expr
+
+
+@convert.register(exp.Paren)
+def _(node: exp.Paren) -> ast.Expression:
+    check_args(node, "this")
+    expr = convert(node.this)
+    expr.parenthesized = True
+    return expr
+
+
+@convert.register(exp.Subquery)
+def _(node: exp.Subquery) -> ast.Query:
+    check_args(node, "this")
+    query = convert_query(node.this)
+    query.parenthesized = True
+    return query
+
+
+@convert.register(exp.Column)
+def _(node: exp.Column) -> ast.Expression:
+    check_args(node, "this", "table", "db", "catalog")
+    parts = [node.args.get(part) for part in ("catalog", "db", "table")]
+    if isinstance(node.this, exp.Star):
+        star = ast.Wildcard()
+        star.name.namespace = convert_names(*parts)
+        return star
+    return ast.Column(convert_names(*parts, node.this))
+
+
+@convert.register(exp.Dot)
+def _(node: exp.Dot) -> ast.Column:
+    check_args(node, "this", "expression")
+    column = convert(node.this)
+    if not isinstance(column, ast.Column) or column.parenthesized:
+        raise unsupported(node, "field access")
+    field = convert_name(node.expression)
+    field.namespace = column.name
+    column.name = field
+    return column
+
+
+@convert.register(exp.Star)
+def _(node: exp.Star) -> ast.Wildcard:
+    check_args(node)
+    star = ast.Wildcard()
+    star.name.namespace = None
+    return star
+
+
+@convert.register(exp.Literal)
+def _(node: exp.Literal) -> ast.Value:
+    source = node.meta.get("source")
+    if source is None:
+        raise unsupported(node, "literal without source")
+    if node.is_string:
+        if not source.startswith("'"):
+            raise unsupported(node, "double quoted string")
+        return ast.String(source)
+    return ast.Number(source)
+
+
+@convert.register(exp.Neg)
+def _(node: exp.Neg) -> ast.Number:
+    check_args(node, "this")
+    number = node.this
+    if not isinstance(number, exp.Literal) or number.is_string:
+        raise unsupported(node)
+    return ast.Number(f"-{number.meta['source']}")
+
+
+@convert.register(exp.Boolean)
+def _(node: exp.Boolean) -> ast.Boolean:
+    return ast.Boolean(node.this)
+
+
+@convert.register(exp.Null)
+def _(_node: exp.Null) -> ast.Null:
+    return ast.Null()
+
+
+@convert.register(
+    exp.Add,
+    exp.Sub,
+    exp.Mul,
+    exp.Div,
+    exp.Mod,
+    exp.And,
+    exp.Or,
+    *COMPARISON_TYPES,
+)
+def _(node: exp.Binary) -> ast.Expression:
+    if "operator" not in node.meta:
+        if isinstance(node, exp.NullSafeEQ):
+            return convert_distinct_from(node, negated=True)
+        raise unsupported(node, "operator")
+    check_args(node, "this", "expression", "typed", "safe")
+    if isinstance(node, COMPARISON_TYPES):
+        # Predicates bind more loosely than comparisons in Spark, but not in sqlglot
+        for operand in (node.this, node.expression):
+            if isinstance(operand, PREDICATE_TYPES) or (
+                isinstance(operand, exp.NullSafeEQ) and "operator" not in operand.meta
+            ):
+                raise unsupported(node, "predicate inside a comparison")
+    try:
+        op = ast.BinaryOpKind(node.meta["operator"].upper())
+    except ValueError as exc:
+        raise unsupported(node, node.meta["operator"]) from exc
+    return ast.BinaryOp(op, convert(node.this), convert(node.expression))
+
+
+@convert.register(exp.NullSafeNEQ)
+def _(node: exp.NullSafeNEQ) -> ast.IsDistinctFrom:
+    return convert_distinct_from(node, negated=False)
+
+
+def convert_distinct_from(node: exp.Binary, negated: bool) -> ast.IsDistinctFrom:
+    """
+    Convert `IS [NOT] DISTINCT FROM`
+    """
+    check_args(node, "this", "expression")
+    return ast.IsDistinctFrom(negated, convert(node.this), convert(node.expression))
+
+
+@convert.register(exp.Not)
+def _(node: exp.Not) -> ast.Expression:
+    check_args(node, "this")
+    if node.meta.get("logical"):
+        return ast.UnaryOp(op=ast.UnaryOpKind.Not, expr=convert(node.this))
+    # A negated predicate, such as `x NOT IN (...)` or `x IS NOT NULL`
+    predicate = node.this
+    if not isinstance(predicate, PREDICATE_TYPES) or isinstance(
+        predicate,
+        (exp.Not, exp.NullSafeNEQ),
+    ):
+        raise unsupported(node)
+    return convert_predicate(predicate, negated=True)
+
+
+@convert.register(exp.Between, exp.In, exp.Is, exp.Like, exp.ILike, exp.RegexpLike)
+def _(node: exp.Expression) -> ast.Predicate:
+    return convert_predicate(node, negated=False)
+
+
+def convert_predicate(node: exp.Expression, negated: bool) -> ast.Predicate:
+    """
+    Convert a (possibly negated) predicate
+    """
+    expr = convert(node.this)
+    if isinstance(node, exp.Between):
+        check_args(node, "this", "low", "high")
+        return ast.Between(
+            negated,
+            expr,
+            convert(node.args["low"]),
+            convert(node.args["high"]),
+        )
+    if isinstance(node, exp.In):
+        check_args(node, "this", "expressions", "query")
+        if query := node.args.get("query"):
+            return ast.In(negated, expr, convert_nested_select(query))
+        return ast.In(negated, expr, convert.all(node.expressions))
+    if isinstance(node, (exp.Like, exp.ILike)):
+        check_args(node, "this", "expression")
+        return ast.Like(
+            negated,
+            expr,
+            "",
+            convert(node.expression),
+            None,
+            case_sensitive=isinstance(node, exp.Like),
+        )
+    if isinstance(node, exp.RegexpLike):
+        check_args(node, "this", "expression")
+        if node.meta.get("keyword") != "RLIKE":
+            raise unsupported(node, "REGEXP")
+        return ast.Rlike(negated, expr, convert(node.expression))
+    if isinstance(node, exp.Is):
+        check_args(node, "this", "expression")
+        value = node.expression
+        if isinstance(value, exp.Null):
+            return ast.IsNull(negated, expr)
+        if isinstance(value, exp.Boolean):
+            return ast.IsBoolean(negated, expr, "TRUE" if value.this else "FALSE")
+    raise unsupported(node)  # pragma: no cover
+
+
+@convert.register(exp.Exists)
+def _(node: exp.Exists) -> ast.UnaryOp:
+    check_args(node, "this")
+    return ast.UnaryOp(
+        op=ast.UnaryOpKind.Exists,
+        expr=convert_nested_select(node.this),
+    )
+
+
+@convert.register(exp.Case)
+def _(node: exp.Case) -> ast.Case:
+    check_args(node, "this", "ifs", "default")
+    conditions, results = [], []
+    for when in node.args["ifs"]:
+        check_args(when, "this", "true")
+        conditions.append(convert(when.this))
+        results.append(convert(when.args["true"]))
+    default = node.args.get("default")
+    return ast.Case(
+        convert(node.this) if node.this else None,
+        conditions=conditions,
+        else_result=convert(default) if default else None,
+        results=results,
+    )
+
+
+@convert.register(exp.Cast, exp.TryCast)
+def _(node: exp.Cast) -> ast.Cast:
+    if not node.meta.get("cast"):
+        raise unsupported(node, "implicit cast")
+    check_args(node, "this", "to", "safe")
+    data_type = node.args["to"]
+    if "source" not in data_type.meta:
+        raise unsupported(node, "type without source")  # pragma: no cover
+    return ast.Cast(
+        data_type=parse_column_type(data_type.meta["source"]),
+        expression=convert(node.this),
+    )
+
+
+@convert.register(exp.Extract)
+def _(node: exp.Extract) -> ast.Function:
+    check_args(node, "this", "expression")
+    if "field" not in node.meta:
+        raise unsupported(node)
+    return ast.Function(
+        ast.Name("EXTRACT"),
+        args=[ast.Name(node.meta["field"]), convert(node.expression)],
+    )
+
+
+@convert.register(exp.Interval)
+def _(node: exp.Interval) -> ast.Interval:
+    tokens = node.meta.get("tokens", [])
+    if len(tokens) != 3 or tokens[1].token_type not in (
+        TokenType.NUMBER,
+        TokenType.STRING,
+    ):
+        raise unsupported(node)
+    value, unit = tokens[1].text, tokens[2].text.upper().rstrip("S")
+    if unit not in INTERVAL_UNITS or " " in value:
+        raise unsupported(node, unit)
+    return ast.Interval([ast.IntervalUnit(unit, ast.Number(value))])
+
+
+@convert.register(exp.Bracket)
+def _(node: exp.Bracket) -> ast.Subscript:
+    check_args(node, "this", "expressions")
+    if len(node.expressions) != 1:
+        raise unsupported(node)
+    return ast.Subscript(expr=convert(node.this), index=convert(node.expressions[0]))
+
+
+@convert.register(exp.Anonymous)
+def _(node: exp.Anonymous) -> ast.Function:
+    return convert_function(node, over=None)
+
+
+@convert.register(exp.Window)
+def _(node: exp.Window) -> ast.Function:
+    check_args(node, "this", "partition_by", "order", "over")
+    if node.args.get("over") != "OVER" or not isinstance(node.this, exp.Anonymous):
+        raise unsupported(node)
+    order_by = []
+    if order := node.args.get("order"):
+        check_args(order, "expressions")
+        order_by = convert.all(order.expressions)
+    over = ast.Over(
+        partition_by=convert.all(node.args.get("partition_by")),
+        order_by=order_by,
+        window_frame=None,
+    )
+    over.parenthesized = True
+    return convert_function(node.this, over=over)
+
+
+def convert_function(node: exp.Anonymous, over: Optional[ast.Over]) -> ast.Function:
+    """
+    Convert a function call
+    """
+    check_args(node, "this", "expressions")
+    if not isinstance(node.this, str):
+        raise unsupported(node, "function name")
+    name, args = node.this, node.expressions
+    upper = name.upper()
+    if upper in SPECIAL_FUNCTIONS:
+        if upper not in ("FIRST", "ANY_VALUE") or len(args) != 1 or over:
+            raise unsupported(node, name)
+        return ast.Function(ast.Name(upper), args=[convert(args[0])])
+    if upper in DATETIME_UNIT_FUNCTIONS and len(args) == 3:
+        raise unsupported(node, name)
+    quantifier = ""
+    if len(args) == 1 and isinstance(args[0], exp.Distinct):
+        check_args(args[0], "expressions")
+        quantifier, args = "DISTINCT", args[0].expressions
+    return ast.Function(
+        ast.Name(name),
+        convert.all(args),
+        quantifier=quantifier,
+        over=over,
+    )
+
+
+@convert.register(exp.Ordered)
+def _(node: exp.Ordered) -> ast.SortItem:
+    check_args(node, "this", "desc", "nulls_first")
+    return ast.SortItem(convert(node.this), node.meta["ordering"], node.meta["nulls"])
+
+
+@convert.register(exp.Select, exp.Union, exp.Intersect, exp.Except)
+def _(node: exp.Expression) -> ast.Query:
+    return convert_query(node)
+
+
+def tokenize(dialect: DJSpark, sql: str) -> List[Token]:
+    """
+    Tokenize the statement, rejecting anything the conversion can't reproduce from
+    the parsed tree
+    """
+    tokens = dialect.tokenize(sql)
+    for previous, token in zip([None, *tokens], tokens):
+        if (
+            token.token_type == TokenType.ALL
+            and previous is not None
+            and previous.token_type == TokenType.SELECT
+        ):
+            raise UnsupportedStatement("SELECT ALL is not supported")
+        if (
+            token.token_type == TokenType.STRING
+            and sql[token.start] != "'"
+            and (previous is None or previous.token_type != TokenType.ALIAS)
+        ):
+            raise UnsupportedStatement("Double quoted strings are not supported")
+    return tokens
+
+
+class SQLGlotBackend(ParserBackend):  # pylint: disable=too-few-public-methods
+    """
+    Parses statements with sqlglot, falling back to ANTLR for what it rejects
+    """
+
+    name = "sqlglot"
+
+    def __init__(self):
+        self.dialect = DJSpark()
+
+    def parse_query(self, sql: str) -> ast.Query:
+        try:
+            tokens = tokenize(self.dialect, sql)
+            statements = [
+                statement
+                for statement in self.dialect.parser().parse(tokens, sql)
+                if statement is not None
+            ]
+        except SqlglotError as exc:
+            raise UnsupportedStatement(str(exc)) from exc
+        if len(statements) != 1:
+            raise UnsupportedStatement("Expected a single statement")
+        statement = statements[0]
+        if not isinstance(statement, (exp.Select, *SET_OPERATIONS.values())):
+            raise unsupported(statement, "expected a query")
+        try:
+            return convert_query(statement)
+        except DJException as exc:
+            if isinstance(exc, UnsupportedStatement):
+                raise
+            raise UnsupportedStatement(str(exc)) from exc
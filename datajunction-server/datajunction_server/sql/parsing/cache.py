@@ -0,0 +1,116 @@
+"""
+A process-wide cache of parsed query ASTs
+"""
+import hashlib
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, NamedTuple, Optional
+
+from cachetools import LRUCache
+
+if TYPE_CHECKING:
+    from datajunction_server.sql.parsing import ast
+
+
+class ParseCacheInfo(NamedTuple):
+    """
+    Statistics on the parse cache
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ParseCache:
+    """
+    A size-bounded LRU cache of parsed query ASTs, keyed by a hash of the query text and
+    the parsing backend, since backends may not produce identical ASTs for a query.
+
+    The cache holds on to a pristine copy of each parsed AST and hands out independent
+    copies of it, so callers are free to mutate (compile, bake, swap) what they get back.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, backend: str = "") -> str:
+        """
+        The cache key for a query parsed with a backend
+        """
+        return hashlib.sha256(f"{backend}\0{query}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str, backend: str = "") -> Optional["ast.Query"]:
+        """
+        Returns a copy of the parsed AST cached for the query, if there is one
+        """
+        key = self.key(query, backend)
+        with self._lock:
+            pristine = self._cache.get(key)
+            if pristine is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return pristine.copy() if pristine is not None else None
+
+    def set(self, query: str, tree: "ast.Query", backend: str = "") -> None:
+        """
+        Caches a copy of the parsed AST for the query
+        """
+        pristine = tree.copy()
+        with self._lock:
+            self._cache[self.key(query, backend)] = pristine
+
+    def get_or_parse(
+        self,
+        query: str,
+        parser: Callable[[str], "ast.Query"],
+        backend: str = "",
+    ) -> "ast.Query":
+        """
+        Returns a copy of the parsed AST for the query, parsing it with `parser`
+        and caching the result if it isn't already cached.
+        """
+        tree = self.get(query, backend)
+        if tree is None:
+            tree = parser(query)
+            self.set(query, tree, backend)
+        return tree
+
+    def info(self) -> ParseCacheInfo:
+        """
+        Returns hit/miss counters and the current size of the cache
+        """
+        with self._lock:
+            return ParseCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=int(self._cache.maxsize),
+                currsize=len(self._cache),
+            )
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets its counters
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+@lru_cache(maxsize=None)
+def get_parse_cache() -> ParseCache:
+    """
+    Get the process-wide parse cache
+    """
+    from datajunction_server.utils import (  # pylint: disable=import-outside-toplevel
+        get_settings,
+    )
+
+    return ParseCache(maxsize=get_settings().parse_cache_size)
@@ -0,0 +1,220 @@
+"""
+Parsing of column type strings into DJ column types
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, cast
+
+from datajunction_server.sql.parsing.types import (
+    DECIMAL_REGEX,
+    FIXED_PARSER,
+    PRIMITIVE_TYPES,
+    VARCHAR_PARSER,
+    ColumnType,
+    DayTimeIntervalType,
+    DecimalType,
+    FixedType,
+    ListType,
+    MapType,
+    NestedField,
+    StructType,
+    VarcharType,
+    YearMonthIntervalType,
+)
+
+
+def primitive_type(type_string: str) -> Optional[ColumnType]:
+    """
+    Resolves a primitive type string, like `int` or `decimal(10,2)`, to its
+    column type. Returns None if the type is not recognized.
+
+    Example:
+        >>> primitive_type("DECIMAL(10,2)")
+        DecimalType(precision=10, scale=2)
+        >>> primitive_type("foo") is None
+        True
+    """
+    decimal_match = DECIMAL_REGEX.match(type_string)
+    if decimal_match:
+        precision = int(decimal_match.group("precision"))
+        scale = int(decimal_match.group("scale"))
+        return DecimalType(precision, scale)
+
+    fixed_match = FIXED_PARSER.match(type_string)
+    if fixed_match:
+        length = int(fixed_match.group("length"))
+        return FixedType(length)
+
+    varchar_match = VARCHAR_PARSER.match(type_string)
+    if varchar_match:
+        return VarcharType(varchar_match.group("length"))
+
+    return PRIMITIVE_TYPES.get(type_string.lower().strip("()"))
+
+
+class UnsupportedTypeString(ValueError):
+    """
+    Raised when a type string is outside of what `TypeStringParser` handles
+    """
+
+
+class TypeStringParser:  # pylint: disable=too-few-public-methods
+    """
+    A recursive-descent parser for column type strings, covering the subset of
+    the `dataType` grammar rule that DJ itself produces when serializing column
+    types (primitives, arrays, maps, structs and intervals). Anything else raises
+    `UnsupportedTypeString` so that the caller can defer to the full SQL parser.
+
+    Example:
+        >>> TypeStringParser("map<string, array<int>>").parse()
+        map<string, array<int>>
+    """
+
+    TOKEN_REGEX = re.compile(
+        r"\s*(?:(?P<ident>[A-Za-z_][A-Za-z0-9_]*)|(?P<quoted>`(?:[^`]|``)*`)"
+        r"|(?P<int>\d+)|(?P<punct><>|[<>(),:]))",
+    )
+    INTERVAL_UNITS: Dict[str, Tuple[str, ...]] = {
+        "YEAR": ("MONTH",),
+        "MONTH": ("MONTH",),
+        "DAY": ("HOUR", "MINUTE", "SECOND"),
+        "HOUR": ("HOUR", "MINUTE", "SECOND"),
+        "MINUTE": ("HOUR", "MINUTE", "SECOND"),
+        "SECOND": ("HOUR", "MINUTE", "SECOND"),
+    }
+
+    def __init__(self, type_string: str):
+        self.tokens = self._tokenize(type_string)
+        self.pos = 0
+
+    def _tokenize(self, type_string: str) -> List[Tuple[str, str]]:
+        tokens = []
+        pos, end = 0, len(type_string.rstrip())
+        while pos < end:
+            match = self.TOKEN_REGEX.match(type_string, pos)
+            if not match or match.end() == pos:
+                raise UnsupportedTypeString(type_string)
+            kind = cast(str, match.lastgroup)
+            tokens.append((kind, match.group(kind)))
+            pos = match.end()
+        return tokens
+
+    def _peek(self, offset: int = 0) -> Tuple[Optional[str], str]:
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset]
+        return None, ""
+
+    def _next(self, kind: Optional[str] = None, value: Optional[str] = None) -> str:
+        token_kind, token = self._peek()
+        if (
+            token_kind is None
+            or (kind and token_kind != kind)
+            or (value and token.upper() != value)
+        ):
+            raise UnsupportedTypeString(token)
+        self.pos += 1
+        return token
+
+    def _accept(self, value: str) -> bool:
+        kind, token = self._peek()
+        if kind in ("ident", "punct") and token.upper() == value:
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self) -> ColumnType:
+        """
+        Parses the full type string, which must consist of exactly one type.
+        """
+        column_type = self._data_type()
+        if self.pos != len(self.tokens):
+            raise UnsupportedTypeString(self._peek()[1])
+        return column_type
+
+    def _data_type(self) -> ColumnType:
+        keyword = self._next("ident")
+        upper = keyword.upper()
+        if upper == "ARRAY" and self._accept("<"):
+            element_type = self._data_type()
+            self._next("punct", ">")
+            return ListType(element_type)
+        if upper == "MAP" and self._accept("<"):
+            key_type = self._data_type()
+            self._next("punct", ",")
+            value_type = self._data_type()
+            self._next("punct", ">")
+            return MapType(key_type, value_type)
+        if upper == "STRUCT" and self._accept("<>"):
+            return StructType()
+        if upper == "STRUCT" and self._accept("<"):
+            fields = []
+            while not self._accept(">"):
+                if fields:
+                    self._next("punct", ",")
+                fields.append(self._struct_field())
+            return StructType(*fields)
+        if upper == "INTERVAL" and self._peek()[1].upper() in self.INTERVAL_UNITS:
+            return self._interval()
+
+        type_string = keyword
+        if self._accept("("):
+            params = [self._next("int")]
+            while self._accept(","):
+                params.append(self._next("int"))
+            self._next("punct", ")")
+            type_string += f"({','.join(params)})"
+        column_type = primitive_type(type_string)
+        if column_type is None:
+            raise UnsupportedTypeString(type_string)
+        return column_type
+
+    def _struct_field(self) -> NestedField:
+        from datajunction_server.sql.parsing.ast import (  # pylint: disable=import-outside-toplevel
+            Name,
+        )
+
+        kind, token = self._peek()
+        if kind == "quoted":
+            self.pos += 1
+            name = Name(token[1:-1], quote_style="`")
+        else:
+            name = Name(self._next("ident"))
+        self._accept(":")
+        field_type = self._data_type()
+        is_optional = True
+        if self._peek()[1].upper() == "NOT" and self._peek(1)[1].upper() == "NULL":
+            self.pos += 2
+            is_optional = False
+        return NestedField(name, field_type, is_optional)
+
+    def _interval(self) -> ColumnType:
+        from_ = self._next("ident").upper()
+        to_ = None
+        if self._accept("TO"):
+            to_ = self._next("ident").upper()
+            if to_ not in self.INTERVAL_UNITS[from_]:
+                raise UnsupportedTypeString(to_)
+        if from_ in ("YEAR", "MONTH"):
+            return YearMonthIntervalType(from_, to_)  # type: ignore
+        return DayTimeIntervalType(from_, to_)  # type: ignore
+
+
+@lru_cache(maxsize=4096)
+def parse_column_type(type_string: str) -> ColumnType:
+    """
+    Parses a type string into a column type. Since column types are immutable and
+    interned, each distinct type string is only ever parsed once. Type strings that
+    the lightweight `TypeStringParser` can't handle fall back to the SQL parser.
+
+    Example:
+        >>> parse_column_type("array<int>") is ListType(parse_column_type("int"))
+        True
+    """
+    try:
+        return TypeStringParser(type_string).parse()
+    except UnsupportedTypeString:
+        from datajunction_server.sql.parsing.backends.antlr4 import (  # pylint: disable=import-outside-toplevel
+            parse_rule,
+        )
+
+        return cast(ColumnType, parse_rule(type_string, "dataType"))
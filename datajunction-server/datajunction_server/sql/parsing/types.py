@@ -13,7 +13,7 @@ field_type=IntegerType(), is_optional=True, doc='an optional field'))
 """
 
 import re
-from typing import TYPE_CHECKING, Any, ClassVar, Dict, Generator, Optional, Tuple, cast
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, Generator, Optional, Tuple
 
 from pydantic import BaseModel, Extra
 from pydantic.class_validators import AnyCallable
@@ -45,6 +45,9 @@ class Singleton:  # pylint: disable=too-few-public-methods
 class ColumnType(BaseModel):
     """
     Base type for all Column Types
+
+    Types are singletons or are interned by their arguments. The interned types define
+    ``__getnewargs__``, so that unpickling them returns the interned instance.
     """
 
     _initialized = False
@@ -92,23 +95,29 @@ class ColumnType(BaseModel):
         """
         Parses the column type
         """
-        from datajunction_server.sql.parsing.backends.antlr4 import (  # pylint: disable=import-outside-toplevel
-            parse_rule,
+        from datajunction_server.sql.parsing.type_parser import (  # pylint: disable=import-outside-toplevel
+            parse_column_type,
         )
 
-        return cast(ColumnType, parse_rule(str(v), "dataType"))
+        if isinstance(v, ColumnType):
+            return v
+        return parse_column_type(str(v))
 
     def __eq__(self, other: "ColumnType"):  # type: ignore
         """
         Equality is dependent on the string representation of the column type.
         """
-        return str(other) == str(self)
+        if self is other:
+            return True
+        if isinstance(other, ColumnType):
+            return self._type_string == other._type_string
+        return str(other) == self._type_string
 
     def __hash__(self):
         """
         Equality is dependent on the string representation of the column type.
         """
-        return hash(str(self))
+        return hash(self._type_string)
 
     def is_compatible(self, other: "ColumnType") -> bool:
         """
@@ -185,6 +194,9 @@ class FixedType(PrimitiveType):
             super().__init__(f"fixed({length})", f"FixedType(length={length})")
             self._length = length
 
+    def __getnewargs__(self):
+        return (self._length,)
+
     @property
     def length(self) -> int:  # pragma: no cover
         """
@@ -230,6 +242,9 @@ class DecimalType(NumberType):
             self._precision = min(precision, DecimalType.max_precision)
             self._scale = min(scale, DecimalType.max_scale)
 
+    def __getnewargs__(self):
+        return (self._precision, self._scale)
+
     @property
     def precision(self) -> int:  # pragma: no cover
         """
@@ -305,6 +320,9 @@ class NestedField(ColumnType):
             self._type = field_type
             self._doc = doc
 
+    def __getnewargs__(self):
+        return (self._name, self._type, self._is_optional, self._doc)
+
     @property
     def is_optional(self) -> bool:
         """
@@ -369,6 +387,9 @@ field_type=IntegerType(), is_optional=True, doc='an optional field'))
             )
             self._fields = fields
 
+    def __getnewargs__(self):
+        return self._fields
+
     @property
     def fields(self) -> Tuple[NestedField, ...]:
         """
@@ -417,6 +438,9 @@ class ListType(ColumnType):
                 is_optional=False,  # type: ignore
             )
 
+    def __getnewargs__(self):
+        return (self._element_field.type,)
+
     @property
     def element(self) -> NestedField:
         """
@@ -459,6 +483,9 @@ class MapType(ColumnType):
                 is_optional=False,  # type: ignore
             )
 
+    def __getnewargs__(self):
+        return (self._key_field.type, self._value_field.type)
+
     @property
     def key(self) -> NestedField:
         """
@@ -774,6 +801,9 @@ class DayTimeIntervalType(IntervalTypeBase):
             self._from = from_
             self._to = to_
 
+    def __getnewargs__(self):
+        return (self._from, self._to)
+
     @property
     def from_(self) -> str:  # pylint: disable=missing-function-docstring
         return self._from  # pragma: no cover
@@ -821,6 +851,9 @@ class YearMonthIntervalType(IntervalTypeBase):
             self._from = from_
             self._to = to_
 
+    def __getnewargs__(self):
+        return (self._from, self._to)
+
     @property
     def from_(self) -> str:  # pylint: disable=missing-function-docstring
         return self._from  # pragma: no cover
@@ -859,18 +892,37 @@ class VarcharType(StringBase):
         >>> column_foo = VarcharType()
         >>> isinstance(column_foo, VarcharType)
         True
+        >>> VarcharType(10)
+        VarcharType(length=10)
+        >>> VarcharType(10) is VarcharType("10")
+        True
     """
 
+    _instances: Dict[Optional[int], "VarcharType"] = {}
+
+    def __new__(cls, length: Optional[int] = None):
+        key = int(length) if length else None
+        cls._instances[key] = cls._instances.get(key) or object.__new__(cls)
+        return cls._instances[key]
+
     def __init__(self, length: Optional[int] = None):
-        super().__init__("varchar", "VarcharType()")
-        self._length = length
+        if not self._initialized:
+            length = int(length) if length else None
+            super().__init__(
+                f"varchar({length})" if length else "varchar",
+                f"VarcharType(length={length})" if length else "VarcharType()",
+            )
+            self._length = length
 
-    def __str__(self):
-        return (
-            f"{self._type_string}({self._length})"
-            if self._length
-            else self._type_string
-        )
+    def __getnewargs__(self):
+        return (self._length,)
+
+    @property
+    def length(self) -> Optional[int]:  # pragma: no cover
+        """
+        The length of the varchar type, if any
+        """
+        return self._length
 
 
 class UUIDType(PrimitiveType, Singleton):
@@ -30,7 +30,7 @@ from datajunction_server.config import Settings
 from datajunction_server.database.user import User
 from datajunction_server.enum import StrEnum
 from datajunction_server.errors import DJException
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 
 
 def setup_logging(loglevel: str) -> None:
@@ -161,14 +161,31 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         await session.close()
 
 
-def get_query_service_client() -> Optional[QueryServiceClient]:
+def get_query_service_client() -> Optional[AsyncQueryServiceClient]:
     """
     Return query service client
     """
     settings = get_settings()
     if not settings.query_service:  # pragma: no cover
         return None
-    return QueryServiceClient(settings.query_service)
+    return _get_query_service_client(settings.query_service)
+
+
+@lru_cache(maxsize=None)
+def _get_query_service_client(uri: str) -> AsyncQueryServiceClient:
+    """
+    The process-wide query service client for a URI, so that requests share its pool of
+    connections
+    """
+    settings = get_settings()
+    return AsyncQueryServiceClient(
+        uri,
+        retries=settings.query_service_retries,
+        max_connections=settings.query_service_max_connections,
+        max_keepalive_connections=settings.query_service_max_keepalive_connections,
+        timeout=settings.query_service_timeout,
+        connect_timeout=settings.query_service_connect_timeout,
+    )
 
 
 def get_issue_url(
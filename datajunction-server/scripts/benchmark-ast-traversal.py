@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# pylint: skip-file
+"""
+Benchmarks traversing and copying DJ ASTs: finding all of the columns in large
+generated queries with `find_all(ast.Column)` and copying them with `copy`,
+along with a full `flatten` of each query for comparison. Run from the
+datajunction-server directory:
+
+    PYTHONPATH=. python scripts/benchmark-ast-traversal.py --repeat 5
+"""
+import argparse
+import time
+
+import datajunction_server.api.main  # noqa: F401  # resolves import order
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse_rule
+
+
+def wide_query(width):
+    """
+    Generate a query with `width` projected expressions over a join
+    """
+    projection = ",\n".join(
+        f"CASE WHEN a.c{i} > b.c{i} THEN COALESCE(a.c{i}, 0) + {i} "
+        f"ELSE SUM(b.c{i} * a.c{i}) END AS m{i}"
+        for i in range(width)
+    )
+    return (
+        f"SELECT {projection}\n"
+        "FROM default.table_a a\n"
+        "JOIN default.table_b b ON a.id = b.id AND a.ds = b.ds\n"
+        "WHERE a.ds BETWEEN '2024-01-01' AND '2024-01-31'\n"
+        "GROUP BY a.id"
+    )
+
+
+def nested_query(depth):
+    """
+    Generate a query with subqueries nested `depth` levels deep
+    """
+    query = "SELECT a.x, a.y, a.z FROM default.table_a a"
+    for i in range(depth):
+        query = (
+            f"SELECT t{i}.x, t{i}.y + 1 AS y, t{i}.z FROM ({query}) t{i} "
+            f"WHERE t{i}.x IN (SELECT b.x FROM default.table_b b)"
+        )
+    return query
+
+
+def best_of(repeat, func):
+    """
+    The best time out of `repeat` runs of `func`
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(repeat, widths, depths):
+    """
+    Run the benchmark and print a summary
+    """
+    queries = [(f"width {width:5d}", wide_query(width)) for width in widths] + [
+        (f"depth {depth:5d}", nested_query(depth)) for depth in depths
+    ]
+    for label, query in queries:
+        tree = parse_rule(query, "singleStatement")
+        nodes = sum(1 for _ in tree.flatten())
+        columns = sum(1 for _ in tree.find_all(ast.Column))
+        find_all_time = best_of(repeat, lambda: list(tree.find_all(ast.Column)))
+        flatten_time = best_of(repeat, lambda: list(tree.flatten()))
+        copy_time = best_of(repeat, tree.copy)
+        print(
+            f"{label} ({nodes:7d} nodes, {columns:6d} columns): "
+            f"find_all(Column) {find_all_time * 1000:9.2f} ms, "
+            f"flatten {flatten_time * 1000:9.2f} ms, "
+            f"copy {copy_time * 1000:9.2f} ms",
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark DJ AST traversal and copying over large generated queries",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--widths",
+        type=int,
+        nargs="*",
+        default=[100, 300, 1000],
+        help="Numbers of projected expressions for the wide queries",
+    )
+    parser.add_argument(
+        "--depths",
+        type=int,
+        nargs="*",
+        default=[5, 15],
+        help="Nesting depths for the nested subquery queries",
+    )
+    args = parser.parse_args()
+    run(repeat=args.repeat, widths=args.widths, depths=args.depths)
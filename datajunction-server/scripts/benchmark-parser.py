@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# pylint: skip-file
+"""
+Benchmarks the SQL parser over a corpus of real node queries taken from the
+examples used in the test suite, along with synthetic deeply nested expressions.
+
+The two phases of parsing are timed separately: building the ANTLR parse tree
+and converting that parse tree into a DJ AST. Run from the datajunction-server
+directory:
+
+    PYTHONPATH=. python scripts/benchmark-parser.py --repeat 5
+
+Pass `--backend sqlglot` to also time the sqlglot parsing backend over the
+example corpus, counting the queries it rejects (which fall back to ANTLR).
+"""
+import argparse
+import statistics
+import time
+
+import datajunction_server.api.main  # noqa: F401  # resolves import order
+from datajunction_server.sql.parsing.backends.antlr4 import string_to_ast, visit
+from datajunction_server.sql.parsing.backends.base import get_parser_backend
+from datajunction_server.sql.parsing.backends.exceptions import UnsupportedStatement
+from tests.examples import EXAMPLES
+
+
+def example_queries():
+    """
+    Collect the node queries from the examples
+    """
+    seen = set()
+    for examples in EXAMPLES.values():
+        for _, payload in examples:
+            query = payload.get("query") if isinstance(payload, dict) else None
+            if query and query not in seen:
+                seen.add(query)
+                yield query
+
+
+def nested_queries(depths):
+    """
+    Generate queries with nested CASE/COALESCE chains of increasing depth
+    """
+    for depth in depths:
+        expr = "x"
+        for i in range(depth):
+            expr = f"COALESCE(CASE WHEN a{i} > {i} THEN ({expr}) ELSE b{i} END, 0)"
+        yield f"SELECT {expr} AS metric FROM default.repair_orders"
+
+
+def time_phases(query, repeat):
+    """
+    Time building the parse tree and converting it to a DJ AST (best of `repeat`)
+    """
+    parse_times, convert_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tree = string_to_ast(query, "singleStatement")
+        parsed = time.perf_counter()
+        visit(tree)
+        converted = time.perf_counter()
+        parse_times.append(parsed - start)
+        convert_times.append(converted - parsed)
+    return min(parse_times), min(convert_times)
+
+
+def time_backend(backend, query, repeat):
+    """
+    Time parsing with a parsing backend (best of `repeat`), or None if rejected
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            backend.parse_query(query)
+        except UnsupportedStatement:
+            return None
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(repeat, depths, backend_name):
+    """
+    Run the benchmark and print a summary
+    """
+    corpus = list(example_queries())
+    parse_total, convert_total = 0.0, 0.0
+    per_query = []
+    for query in corpus:
+        parse_time, convert_time = time_phases(query, repeat)
+        parse_total += parse_time
+        convert_total += convert_time
+        per_query.append(parse_time + convert_time)
+    print(f"Example corpus: {len(corpus)} queries")
+    print(f"  parse tree:     {parse_total * 1000:10.2f} ms")
+    print(f"  AST conversion: {convert_total * 1000:10.2f} ms")
+    print(f"  median/query:   {statistics.median(per_query) * 1000:10.2f} ms")
+    print(f"  max/query:      {max(per_query) * 1000:10.2f} ms")
+
+    if backend_name != "antlr4":
+        backend = get_parser_backend(backend_name)
+        timings = [time_backend(backend, query, repeat) for query in corpus]
+        accepted = [timing for timing in timings if timing is not None]
+        print(f"Backend {backend_name}: {len(accepted)}/{len(corpus)} queries accepted")
+        if accepted:
+            print(f"  total:          {sum(accepted) * 1000:10.2f} ms")
+            print(f"  median/query:   {statistics.median(accepted) * 1000:10.2f} ms")
+
+    print("Nested CASE/COALESCE chains:")
+    for depth, query in zip(depths, nested_queries(depths)):
+        parse_time, convert_time = time_phases(query, repeat)
+        print(
+            f"  depth {depth:4d}: parse tree {parse_time * 1000:10.2f} ms, "
+            f"AST conversion {convert_time * 1000:10.2f} ms",
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the DJ SQL parser over the example node queries",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--depths",
+        type=int,
+        nargs="*",
+        default=[5, 10, 20, 40],
+        help="Nesting depths for the synthetic CASE/COALESCE queries",
+    )
+    parser.add_argument(
+        "--backend",
+        default="antlr4",
+        help="Also time this SQL parsing backend over the example corpus",
+    )
+    args = parser.parse_args()
+    run(repeat=args.repeat, depths=args.depths, backend_name=args.backend)
@@ -10,7 +10,7 @@ import pytest_asyncio
 from httpx import AsyncClient
 
 from datajunction_server.models.query import ColumnMetadata
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.parsing.backends.antlr4 import parse
 from tests.sql.utils import assert_query_strings_equal, compare_query_strings
 
@@ -907,7 +907,7 @@ SELECT  default_DOT_repair_orders_fact.default_DOT_repair_orders_fact_DOT_repair
 @pytest.mark.asyncio
 async def test_druid_cube_agg_materialization(
     client_with_repairs_cube: AsyncClient,  # pylint: disable=redefined-outer-name
-    module__query_service_client: Iterator[QueryServiceClient],
+    module__query_service_client: Iterator[AsyncQueryServiceClient],
 ):
     """
     Verifies scheduling a materialized aggregate cube
@@ -1792,7 +1792,7 @@ async def test_updating_cube(
 @pytest.mark.asyncio
 async def test_updating_cube_with_existing_materialization(
     client_with_repairs_cube: AsyncClient,  # pylint: disable=redefined-outer-name
-    module__query_service_client: QueryServiceClient,
+    module__query_service_client: AsyncQueryServiceClient,
 ):
     """
     Verify updating a cube with existing materialization
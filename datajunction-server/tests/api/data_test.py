@@ -15,6 +15,7 @@ from sqlalchemy.orm import joinedload
 from datajunction_server.database import QueryRequest
 from datajunction_server.database.node import Node, NodeRevision
 from datajunction_server.database.queryrequest import QueryBuildType
+from datajunction_server.internal.sql_cache import get_sql_build_cache
 from datajunction_server.models.node import AvailabilityStateBase
 
 
@@ -516,6 +517,55 @@ class TestDataForNode:
             "submitted_query": mock.ANY,
         }
 
+    @pytest.mark.asyncio
+    async def test_get_metrics_data_uses_sql_build_cache(
+        self,
+        module__client_with_roads,
+    ) -> None:
+        """
+        Test that repeated requests for metrics data submit the cached SQL instead of
+        building it again
+        """
+        url = (
+            "/data?metrics=default.num_repair_orders"
+            "&dimensions=default.dispatcher.company_name&limit=10"
+        )
+        response = await module__client_with_roads.get(url)
+        assert response.status_code == 200
+        with mock.patch(
+            "datajunction_server.api.data.build_sql_for_multiple_metrics",
+        ) as build_sql:
+            cached_response = await module__client_with_roads.get(url)
+        assert build_sql.call_count == 0
+        assert cached_response.status_code == 200
+        assert cached_response.json() == response.json()
+
+    @pytest.mark.asyncio
+    async def test_get_metrics_data_uses_saved_query_requests(
+        self,
+        module__client_with_roads,
+    ) -> None:
+        """
+        Test that requests for metrics data that miss the SQL build cache submit the SQL
+        saved in the query requests instead of building it again
+        """
+        url = (
+            "/data?metrics=default.num_repair_orders"
+            "&dimensions=default.hard_hat.state&limit=10"
+        )
+        response = await module__client_with_roads.get(url)
+        assert response.status_code == 200
+        get_sql_build_cache().clear()
+        with mock.patch(
+            "datajunction_server.api.data.build_sql_for_multiple_metrics",
+        ) as build_sql:
+            saved_response = await module__client_with_roads.get(url)
+        assert build_sql.call_count == 0
+        assert saved_response.status_code == 200
+        assert saved_response.json()["submitted_query"] == (
+            response.json()["submitted_query"]
+        )
+
     @pytest.mark.asyncio
     async def test_stream_multiple_metrics_and_dimensions_data(
         self,
@@ -702,6 +752,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
                     "temporal_partitions": [],
                     "valid_through_ts": 20230125,
                     "url": "http://some.catalog.com/default.accounting.pmts",
+                    "row_count": None,
                 },
                 "pre": {},
                 "user": "dj",
@@ -726,6 +777,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "categorical_partitions": [],
             "temporal_partitions": [],
             "url": "http://some.catalog.com/default.accounting.pmts",
+            "row_count": None,
         }
 
     @pytest.mark.asyncio
@@ -839,6 +891,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
                     "temporal_partitions": [],
                     "valid_through_ts": 20230125,
                     "url": None,
+                    "row_count": None,
                 },
                 "pre": {
                     "catalog": "default",
@@ -851,6 +904,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
                     "temporal_partitions": [],
                     "valid_through_ts": 20230125,
                     "url": None,
+                    "row_count": None,
                 },
                 "user": "dj",
             },
@@ -873,6 +927,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
                     "temporal_partitions": [],
                     "valid_through_ts": 20230125,
                     "url": None,
+                    "row_count": None,
                 },
                 "pre": {
                     "catalog": "default",
@@ -885,6 +940,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
                     "temporal_partitions": [],
                     "valid_through_ts": 20230125,
                     "url": None,
+                    "row_count": None,
                 },
                 "user": "dj",
             },
@@ -907,6 +963,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
                     "temporal_partitions": [],
                     "valid_through_ts": 20230125,
                     "url": None,
+                    "row_count": None,
                 },
                 "pre": {},
                 "user": "dj",
@@ -931,6 +988,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "categorical_partitions": [],
             "temporal_partitions": [],
             "url": None,
+            "row_count": None,
         }
 
     @pytest.mark.asyncio
@@ -1070,6 +1128,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "categorical_partitions": [],
             "temporal_partitions": ["payment_id"],
             "url": None,
+            "row_count": None,
         }
 
     @pytest.fixture
@@ -1141,6 +1200,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "table": "local_hard_hats",
             "valid_through_ts": 20230101,
             "url": None,
+            "row_count": None,
         }
 
     @pytest.mark.asyncio
@@ -1187,6 +1247,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "table": "local_hard_hats",
             "valid_through_ts": 20230101,
             "url": None,
+            "row_count": None,
         }
 
     @pytest.mark.asyncio
@@ -1540,6 +1601,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "schema_": "accounting",
             "partitions": [],
             "url": None,
+            "row_count": None,
         }
 
     @pytest.mark.asyncio
@@ -1612,6 +1674,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "categorical_partitions": [],
             "temporal_partitions": [],
             "url": None,
+            "row_count": None,
         }
 
     @pytest.mark.asyncio
@@ -1655,6 +1718,7 @@ class TestAvailabilityState:  # pylint: disable=too-many-public-methods
             "categorical_partitions": [],
             "temporal_partitions": [],
             "url": None,
+            "row_count": None,
         }
 
     @pytest.mark.asyncio
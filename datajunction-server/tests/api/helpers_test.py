@@ -2,17 +2,26 @@
 Tests for API helpers.
 """
 
+import asyncio
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from datajunction_server.api import helpers
+from datajunction_server.construction.partition_coverage import (
+    Coverage,
+    PartitionCoverage,
+)
 from datajunction_server.database.node import Node, NodeRevision
 from datajunction_server.database.user import OAuthProvider, User
 from datajunction_server.errors import DJDoesNotExistException, DJException
 from datajunction_server.internal.nodes import propagate_valid_status
+from datajunction_server.internal.query_watchers import get_query_watchers
 from datajunction_server.models.node import NodeStatus
+from datajunction_server.models.query import QueryWithResults
+from datajunction_server.typing import QueryState
 
 
 @pytest.mark.asyncio
@@ -95,42 +104,66 @@ async def test_get_node_namespace():
 
 
 @pytest.mark.asyncio
-async def test_find_existing_cube():
+@patch("datajunction_server.api.helpers.get_partition_coverage")
+@patch("datajunction_server.api.helpers.choose_cube_materialization")
+async def test_find_materialized_cube(
+    mock_choose_cube_materialization,
+    mock_get_partition_coverage,
+):
     """
-    Test finding an existing cube
+    Test finding the materialized cube to answer for metrics and dimensions, among the
+    cubes that have all of the requested temporal range
     """
-    mock_cube = MagicMock(current="foo-cube")
-    mock_execute = AsyncMock(
+    mock_cube = MagicMock()
+    partial_cube = MagicMock()
+    mock_get_partition_coverage.side_effect = lambda cube, filters: PartitionCoverage(
+        Coverage.FULL if cube is mock_cube else Coverage.PARTIAL,
+    )
+    mock_execute = MagicMock(
         unique=MagicMock(
             return_value=MagicMock(
                 scalars=MagicMock(
-                    return_value=MagicMock(all=MagicMock(return_value=[mock_cube])),
+                    return_value=MagicMock(
+                        all=MagicMock(return_value=[mock_cube, partial_cube]),
+                    ),
                 ),
             ),
         ),
     )
     mock_session = AsyncMock(execute=AsyncMock(return_value=mock_execute))
-    node = await helpers.find_existing_cube(
+    metric_column = MagicMock()
+    metric_column.name = "default_DOT_num_repair_orders"
+    metric_column.node_revision.return_value.name = "default.num_repair_orders"
+    dimension_column = MagicMock()
+    dimension_column.name = "country"
+    dimension_column.node_revision.return_value.name = "default.hard_hat"
+
+    cube_materialization = await helpers.find_materialized_cube(
         session=mock_session,
-        metric_columns=[],
-        dimension_columns=[],
-        materialized=False,
+        metric_columns=[metric_column],
+        dimension_columns=[dimension_column],
+        filters=["default.hard_hat.state = 'CA'"],
+    )
+    assert cube_materialization == mock_choose_cube_materialization.return_value
+    mock_choose_cube_materialization.assert_called_once_with(
+        [mock_cube],
+        ["default.num_repair_orders"],
+        {"default_DOT_hard_hat_DOT_country", "default_DOT_hard_hat_DOT_state"},
     )
-    assert node == "foo-cube"
 
 
 @pytest.mark.asyncio
 @patch("datajunction_server.api.helpers.ColumnMetadata", MagicMock)
 @patch("datajunction_server.api.helpers.validate_cube")
 @patch("datajunction_server.api.helpers.Node.get_by_name")
-@patch("datajunction_server.api.helpers.find_existing_cube")
+@patch("datajunction_server.api.helpers.find_materialized_cube")
 @patch("datajunction_server.api.helpers.get_catalog_by_name")
 @patch("datajunction_server.api.helpers.build_materialized_cube_node")
 @patch("datajunction_server.api.helpers.TranslatedSQL", MagicMock)
 async def test_build_sql_for_multiple_metrics(
     mock_build_materialized_cube_node,
     mock_get_catalog_by_name,
-    mock_find_existing_cube,
+    mock_find_materialized_cube,
     mock_get_by_name,
     mock_validate_cube,
 ):
@@ -141,8 +174,8 @@ async def test_build_sql_for_multiple_metrics(
     mock_get_catalog_by_name.return_value = MagicMock(
         engines=[MagicMock(), MagicMock()],
     )
-    mock_find_existing_cube.return_value = MagicMock(
-        availability=MagicMock(catalog="cata-foo"),
+    mock_find_materialized_cube.return_value = MagicMock(
+        cube=MagicMock(availability=MagicMock(catalog="cata-foo")),
     )
     mock_get_by_name.return_value = MagicMock(
         current=MagicMock(catalog=MagicMock(engines=["eng1", "eng2"])),
@@ -166,3 +199,121 @@ async def test_build_sql_for_multiple_metrics(
         dimensions=[],
     )
     assert sql is not None
+
+
+@pytest.mark.asyncio
+async def test_query_event_stream_shares_query_watchers():
+    """
+    Test that clients streaming the same query share a single watcher of it
+    """
+    query = QueryWithResults(
+        id="4ee8d1d2-2d5f-4fbf-9c1a-3a8a5b3e3fd4",
+        submitted_query="SELECT 1",
+        state=QueryState.ACCEPTED,
+        results=[],
+        errors=[],
+    )
+    states = iter([QueryState.RUNNING, QueryState.FINISHED])
+
+    async def get_query(  # pylint: disable=unused-argument
+        query_id,
+        request_headers,
+        changed_from,
+        wait,
+    ):
+        assert (query_id, changed_from, wait) == (query.id, query_state[0], 30.0)
+        query_state[0] = next(states)
+        await asyncio.sleep(0.01)
+        return query.copy(update={"state": query_state[0]})
+
+    query_state = [query.state]
+    query_service_client = MagicMock()
+    query_service_client.get_query = AsyncMock(side_effect=get_query)
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(return_value=False)
+
+    async def stream():
+        return [
+            json.loads(json.loads(event["data"]))["state"]
+            async for event in helpers.query_event_stream(
+                query=query,
+                request_headers={},
+                query_service_client=query_service_client,
+                columns=[],
+                request=request,
+            )
+        ]
+
+    events = await asyncio.gather(stream(), stream())
+    assert events == [["ACCEPTED", "RUNNING", "FINISHED"]] * 2
+    assert query_service_client.get_query.call_count == 2
+    assert len(get_query_watchers()) == 0
+
+
+@pytest.mark.asyncio
+async def test_query_watchers_are_shared_by_credentials():
+    """
+    Test that clients only share a query watcher when they pass on the same credentials
+    to the query service
+    """
+    query = QueryWithResults(
+        id="a6b1f0b4-5c1e-4d2b-8a86-0f4d2f1c7e55",
+        submitted_query="SELECT 1",
+        state=QueryState.RUNNING,
+        results=[],
+        errors=[],
+    )
+
+    async def get_query(**kwargs):  # pylint: disable=unused-argument
+        await asyncio.sleep(60)
+
+    query_service_client = MagicMock()
+    query_service_client.get_query = AsyncMock(side_effect=get_query)
+    watchers = get_query_watchers()
+    async with watchers.watch(
+        query_service_client,
+        query,
+        request_headers={"Cookie": "a"},
+    ) as first, watchers.watch(
+        query_service_client,
+        query,
+        request_headers={"Cookie": "b"},
+    ) as second, watchers.watch(
+        query_service_client,
+        query,
+        request_headers={"cookie": "a", "user-agent": "curl"},
+    ) as third, watchers.watch(
+        query_service_client,
+        query,
+        request_headers={"Cookie": "a", "Authorization": "Bearer c"},
+    ) as fourth:
+        assert first is third
+        assert first is not fourth
+        assert first is not second
+        assert second.request_headers == {"Cookie": "b"}
+        assert len(watchers) == 3
+    assert len(watchers) == 0
+
+
+@pytest.mark.asyncio
+async def test_query_watcher_falls_back_to_polling():
+    """
+    Test that a query watcher backs off polling the query service when it doesn't
+    hold requests until the query changes
+    """
+    query = QueryWithResults(
+        id="0bd1de4e-3b0e-4a7b-a7bb-8cb8fd7a0c9b",
+        submitted_query="SELECT 1",
+        state=QueryState.RUNNING,
+        results=[],
+        errors=[],
+    )
+    responses = [query, query, query.copy(update={"state": QueryState.FAILED})]
+    query_service_client = MagicMock()
+    query_service_client.get_query = AsyncMock(side_effect=responses)
+
+    with patch("asyncio.sleep", AsyncMock()) as sleep:
+        async with get_query_watchers().watch(query_service_client, query) as watcher:
+            updates = [update.state async for update in watcher.updates()]
+    assert updates == [QueryState.FAILED]
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
@@ -9,7 +9,7 @@ import pytest_asyncio
 from httpx import AsyncClient
 
 from datajunction_server.models.partition import PartitionBackfill
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.parsing.backends.antlr4 import parse
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -280,7 +280,7 @@ async def test_crud_materialization(module__client_with_basic: AsyncClient):
 @pytest.mark.asyncio
 async def test_druid_measures_cube_full(
     client_with_repairs_cube: AsyncClient,  # pylint: disable=redefined-outer-name
-    module__query_service_client: QueryServiceClient,
+    module__query_service_client: AsyncQueryServiceClient,
     load_expected_file,  # pylint: disable=redefined-outer-name
     set_temporal_column,  # pylint: disable=redefined-outer-name
 ):
@@ -400,7 +400,7 @@ async def test_druid_measures_cube_full(
 @pytest.mark.asyncio
 async def test_druid_measures_cube_incremental(
     client_with_repairs_cube: AsyncClient,  # pylint: disable=redefined-outer-name
-    module__query_service_client: QueryServiceClient,
+    module__query_service_client: AsyncQueryServiceClient,
     load_expected_file,  # pylint: disable=redefined-outer-name
     set_temporal_column,  # pylint: disable=redefined-outer-name
     set_categorical_partition,  # pylint: disable=redefined-outer-name,
@@ -587,7 +587,7 @@ WHERE repair_orders.order_date = DJ_LOGICAL_TIMESTAMP()""",
 @pytest.mark.asyncio
 async def test_druid_metrics_cube_incremental(
     client_with_repairs_cube: AsyncClient,  # pylint: disable=redefined-outer-name
-    module__query_service_client: QueryServiceClient,
+    module__query_service_client: AsyncQueryServiceClient,
     load_expected_file,  # pylint: disable=redefined-outer-name
     set_temporal_column,  # pylint: disable=redefined-outer-name,
     set_categorical_partition,  # pylint: disable=redefined-outer-name,
@@ -710,7 +710,7 @@ async def test_druid_metrics_cube_incremental(
 @pytest.mark.asyncio
 async def test_spark_sql_full(
     module__client_with_roads: AsyncClient,  # pylint: disable=redefined-outer-name
-    module__query_service_client: QueryServiceClient,
+    module__query_service_client: AsyncQueryServiceClient,
     load_expected_file,  # pylint: disable=redefined-outer-name
 ):
     """
@@ -841,11 +841,38 @@ async def test_spark_sql_full(
     )
     assert response.json() == {"output_tables": [], "urls": ["http://fake.url/job"]}
 
+    # An incremental backfill is split into chunks, each recorded with its status
+    response = await module__client_with_roads.post(
+        "/nodes/default.hard_hat/materializations/spark_sql__full__birth_date__country/backfill",
+        params={"incremental": True},
+        json=[
+            {
+                "column_name": "birth_date",
+                "range": ["20230101", "20230201"],
+            },
+        ],
+    )
+    assert response.status_code == 201
+    response = await module__client_with_roads.get("/nodes/default.hard_hat/")
+    materialization = next(
+        materialization
+        for materialization in response.json()["materializations"]
+        if materialization["name"] == "spark_sql__full__birth_date__country"
+    )
+    assert [
+        (backfill["spec"][0]["range"], backfill["status"])
+        for backfill in materialization["backfills"]
+    ] == [
+        (["20230101", "20230201"], "submitted"),
+        (["20230103", "20230201"], "submitted"),
+        (["20230101", "20230102"], "submitted"),
+    ]
+
 
 @pytest.mark.asyncio
 async def test_spark_sql_incremental(
     module__client_with_roads: AsyncClient,  # pylint: disable=redefined-outer-name
-    module__query_service_client: QueryServiceClient,
+    module__query_service_client: AsyncQueryServiceClient,
     set_temporal_column,  # pylint: disable=redefined-outer-name
     set_categorical_partition,  # pylint: disable=redefined-outer-name
     load_expected_file,  # pylint: disable=redefined-outer-name
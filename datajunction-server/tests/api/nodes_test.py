@@ -22,7 +22,7 @@ from datajunction_server.errors import DJDoesNotExistException
 from datajunction_server.internal.materializations import decompose_expression
 from datajunction_server.models.node import NodeStatus
 from datajunction_server.models.node_type import NodeType
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.sql.dag import get_upstream_nodes
 from datajunction_server.sql.parsing import ast, types
 from datajunction_server.sql.parsing.types import IntegerType, StringType, TimestampType
@@ -1721,7 +1721,7 @@ class TestNodeCRUD:  # pylint: disable=too-many-public-methods
     async def test_refresh_source_node_with_problems(
         self,
         client_with_query_service_example_loader,
-        query_service_client: QueryServiceClient,
+        query_service_client: AsyncQueryServiceClient,
         mocker: MockerFixture,
     ):
         """
@@ -1733,7 +1733,7 @@ class TestNodeCRUD:  # pylint: disable=too-many-public-methods
         )
         data = response.json()
 
-        the_good_columns = query_service_client.get_columns_for_table(
+        the_good_columns = await query_service_client.get_columns_for_table(
             "default",
             "roads",
             "repair_orders",
@@ -1762,7 +1762,7 @@ class TestNodeCRUD:  # pylint: disable=too-many-public-methods
         mocker.patch.object(
             query_service_client,
             "get_columns_for_table",
-            lambda *args: [],
+            mock.AsyncMock(return_value=[]),
         )
         response = await custom_client.post(
             "/nodes/default.repair_orders/refresh/",
@@ -1778,8 +1778,10 @@ class TestNodeCRUD:  # pylint: disable=too-many-public-methods
         mocker.patch.object(
             query_service_client,
             "get_columns_for_table",
-            lambda *args: (_ for _ in ()).throw(
-                DJDoesNotExistException(message="Table not found: foo.bar.baz"),
+            mock.AsyncMock(
+                side_effect=DJDoesNotExistException(
+                    message="Table not found: foo.bar.baz",
+                ),
             ),
         )
         response = await custom_client.post(
@@ -1796,7 +1798,7 @@ class TestNodeCRUD:  # pylint: disable=too-many-public-methods
         mocker.patch.object(
             query_service_client,
             "get_columns_for_table",
-            lambda *args: the_good_columns,
+            mock.AsyncMock(return_value=the_good_columns),
         )
         response = await custom_client.post(
             "/nodes/default.repair_orders/refresh/",
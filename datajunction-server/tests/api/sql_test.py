@@ -1,4 +1,5 @@
 """Tests for the /sql/ endpoint"""
+import asyncio
 import datetime
 from typing import List
 
@@ -7,14 +8,17 @@ from typing import List
 import duckdb
 import pytest
 from httpx import AsyncClient, Response
+from pytest_mock import MockerFixture
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from datajunction_server.database.column import Column
 from datajunction_server.database.database import Database
+from datajunction_server.database.history import GraphEpoch
 from datajunction_server.database.node import Node, NodeRevision
 from datajunction_server.database.queryrequest import QueryBuildType, QueryRequest
 from datajunction_server.internal.access.authorization import validate_access
+from datajunction_server.internal.sql_cache import SQLBuildCache, get_sql_build_cache
 from datajunction_server.models import access
 from datajunction_server.models.node_type import NodeType
 from datajunction_server.sql.parsing.backends.antlr4 import parse
@@ -445,6 +449,189 @@ async def test_saving_measures_sql_requests(
     )
 
 
+@pytest.mark.asyncio
+async def test_saved_measures_sql_requests_found_by_fingerprint(
+    session: AsyncSession,
+    client_with_roads: AsyncClient,
+    measures_sql_request,  # pylint: disable=redefined-outer-name
+    mocker: MockerFixture,
+) -> None:
+    """
+    Test that saved query requests are found by their fingerprint without versioning the
+    request, until something in the DJ graph changes
+    """
+    response = (await measures_sql_request()).json()
+    query_requests = await get_query_requests(session, QueryBuildType.MEASURES)
+    assert query_requests[0].fingerprint
+    assert query_requests[0].graph_epoch == await GraphEpoch.get_current(session)
+
+    to_versioned_query_request = mocker.spy(
+        QueryRequest,
+        "to_versioned_query_request",
+    )
+    assert (await measures_sql_request()).json()["sql"] == response["sql"]
+    assert to_versioned_query_request.call_count == 0
+
+    # Any change to the graph moves the epoch on, so the request is versioned once more
+    # (here, to look it up and then to save the rebuilt SQL for the new version of the
+    # dimension node), after which it is found by its fingerprint again
+    response = await client_with_roads.patch(
+        "/nodes/default.hard_hat",
+        json={"description": "Hard hats"},
+    )
+    assert response.status_code == 200
+    await measures_sql_request()
+    assert to_versioned_query_request.call_count == 2
+    await measures_sql_request()
+    assert to_versioned_query_request.call_count == 2
+    query_requests = await get_query_requests(session, QueryBuildType.MEASURES)
+    assert len(query_requests) == 2
+    assert query_requests[0].fingerprint == query_requests[1].fingerprint
+
+
+@pytest.mark.asyncio
+async def test_metrics_sql_served_from_build_cache(
+    client_with_roads: AsyncClient,
+    mocker: MockerFixture,
+) -> None:
+    """
+    Test that repeated metrics SQL requests are served from the in-process SQL build
+    cache, with access checked again, until something in the DJ graph changes
+    """
+    params = {
+        "metrics": ["default.num_repair_orders"],
+        "dimensions": ["default.hard_hat.state"],
+    }
+    response = (await client_with_roads.get("/sql/", params=params)).json()
+
+    get_query_request = mocker.spy(QueryRequest, "get_query_request")
+    cached = (await client_with_roads.get("/sql/", params=params)).json()
+    assert cached == response
+    assert get_query_request.call_count == 0
+    assert get_sql_build_cache().info().hits == 1
+
+    def validate_access_override():
+        def _validate_access(access_control: access.AccessControl):
+            access_control.deny_all()
+
+        return _validate_access
+
+    client_with_roads.app.dependency_overrides[
+        validate_access
+    ] = validate_access_override
+    denied = (await client_with_roads.get("/sql/", params=params)).json()
+    assert "The following requests were denied:\n" in denied["message"]
+    assert "read:node/default.hard_hat" in denied["message"]
+    del client_with_roads.app.dependency_overrides[validate_access]
+
+    response = await client_with_roads.patch(
+        "/nodes/default.hard_hat",
+        json={"description": "Hard hats"},
+    )
+    assert response.status_code == 200
+    rebuilt = (await client_with_roads.get("/sql/", params=params)).json()
+    assert rebuilt["sql"] == cached["sql"]
+    assert get_query_request.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_saved_metrics_sql_checks_access(
+    client_with_roads: AsyncClient,
+) -> None:
+    """
+    Test that metrics SQL served from the saved query requests is only served once
+    access to it has been checked, and that those checks are made again for requests
+    then served from the SQL build cache
+    """
+    params = {
+        "metrics": ["default.num_repair_orders"],
+        "dimensions": ["default.hard_hat.state"],
+    }
+    response = (await client_with_roads.get("/sql/", params=params)).json()
+    get_sql_build_cache().clear()
+
+    def validate_access_override():
+        def _validate_access(access_control: access.AccessControl):
+            access_control.deny_all()
+
+        return _validate_access
+
+    client_with_roads.app.dependency_overrides[
+        validate_access
+    ] = validate_access_override
+    denied = (await client_with_roads.get("/sql/", params=params)).json()
+    assert "read:node/default.num_repair_orders" in denied["message"]
+    assert "read:node/default.hard_hat" in denied["message"]
+    del client_with_roads.app.dependency_overrides[validate_access]
+
+    saved = (await client_with_roads.get("/sql/", params=params)).json()
+    assert saved["sql"] == response["sql"]
+    assert get_sql_build_cache().info().currsize == 1
+
+    client_with_roads.app.dependency_overrides[
+        validate_access
+    ] = validate_access_override
+    denied = (await client_with_roads.get("/sql/", params=params)).json()
+    assert "read:node/default.hard_hat" in denied["message"]
+    assert get_sql_build_cache().info().hits == 1
+    del client_with_roads.app.dependency_overrides[validate_access]
+
+
+@pytest.mark.asyncio
+async def test_measures_sql_v2_builds_take_turns(
+    client_with_roads: AsyncClient,
+    mocker: MockerFixture,
+) -> None:
+    """
+    Test that building measures SQL takes the lock that server processes sharing the
+    database take turns with, and that requests served from the SQL build cache don't
+    """
+    lock = mocker.spy(QueryRequest, "lock")
+    params = {
+        "metrics": ["default.num_repair_orders"],
+        "dimensions": ["default.hard_hat.state"],
+    }
+    response = await client_with_roads.get("/sql/measures/v2/", params=params)
+    assert response.status_code == 200
+    assert lock.call_count == 1
+    response = await client_with_roads.get("/sql/measures/v2/", params=params)
+    assert response.status_code == 200
+    assert lock.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sql_builds_are_coalesced(session: AsyncSession) -> None:
+    """
+    Test that of several identical requests that come in at once, only one builds the
+    SQL while the others wait and are served the SQL it cached
+    """
+    sql_cache = SQLBuildCache()
+    cache_key = sql_cache.key(
+        "metrics",
+        QueryBuildType.METRICS,
+        nodes=["default.num_repair_orders"],
+        dimensions=["default.hard_hat.state"],
+        filters=[],
+        engine_name=None,
+        engine_version=None,
+    )
+    builds = []
+
+    async def request_sql():
+        async with sql_cache.building(cache_key):
+            if cached_sql := sql_cache.get(cache_key, "1", lambda _: None, None):
+                return cached_sql
+            await QueryRequest.lock(session, cache_key[1])
+            builds.append(cache_key)
+            await asyncio.sleep(0.01)
+            sql_cache.set(cache_key, "1", "SELECT 1")
+            return "SELECT 1"
+
+    assert await asyncio.gather(*(request_sql() for _ in range(5))) == ["SELECT 1"] * 5
+    assert len(builds) == 1
+    assert sql_cache.info().hits == 4
+
+
 @pytest.mark.asyncio
 async def test_saving_metrics_sql_requests(  # pylint: disable=too-many-statements
     session: AsyncSession,
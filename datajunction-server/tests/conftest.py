@@ -1,3 +1,4 @@
+# pylint: disable=too-many-lines
 """
 Fixtures for testing.
 """
@@ -17,7 +18,7 @@ from typing import (
     List,
     Optional,
 )
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
 import duckdb
 import pytest
@@ -40,11 +41,12 @@ from datajunction_server.database.engine import Engine
 from datajunction_server.database.user import User
 from datajunction_server.errors import DJQueryServiceClientException
 from datajunction_server.internal.access.authorization import validate_access
+from datajunction_server.internal.sql_cache import get_sql_build_cache
 from datajunction_server.models.access import AccessControl, ValidateAccessFn
 from datajunction_server.models.materialization import MaterializationInfo
 from datajunction_server.models.query import QueryCreate, QueryWithResults
 from datajunction_server.models.user import OAuthProvider
-from datajunction_server.service_clients import QueryServiceClient
+from datajunction_server.service_clients import AsyncQueryServiceClient
 from datajunction_server.typing import QueryState
 from datajunction_server.utils import (
     get_query_service_client,
@@ -80,6 +82,16 @@ def _init_cache() -> Generator[Any, Any, None]:
     FastAPICache.reset()
 
 
+@pytest.fixture(autouse=True)
+def _clear_sql_build_cache() -> Generator[Any, Any, None]:
+    """
+    Start each test with an empty SQL build cache, since the graph epochs of different
+    tests' databases line up
+    """
+    get_sql_build_cache().clear()
+    yield
+
+
 @pytest_asyncio.fixture
 def settings(mocker: MockerFixture) -> Iterator[Settings]:
     """
@@ -188,13 +200,13 @@ def event_loop():
 def query_service_client(
     mocker: MockerFixture,
     duckdb_conn: duckdb.DuckDBPyConnection,  # pylint: disable=c-extension-no-member
-) -> Iterator[QueryServiceClient]:
+) -> Iterator[AsyncQueryServiceClient]:
     """
     Custom settings for unit tests.
     """
-    qs_client = QueryServiceClient(uri="query_service:8001")
+    qs_client = AsyncQueryServiceClient(uri="query_service:8001")
 
-    def mock_get_columns_for_table(
+    async def mock_get_columns_for_table(
         catalog: str,
         schema: str,
         table: str,
@@ -211,7 +223,7 @@ def query_service_client(
         mock_get_columns_for_table,
     )
 
-    def mock_submit_query(
+    async def mock_submit_query(
         query_create: QueryCreate,
         request_headers: Optional[  # pylint: disable=unused-argument
             Dict[str, str]
@@ -242,11 +254,11 @@ def query_service_client(
         mock_submit_query,
     )
 
-    def mock_get_query(
+    async def mock_get_query(  # pylint: disable=unused-argument
         query_id: str,
-        request_headers: Optional[  # pylint: disable=unused-argument
-            Dict[str, str]
-        ] = None,
+        request_headers: Optional[Dict[str, str]] = None,
+        changed_from: Optional[QueryState] = None,
+        wait: float = 0.0,
     ) -> Collection[Collection[str]]:
         if query_id == "foo-bar-baz":
             raise DJQueryServiceClientException("Query foo-bar-baz not found.")
@@ -261,7 +273,7 @@ def query_service_client(
         mock_get_query,
     )
 
-    mock_materialize = MagicMock()
+    mock_materialize = AsyncMock()
     mock_materialize.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=["common.a", "common.b"],
@@ -272,7 +284,7 @@ def query_service_client(
         mock_materialize,
     )
 
-    mock_deactivate_materialization = MagicMock()
+    mock_deactivate_materialization = AsyncMock()
     mock_deactivate_materialization.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=[],
@@ -283,7 +295,7 @@ def query_service_client(
         mock_deactivate_materialization,
     )
 
-    mock_get_materialization_info = MagicMock()
+    mock_get_materialization_info = AsyncMock()
     mock_get_materialization_info.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=["common.a", "common.b"],
@@ -294,7 +306,7 @@ def query_service_client(
         mock_get_materialization_info,
     )
 
-    mock_run_backfill = MagicMock()
+    mock_run_backfill = AsyncMock()
     mock_run_backfill.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=[],
@@ -546,14 +558,14 @@ def compare_query_strings_fixture():
 async def client_with_query_service_example_loader(  # pylint: disable=too-many-statements
     session: AsyncSession,
     settings: Settings,
-    query_service_client: QueryServiceClient,
+    query_service_client: AsyncQueryServiceClient,
 ) -> Callable[[Optional[List[str]]], AsyncClient]:
     """
     Provides a callable fixture for loading examples into a test client
     fixture that additionally has a mocked query service.
     """
 
-    def get_query_service_client_override() -> QueryServiceClient:
+    def get_query_service_client_override() -> AsyncQueryServiceClient:
         return query_service_client
 
     def get_session_override() -> AsyncSession:
@@ -656,7 +668,7 @@ async def module__client_example_loader(
 async def module__client(  # pylint: disable=too-many-statements
     module__session: AsyncSession,
     module__settings: Settings,
-    module__query_service_client: QueryServiceClient,
+    module__query_service_client: AsyncQueryServiceClient,
 ) -> AsyncGenerator[AsyncClient, None]:
     """
     Create a client for testing APIs.
@@ -670,7 +682,7 @@ async def module__client(  # pylint: disable=too-many-statements
     )
     await module__session.execute(statement)
 
-    def get_query_service_client_override() -> QueryServiceClient:
+    def get_query_service_client_override() -> AsyncQueryServiceClient:
         return module__query_service_client
 
     def get_session_override() -> AsyncSession:
@@ -865,13 +877,13 @@ def module__postgres_container(request) -> PostgresContainer:
 def module__query_service_client(
     module_mocker: MockerFixture,
     duckdb_conn: duckdb.DuckDBPyConnection,  # pylint: disable=c-extension-no-member
-) -> Iterator[QueryServiceClient]:
+) -> Iterator[AsyncQueryServiceClient]:
     """
     Custom settings for unit tests.
     """
-    qs_client = QueryServiceClient(uri="query_service:8001")
+    qs_client = AsyncQueryServiceClient(uri="query_service:8001")
 
-    def mock_get_columns_for_table(
+    async def mock_get_columns_for_table(
         catalog: str,
         schema: str,
         table: str,
@@ -888,7 +900,7 @@ def module__query_service_client(
         mock_get_columns_for_table,
     )
 
-    def mock_submit_query(
+    async def mock_submit_query(
         query_create: QueryCreate,
         request_headers: Optional[  # pylint: disable=unused-argument
             Dict[str, str]
@@ -919,11 +931,11 @@ def module__query_service_client(
         mock_submit_query,
     )
 
-    def mock_get_query(
+    async def mock_get_query(  # pylint: disable=unused-argument
         query_id: str,
-        request_headers: Optional[  # pylint: disable=unused-argument
-            Dict[str, str]
-        ] = None,
+        request_headers: Optional[Dict[str, str]] = None,
+        changed_from: Optional[QueryState] = None,
+        wait: float = 0.0,
     ) -> Collection[Collection[str]]:
         if query_id == "foo-bar-baz":
             raise DJQueryServiceClientException("Query foo-bar-baz not found.")
@@ -938,7 +950,7 @@ def module__query_service_client(
         mock_get_query,
     )
 
-    mock_materialize = MagicMock()
+    mock_materialize = AsyncMock()
     mock_materialize.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=["common.a", "common.b"],
@@ -949,7 +961,7 @@ def module__query_service_client(
         mock_materialize,
     )
 
-    mock_deactivate_materialization = MagicMock()
+    mock_deactivate_materialization = AsyncMock()
     mock_deactivate_materialization.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=[],
@@ -960,7 +972,7 @@ def module__query_service_client(
         mock_deactivate_materialization,
     )
 
-    mock_get_materialization_info = MagicMock()
+    mock_get_materialization_info = AsyncMock()
     mock_get_materialization_info.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=["common.a", "common.b"],
@@ -971,7 +983,7 @@ def module__query_service_client(
         mock_get_materialization_info,
     )
 
-    mock_run_backfill = MagicMock()
+    mock_run_backfill = AsyncMock()
     mock_run_backfill.return_value = MaterializationInfo(
         urls=["http://fake.url/job"],
         output_tables=[],
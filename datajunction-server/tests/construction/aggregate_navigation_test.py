@@ -0,0 +1,248 @@
+"""
+Tests for ``datajunction_server.construction.aggregate_navigation``.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from unittest.mock import MagicMock
+
+from datajunction_server.construction.aggregate_navigation import (
+    choose_cube_materialization,
+    cube_column_name,
+    get_metric_combiners,
+    index_cube_materializations,
+    referenced_columns,
+)
+from datajunction_server.database.materialization import Materialization
+from datajunction_server.database.node import NodeRevision
+from datajunction_server.models.node_type import NodeType
+from datajunction_server.naming import amenable_name
+
+METRICS = {
+    "default.num_repair_orders": (
+        "SELECT count(repair_order_id) FROM default.repair_orders_fact"
+    ),
+    "default.avg_repair_price": "SELECT avg(price) FROM default.repair_orders_fact",
+}
+
+
+def measures_materialization(
+    name: str,
+    metrics: List[str],
+    suffix: Optional[str] = None,
+) -> Materialization:
+    """
+    A measures cube materialization for the metrics, ingested into Druid with the
+    suffix if there is one
+    """
+    return Materialization(
+        name=name,
+        schedule="@daily",
+        config={
+            **({"prefix": "", "suffix": suffix} if suffix is not None else {}),
+            "measures": {
+                metric: {
+                    "metric": metric,
+                    "measures": [
+                        {
+                            "name": "default.repair_orders_fact.price",
+                            "field_name": "default_DOT_repair_orders_fact_DOT_price",
+                            "agg": "sum",
+                            "type": "float",
+                        },
+                    ],
+                    "combiner": "avg(default_DOT_repair_orders_fact_DOT_price)",
+                }
+                for metric in metrics
+            },
+        },
+    )
+
+
+def metrics_materialization(
+    name: str,
+    metrics: List[str],
+    suffix: Optional[str] = None,
+) -> Materialization:
+    """
+    A metrics cube materialization for the metrics, ingested into Druid with the suffix
+    if there is one
+    """
+    return Materialization(
+        name=name,
+        schedule="@daily",
+        config={
+            **({"prefix": "", "suffix": suffix} if suffix is not None else {}),
+            "metrics": [
+                {"name": amenable_name(metric), "type": "bigint", "node": metric}
+                for metric in metrics
+            ],
+        },
+    )
+
+
+def make_cube(
+    name: str,
+    dimensions: List[str],
+    materializations: List[Materialization],
+    row_count: Optional[int] = None,
+    metrics: Optional[Dict[str, str]] = None,
+    table: str = "cube_table",
+) -> MagicMock:
+    """
+    A materialized cube with the dimensions and metrics
+    """
+    elements = []
+    for metric, query in (metrics or METRICS).items():
+        element = MagicMock()
+        element.name = amenable_name(metric)
+        elements.append(
+            (
+                element,
+                NodeRevision(name=metric, type=NodeType.METRIC, query=query),
+            ),
+        )
+    cube = MagicMock(materializations=materializations)
+    cube.name = name
+    cube.cube_dimensions.return_value = dimensions
+    cube.cube_elements_with_nodes.return_value = elements
+    cube.availability.row_count = row_count
+    cube.availability.table = table
+    return cube
+
+
+def test_cube_column_names() -> None:
+    """
+    Test naming the cube columns for metrics and dimension attributes
+    """
+    assert (
+        cube_column_name("default.hard_hat.country[manager]")
+        == "default_DOT_hard_hat_DOT_country"
+    )
+    assert referenced_columns(
+        [
+            "default.hard_hat.country = 'NZ' AND default.hard_hat.state IN ('CA')",
+            "x > 1",
+        ],
+    ) == {"default_DOT_hard_hat_DOT_country", "default_DOT_hard_hat_DOT_state"}
+
+
+def test_choose_cheapest_cube() -> None:
+    """
+    Test choosing the cube with the fewest rows that can answer a request by rolling up
+    """
+    fine = make_cube(
+        "default.fine_cube",
+        ["default.hard_hat.country", "default.hard_hat.postal_code"],
+        [measures_materialization("fine", list(METRICS))],
+        row_count=1000,
+    )
+    coarse = make_cube(
+        "default.coarse_cube",
+        ["default.hard_hat.country"],
+        [measures_materialization("coarse", list(METRICS))],
+        row_count=10,
+    )
+    metrics = ["default.avg_repair_price"]
+
+    choice = choose_cube_materialization(
+        [fine, coarse],
+        metrics,
+        {"default_DOT_hard_hat_DOT_country"},
+    )
+    assert choice.cube is coarse  # type: ignore
+    assert choice.materialization.name == "coarse"  # type: ignore
+
+    # Only the finer cube has the postal code
+    choice = choose_cube_materialization(
+        [fine, coarse],
+        metrics,
+        {"default_DOT_hard_hat_DOT_postal_code"},
+    )
+    assert choice.cube is fine  # type: ignore
+
+    # Without row counts, the cube with the coarser grain is chosen
+    fine.availability.row_count = coarse.availability.row_count = None
+    choice = choose_cube_materialization([fine, coarse], metrics, set())
+    assert choice.cube is coarse  # type: ignore
+
+    # No cube has the state
+    assert (
+        choose_cube_materialization(
+            [fine, coarse],
+            metrics,
+            {"default_DOT_hard_hat_DOT_state"},
+        )
+        is None
+    )
+
+
+def test_choose_materialization() -> None:
+    """
+    Test that only the materialization that produced a cube's available table is used,
+    which can only answer for metrics that it stores the measures for or that can be
+    rolled up
+    """
+    deactivated = measures_materialization("deactivated", list(METRICS), "_old")
+    deactivated.deactivated_at = datetime.now(timezone.utc)
+    cube = make_cube(
+        "default.repairs_cube",
+        ["default.hard_hat.country", "default.hard_hat.postal_code"],
+        [
+            deactivated,
+            metrics_materialization("metrics", list(METRICS), "_metrics"),
+            measures_materialization(
+                "measures",
+                ["default.avg_repair_price"],
+                "_measures",
+            ),
+        ],
+        table="default_DOT_repairs_cube_metrics",
+    )
+    assert [
+        materialization.materialization.name
+        for materialization in index_cube_materializations(cube)
+    ] == ["metrics"]
+
+    # The count can be rolled up from the metrics cube, but the average can't
+    combiners = get_metric_combiners(cube, cube.materializations[1])
+    assert list(combiners) == ["default.num_repair_orders"]
+    assert (
+        combiners["default.num_repair_orders"].combiner
+        == "sum(default_DOT_num_repair_orders)"
+    )
+
+    dimensions = {"default_DOT_hard_hat_DOT_country"}
+    choice = choose_cube_materialization(
+        [cube],
+        ["default.num_repair_orders"],
+        dimensions,
+    )
+    assert choice.materialization.name == "metrics"  # type: ignore
+    assert (
+        choose_cube_materialization([cube], ["default.avg_repair_price"], dimensions)
+        is None
+    )
+
+    # Once the measures materialization has produced the table, only it is used
+    cube.availability.table = "default_DOT_repairs_cube_measures"
+    choice = choose_cube_materialization(
+        [cube],
+        ["default.avg_repair_price"],
+        dimensions,
+    )
+    assert choice.materialization.name == "measures"  # type: ignore
+    assert (
+        choose_cube_materialization([cube], ["default.num_repair_orders"], dimensions)
+        is None
+    )
+
+    # Nor is any of them when it can't be told which one produced the table
+    cube.availability.table = "unknown_table"
+    assert index_cube_materializations(cube) == []
+
+    # A cube's only active materialization produced its table
+    cube.materializations[1].deactivated_at = datetime.now(timezone.utc)
+    assert [
+        materialization.materialization.name
+        for materialization in index_cube_materializations(cube)
+    ] == ["measures"]
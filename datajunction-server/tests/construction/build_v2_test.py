@@ -10,8 +10,10 @@ import datajunction_server.sql.parsing.types as ct
 from datajunction_server.construction.build_v2 import (
     QueryBuilder,
     combine_filter_conditions,
+    compile_node_ast,
     dimension_join_path,
 )
+from datajunction_server.construction.cache import get_compiled_node_cache
 from datajunction_server.database.attributetype import AttributeType, ColumnAttribute
 from datajunction_server.database.column import Column
 from datajunction_server.database.dimensionlink import DimensionLink, JoinType
@@ -1495,3 +1497,50 @@ def test_combine_filter_conditions():
         )
         == "abc = 'one' AND def = 'two'"
     )
+
+
+@pytest.mark.asyncio
+async def test_compile_node_ast_is_cached(
+    session: AsyncSession,
+    events: Node,
+    events_agg: Node,
+):
+    """
+    Test that compiled node query ASTs are cached by node revision, handed out bound to
+    the DJ nodes in the caller's session, and recompiled when an upstream node changes
+    """
+    cache = get_compiled_node_cache()
+    cache.clear()
+    compiled = await compile_node_ast(session, events_agg.current)
+    cached = await compile_node_ast(session, events_agg.current)
+    assert (cache.info().hits, cache.info().misses) == (1, 1)
+    assert cached is not compiled
+    assert str(cached) == str(compiled)
+    assert [expr.type for expr in cached.select.projection] == [
+        expr.type for expr in compiled.select.projection
+    ]
+    assert next(cached.find_all(ast.Table)).dj_node is events.current
+
+    # A new revision of the upstream node means the query has to be compiled again
+    events_v2 = NodeRevision(
+        node=events,
+        name=events.name,
+        type=NodeType.SOURCE,
+        version="2",
+        schema_="test",
+        table="events_v2",
+        columns=[
+            Column(name=column.name, type=column.type, order=column.order)
+            for column in events.current.columns
+        ],
+    )
+    events.current_version = "2"
+    session.add(events_v2)
+    await session.commit()
+    await session.refresh(events, ["current"])
+    recompiled = await compile_node_ast(session, events_agg.current)
+    assert (cache.info().hits, cache.info().misses) == (1, 2)
+    assert next(recompiled.find_all(ast.Table)).dj_node is events_v2
+
+    cache.invalidate(events_agg.name)
+    assert cache.info().currsize == 0
@@ -0,0 +1,165 @@
+"""
+Tests for ``datajunction_server.construction.partition_coverage``.
+"""
+from typing import List, Optional
+
+import pytest
+
+from datajunction_server.construction.partition_coverage import (
+    Coverage,
+    TemporalRange,
+    get_partition_coverage,
+    partition_value,
+    requested_range,
+)
+from datajunction_server.database.availabilitystate import AvailabilityState
+from datajunction_server.database.column import Column
+from datajunction_server.database.node import NodeRevision
+from datajunction_server.database.partition import Partition
+from datajunction_server.models.node_type import NodeType
+from datajunction_server.models.partition import Granularity, PartitionType
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse
+from datajunction_server.sql.parsing.types import IntegerType, StringType
+
+
+def make_node(
+    min_partition: Optional[List[str]] = None,
+    max_partition: Optional[List[str]] = None,
+) -> NodeRevision:
+    """
+    A node partitioned on `dateint`, materialized for the range of partitions
+    """
+    dateint = Column(
+        name="dateint",
+        type=IntegerType(),
+        partition=Partition(
+            type_=PartitionType.TEMPORAL,
+            granularity=Granularity.DAY,
+            format="yyyyMMdd",
+        ),
+    )
+    return NodeRevision(
+        name="default.repair_orders_fact",
+        type=NodeType.TRANSFORM,
+        columns=[Column(name="repair_order_id", type=StringType()), dateint],
+        availability=AvailabilityState(
+            catalog="default",
+            schema_="dj",
+            table="repair_orders_fact",
+            valid_through_ts=20230131,
+            min_temporal_partition=min_partition,
+            max_temporal_partition=max_partition,
+        ),
+    )
+
+
+def test_partition_values() -> None:
+    """
+    Test normalizing partition values and requested ranges
+    """
+    assert partition_value(["2023", "01", "25"]) == "20230125"
+    assert partition_value("2023-01-25") == partition_value(20230125) == "20230125"
+    assert partition_value([]) is None
+
+    references = {"default.repair_orders_fact.dateint"}
+    assert requested_range(
+        [
+            "default.repair_orders_fact.dateint >= 20230101 AND x = 1",
+            "20230131 > default.repair_orders_fact.dateint",
+        ],
+        references,
+    ) == TemporalRange("20230101", "20230131")
+    assert requested_range(
+        ["default.repair_orders_fact.dateint BETWEEN '2023-01-05' AND '2023-01-10'"],
+        references,
+    ) == TemporalRange("20230105", "20230110")
+    assert requested_range(
+        ["default.repair_orders_fact.dateint = 20230105"],
+        references,
+    ) == TemporalRange("20230105", "20230105")
+
+    # Conditions that not all rows must satisfy don't restrict the range
+    assert (
+        requested_range(
+            [
+                "default.repair_orders_fact.dateint >= 20230101 OR x = 1",
+                "default.repair_orders_fact.dateint NOT BETWEEN 1 AND 2",
+                "default.repair_orders_fact.repair_order_id >= 20230101",
+            ],
+            references,
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "filters, coverage",
+    [
+        (None, Coverage.FULL),
+        (["default.repair_orders_fact.repair_order_id = '1'"], Coverage.FULL),
+        (
+            ["default.repair_orders_fact.dateint BETWEEN 20230105 AND 20230110"],
+            Coverage.FULL,
+        ),
+        (["default.repair_orders_fact.dateint >= 20230105"], Coverage.PARTIAL),
+        (
+            ["default.repair_orders_fact.dateint BETWEEN 20221225 AND 20230110"],
+            Coverage.PARTIAL,
+        ),
+        (["default.repair_orders_fact.dateint > 20230201"], Coverage.NONE),
+        # Bounds in a different format can't be checked
+        (["default.repair_orders_fact.dateint = 2023"], Coverage.PARTIAL),
+    ],
+)
+def test_get_partition_coverage(
+    filters: Optional[List[str]],
+    coverage: Coverage,
+) -> None:
+    """
+    Test finding how much of a requested range a materialized table covers
+    """
+    node = make_node(["20230101"], ["20230131"])
+    assert get_partition_coverage(node, filters).coverage == coverage
+
+    # Tables without a recorded range are assumed to cover any request
+    assert get_partition_coverage(make_node(), filters).coverage == Coverage.FULL
+
+    # Source nodes are read from their tables whatever the range
+    node.type = NodeType.SOURCE
+    assert get_partition_coverage(node, filters).coverage == Coverage.FULL
+
+
+def test_union_with_live() -> None:
+    """
+    Test combining a partly covering materialized table with the live node query
+    """
+    node = make_node(["20230101"], ["20230131"])
+    partition_coverage = get_partition_coverage(
+        node,
+        ["default.repair_orders_fact.dateint >= 20230115"],
+    )
+    assert partition_coverage.coverage == Coverage.PARTIAL
+    query = partition_coverage.union_with_live(
+        node,
+        ast.Table(ast.Name("repair_orders_fact", namespace=ast.Name("dj"))),
+        parse("SELECT repair_order_id, dateint FROM default.repair_orders"),
+    )
+    assert str(parse(str(query))) == str(
+        parse(
+            """
+            SELECT repair_order_id, dateint
+            FROM (
+              SELECT repair_order_id, dateint
+              FROM dj.repair_orders_fact
+              WHERE dateint BETWEEN 20230101 AND 20230131
+              UNION ALL
+              SELECT repair_order_id, dateint
+              FROM (
+                SELECT repair_order_id, dateint FROM default.repair_orders
+              ) AS default_DOT_repair_orders_fact_live
+              WHERE NOT dateint BETWEEN 20230101 AND 20230131
+            ) AS default_DOT_repair_orders_fact_coverage
+            """,
+        ),
+    )
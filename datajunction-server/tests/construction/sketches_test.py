@@ -0,0 +1,120 @@
+"""
+Tests for ``datajunction_server.construction.sketches``.
+"""
+import pytest
+
+from datajunction_server.construction.sketches import (
+    SketchType,
+    sketch_combiner,
+    sketch_type,
+)
+from datajunction_server.internal.materializations import (
+    decompose_expression,
+    materialization_dialect,
+)
+from datajunction_server.models.engine import Dialect
+from datajunction_server.models.materialization import Measure, druid_aggregator
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse
+
+
+def metric_expression(query: str) -> ast.Expression:
+    """
+    The expression of a metric query
+    """
+    return parse(query).select.projection[0]  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "query, sketch",
+    [
+        ("SELECT COUNT(DISTINCT orders) FROM a", SketchType.HLL),
+        ("SELECT approx_count_distinct(orders) FROM a", SketchType.HLL),
+        ("SELECT approx_count_distinct_ds_theta(orders) FROM a", SketchType.THETA),
+        ("SELECT approx_percentile(orders, 0.5) FROM a", SketchType.QUANTILES),
+        ("SELECT COUNT(orders) FROM a", None),
+        ("SELECT COUNT(DISTINCT orders, customers) FROM a", None),
+        ("SELECT approx_percentile(orders, array(0.5, 0.9)) FROM a", None),
+    ],
+)
+def test_sketch_type(query: str, sketch: SketchType) -> None:
+    """
+    Test finding the sketch that an aggregation can be computed from
+    """
+    assert sketch_type(metric_expression(query)) == sketch
+
+
+def test_sketch_combiner() -> None:
+    """
+    Test combining a column of sketches into the value of an aggregation
+    """
+    column = ast.Column(name=ast.Name("orders_quantiles"))
+    assert (
+        str(
+            sketch_combiner(
+                metric_expression("SELECT approx_percentile(orders, 0.9) FROM a"),
+                column,
+            ),
+        )
+        == "APPROX_QUANTILE_DS(orders_quantiles, 0.9)"
+    )
+
+
+def test_decompose_sketches() -> None:
+    """
+    Test decomposing distinct counts and percentiles into sketch measures, which
+    hold the values to sketch
+    """
+    combiner, measures = decompose_expression(
+        metric_expression("SELECT COUNT(DISTINCT orders) FROM a"),
+    )
+    assert str(combiner) == "APPROX_COUNT_DISTINCT_DS_HLL(orders3845127662_hll)"
+    assert [str(measure) for measure in measures] == ["orders orders3845127662_hll"]
+
+    combiner, measures = decompose_expression(
+        metric_expression("SELECT approx_percentile(a.orders, 0.9) FROM a"),
+    )
+    assert str(combiner) == "APPROX_QUANTILE_DS(orders3845127662_quantiles, 0.9)"
+    assert [str(measure) for measure in measures] == [
+        "a.orders orders3845127662_quantiles",
+    ]
+
+    combiner, measures = decompose_expression(
+        metric_expression("SELECT COUNT(DISTINCT orders) / COUNT(*) FROM a"),
+    )
+    assert str(combiner).startswith(
+        "APPROX_COUNT_DISTINCT_DS_HLL(orders3845127662_hll) / ",
+    )
+    assert str(measures[0]) == "orders orders3845127662_hll"
+
+
+def test_materialization_dialect() -> None:
+    """
+    Test finding the dialect that a materialization job's output is held in
+    """
+    assert materialization_dialect("DruidMeasuresCubeMaterializationJob") == (
+        Dialect.DRUID
+    )
+    assert materialization_dialect("DruidMetricsCubeMaterializationJob") == (
+        Dialect.DRUID
+    )
+    assert materialization_dialect("SparkSqlMaterializationJob") == Dialect.SPARK
+    assert materialization_dialect(None) == Dialect.SPARK
+
+
+def test_druid_aggregator() -> None:
+    """
+    Test finding the Druid aggregators for sketch measures and simple measures
+    """
+    assert (
+        druid_aggregator(Measure(name="a", field_name="a", agg="hll", type="int"))
+        == "HLLSketchBuild"
+    )
+    assert (
+        druid_aggregator(Measure(name="a", field_name="a", agg="sum", type="int"))
+        == "longSum"
+    )
+    assert (
+        druid_aggregator(Measure(name="a", field_name="a", agg="median", type="int"))
+        is None
+    )
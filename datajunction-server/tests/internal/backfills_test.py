@@ -0,0 +1,202 @@
+"""
+Tests for ``datajunction_server.internal.backfills``.
+"""
+import asyncio
+from typing import List, Optional
+from unittest.mock import MagicMock
+
+import pytest
+
+from datajunction_server.database.availabilitystate import AvailabilityState
+from datajunction_server.database.column import Column
+from datajunction_server.database.node import NodeRevision
+from datajunction_server.database.partition import Partition
+from datajunction_server.internal.backfills import (
+    BackfillPlan,
+    plan_backfill,
+    run_backfill_plan,
+)
+from datajunction_server.models.materialization import MaterializationInfo
+from datajunction_server.models.node_type import NodeType
+from datajunction_server.models.partition import (
+    Granularity,
+    PartitionBackfill,
+    PartitionType,
+)
+from datajunction_server.sql.parsing.types import IntegerType, StringType
+
+
+def make_node(availability: Optional[AvailabilityState] = None) -> NodeRevision:
+    """
+    A node partitioned daily on `dateint` and by `country`
+    """
+    return NodeRevision(
+        name="default.repair_orders_fact",
+        type=NodeType.TRANSFORM,
+        columns=[
+            Column(
+                name="dateint",
+                type=IntegerType(),
+                partition=Partition(
+                    type_=PartitionType.TEMPORAL,
+                    granularity=Granularity.DAY,
+                    format="yyyyMMdd",
+                ),
+            ),
+            Column(
+                name="country",
+                type=StringType(),
+                partition=Partition(type_=PartitionType.CATEGORICAL),
+            ),
+        ],
+        availability=availability,
+    )
+
+
+def ranges(plan: BackfillPlan) -> List[List[str]]:
+    """
+    The temporal ranges of the chunks of a plan
+    """
+    return [chunk[0].range for chunk in plan.chunks]  # type: ignore
+
+
+def test_plan_backfill_without_availability() -> None:
+    """
+    Test that the whole range is backfilled when nothing has been materialized yet,
+    in chunks of the newest partitions first
+    """
+    plan = plan_backfill(
+        make_node(),
+        [PartitionBackfill(column_name="dateint", range=["20230101", "20230110"])],
+        chunk_size=4,
+    )
+    assert ranges(plan) == [
+        ["20230107", "20230110"],
+        ["20230103", "20230106"],
+        ["20230101", "20230102"],
+    ]
+    assert len(plan.missing) == 10
+    assert plan.skipped == 0
+
+    # Backfills that aren't of a temporal range are kept as they are
+    partitions = [PartitionBackfill(column_name="country", values=["US"])]
+    assert plan_backfill(make_node(), partitions, chunk_size=4).chunks == [partitions]
+
+
+def test_plan_backfill_missing_and_stale() -> None:
+    """
+    Test backfilling only the partitions that are missing for the requested categorical
+    values, or that were materialized before the upstream data was valid
+    """
+    availability = AvailabilityState(
+        catalog="default",
+        schema_="dj",
+        table="repair_orders_fact",
+        valid_through_ts=20230120,
+        categorical_partitions=["country"],
+        temporal_partitions=["dateint"],
+        min_temporal_partition=["20230101"],
+        max_temporal_partition=["20230120"],
+        partitions=[
+            {
+                "value": [None],
+                "min_temporal_partition": ["20230105"],
+                "max_temporal_partition": ["20230120"],
+                "valid_through_ts": 20230118,
+            },
+            {
+                "value": ["US"],
+                "min_temporal_partition": ["20230101"],
+                "max_temporal_partition": ["20230120"],
+                "valid_through_ts": 20230120,
+            },
+        ],
+    )
+    partitions = [
+        PartitionBackfill(column_name="dateint", range=[20230101, 20230125]),
+        PartitionBackfill(column_name="country", values=["US", "CA"]),
+    ]
+    plan = plan_backfill(
+        make_node(availability),
+        partitions,
+        chunk_size=10,
+        upstream_valid_through=20230125,
+    )
+
+    # CA is only available from 20230105 and through 20230118, and the partitions after
+    # 20230120 haven't been materialized at all
+    assert plan.missing == [
+        "20230101",
+        "20230102",
+        "20230103",
+        "20230104",
+        "20230121",
+        "20230122",
+        "20230123",
+        "20230124",
+        "20230125",
+    ]
+    assert plan.stale == ["20230119", "20230120"]
+    assert plan.skipped == 14
+    assert ranges(plan) == [[20230119, 20230125], [20230101, 20230104]]
+    assert plan.chunks[0][1] is partitions[1]
+
+    # Only US is requested, which is available and up to date through 20230120
+    plan = plan_backfill(
+        make_node(availability),
+        [
+            PartitionBackfill(column_name="dateint", range=["20230101", "20230120"]),
+            PartitionBackfill(column_name="country", values=["US"]),
+        ],
+        chunk_size=10,
+        upstream_valid_through=20230120,
+    )
+    assert plan.chunks == []
+    assert plan.skipped == 20
+
+
+@pytest.mark.asyncio
+async def test_run_backfill_plan() -> None:
+    """
+    Test submitting the chunks of a plan with limited concurrency
+    """
+    running = []
+    max_running = 0
+
+    async def run_backfill(  # pylint: disable=unused-argument
+        materialization,
+        chunk,
+        query_service_client,
+        **kwargs,
+    ):
+        nonlocal max_running
+        running.append(chunk)
+        max_running = max(max_running, len(running))
+        await asyncio.sleep(0.01)
+        running.remove(chunk)
+        if chunk[0].range == ["20230101", "20230102"]:
+            raise RuntimeError("Failed")
+        return MaterializationInfo(output_tables=[], urls=["http://fake.url/job"])
+
+    job = MagicMock(run_backfill=run_backfill)
+    plan = plan_backfill(
+        make_node(),
+        [PartitionBackfill(column_name="dateint", range=["20230101", "20230110"])],
+        chunk_size=2,
+    )
+    outcomes = await run_backfill_plan(
+        job,
+        MagicMock(),
+        plan,
+        MagicMock(),
+        max_concurrency=2,
+    )
+    assert max_running == 2
+    assert [chunk for chunk, _ in outcomes] == plan.chunks
+    assert [isinstance(outcome, Exception) for _, outcome in outcomes] == [
+        False,
+        False,
+        False,
+        False,
+        True,
+    ]
@@ -6,7 +6,9 @@ Tests for ``datajunction_server.models.node``.
 
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from datajunction_server.database.availabilitystate import AvailabilityState
 from datajunction_server.database.node import Node, NodeRevision
@@ -43,6 +45,41 @@ def test_node_relationship(session: AsyncSession) -> None:
     assert node_c_rev.parents == [node_a, node_b]
 
 
+@pytest.mark.asyncio
+async def test_node_revision_parents_order(session: AsyncSession) -> None:
+    """
+    Test that a node revision's parents are loaded in the order of their node ids,
+    whatever order they were assigned in
+    """
+    node_a = Node(name="A", type=NodeType.SOURCE, current_version="1")
+    node_b = Node(name="B", type=NodeType.SOURCE, current_version="1")
+    session.add_all([node_a, node_b])
+    await session.flush()
+
+    node_c = Node(name="C", type=NodeType.TRANSFORM, current_version="1")
+    session.add(
+        NodeRevision(
+            name="C",
+            type=NodeType.TRANSFORM,
+            version="1",
+            node=node_c,
+            query="SELECT * FROM B JOIN A",
+            parents=[node_b, node_a],
+        ),
+    )
+    await session.commit()
+    session.expunge_all()
+
+    revision = (
+        await session.execute(
+            select(NodeRevision)
+            .where(NodeRevision.name == "C")
+            .options(selectinload(NodeRevision.parents)),
+        )
+    ).scalar_one()
+    assert [parent.name for parent in revision.parents] == ["A", "B"]
+
+
 def test_extra_validation() -> None:
     """
     Test ``extra_validation``.
@@ -180,6 +217,7 @@ def test_merging_availability_simple_no_partitions() -> None:
         "temporal_partitions": [],
         "partitions": [],
         "url": None,
+        "row_count": None,
     }
 
 
@@ -220,6 +258,7 @@ def test_merging_availability_complex_no_partitions() -> None:
         "temporal_partitions": [],
         "partitions": [],
         "url": None,
+        "row_count": None,
     }
 
 
@@ -300,4 +339,5 @@ def test_merging_availability_complex_with_partitions() -> None:
             },
         ],
         "url": None,
+        "row_count": None,
     }
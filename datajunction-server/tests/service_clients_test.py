@@ -1,8 +1,10 @@
 """
 Tests for ``datajunction_server.service_clients``.
 """
+import json
 from unittest.mock import ANY, MagicMock
 
+import httpx
 import pytest
 from pytest_mock import MockerFixture
 from requests import Request
@@ -20,11 +22,14 @@ from datajunction_server.models.materialization import (
 )
 from datajunction_server.models.node_type import NodeType
 from datajunction_server.models.partition import PartitionBackfill
-from datajunction_server.models.query import QueryCreate
+from datajunction_server.models.query import QueryCreate, QueryWithResults
 from datajunction_server.service_clients import (
+    ArrowQueryResults,
+    AsyncQueryServiceClient,
     QueryServiceClient,
     RequestsSessionWithEndpoint,
 )
+from datajunction_server.typing import QueryState
 
 
 class TestRequestsSessionWithEndpoint:
@@ -610,3 +615,242 @@ class TestQueryServiceClient:  # pylint: disable=too-few-public-methods
             "User-Agent": "python-requests/2.29.0",
             "Accept": "*/*",
         }
+
+
+class TestAsyncQueryServiceClient:
+    """
+    Test using the async query service client.
+    """
+
+    endpoint = "http://queryservice:8001"
+
+    @pytest.mark.asyncio
+    async def test_async_query_service_client(self, mocker: MockerFixture) -> None:
+        """
+        Test making requests with the async query service client.
+        """
+        query_info = {
+            "catalog_name": "public",
+            "engine_name": "postgres",
+            "engine_version": "15.2",
+            "id": "ef209eef-c31a-4089-aae6-833259a08e22",
+            "submitted_query": "SELECT 1 as num",
+            "state": "FINISHED",
+            "results": [],
+            "errors": [],
+        }
+        responses = {
+            ("GET", "/table/hive.test.pies/columns/"): httpx.Response(
+                200,
+                json={"columns": [{"name": "id", "type": "int"}]},
+            ),
+            ("POST", "/queries/"): httpx.Response(200, json=query_info),
+            (
+                "GET",
+                "/queries/ef209eef-c31a-4089-aae6-833259a08e22/",
+            ): httpx.Response(200, json=query_info),
+            ("POST", "/materialization/run/default.hard_hat/default/"): httpx.Response(
+                200,
+                json={"urls": ["http://fake.url/job"], "output_tables": []},
+            ),
+        }
+        sent = []
+
+        async def send(
+            request: httpx.Request, **kwargs
+        ):  # pylint: disable=unused-argument
+            sent.append(request)
+            return responses[(request.method, request.url.path)]
+
+        mocker.patch.object(httpx.AsyncClient, "send", side_effect=send)
+        query_service_client = AsyncQueryServiceClient(uri=self.endpoint)
+
+        columns = await query_service_client.get_columns_for_table(
+            "hive",
+            "test",
+            "pies",
+            request_headers={"Accept-Encoding": "br", "User-Agent": "dj"},
+            engine=Engine(name="spark", version="2.4.4"),
+        )
+        assert [(col.name, str(col.type)) for col in columns] == [("id", "int")]
+        assert str(sent[-1].url) == (
+            "http://queryservice:8001/table/hive.test.pies/columns/"
+            "?engine=spark&engine_version=2.4.4"
+        )
+        assert sent[-1].headers["User-Agent"] == "dj"
+        assert "br" not in sent[-1].headers["Accept-Encoding"]
+
+        query_create = QueryCreate(
+            catalog_name="default",
+            engine_name="postgres",
+            engine_version="15.2",
+            submitted_query="SELECT 1",
+            async_=False,
+        )
+        result = await query_service_client.submit_query(query_create)
+        assert result.id == "ef209eef-c31a-4089-aae6-833259a08e22"
+        assert json.loads(sent[-1].content) == query_create.dict()
+
+        result = await query_service_client.get_query(
+            "ef209eef-c31a-4089-aae6-833259a08e22",
+        )
+        assert result.state == "FINISHED"
+
+        # Ask the query service to hold the request until the query's state changes
+        result = await query_service_client.get_query(
+            "ef209eef-c31a-4089-aae6-833259a08e22",
+            changed_from=QueryState.RUNNING,
+            wait=30,
+        )
+        assert result.state == "FINISHED"
+        assert sent[-1].url.params["state"] == "RUNNING"
+        assert sent[-1].url.params["timeout"] == "30"
+
+        info = await query_service_client.run_backfill(
+            "default.hard_hat",
+            "default",
+            [
+                PartitionBackfill(
+                    column_name="hire_date", range=["20230101", "20230102"]
+                )
+            ],
+        )
+        assert info.urls == ["http://fake.url/job"]
+        assert json.loads(sent[-1].content) == [
+            {
+                "column_name": "hire_date",
+                "values": None,
+                "range": ["20230101", "20230102"],
+            },
+        ]
+
+    @pytest.mark.asyncio
+    async def test_async_query_service_client_retries(
+        self,
+        mocker: MockerFixture,
+    ) -> None:
+        """
+        Test that the async query service client retries requests that fail to connect
+        or come back with a retryable status, up to the configured number of retries.
+        """
+        send = mocker.patch.object(
+            httpx.AsyncClient,
+            "send",
+            side_effect=[
+                httpx.ConnectError("Connection refused"),
+                httpx.Response(503, text="Unavailable"),
+                httpx.Response(200, json={"columns": [{"name": "id", "type": "int"}]}),
+            ],
+        )
+        query_service_client = AsyncQueryServiceClient(
+            uri=self.endpoint,
+            retries=2,
+            backoff_factor=0,
+        )
+        columns = await query_service_client.get_columns_for_table(
+            "hive", "test", "pies"
+        )
+        assert [col.name for col in columns] == ["id"]
+        assert send.call_count == 3
+
+        # Out of retries, the last response is returned
+        send = mocker.patch.object(
+            httpx.AsyncClient,
+            "send",
+            side_effect=[
+                httpx.Response(503, text="Unavailable"),
+                httpx.Response(502, text="Bad gateway"),
+                httpx.Response(503, text="Still unavailable"),
+            ],
+        )
+        with pytest.raises(DJQueryServiceClientException) as exc_info:
+            await query_service_client.get_columns_for_table("hive", "test", "pies")
+        assert "Still unavailable" in str(exc_info.value)
+        assert send.call_count == 3
+
+        # Errors that aren't retryable come straight back
+        send = mocker.patch.object(
+            httpx.AsyncClient,
+            "send",
+            side_effect=[httpx.Response(404, text="Table not found")],
+        )
+        with pytest.raises(DJDoesNotExistException):
+            await query_service_client.get_columns_for_table("hive", "test", "pies")
+        assert send.call_count == 1
+
+        send = mocker.patch.object(
+            httpx.AsyncClient,
+            "send",
+            side_effect=httpx.ConnectError("Connection refused"),
+        )
+        with pytest.raises(httpx.ConnectError):
+            await query_service_client.get_columns_for_table("hive", "test", "pies")
+        assert send.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_async_query_service_client_arrow(
+        self,
+        mocker: MockerFixture,
+    ) -> None:
+        """
+        Test submitting a query for results as an Arrow stream, which are passed on
+        without being decoded.
+        """
+        send = mocker.patch.object(
+            httpx.AsyncClient,
+            "send",
+            side_effect=[
+                httpx.Response(
+                    200,
+                    content=b"arrow stream",
+                    headers={
+                        "content-type": "application/vnd.apache.arrow.stream",
+                        "X-DJ-Query-Id": "ef209eef-c31a-4089-aae6-833259a08e22",
+                    },
+                ),
+            ],
+        )
+        query_service_client = AsyncQueryServiceClient(uri=self.endpoint)
+        query_create = QueryCreate(
+            catalog_name="default",
+            engine_name="postgres",
+            engine_version="15.2",
+            submitted_query="SELECT 1",
+            async_=False,
+        )
+        result = await query_service_client.submit_query_arrow(
+            query_create,
+            request_headers={"accept": "application/vnd.apache.arrow.stream"},
+        )
+        assert result == ArrowQueryResults(
+            query_id="ef209eef-c31a-4089-aae6-833259a08e22",
+            content=b"arrow stream",
+        )
+        request = send.call_args.args[0]
+        assert request.headers["accept"] == (
+            "application/vnd.apache.arrow.stream, application/json;q=0.9"
+        )
+
+        # Query services that can't return Arrow streams return JSON
+        mocker.patch.object(
+            httpx.AsyncClient,
+            "send",
+            side_effect=[
+                httpx.Response(
+                    200,
+                    json={
+                        "catalog_name": "default",
+                        "engine_name": "postgres",
+                        "engine_version": "15.2",
+                        "id": "ef209eef-c31a-4089-aae6-833259a08e22",
+                        "submitted_query": "SELECT 1",
+                        "state": "FINISHED",
+                        "results": [],
+                        "errors": [],
+                    },
+                ),
+            ],
+        )
+        result = await query_service_client.submit_query_arrow(query_create)
+        assert isinstance(result, QueryWithResults)
+        assert result.id == "ef209eef-c31a-4089-aae6-833259a08e22"
@@ -1,11 +1,16 @@
 """
 Tests for ``datajunction_server.sql.dag``.
 """
+from datetime import datetime, timezone
+
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from datajunction_server.database.column import Column
 from datajunction_server.database.database import Database
+from datajunction_server.database.dimensionreachability import DimensionReachability
+from datajunction_server.database.history import ActivityType, EntityType, History
 from datajunction_server.database.node import Node, NodeRevision
 from datajunction_server.errors import DJException
 from datajunction_server.models.node import DimensionAttributeOutput, NodeType
@@ -90,6 +95,99 @@ async def test_get_dimensions(session: AsyncSession) -> None:
     ]
 
 
+@pytest.mark.asyncio
+async def test_dimension_reachability(session: AsyncSession) -> None:
+    """
+    Test that the dimensions reachable from a node revision are recorded, and worked
+    out again once the graph changes along their paths
+    """
+    dimension_ref = Node(name="B", type=NodeType.DIMENSION, current_version="1")
+    dimension = NodeRevision(
+        node=dimension_ref,
+        name=dimension_ref.name,
+        type=dimension_ref.type,
+        display_name="B",
+        version="1",
+        columns=[Column(name="id", type=IntegerType(), order=0)],
+    )
+    parent_ref = Node(name="A", current_version="1", type=NodeType.SOURCE)
+    parent = NodeRevision(
+        node=parent_ref,
+        name=parent_ref.name,
+        type=parent_ref.type,
+        display_name="A",
+        version="1",
+        columns=[
+            Column(name="b_id", type=IntegerType(), dimension=dimension_ref, order=0),
+        ],
+    )
+    session.add_all([dimension, dimension_ref, parent, parent_ref])
+    await session.commit()
+
+    async def recorded():
+        return (
+            await session.execute(
+                select(
+                    DimensionReachability.dimension_node_id,
+                    DimensionReachability.join_path,
+                    DimensionReachability.hops,
+                )
+                .where(DimensionReachability.node_revision_id == parent.id)
+                .order_by(DimensionReachability.hops),
+            )
+        ).all()
+
+    dimensions = await get_dimensions(session, parent_ref)
+    assert [dim.name for dim in dimensions] == ["B.id"]
+    assert await recorded() == [
+        (parent_ref.id, "", 0),
+        (dimension_ref.id, "A.b_id,B", 1),
+    ]
+    assert await get_dimensions(session, parent_ref) == dimensions
+
+    # Deactivating the dimension removes what's recorded for the nodes that reach it
+    dimension_ref.deactivated_at = datetime.now(timezone.utc)
+    session.add(
+        History(
+            entity_type=EntityType.NODE,
+            node="B",
+            activity_type=ActivityType.DELETE,
+        ),
+    )
+    await session.commit()
+    assert await recorded() == []
+    assert await get_dimensions(session, parent_ref) == []
+    assert await recorded() == [(parent_ref.id, "", 0)]
+
+    # Restoring it does the same, even though it isn't recorded as reachable
+    dimension_ref.deactivated_at = None
+    session.add(
+        History(
+            entity_type=EntityType.NODE,
+            node="B",
+            activity_type=ActivityType.RESTORE,
+        ),
+    )
+    await session.commit()
+    assert await recorded() == []
+    assert await get_dimensions(session, parent_ref) == dimensions
+
+    # Sessions with uncommitted changes work out the graph for themselves, without
+    # recording anything or committing their changes
+    session.add(
+        History(
+            entity_type=EntityType.LINK,
+            node="A",
+            activity_type=ActivityType.UPDATE,
+        ),
+    )
+    await session.flush()
+    assert await get_dimensions(session, parent_ref) == dimensions
+    assert await recorded() == []
+    await session.commit()
+    assert await recorded() == []
+
+
 @pytest.mark.asyncio
 async def test_topological_sort(session: AsyncSession) -> None:
     """
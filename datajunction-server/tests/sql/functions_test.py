@@ -4,6 +4,7 @@ Tests for ``datajunction_server.sql.functions``.
 """
 
 import pytest
+from pytest_mock import MockerFixture
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import datajunction_server.sql.functions as F
@@ -710,6 +711,25 @@ async def test_cardinality(session: AsyncSession):
     assert query_with_map.select.projection[0].type == ct.IntegerType()  # type: ignore
 
 
+@pytest.mark.asyncio
+async def test_trino_sketch_functions(session: AsyncSession):
+    """
+    Test the Trino functions that build and combine HyperLogLog and t-digest sketches
+    """
+    query = parse(
+        "SELECT approx_set(1), cardinality(merge(approx_set(1))), tdigest_agg(1.0), "
+        "value_at_quantile(merge(tdigest_agg(1.0, 2)), 0.9)",
+    )
+    exc = DJException()
+    ctx = ast.CompileContext(session=session, exception=exc)
+    await query.compile(ctx)
+    assert not exc.errors
+    assert query.select.projection[0].type == ct.BinaryType()  # type: ignore
+    assert query.select.projection[1].type == ct.LongType()  # type: ignore
+    assert query.select.projection[2].type == ct.BinaryType()  # type: ignore
+    assert query.select.projection[3].type == ct.DoubleType()  # type: ignore
+
+
 @pytest.mark.asyncio
 async def test_cbrt_func(session: AsyncSession):
     """
@@ -3599,3 +3619,34 @@ async def test_var_samp(session: AsyncSession):
     await query.compile(ctx)
     assert not exc.errors
     assert query.select.projection[0].type == ct.DoubleType()  # type: ignore
+
+
+def test_dispatch_caches_resolved_functions(mocker: MockerFixture) -> None:
+    """
+    Test that the signatures of the functions registered on a class are only read when
+    the class is first dispatched on, and that the function resolved for a combination
+    of argument types that doesn't exactly match a signature is memoized
+    """
+
+    class Halve(F.Function):  # pylint: disable=too-few-public-methods, abstract-method
+        """
+        A test function
+        """
+
+    @Halve.register
+    def infer_type(
+        arg: ct.NumberType,
+    ) -> ct.ColumnType:  # pylint: disable=unused-variable
+        return arg.type
+
+    assert Halve in F.Dispatch.pending
+    assert not F.Dispatch.registry[Halve]["infer_type"]
+
+    compare_registers = mocker.spy(F, "compare_registers")
+    column = ast.Column(ast.Name("x"), _type=IntegerType())
+    assert Halve.infer_type(column) == IntegerType()
+    assert Halve not in F.Dispatch.pending
+    assert compare_registers.call_count == 1
+
+    assert Halve.infer_type(column) == IntegerType()
+    assert compare_registers.call_count == 1
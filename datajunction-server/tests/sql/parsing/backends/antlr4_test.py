@@ -4,8 +4,9 @@ Tests for custom antlr4 parser
 # mypy: ignore-errors
 
 import pytest
+from antlr4 import ParserRuleContext
 
-from datajunction_server.sql.parsing.backends.antlr4 import parse
+from datajunction_server.sql.parsing.backends.antlr4 import parse, string_to_ast, visit
 
 
 @pytest.mark.parametrize(
@@ -119,3 +120,28 @@ def test_antlr4_lambda_function():
     assert "FOO('a', 'b', c -> d) AS e" in str(query)
     query = parse("SELECT FOO('a', 'b', (c, c2, c3) -> d) AS e;")
     assert "FOO('a', 'b', (c, c2, c3) -> d) AS e" in str(query)
+
+
+def test_antlr4_backend_conversion_is_linear(mocker):
+    """
+    Test that converting the parse tree to a DJ AST doesn't re-read the text of
+    every subtree, which makes conversion quadratic for nested expressions
+    """
+    expr = "x"
+    for i in range(20):
+        expr = f"COALESCE(CASE WHEN a{i} > {i} THEN ({expr}) ELSE b{i} END, 0)"
+    query = f"SELECT {expr} AS metric FROM default.repair_orders"
+    tree = string_to_ast(query, "singleStatement")
+
+    text_read = []
+    get_text = ParserRuleContext.getText
+
+    def counting_get_text(self):
+        text = get_text(self)
+        text_read.append(len(text))
+        return text
+
+    mocker.patch.object(ParserRuleContext, "getText", counting_get_text)
+    query_ast = visit(tree)
+    assert sum(text_read) <= len(query)
+    assert "THEN (x)" in str(query_ast)
@@ -0,0 +1,99 @@
+"""
+Tests for the sqlglot parsing backend
+"""
+# mypy: ignore-errors
+
+from pathlib import Path
+
+import pytest
+
+from datajunction_server.errors import DJPluginNotFoundException
+from datajunction_server.sql.parsing.backends.antlr4 import parse, parse_rule
+from datajunction_server.sql.parsing.backends.base import get_parser_backend
+from datajunction_server.sql.parsing.backends.exceptions import UnsupportedStatement
+from datajunction_server.sql.parsing.cache import get_parse_cache
+from tests.examples import EXAMPLES
+
+pytest.importorskip("sqlglot")
+
+TPCDS_QUERIES = Path(__file__).parent.parent / "queries" / "tpcds"
+
+
+def corpus():
+    """
+    The example node queries and the TPC-DS queries
+    """
+    queries = [
+        payload["query"]
+        for examples in EXAMPLES.values()
+        for _, payload in examples
+        if isinstance(payload, dict) and payload.get("query")
+    ]
+    queries.extend(path.read_text() for path in sorted(TPCDS_QUERIES.glob("*/*.sql")))
+    return list(dict.fromkeys(queries))
+
+
+def test_sqlglot_backend_matches_antlr4():
+    """
+    Test that every query the sqlglot backend accepts is parsed into exactly
+    the same DJ AST as the ANTLR backend would produce
+    """
+    backend = get_parser_backend("sqlglot")
+    accepted = 0
+    for query in corpus():
+        try:
+            fast = backend.parse_query(query)
+        except UnsupportedStatement:
+            continue
+        expected = parse_rule(query, "singleStatement")
+        assert str(fast) == str(expected), query
+        assert not expected.diff(fast), query
+        accepted += 1
+    assert accepted > len(corpus()) // 2
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [
+        "SELECT a, b FROM t LATERAL VIEW EXPLODE(c) AS b",
+        "SELECT a FROM t GROUP BY ROLLUP(a)",
+        "SELECT a || b FROM t",
+        'SELECT "a" FROM t',
+        "SELECT 1; SELECT 2",
+    ],
+)
+def test_sqlglot_backend_rejects_unsupported(query_string):
+    """
+    Test that the sqlglot backend rejects statements it can't convert faithfully
+    """
+    with pytest.raises(UnsupportedStatement):
+        get_parser_backend("sqlglot").parse_query(query_string)
+
+
+def test_sqlglot_backend_falls_back_to_antlr4(settings):
+    """
+    Test that parsing with the sqlglot backend configured falls back to ANTLR
+    for statements the backend rejects
+    """
+    settings.sql_parsing_backend = "sqlglot"
+    get_parse_cache().clear()
+    query = parse("SELECT a, b FROM t LATERAL VIEW EXPLODE(c) AS b")
+    assert "LATERAL VIEW EXPLODE(c)" in str(query)
+
+    query = parse("SELECT a, CAST(b AS INT) AS b FROM t WHERE a IN (1, 2)")
+    assert str(query) == str(
+        parse_rule(
+            "SELECT a, CAST(b AS INT) AS b FROM t WHERE a IN (1, 2)",
+            "singleStatement",
+        ),
+    )
+    get_parse_cache().clear()
+
+
+def test_unknown_parser_backend():
+    """
+    Test requesting a parsing backend that doesn't exist
+    """
+    with pytest.raises(DJPluginNotFoundException) as exc_info:
+        get_parser_backend("yacc")
+    assert "No SQL parsing backend found for `yacc`!" in str(exc_info.value)
@@ -1,8 +1,14 @@
 """
 Tests for types
 """
+import pickle
+
+import pytest
+
 import datajunction_server.sql.parsing.types as ct
 from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.exceptions import DJParseException
+from datajunction_server.sql.parsing.type_parser import parse_column_type
 
 
 def test_types_compatible():
@@ -35,3 +41,70 @@ def test_varchar_in_ast():
         expression=ast.Column(ast.Name("abc")),
     )
     assert str(cast_expr) == "CAST(abc AS VARCHAR(10))"
+
+
+def test_parse_column_type():
+    """
+    Test that the type string parser matches the full SQL parser and that
+    parsed types are interned.
+    """
+    from datajunction_server.sql.parsing.backends.antlr4 import (  # pylint: disable=import-outside-toplevel
+        parse_rule,
+    )
+
+    type_strings = [
+        "int",
+        "BIGINT",
+        "long",
+        "decimal(10, 2)",
+        "DECIMAL(38,18)",
+        "fixed(8)",
+        "varchar",
+        "varchar(10)",
+        "array<array<int>>",
+        "map<string, array<int>>",
+        "struct<a int,b string NOT NULL>",
+        "struct<a:int>",
+        "struct<>",
+        "struct<`a b` int, c struct<d date>>",
+        "struct<a int comment 'hi'>",
+        "INTERVAL DAY TO SECOND",
+        "INTERVAL YEAR TO MONTH",
+        "interval hour",
+        "int foo",
+        "NULL",
+    ]
+    for type_string in type_strings:
+        parsed = parse_column_type(type_string)
+        expected = parse_rule(type_string, "dataType")
+        assert parsed == expected
+        assert repr(parsed) == repr(expected)
+        assert parse_column_type(type_string) is parsed
+
+    assert parse_column_type("varchar(10)") is ct.VarcharType(10)
+    assert str(ct.VarcharType()) == "varchar"
+    assert ct.ColumnType.validate("array<int>") is ct.ListType(ct.IntegerType())
+    assert ct.ColumnType.validate(ct.IntegerType()) is ct.IntegerType()
+    assert ct.IntegerType() != ct.BigIntType()
+    assert ct.IntegerType() == "int"
+
+    with pytest.raises(DJParseException) as exc_info:
+        parse_column_type("decimal")
+    assert "DJ does not recognize the type `decimal`" in str(exc_info.value)
+
+
+def test_pickled_types_stay_interned():
+    """
+    Test that parameterized types survive a pickle round-trip and come back as
+    the interned instances.
+    """
+    types = [
+        ct.DecimalType(10, 2),
+        ct.VarcharType(10),
+        ct.VarcharType(),
+        ct.ListType(ct.IntegerType()),
+        ct.MapType(ct.StringType(), ct.IntegerType()),
+    ]
+    for type_ in types:
+        assert pickle.loads(pickle.dumps(type_)) is type_
+    assert str(pickle.loads(pickle.dumps(ct.VarcharType()))) == "varchar"
@@ -0,0 +1,90 @@
+"""
+Tests for the parsed AST cache
+"""
+# mypy: ignore-errors
+
+from datajunction_server.sql.parsing import ast
+from datajunction_server.sql.parsing.backends.antlr4 import parse, parse_rule
+from datajunction_server.sql.parsing.cache import ParseCache, get_parse_cache
+
+
+def test_parse_cache_hands_out_independent_copies():
+    """
+    Test that the parse cache returns independent copies of a pristine AST
+    """
+    cache = ParseCache(maxsize=2)
+    query = "SELECT a, b FROM foo.bar WHERE a > 1"
+
+    def parser(sql):
+        return parse_rule(sql, "singleStatement")
+
+    first = cache.get_or_parse(query, parser)
+    second = cache.get_or_parse(query, parser)
+    assert first is not second
+    assert first.compare(second)
+    assert cache.info() == (1, 1, 2, 1)
+
+    # Mutating a copy should not affect the cached AST
+    first.select.projection[0].name = ast.Name("c")
+    third = cache.get_or_parse(query, parser)
+    assert str(third) == str(second)
+    assert "c" not in [col.name.name for col in third.select.projection]
+
+    # The least recently used query should be evicted once the cache is full
+    cache.get_or_parse("SELECT 1", parser)
+    cache.get_or_parse("SELECT 2", parser)
+    assert cache.info().currsize == 2
+    cache.get_or_parse(query, parser)
+    assert cache.info().misses == 4
+
+    cache.clear()
+    assert cache.info() == (0, 0, 2, 0)
+
+
+def test_parse_uses_cache():
+    """
+    Test that `parse` goes through the process-wide parse cache
+    """
+    query = "SELECT x FROM parse_cache_test.tbl"
+    hits = get_parse_cache().info().hits
+    assert parse(query).compare(parse(query))
+    assert get_parse_cache().info().hits == hits + 1
+
+
+def test_parse_cache_copies_functions():
+    """
+    Test that function calls in a cached AST aren't shared with the copies handed out
+    """
+    cache = ParseCache(maxsize=2)
+    query = "SELECT SUM(a) AS total FROM foo.bar"
+
+    def parser(sql):
+        return parse_rule(sql, "singleStatement")
+
+    first = cache.get_or_parse(query, parser)
+    function = next(first.find_all(ast.Function))
+    function.args[0].name = ast.Name("b")
+    assert "SUM(b)" in str(first)
+
+    second = cache.get_or_parse(query, parser)
+    assert next(second.find_all(ast.Function)) is not function
+    assert "SUM(a)" in str(second)
+
+
+def test_parse_cache_is_keyed_by_backend():
+    """
+    Test that ASTs parsed with one backend aren't handed out for another
+    """
+    cache = ParseCache(maxsize=2)
+    query = "SELECT a FROM foo.bar"
+    parsed = []
+
+    def parser(sql):
+        parsed.append(sql)
+        return parse_rule(sql, "singleStatement")
+
+    cache.get_or_parse(query, parser, "antlr4")
+    cache.get_or_parse(query, parser, "sqlglot")
+    cache.get_or_parse(query, parser, "sqlglot")
+    assert parsed == [query, query]
+    assert cache.info() == (1, 2, 2, 2)
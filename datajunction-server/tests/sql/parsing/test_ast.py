@@ -2,10 +2,12 @@
 """
 testing ast Nodes and their methods
 """
+from dataclasses import dataclass, fields
 from typing import cast
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from datajunction_server.errors import DJException
@@ -100,6 +102,42 @@ async def test_ast_compile_query(
     assert node.name == "default.hard_hats"
 
 
+@pytest.mark.asyncio
+async def test_ast_compile_query_prefetches_dj_nodes(
+    session: AsyncSession,
+    client_with_roads: AsyncClient,  # pylint: disable=unused-argument
+):
+    """
+    Test that compiling a query loads the DJ nodes it references and the dimension
+    nodes reachable from them up front, so that compiling makes no further queries
+    """
+    query = parse(
+        "SELECT repair_order_id, default.dispatcher.company_name "
+        "FROM default.repair_orders",
+    )
+    exc = DJException()
+    ctx = ast.CompileContext(session=session, exception=exc)
+    await ctx.prefetch(query)
+    assert {
+        "default.repair_orders",
+        "default.repair_order",
+        "default.dispatcher",
+    } <= set(ctx.dj_nodes)
+
+    statements = []
+
+    def count_statements(orm_execute_state):
+        statements.append(orm_execute_state.statement)
+
+    event.listen(session.sync_session, "do_orm_execute", count_statements)
+    try:
+        await query.compile(ctx)
+    finally:
+        event.remove(session.sync_session, "do_orm_execute", count_statements)
+    assert not exc.errors
+    assert not statements
+
+
 @pytest.mark.asyncio
 async def test_ast_compile_query_missing_columns(
     session: AsyncSession,
@@ -1094,6 +1132,53 @@ FROM VALUES
     ] == [("a_", types.IntegerType()), ("b_", types.IntegerType())]
 
 
+@pytest.mark.asyncio
+async def test_ast_compile_correlated_subquery(session: AsyncSession, mocker):
+    """
+    Test that columns are resolved through each query's scope, which is built once
+    per query, and that a subquery expression can reference the tables of the
+    query it is correlated with
+    """
+    query = parse(
+        """SELECT
+  w.a,
+  a + b AS c,
+  (SELECT MAX(v.x) FROM VALUES (1, 0), (3, 0) AS v(x, z) WHERE v.x < w.b) AS d
+FROM VALUES (1, 2), (3, 4) AS w(a, b)""",
+    )
+    scopes = mocker.spy(ast.Scope, "__init__")
+    exc = DJException()
+    ctx = ast.CompileContext(session=session, exception=exc)
+    await query.compile(ctx)
+    assert not exc.errors
+    assert scopes.call_count == 2
+
+    outer_table = query.select.from_.relations[0].primary  # type: ignore
+    subquery = next(node for node in query.find_all(ast.Query) if node is not query)
+    correlated = next(
+        col for col in subquery.find_all(ast.Column) if col.identifier() == "w.b"
+    )
+    assert correlated.table is outer_table
+
+
+@pytest.mark.asyncio
+async def test_ast_compile_subquery_in_from_is_not_correlated(session: AsyncSession):
+    """
+    Test that a query in a FROM clause can't reference the tables of its parent query
+    """
+    query = parse(
+        """SELECT w.a, t.x
+FROM VALUES (1, 2) AS w(a, b)
+CROSS JOIN (SELECT v.x FROM VALUES (1, 0) AS v(x, z) WHERE v.x < w.b) t""",
+    )
+    exc = DJException()
+    ctx = ast.CompileContext(session=session, exception=exc)
+    await query.compile(ctx)
+    assert [error.message for error in exc.errors] == [
+        "Column `w.b` does not exist on any valid table.",
+    ]
+
+
 @pytest.mark.asyncio
 async def test_ast_hints():
     """
@@ -1235,3 +1320,169 @@ async def test_ast_hints():
     assert cast(ast.Hint, query.select.hints[0]).name.name == "REBALANCE"
     assert [str(col) for col in query.select.hints[0].parameters] == ["3", "c"]
     assert "/*+ REBALANCE(3, c) */" in str(query)
+
+
+def test_ast_find_all_skips_subtrees():
+    """
+    Test that `find_all` yields nodes in the same order as a full traversal of the
+    AST while skipping subtrees that can't contain nodes of the type searched for
+    """
+    query = parse(
+        "SELECT a.x, SUM(b.y) AS y, (SELECT MAX(z) FROM c) AS z "
+        "FROM a JOIN b ON a.id = b.id WHERE a.ds > '2024-01-01' GROUP BY a.x",
+    )
+    for node_type in (ast.Column, ast.Table, ast.Query, ast.Name, ast.Function):
+        expected = [node for node in query.flatten() if isinstance(node, node_type)]
+        found = list(query.find_all(node_type))
+        assert len(found) == len(expected)
+        assert all(node is other for node, other in zip(found, expected))
+
+    assert not ast.may_contain(ast.Name, ast.Column)
+    assert not ast.may_contain(ast.Number, ast.Node)
+    assert ast.may_contain(ast.Select, ast.Column)
+    # columns add their table to their children, so anything may be below them
+    assert ast.child_node_classes(ast.Column) is None
+    assert ast.may_contain(ast.Column, ast.Query)
+
+    column = next(query.find_all(ast.Column))
+    assert query.contains(column)
+    assert not query.contains(ast.Column(ast.Name("x")))
+
+
+def brute_force_walk(node: ast.Node):
+    """
+    Walk an AST by going through every field of every node, regardless of what the
+    annotations of the fields say they hold
+    """
+    yield node
+    for node_field in fields(node):
+        if node_field.name.startswith("_"):
+            continue
+        for child in ast.flatten(getattr(node, node_field.name)):
+            if isinstance(child, ast.Node):
+                yield from brute_force_walk(child)
+    if isinstance(node, ast.Column) and node.table and node.table.parent is node:
+        yield from brute_force_walk(node.table)
+
+
+@dataclass(eq=False)
+class Annotated(ast.Expression):
+    """
+    An expression with a field that isn't annotated to hold nodes
+    """
+
+    note: str = ""
+
+    def __str__(self) -> str:
+        return f"{self.note} /* annotated */"
+
+
+def test_ast_traversal_matches_brute_force_walk():
+    """
+    Test that `flatten` and `find_all` find the same nodes, in the same order, as a
+    walk through all the fields of the nodes, including fields that hold nodes even
+    though their annotations don't allow for it (such as the names of aliases, which
+    are parsed into names holding names)
+    """
+    queries = [
+        parse(
+            "WITH c AS (SELECT id, MAX(z) AS z FROM t GROUP BY id) "
+            "SELECT a.x, SUM(b.y) OVER (PARTITION BY a.x ORDER BY b.ds) AS y, "
+            "CASE WHEN a.x > 1 THEN 'big' ELSE NULL END AS size, "
+            "CAST(cc.z AS BIGINT) AS z, TRANSFORM(a.arr, v -> v + 1) AS arr "
+            "FROM a LEFT JOIN b ON a.id = b.id JOIN c AS cc ON cc.id = a.id "
+            "LATERAL VIEW EXPLODE(a.arr) t AS item "
+            "WHERE a.ds IN (SELECT ds FROM d) ORDER BY 1 LIMIT 10",
+        ),
+        parse("SELECT 1 AS one UNION ALL SELECT COUNT(*) FROM (SELECT x FROM e) f"),
+    ]
+    stray_column = ast.Column(ast.Name("stray"))
+    annotated = Annotated()
+    annotated.note = stray_column
+    queries[1].select.projection = queries[1].select.projection + [annotated]
+    assert stray_column.parent is annotated
+    assert "note" in ast.child_field_names(Annotated)
+    assert ast.may_contain(Annotated, ast.Column)
+
+    for query in queries:
+        expected = list(brute_force_walk(query))
+        flattened = list(query.flatten())
+        assert len(flattened) == len(expected)
+        assert all(node is other for node, other in zip(flattened, expected))
+        for node_type in (
+            ast.Column,
+            ast.Table,
+            ast.Query,
+            ast.Name,
+            ast.Function,
+            ast.Lambda,
+            ast.Case,
+            Annotated,
+        ):
+            found = list(query.find_all(node_type))
+            of_type = [node for node in expected if isinstance(node, node_type)]
+            assert len(found) == len(of_type)
+            assert all(node is other for node, other in zip(found, of_type))
+    assert any(column is stray_column for column in queries[1].find_all(ast.Column))
+
+
+def test_ast_copy():
+    """
+    Test that copying an AST copies its structure, relinking parents and references
+    between nodes inside of it, while sharing everything else with the original
+    """
+    # pylint: disable=protected-access
+    query = parse("SELECT a.x, CAST(a.y AS INT) AS y FROM a WHERE a.x > 1")
+    table = next(query.find_all(ast.Table))
+    dj_node = object()
+    table.set_dj_node(dj_node)
+    outer_table = next(parse("SELECT b.y FROM b").find_all(ast.Table))
+    column, other_column = list(query.select.find_all(ast.Column))[:2]
+    table._columns = [ast.Column(ast.Name("x"), _table=table)]
+    column.add_table(table)
+    other_column.add_table(outer_table)
+
+    copied = query.copy()
+    assert str(copied) == str(query)
+    assert not query.diff(copied)
+    original_nodes = {id(node) for node in query.flatten()}
+    for node in copied.flatten():
+        assert id(node) not in original_nodes
+        if node is not copied:
+            assert any(child is node for child in node.parent.children)
+
+    copied_table = next(copied.find_all(ast.Table))
+    copied_column, copied_other_column = list(copied.select.find_all(ast.Column))[:2]
+    assert copied_table.dj_node is dj_node
+    assert copied_table._columns[0] is not table._columns[0]
+    assert copied_table._columns[0].table is copied_table
+    assert copied_column.table is copied_table
+    assert copied_other_column.table is outer_table
+    assert copied.select.projection[1].type is query.select.projection[1].type
+
+
+def test_ast_copy_is_independent():
+    """
+    Test that changing a copy of an AST, including the containers held by its nodes,
+    leaves the original as it was
+    """
+    query = parse("SELECT a.x, COUNT(*) AS n FROM a WHERE a.x > 1 GROUP BY a.x")
+    select = query.select
+    select.notes = {"tags": ["original"]}
+    original = str(query)
+
+    copied = select.copy()
+    assert copied.parent is None
+    assert copied.parent_key is None
+    assert select.parent is query
+    copied.projection.append(ast.Column(ast.Name("y")))
+    copied.group_by.clear()
+    copied.where.left.name.name = "z"
+    copied.notes["tags"].append("copied")
+    assert str(query) == original
+    assert select.notes == {"tags": ["original"]}
+
+    wildcard = next(select.find_all(ast.Wildcard))
+    copied_wildcard = next(copied.find_all(ast.Wildcard))
+    assert copied_wildcard.name is not wildcard.name
+    assert copied_wildcard.name.parent is copied_wildcard
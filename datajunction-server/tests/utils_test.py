@@ -111,6 +111,10 @@ def test_get_query_service_client(mocker: MockerFixture, settings: Settings) ->
     mocker.patch("datajunction_server.utils.get_settings", return_value=settings)
     query_service_client = get_query_service_client()
     assert query_service_client.uri == "http://query_service:8001"  # type: ignore
+    assert query_service_client.retries == settings.query_service_retries  # type: ignore
+
+    # Requests share the same client and its pool of connections
+    assert get_query_service_client() is query_service_client
 
 
 def test_version_parse() -> None: